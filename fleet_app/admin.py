@@ -19,6 +19,9 @@ from .models_entreprise import (
     ConfigurationChargesSociales,
     ConfigurationHeureSupplementaire,
 )
+from .models_pdf import RenduPdf
+from .models_sequences import SequenceNumerotation
+from .models_recherche import DocumentRecherche
 
 # Enregistrement des modèles dans l'administration Django
 
@@ -239,6 +242,27 @@ class SalaireMensuelAdmin(UserOwnedAdminMixin, admin.ModelAdmin):
     list_filter = ('annee', 'mois')
     search_fields = ('employe__matricule', 'employe__prenom', 'employe__nom')
 
+@admin.register(RenduPdf)
+class RenduPdfAdmin(UserOwnedAdminMixin, admin.ModelAdmin):
+    list_display = ('nom_fichier', 'statut', 'moteur', 'date_creation', 'date_fin')
+    list_filter = ('statut', 'moteur')
+    search_fields = ('nom_fichier', 'empreinte')
+    readonly_fields = ('empreinte', 'date_creation', 'date_fin')
+
+@admin.register(SequenceNumerotation)
+class SequenceNumerotationAdmin(admin.ModelAdmin):
+    list_display = ('prefixe', 'periode', 'portee', 'dernier_numero', 'date_modification')
+    list_filter = ('prefixe',)
+    search_fields = ('prefixe', 'periode', 'portee')
+    readonly_fields = ('date_modification',)
+
+@admin.register(DocumentRecherche)
+class DocumentRechercheAdmin(admin.ModelAdmin):
+    list_display = ('titre', 'type_objet', 'objet_id', 'user', 'entreprise', 'date_modification')
+    list_filter = ('type_objet',)
+    search_fields = ('titre', 'objet_id')
+    readonly_fields = ('date_modification',)
+
 # ==========================
 # Galerie d'images simple
 # ==========================
@@ -12,3 +12,7 @@ class FleetAppConfig(AppConfig):
             print("SYNC: Signaux de synchronisation automatique actives")
         except ImportError as e:
             print(f"SYNC ERROR: Impossible d'importer les signaux - {e}")
+
+        # Champs de chaque modèle indexés une fois pour le filtrage par tenant
+        from fleet_app.utils.decorators import index_model_fields
+        index_model_fields()
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+UserModel = get_user_model()
+
+
+class TenantModelBackend(ModelBackend):
+    """
+    ModelBackend dont `get_user` charge aussi le profil et l'entreprise.
+
+    L'utilisateur de chaque requête est lu avec `select_related('profil__entreprise')` :
+    le contexte tenant (`TenantMiddleware`, `queryset_filter_by_tenant`,
+    `check_profile_completion`) ne coûte plus aucune requête supplémentaire.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('profil__entreprise').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
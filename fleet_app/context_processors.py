@@ -1,10 +1,15 @@
-from .models_alertes import Alerte
+from django.utils.functional import SimpleLazyObject
+
+from .utils_alertes import compteurs_alertes
+
 
 def alerts_count(request):
     """
     Contexte global pour fournir le nombre d'alertes actives à tous les templates.
+
+    Le compteur est celui du tenant, lu dans le cache (voir utils_alertes), et
+    n'est évalué que si le template l'affiche: les fragments AJAX ne paient rien.
     """
     if hasattr(request, 'user') and request.user.is_authenticated:
-        count = Alerte.objects.filter(statut='Active').count()
-        return {'alerts_count': count}
+        return {'alerts_count': SimpleLazyObject(lambda: compteurs_alertes(request.user)['total_actives'])}
     return {'alerts_count': 0}
@@ -1,6 +1,7 @@
 from django import forms
 from .models_inventaire import Produit, EntreeStock, SortieStock, Commande, LigneCommande
 from .models_facturation import Facture, LigneFacture
+from .models import Vehicule
 import re
 import os
 from django.core.exceptions import ValidationError
@@ -45,6 +46,9 @@ class EntreeStockForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if self.user:
             self.fields['produit'].queryset = Produit.objects.filter(user=self.user)
+        # Laissé vide, l'ID est pris dans la séquence ENT au moment de l'enregistrement
+        self.fields['id_entree'].required = False
+        self.fields['id_entree'].widget.attrs['placeholder'] = 'Automatique'
     
     def save(self, commit=True):
         instance = super().save(commit=False)
@@ -64,10 +68,10 @@ class EntreeStockForm(forms.ModelForm):
         }
     
     def clean_id_entree(self):
-        """Valide que l'ID de l'entrée suit le format ENTxxx"""
+        """Valide que l'ID de l'entrée suit le format ENTxxx (vide: attribué automatiquement)"""
         id_entree = self.cleaned_data.get('id_entree')
-        if not re.match(r'^ENT\d{3}$', id_entree):
-            raise ValidationError("L'ID de l'entrée doit être au format ENTxxx où xxx est un nombre à 3 chiffres.")
+        if id_entree and not re.match(r'^ENT\d{3,7}$', id_entree):
+            raise ValidationError("L'ID de l'entrée doit être au format ENTxxx où xxx est un nombre d'au moins 3 chiffres.")
         return id_entree
     
     def clean_reference_facture(self):
@@ -86,6 +90,13 @@ class SortieStockForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if self.user:
             self.fields['produit'].queryset = Produit.objects.filter(user=self.user)
+        # Laissé vide, l'ID est pris dans la séquence SRT au moment de l'enregistrement
+        self.fields['id_sortie'].required = False
+        self.fields['id_sortie'].widget.attrs['placeholder'] = 'Automatique'
+        # Véhicule destinataire : facultatif, déduit de la destination s'il est laissé vide
+        self.fields['vehicule'].required = False
+        if self.user:
+            self.fields['vehicule'].queryset = Vehicule.objects.filter(user=self.user)
     
     def save(self, commit=True):
         instance = super().save(commit=False)
@@ -97,7 +108,7 @@ class SortieStockForm(forms.ModelForm):
     
     class Meta:
         model = SortieStock
-        fields = ['id_sortie', 'date', 'produit', 'quantite', 'destination', 'motif']
+        fields = ['id_sortie', 'date', 'produit', 'quantite', 'destination', 'vehicule', 'motif']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date'}),
             'quantite': forms.NumberInput(attrs={'min': '1', 'step': '1'}),
@@ -106,10 +117,10 @@ class SortieStockForm(forms.ModelForm):
         }
     
     def clean_id_sortie(self):
-        """Valide que l'ID de la sortie suit le format SRTxxx"""
+        """Valide que l'ID de la sortie suit le format SRTxxx (vide: attribué automatiquement)"""
         id_sortie = self.cleaned_data.get('id_sortie')
-        if not re.match(r'^SRT\d{3}$', id_sortie):
-            raise ValidationError("L'ID de la sortie doit être au format SRTxxx où xxx est un nombre à 3 chiffres.")
+        if id_sortie and not re.match(r'^SRT\d{3,7}$', id_sortie):
+            raise ValidationError("L'ID de la sortie doit être au format SRTxxx où xxx est un nombre d'au moins 3 chiffres.")
         return id_sortie
     
     # Méthode supprimée car le champ reference_bon n'existe pas dans le modèle SortieStock
@@ -84,5 +84,16 @@ class FactureLocationForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
+        self._user = user
         if user is not None:
             self.fields["location"].queryset = LocationVehicule.objects.filter(user=user)
+
+    def clean_numero(self):
+        """Le numéro est unique par utilisateur (le champ user n'est pas dans le formulaire)"""
+        numero = self.cleaned_data.get("numero")
+        user_id = self.instance.user_id if self.instance.pk else getattr(self._user, "pk", None)
+        if numero and user_id is not None:
+            doublons = FactureLocation.objects.filter(user_id=user_id, numero=numero).exclude(pk=self.instance.pk)
+            if doublons.exists():
+                raise forms.ValidationError("Une facture porte déjà ce numéro.")
+        return numero
@@ -0,0 +1,76 @@
+"""
+Commande Django pour comparer date__month/date__year et for_month sur PresenceJournaliere
+Usage: python manage.py bench_filtre_mois [--lignes=1000000] [--repetitions=5]
+
+Les données de test sont créées dans une transaction annulée à la fin.
+"""
+
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from fleet_app.models_entreprise import Employe, PresenceJournaliere
+
+# Jours pointés par employé (2 ans)
+JOURS_PAR_EMPLOYE = 730
+TAILLE_LOT = 5000
+
+
+class Command(BaseCommand):
+    help = 'Mesure le plan et la durée des filtres mensuels de présences avant / après for_month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lignes', type=int, default=1_000_000, help='Nombre de présences générées')
+        parser.add_argument('--repetitions', type=int, default=5, help='Exécutions par requête')
+
+    def handle(self, *args, **options):
+        lignes = max(options['lignes'], JOURS_PAR_EMPLOYE)
+        debut = date(2024, 1, 1)
+
+        with transaction.atomic():
+            self.stdout.write(f'🔄 Génération de {lignes} présences...')
+            user = User.objects.create(username=f'bench_{uuid.uuid4().hex[:12]}')
+            nb_employes = -(-lignes // JOURS_PAR_EMPLOYE)
+            employes = Employe.objects.bulk_create([
+                Employe(matricule=f'BENCH{n:06d}', prenom='Bench', nom=str(n), fonction='Chauffeur', user=user)
+                for n in range(nb_employes)
+            ])
+            lot = []
+            for index in range(lignes):
+                employe = employes[index // JOURS_PAR_EMPLOYE]
+                lot.append(PresenceJournaliere(
+                    employe=employe, date=debut + timedelta(days=index % JOURS_PAR_EMPLOYE), user=user,
+                ))
+                if len(lot) == TAILLE_LOT:
+                    PresenceJournaliere.objects.bulk_create(lot)
+                    lot = []
+            PresenceJournaliere.objects.bulk_create(lot)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            mois, annee = 6, 2025
+            requetes = [
+                ('Tenant, date__month/date__year', PresenceJournaliere.objects.filter(
+                    user=user, date__month=mois, date__year=annee)),
+                ('Tenant, for_month', PresenceJournaliere.objects.for_month(mois, annee).filter(user=user)),
+                ('Employé, date__month/date__year', PresenceJournaliere.objects.filter(
+                    employe=employes[0], date__month=mois, date__year=annee)),
+                ('Employé, for_month', PresenceJournaliere.objects.for_month(mois, annee).filter(employe=employes[0])),
+            ]
+            for libelle, queryset in requetes:
+                durees = []
+                for _ in range(options['repetitions']):
+                    depart = time.perf_counter()
+                    total = queryset.count()
+                    durees.append(time.perf_counter() - depart)
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ {libelle}: {total} ligne(s), {min(durees) * 1000:.2f} ms (meilleure de {len(durees)})'
+                ))
+                self.stdout.write(f'   {queryset.explain()}')
+
+            transaction.set_rollback(True)
+        self.stdout.write('🧹 Données de test annulées')
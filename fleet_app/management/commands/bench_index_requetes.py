@@ -0,0 +1,36 @@
+"""
+Commande Django pour vérifier que les requêtes critiques utilisent un index
+Usage: python manage.py bench_index_requetes [--plans]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fleet_app.utils_explain import analyser_requetes
+
+
+class Command(BaseCommand):
+    help = 'Exécute EXPLAIN sur les requêtes tenant + période et échoue en cas de parcours séquentiel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Afficher le plan complet de chaque requête',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'🔄 Analyse des plans d\'exécution ({connection.vendor})...')
+        echecs = []
+        for libelle, table, plan, sequentiel in analyser_requetes():
+            if sequentiel:
+                echecs.append(libelle)
+                self.stdout.write(self.style.ERROR(f'❌ {libelle}: parcours séquentiel de {table}'))
+            else:
+                self.stdout.write(f'✅ {libelle}')
+            if options['plans'] or sequentiel:
+                self.stdout.write(f'   {plan}')
+
+        if echecs:
+            raise CommandError(f'{len(echecs)} requête(s) sans index')
+        self.stdout.write(self.style.SUCCESS('✅ Toutes les requêtes critiques utilisent un index'))
@@ -0,0 +1,64 @@
+"""
+Commande Django pour mesurer la recherche plein texte sur un gros volume de documents
+Usage: python manage.py bench_recherche [--documents=100000] [--repetitions=5]
+
+Les documents de test sont créés dans une transaction annulée à la fin.
+"""
+
+import random
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from fleet_app.models_recherche import DocumentRecherche
+from fleet_app.utils_recherche import index_plein_texte_disponible, normaliser, rechercher
+
+MARQUES = ['Toyota', 'Nissan', 'Renault', 'Peugeot', 'Mitsubishi', 'Hyundai', 'Isuzu', 'Mercedes', 'Suzuki', 'Ford']
+DESTINATIONS = ['Conakry', 'Kindia', 'Boké', 'Kankan', 'Labé', 'Mamou', 'Siguiri', 'Nzérékoré', 'Faranah', 'Kamsar']
+SAISIES = ['to', 'toy', 'nis', 'kan', 'rc 12', 'peugeot kin', 'mer bok']
+TAILLE_LOT = 5000
+
+
+class Command(BaseCommand):
+    help = 'Mesure la durée des recherches par préfixe (FTS5 / tsvector) sur N documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100_000, help='Nombre de documents générés')
+        parser.add_argument('--repetitions', type=int, default=5, help='Exécutions par saisie')
+
+    def handle(self, *args, **options):
+        if not index_plein_texte_disponible():
+            raise CommandError('Index plein texte absent: lancer les migrations ou indexer_recherche --installer')
+
+        aleatoire = random.Random(42)
+        with transaction.atomic():
+            self.stdout.write(f'🔄 Génération de {options["documents"]} documents ({connection.vendor})...')
+            user = User.objects.create(username=f'bench_{uuid.uuid4().hex[:12]}')
+            lot = []
+            for numero in range(options['documents']):
+                marque, destination = aleatoire.choice(MARQUES), aleatoire.choice(DESTINATIONS)
+                titre = f"{marque} RC-{numero:05d} - {destination}"
+                lot.append(DocumentRecherche(
+                    type_objet=aleatoire.choice(['vehicule', 'feuille_route', 'alerte']),
+                    objet_id=f'bench-{numero}', user=user, titre=titre, contenu=normaliser(titre),
+                ))
+                if len(lot) == TAILLE_LOT:
+                    DocumentRecherche.objects.bulk_create(lot)
+                    lot = []
+            DocumentRecherche.objects.bulk_create(lot)
+
+            for saisie in SAISIES:
+                durees = []
+                for _ in range(options['repetitions']):
+                    depart = time.perf_counter()
+                    resultats = rechercher(user, saisie, limite=10)
+                    durees.append(time.perf_counter() - depart)
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ "{saisie}": {len(resultats)} résultat(s), {min(durees) * 1000:.2f} ms (meilleure de {len(durees)})'
+                ))
+
+            transaction.set_rollback(True)
+        self.stdout.write('🧹 Données de test annulées')
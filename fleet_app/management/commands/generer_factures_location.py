@@ -0,0 +1,52 @@
+"""
+Commande Django pour générer les factures mensuelles de location de tous les tenants
+Usage: python manage.py generer_factures_location [--user=username] [--mois=7] [--annee=2025]
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from fleet_app.utils_factures_location import generer_factures_mensuelles_tous_tenants
+
+
+class Command(BaseCommand):
+    help = 'Crée ou met à jour les factures mensuelles (LOC-{location}-{YYYYMM}) de toutes les locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Nom d\'utilisateur dont les locations sont à facturer (optionnel, défaut: tous)',
+        )
+        parser.add_argument(
+            '--mois',
+            type=int,
+            help='Mois à facturer (1-12, défaut: mois actuel)',
+        )
+        parser.add_argument(
+            '--annee',
+            type=int,
+            help='Année à facturer (défaut: année actuelle)',
+        )
+
+    def handle(self, *args, **options):
+        mois = options['mois'] or datetime.now().month
+        annee = options['annee'] or datetime.now().year
+        if not 1 <= mois <= 12:
+            raise CommandError(f"Mois invalide: {mois}")
+
+        users = None
+        if options['user']:
+            users = User.objects.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"Utilisateur {options['user']} introuvable")
+
+        self.stdout.write(f'🔄 Génération des factures de location pour {mois:02d}/{annee}...')
+        details = generer_factures_mensuelles_tous_tenants(annee, mois, users)
+        nb_creees = sum(1 for detail in details if detail['created'])
+        total = sum(detail['montant_ttc'] for detail in details)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(details)} facture(s) écrite(s) dont {nb_creees} nouvelle(s) - total {total:,.0f} GNF'
+        ))
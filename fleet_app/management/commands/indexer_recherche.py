@@ -0,0 +1,36 @@
+"""
+Commande Django pour reconstruire l'index de recherche plein texte
+Usage: python manage.py indexer_recherche [--type=vehicule] [--installer]
+"""
+
+from django.core.management.base import BaseCommand
+
+from fleet_app.utils_recherche import SOURCES, installer_index_plein_texte, reconstruire_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les documents de recherche (SearchDocument) de tous les tenants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            choices=list(SOURCES),
+            help='Type d\'objet à réindexer (répétable, tous par défaut)',
+        )
+        parser.add_argument(
+            '--installer',
+            action='store_true',
+            help='(Ré)installer la table FTS5 / l\'index GIN avant l\'indexation',
+        )
+
+    def handle(self, *args, **options):
+        if options['installer']:
+            self.stdout.write('🔄 Installation de l\'index plein texte...')
+            installer_index_plein_texte()
+
+        self.stdout.write('🔄 Reconstruction de l\'index de recherche...')
+        totaux = reconstruire_index(options['type'])
+        for type_objet, total in totaux.items():
+            self.stdout.write(f'   {type_objet}: {total} document(s)')
+        self.stdout.write(self.style.SUCCESS(f'✅ {sum(totaux.values())} document(s) indexé(s)'))
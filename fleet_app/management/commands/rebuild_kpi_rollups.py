@@ -0,0 +1,43 @@
+"""
+Commande Django pour (re)construire la table de cumul KPI mensuelle
+Usage: python manage.py rebuild_kpi_rollups [--user=username] [--vehicule=ID]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from fleet_app.models import Vehicule
+from fleet_app.utils_kpi_mensuel import reconstruire_kpi_mensuels
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les cumuls KPI mensuels (KpiMensuel) à partir des tables sources'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Nom d\'utilisateur dont les véhicules sont à reconstruire (optionnel)',
+        )
+        parser.add_argument(
+            '--vehicule',
+            type=str,
+            help='ID de véhicule spécifique à reconstruire (optionnel)',
+        )
+
+    def handle(self, *args, **options):
+        vehicules = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur {options['user']} introuvable")
+            vehicules = Vehicule.objects.filter(user=user)
+        if options['vehicule']:
+            vehicules = (vehicules if vehicules is not None else Vehicule.objects.all()).filter(
+                id_vehicule=options['vehicule']
+            )
+
+        self.stdout.write('🔄 Reconstruction des cumuls KPI mensuels...')
+        nb_lignes = reconstruire_kpi_mensuels(vehicules)
+        self.stdout.write(self.style.SUCCESS(f'✅ {nb_lignes} lignes de cumul KPI écrites'))
@@ -0,0 +1,56 @@
+"""
+Commande Django pour vérifier et corriger le stock persisté des produits
+Usage: python manage.py recompute_stock [--user=username] [--produit=ID] [--verifier]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from fleet_app.models_inventaire import Produit
+from fleet_app.utils_stock import verifier_stocks
+
+
+class Command(BaseCommand):
+    help = 'Compare Produit.stock_courant aux entrées - sorties et corrige les écarts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Nom d\'utilisateur dont les produits sont à contrôler (optionnel)',
+        )
+        parser.add_argument(
+            '--produit',
+            type=str,
+            help='ID de produit spécifique à contrôler (optionnel)',
+        )
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help='Afficher les écarts sans les corriger',
+        )
+
+    def handle(self, *args, **options):
+        produits = Produit.objects.all()
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Utilisateur {options['user']} introuvable")
+            produits = produits.filter(user=user)
+        if options['produit']:
+            produits = produits.filter(id_produit=options['produit'])
+
+        corriger = not options['verifier']
+        self.stdout.write('🔄 Contrôle du stock des produits...')
+        ecarts = verifier_stocks(produits, corriger=corriger)
+        for produit, stock_courant, solde in ecarts:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {produit.id_produit} - {produit.nom}: stock enregistré {stock_courant}, mouvements {solde}'
+            ))
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS('✅ Aucun écart de stock'))
+        elif corriger:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(ecarts)} produit(s) corrigé(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(ecarts)} produit(s) en écart (non corrigés)'))
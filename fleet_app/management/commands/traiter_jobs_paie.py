@@ -0,0 +1,38 @@
+"""
+Commande Django pour exécuter les jobs de synchronisation des paies en attente
+Usage: python manage.py traiter_jobs_paie [--boucle] [--intervalle=10]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from fleet_app.utils_paie_sync import traiter_jobs_en_attente
+
+
+class Command(BaseCommand):
+    help = 'Exécute les jobs de synchronisation des paies (SynchronisationPaieJob) en attente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--boucle',
+            action='store_true',
+            help='Continuer à surveiller la file au lieu de s\'arrêter une fois vide',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=int,
+            default=10,
+            help='Secondes entre deux passages en mode boucle (défaut: 10)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            nb_jobs = traiter_jobs_en_attente()
+            if nb_jobs:
+                self.stdout.write(self.style.SUCCESS(f'✅ {nb_jobs} job(s) de synchronisation exécuté(s)'))
+            if not options['boucle']:
+                if not nb_jobs:
+                    self.stdout.write('Aucun job en attente')
+                break
+            time.sleep(options['intervalle'])
@@ -0,0 +1,54 @@
+"""
+Commande Django pour exécuter les rendus PDF en attente et purger les anciens
+Usage: python manage.py traiter_rendus_pdf [--boucle] [--intervalle=5] [--retention=30]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from fleet_app.utils_pdf import purger_rendus_pdf, traiter_rendus_en_attente
+
+
+# Intervalle entre deux purges en mode boucle (secondes)
+INTERVALLE_PURGE = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Exécute les rendus PDF (RenduPdf) en attente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--boucle',
+            action='store_true',
+            help='Continuer à surveiller la file au lieu de s\'arrêter une fois vide',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=int,
+            default=5,
+            help='Secondes entre deux passages en mode boucle (défaut: 5)',
+        )
+        parser.add_argument(
+            '--retention',
+            type=int,
+            default=None,
+            help='Jours de conservation des rendus terminés et des PDF en cache (défaut: PDF_RETENTION_JOURS)',
+        )
+
+    def handle(self, *args, **options):
+        derniere_purge = None
+        while True:
+            if derniere_purge is None or time.monotonic() - derniere_purge >= INTERVALLE_PURGE:
+                nb_purges, nb_fichiers = purger_rendus_pdf(options['retention'])
+                derniere_purge = time.monotonic()
+                if nb_purges or nb_fichiers:
+                    self.stdout.write(f'🗑️ {nb_purges} rendu(s) et {nb_fichiers} fichier(s) PDF purgé(s)')
+            nb_rendus = traiter_rendus_en_attente()
+            if nb_rendus:
+                self.stdout.write(self.style.SUCCESS(f'✅ {nb_rendus} rendu(s) PDF exécuté(s)'))
+            if not options['boucle']:
+                if not nb_rendus:
+                    self.stdout.write('Aucun rendu en attente')
+                break
+            time.sleep(options['intervalle'])
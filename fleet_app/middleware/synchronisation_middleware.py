@@ -4,10 +4,28 @@ Gère automatiquement les paramètres de mois/année entre tous les modules de g
 """
 
 from django.utils.deprecation import MiddlewareMixin
-from django.shortcuts import redirect
-from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from datetime import datetime
-import json
+
+
+# Métadonnées des modules synchronisés, construites une fois à l'import
+MODULES_DISPONIBLES = (
+    {'name': 'pointage', 'title': 'Pointage Journalier', 'url': '/management/presences/', 'icon': 'fas fa-clock'},
+    {'name': 'paies', 'title': 'Gestion des Paies', 'url': '/management/paies/', 'icon': 'fas fa-money-bill-wave'},
+    {'name': 'heures-supplementaires', 'title': 'Heures Supplémentaires', 'url': '/management/heures-supplementaires/', 'icon': 'fas fa-clock'},
+    {'name': 'parametres-paie', 'title': 'Paramètres de Paie', 'url': '/management/parametres-paie/', 'icon': 'fas fa-cog'},
+    {'name': 'bulletins-paie', 'title': 'Bulletins de Paie', 'url': '/management/bulletins-paie/', 'icon': 'fas fa-file-invoice'},
+    {'name': 'archivage-mensuel', 'title': 'Archivage Mensuel', 'url': '/management/archivage-mensuel/', 'icon': 'fas fa-archive'},
+)
+
+# Chemin de base -> nom du module
+MODULE_PAR_PATTERN = {module['url']: module['name'] for module in MODULES_DISPONIBLES}
+
+NOMS_MOIS = {
+    1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
+    5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
+    9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
+}
 
 
 class SynchronisationMiddleware(MiddlewareMixin):
@@ -27,14 +45,7 @@ class SynchronisationMiddleware(MiddlewareMixin):
     ]
     
     # URLs de base pour chaque module
-    MODULE_PATTERNS = [
-        '/management/presences/',
-        '/management/paies/',
-        '/management/heures-supplementaires/',
-        '/management/parametres-paie/',
-        '/management/bulletins-paie/',
-        '/management/archivage-mensuel/'
-    ]
+    MODULE_PATTERNS = tuple(MODULE_PAR_PATTERN)
     
     def process_request(self, request):
         """
@@ -72,6 +83,9 @@ class SynchronisationMiddleware(MiddlewareMixin):
     def get_or_set_period(self, request):
         """
         Récupère ou définit la période actuelle
+
+        La session n'est écrite que si la période change : une navigation
+        sur la même période ne provoque aucun UPDATE de la table des sessions.
         """
         # Priorité 1: Paramètres GET
         month = request.GET.get('mois') or request.GET.get('month')
@@ -84,16 +98,15 @@ class SynchronisationMiddleware(MiddlewareMixin):
                     'year': int(year)
                 }
                 # Sauvegarder en session
-                request.session['management_period'] = period
+                self.save_period(request, period)
                 return period
             except (ValueError, TypeError):
                 pass
         
         # Priorité 2: Session
-        if 'management_period' in request.session:
-            period = request.session['management_period']
-            if self.is_valid_period(period):
-                return period
+        period = request.session.get('management_period')
+        if self.is_valid_period(period):
+            return period
         
         # Priorité 3: Valeurs par défaut (mois/année actuels)
         now = datetime.now()
@@ -102,9 +115,16 @@ class SynchronisationMiddleware(MiddlewareMixin):
             'year': now.year
         }
         
-        request.session['management_period'] = period
+        self.save_period(request, period)
         return period
     
+    def save_period(self, request, period):
+        """
+        Enregistre la période en session seulement si elle diffère de celle stockée
+        """
+        if request.session.get('management_period') != period:
+            request.session['management_period'] = period
+    
     def is_valid_period(self, period):
         """
         Valide une période
@@ -144,20 +164,16 @@ class SynchronisationContextProcessor:
                 'year': now.year
             }
         
-        # Ajouter les informations de module
-        context['sync_modules'] = {
+        # Informations de module, calculées seulement si le template les lit
+        context['sync_modules'] = SimpleLazyObject(lambda: {
             'current_module': self.get_current_module(request.path),
             'available_modules': self.get_available_modules(),
             'is_management_page': any(pattern in request.path 
                                     for pattern in SynchronisationMiddleware.MODULE_PATTERNS)
-        }
+        })
         
         # Ajouter les noms de mois en français
-        context['month_names'] = {
-            1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
-            5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
-            9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
-        }
+        context['month_names'] = NOMS_MOIS
         
         return context
     
@@ -165,16 +181,7 @@ class SynchronisationContextProcessor:
         """
         Détermine le module actuel depuis le chemin
         """
-        module_map = {
-            '/management/presences/': 'pointage',
-            '/management/paies/': 'paies',
-            '/management/heures-supplementaires/': 'heures-supplementaires',
-            '/management/parametres-paie/': 'parametres-paie',
-            '/management/bulletins-paie/': 'bulletins-paie',
-            '/management/archivage-mensuel/': 'archivage-mensuel'
-        }
-        
-        for pattern, module in module_map.items():
+        for pattern, module in MODULE_PAR_PATTERN.items():
             if pattern in path:
                 return module
                 
@@ -184,49 +191,14 @@ class SynchronisationContextProcessor:
         """
         Retourne la liste des modules disponibles
         """
-        return [
-            {
-                'name': 'pointage',
-                'title': 'Pointage Journalier',
-                'url': '/management/presences/',
-                'icon': 'fas fa-clock'
-            },
-            {
-                'name': 'paies',
-                'title': 'Gestion des Paies',
-                'url': '/management/paies/',
-                'icon': 'fas fa-money-bill-wave'
-            },
-            {
-                'name': 'heures-supplementaires',
-                'title': 'Heures Supplémentaires',
-                'url': '/management/heures-supplementaires/',
-                'icon': 'fas fa-clock'
-            },
-            {
-                'name': 'parametres-paie',
-                'title': 'Paramètres de Paie',
-                'url': '/management/parametres-paie/',
-                'icon': 'fas fa-cog'
-            },
-            {
-                'name': 'bulletins-paie',
-                'title': 'Bulletins de Paie',
-                'url': '/management/bulletins-paie/',
-                'icon': 'fas fa-file-invoice'
-            },
-            {
-                'name': 'archivage-mensuel',
-                'title': 'Archivage Mensuel',
-                'url': '/management/archivage-mensuel/',
-                'icon': 'fas fa-archive'
-            }
-        ]
+        return MODULES_DISPONIBLES
+
+
+_processor = SynchronisationContextProcessor()
 
 
 def synchronisation_context_processor(request):
     """
     Fonction de processeur de contexte pour la synchronisation
     """
-    processor = SynchronisationContextProcessor()
-    return processor(request)
+    return _processor(request)
@@ -1,25 +1,20 @@
 from typing import Callable
 from django.http import HttpRequest, HttpResponse
 
+from ..utils.tenant import build_tenant_context
+
 
 class TenantMiddleware:
-    """Attach request.entreprise for the current authenticated user.
+    """Attach request.tenant (user, profil, entreprise) and request.entreprise for the current user.
 
-    This makes it easier and safer to access the tenant context across views and services.
+    The tenant context is resolved once per request and reused by views, decorators
+    and `queryset_filter_by_tenant` (see fleet_app.utils.tenant).
     """
 
     def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
         self.get_response = get_response
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
-        user = getattr(request, 'user', None)
-        ent = None
-        if user and getattr(user, 'is_authenticated', False):
-            # Try user.profil.entreprise first, then user.entreprise
-            profil = getattr(user, 'profil', None)
-            if profil is not None:
-                ent = getattr(profil, 'entreprise', None)
-            if ent is None:
-                ent = getattr(user, 'entreprise', None)
-        request.entreprise = ent
+        request.tenant = build_tenant_context(getattr(request, 'user', None))
+        request.entreprise = request.tenant.entreprise
         return self.get_response(request)
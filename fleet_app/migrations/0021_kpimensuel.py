@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0020_add_frais_kilometrique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KpiMensuel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.IntegerField(verbose_name='Année')),
+                ('mois', models.IntegerField(verbose_name='Mois (1-12)')),
+                ('distance_km', models.BigIntegerField(default=0, verbose_name='Distance parcourue (km)')),
+                ('nb_distances', models.IntegerField(default=0, verbose_name='Relevés de distance')),
+                ('litres_carburant', models.FloatField(default=0, verbose_name='Litres ajoutés')),
+                ('distance_carburant', models.BigIntegerField(default=0, verbose_name='Distance entre pleins (km)')),
+                ('somme_consommation_100km', models.FloatField(default=0, verbose_name='Somme des consommations (L/100km)')),
+                ('nb_consommations', models.IntegerField(default=0, verbose_name='Relevés de consommation')),
+                ('somme_disponibilite', models.FloatField(default=0, verbose_name='Somme des disponibilités (%)')),
+                ('nb_disponibilites', models.IntegerField(default=0, verbose_name='Relevés de disponibilité')),
+                ('heures_disponibles', models.BigIntegerField(default=0, verbose_name='Heures disponibles')),
+                ('heures_totales', models.BigIntegerField(default=0, verbose_name='Heures totales')),
+                ('jours_utilises', models.IntegerField(default=0, verbose_name='Jours utilisés')),
+                ('jours_disponibles', models.IntegerField(default=0, verbose_name='Jours disponibles')),
+                ('nb_utilisations', models.IntegerField(default=0, verbose_name='Utilisations de véhicule')),
+                ('nb_incidents', models.IntegerField(default=0, verbose_name='Incidents')),
+                ('cout_fonctionnement', models.FloatField(default=0, verbose_name='Coûts de fonctionnement')),
+                ('somme_cout_fonctionnement_km', models.FloatField(default=0, verbose_name='Somme des coûts de fonctionnement par km')),
+                ('nb_couts_fonctionnement', models.IntegerField(default=0, verbose_name='Coûts de fonctionnement saisis')),
+                ('cout_financier', models.FloatField(default=0, verbose_name='Coûts financiers')),
+                ('somme_cout_financier_km', models.FloatField(default=0, verbose_name='Somme des coûts financiers par km')),
+                ('nb_couts_financiers', models.IntegerField(default=0, verbose_name='Coûts financiers saisis')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+                ('entreprise', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='fleet_app.entreprise', verbose_name='Entreprise')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('vehicule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kpi_mensuels', to='fleet_app.vehicule', verbose_name='Véhicule')),
+            ],
+            options={
+                'verbose_name': 'KPI mensuel',
+                'verbose_name_plural': 'KPI mensuels',
+                'indexes': [models.Index(fields=['entreprise', 'annee', 'mois'], name='kpimensuel_ent_periode_idx'), models.Index(fields=['user', 'annee', 'mois'], name='kpimensuel_user_periode_idx')],
+                'unique_together': {('vehicule', 'annee', 'mois')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0021_kpimensuel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SynchronisationPaieJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.IntegerField(verbose_name='Mois')),
+                ('annee', models.IntegerField(verbose_name='Année')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('declencheur', models.CharField(choices=[('manuel', 'Manuel'), ('donnees', 'Modification de données')], default='manuel', max_length=20, verbose_name='Déclencheur')),
+                ('total', models.IntegerField(default=0, verbose_name='Paies à traiter')),
+                ('traites', models.IntegerField(default=0, verbose_name='Paies traitées')),
+                ('message', models.TextField(blank=True, default='', verbose_name='Message')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synchronisations_paie', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Synchronisation de paies',
+                'verbose_name_plural': 'Synchronisations de paies',
+                'db_table': 'SynchronisationPaieJobs',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='syncpaie_statut_idx'), models.Index(fields=['user', 'annee', 'mois'], name='syncpaie_user_periode_idx')],
+            },
+        ),
+    ]
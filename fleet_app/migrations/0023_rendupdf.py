@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0022_synchronisationpaiejob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenduPdf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('empreinte', models.CharField(max_length=64, verbose_name='Empreinte du contenu')),
+                ('nom_fichier', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('moteur', models.CharField(choices=[('xhtml2pdf', 'xhtml2pdf'), ('weasyprint', 'WeasyPrint')], default='xhtml2pdf', max_length=20, verbose_name='Moteur de rendu')),
+                ('html', models.TextField(blank=True, default='', verbose_name='HTML à convertir')),
+                ('base_url', models.CharField(blank=True, default='', max_length=500, verbose_name='URL de base')),
+                ('fichier', models.FileField(blank=True, upload_to='pdf_cache/', verbose_name='Fichier PDF')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('erreur', 'Erreur')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('message', models.TextField(blank=True, default='', verbose_name='Message')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin du rendu')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rendus_pdf', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Rendu PDF',
+                'verbose_name_plural': 'Rendus PDF',
+                'db_table': 'RendusPdf',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['user', 'empreinte'], name='rendupdf_user_empreinte_idx'), models.Index(fields=['statut', 'date_creation'], name='rendupdf_statut_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0023_rendupdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rendupdf',
+            name='parametres',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Paramètres du lot'),
+        ),
+        migrations.AddField(
+            model_name='rendupdf',
+            name='type_lot',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Type de lot'),
+        ),
+        migrations.AlterField(
+            model_name='rendupdf',
+            name='moteur',
+            field=models.CharField(choices=[('xhtml2pdf', 'xhtml2pdf'), ('weasyprint', 'WeasyPrint'), ('fusion', 'Fusion de fragments')], default='xhtml2pdf', max_length=20, verbose_name='Moteur de rendu'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def renommer_doublons(apps, schema_editor):
+    """Suffixe les numéros de facture en double pour un même utilisateur (-2, -3...)"""
+    FactureLocation = apps.get_model('fleet_app', 'FactureLocation')
+    doublons = FactureLocation.objects.values('user', 'numero').annotate(nb=Count('pk')).filter(nb__gt=1)
+    for doublon in doublons:
+        factures = FactureLocation.objects.filter(user=doublon['user'], numero=doublon['numero']).order_by('pk')
+        for rang, facture in enumerate(factures[1:], start=2):
+            facture.numero = f"{facture.numero}-{rang}"
+            facture.save(update_fields=['numero'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0024_rendupdf_lot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(renommer_doublons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='facturelocation',
+            constraint=models.UniqueConstraint(fields=('user', 'numero'), name='facture_location_user_numero_uniq'),
+        ),
+    ]
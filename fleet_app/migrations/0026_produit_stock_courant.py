@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def initialiser_stock_courant(apps, schema_editor):
+    """Initialise le solde de chaque produit avec entrées - sorties (deux requêtes groupées)"""
+    Produit = apps.get_model('fleet_app', 'Produit')
+    EntreeStock = apps.get_model('fleet_app', 'EntreeStock')
+    SortieStock = apps.get_model('fleet_app', 'SortieStock')
+    soldes = {}
+    for modele, sens in ((EntreeStock, 1), (SortieStock, -1)):
+        for produit_id, total in modele.objects.values('produit').annotate(total=Sum('quantite')).values_list('produit', 'total'):
+            soldes[produit_id] = soldes.get(produit_id, 0) + sens * (total or 0)
+    produits = list(Produit.objects.filter(pk__in=soldes))
+    for produit in produits:
+        produit.stock_courant = soldes[produit.pk]
+    Produit.objects.bulk_update(produits, ['stock_courant'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0025_facturelocation_user_numero_uniq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produit',
+            name='stock_courant',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Stock courant'),
+        ),
+        migrations.RunPython(initialiser_stock_courant, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['user', 'stock_courant'], name='produit_user_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produit',
+            index=models.Index(fields=['entreprise', 'stock_courant'], name='produit_ent_stock_idx'),
+        ),
+    ]
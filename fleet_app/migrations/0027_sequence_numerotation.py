@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0026_produit_stock_courant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceNumerotation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('portee', models.CharField(blank=True, default='', max_length=40, verbose_name='Portée (tenant)')),
+                ('prefixe', models.CharField(max_length=20, verbose_name='Préfixe')),
+                ('periode', models.CharField(blank=True, default='', max_length=10, verbose_name='Période')),
+                ('dernier_numero', models.PositiveBigIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Dernière allocation')),
+            ],
+            options={
+                'verbose_name': 'Séquence de numérotation',
+                'verbose_name_plural': 'Séquences de numérotation',
+                'db_table': 'NumberSequence',
+                'constraints': [models.UniqueConstraint(fields=('portee', 'prefixe', 'periode'), name='sequence_portee_prefixe_periode_uniq')],
+            },
+        ),
+    ]
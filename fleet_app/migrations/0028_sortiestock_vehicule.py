@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def rattacher_sorties_aux_vehicules(apps, schema_editor):
+    """Renseigne le véhicule des sorties dont la destination cite une immatriculation du même utilisateur"""
+    SortieStock = apps.get_model('fleet_app', 'SortieStock')
+    Vehicule = apps.get_model('fleet_app', 'Vehicule')
+    immatriculations = defaultdict(list)
+    for pk, user_id, immatriculation in Vehicule.objects.exclude(immatriculation='').values_list('pk', 'user_id', 'immatriculation'):
+        immatriculations[user_id].append((len(immatriculation), immatriculation.upper(), pk))
+    a_mettre_a_jour = []
+    for sortie in SortieStock.objects.filter(vehicule__isnull=True).exclude(destination__isnull=True).exclude(destination='').select_related('produit'):
+        destination = sortie.destination.upper()
+        candidats = [(longueur, pk) for longueur, immat, pk in immatriculations.get(sortie.produit.user_id, []) if immat in destination]
+        if candidats:
+            sortie.vehicule_id = max(candidats)[1]
+            a_mettre_a_jour.append(sortie)
+    SortieStock.objects.bulk_update(a_mettre_a_jour, ['vehicule'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0027_sequence_numerotation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sortiestock',
+            name='vehicule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sorties_stock', to='fleet_app.vehicule', verbose_name='Véhicule'),
+        ),
+        migrations.RunPython(rattacher_sorties_aux_vehicules, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sortiestock',
+            index=models.Index(fields=['vehicule', 'date'], name='sortiestock_vehicule_date_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0028_sortiestock_vehicule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alerte',
+            index=models.Index(fields=['vehicule', 'statut'], name='alerte_vehicule_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alerte',
+            index=models.Index(condition=models.Q(('statut', 'Active')), fields=['-date_creation'], name='alerte_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feuillepontagelocation',
+            index=models.Index(fields=['location', 'statut', 'date'], name='pontage_loc_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feuillepontagelocation',
+            index=models.Index(fields=['user', 'date'], name='pontage_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feuillepontagelocation',
+            index=models.Index(fields=['entreprise', 'date'], name='pontage_ent_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fraiskilometrique',
+            index=models.Index(fields=['employe', 'date'], name='fraiskm_employe_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fraiskilometrique',
+            index=models.Index(fields=['user', 'date'], name='fraiskm_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='heuresupplementaire',
+            index=models.Index(fields=['user', 'date'], name='heuresup_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouvementstock',
+            index=models.Index(fields=['produit', 'date'], name='mouvement_produit_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mouvementstock',
+            index=models.Index(fields=['entreprise', 'date'], name='mouvement_ent_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='peseecamion',
+            index=models.Index(fields=['user', 'date'], name='pesee_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='presencejournaliere',
+            index=models.Index(fields=['user', 'date'], name='presence_user_date_idx'),
+        ),
+    ]
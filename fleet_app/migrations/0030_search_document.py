@@ -0,0 +1,211 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:28
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.urls import NoReverseMatch, reverse
+
+
+def installer_index(apps, schema_editor):
+    """Table FTS5 + triggers (SQLite) ou colonne tsvector + GIN (PostgreSQL)"""
+    from fleet_app.utils_recherche import installer_index_plein_texte
+    installer_index_plein_texte(schema_editor.connection)
+
+
+# Copie figée des constructeurs de documents de fleet_app.utils_recherche à la
+# création de la table: ils ne lisent que des champs des modèles historiques.
+
+def _normaliser(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^0-9a-z]+', ' ', texte).strip()
+
+
+def _url(nom, *args):
+    try:
+        return reverse(f'fleet_app:{nom}', args=args)
+    except NoReverseMatch:
+        return ''
+
+
+def _libelle_vehicule(vehicule):
+    if vehicule is None:
+        return ''
+    return f"{vehicule.marque} {vehicule.modele} ({vehicule.immatriculation})"
+
+
+def _champs_vehicule(vehicule):
+    if vehicule is None:
+        return []
+    return [vehicule.immatriculation, vehicule.marque, vehicule.modele]
+
+
+def _date(valeur):
+    return valeur.strftime('%d/%m/%Y') if valeur else ''
+
+
+def _document_vehicule(vehicule):
+    return {
+        'user_id': vehicule.user_id,
+        'entreprise_id': vehicule.entreprise_id,
+        'titre': _libelle_vehicule(vehicule),
+        'champs': [vehicule.id_vehicule, *_champs_vehicule(vehicule), vehicule.numero_chassis, vehicule.categorie],
+        'statut': vehicule.statut_actuel,
+        'categorie': vehicule.categorie,
+        'url': _url('vehicule_detail', vehicule.pk),
+        'donnees': {'statut': vehicule.statut_actuel, 'categorie': vehicule.categorie},
+    }
+
+
+def _document_chauffeur(chauffeur):
+    return {
+        'user_id': chauffeur.user_id,
+        'titre': f"{chauffeur.nom} {chauffeur.prenom}",
+        'champs': [chauffeur.nom, chauffeur.prenom, chauffeur.numero_permis, chauffeur.telephone],
+        'statut': chauffeur.statut,
+        'url': _url('chauffeur_detail', chauffeur.pk),
+        'donnees': {'telephone': chauffeur.telephone, 'statut': chauffeur.statut},
+    }
+
+
+def _document_feuille_route(feuille):
+    vehicule, chauffeur = feuille.vehicule, feuille.chauffeur
+    return {
+        'user_id': vehicule.user_id,
+        'entreprise_id': vehicule.entreprise_id,
+        'titre': f"Feuille de route {feuille.pk} - {feuille.destination}",
+        'champs': [feuille.destination, *_champs_vehicule(vehicule), chauffeur.nom, chauffeur.prenom],
+        'date': feuille.date_depart,
+        'url': _url('feuille_route_detail', feuille.pk),
+        'donnees': {
+            'date': _date(feuille.date_depart),
+            'vehicule': _libelle_vehicule(vehicule),
+            'chauffeur': f"{chauffeur.nom} {chauffeur.prenom}",
+        },
+    }
+
+
+def _document_alerte(alerte):
+    vehicule = alerte.vehicule
+    libelle = _libelle_vehicule(vehicule)
+    return {
+        'user_id': vehicule.user_id if vehicule else None,
+        'entreprise_id': vehicule.entreprise_id if vehicule else None,
+        'titre': f"{alerte.titre} - {libelle}" if libelle else alerte.titre,
+        'champs': [alerte.titre, alerte.description, *_champs_vehicule(vehicule)],
+        'statut': alerte.statut,
+        'niveau': alerte.niveau,
+        'date': alerte.date_creation.date() if alerte.date_creation else None,
+        'url': _url('alerte_list'),
+        'donnees': {'niveau': alerte.niveau, 'statut': alerte.statut, 'date': _date(alerte.date_creation)},
+    }
+
+
+def _document_fournisseur(fournisseur):
+    return {
+        'user_id': fournisseur.user_id,
+        'entreprise_id': fournisseur.entreprise_id,
+        'titre': fournisseur.nom,
+        'champs': [fournisseur.nom, fournisseur.contact, fournisseur.telephone, fournisseur.email, fournisseur.adresse],
+        'url': _url('fournisseur_update', fournisseur.pk),
+        'donnees': {'telephone': fournisseur.telephone or ''},
+    }
+
+
+def _document_location(location):
+    vehicule, fournisseur = location.vehicule, location.fournisseur
+    return {
+        'user_id': location.user_id,
+        'entreprise_id': location.entreprise_id,
+        'titre': f"Location {_libelle_vehicule(vehicule)}",
+        'champs': [*_champs_vehicule(vehicule), fournisseur.nom if fournisseur else '', location.motif],
+        'statut': location.statut,
+        'categorie': location.type_location,
+        'date': location.date_debut,
+        'url': _url('location_detail', location.pk),
+        'donnees': {
+            'statut': location.statut,
+            'fournisseur': fournisseur.nom if fournisseur else '',
+            'date': _date(location.date_debut),
+        },
+    }
+
+
+# type_objet -> (modèle historique, relations chargées, constructeur)
+SOURCES = [
+    ('vehicule', 'Vehicule', (), _document_vehicule),
+    ('chauffeur', 'Chauffeur', (), _document_chauffeur),
+    ('feuille_route', 'FeuilleDeRoute', ('vehicule', 'chauffeur'), _document_feuille_route),
+    ('alerte', 'Alerte', ('vehicule',), _document_alerte),
+    ('fournisseur', 'FournisseurVehicule', (), _document_fournisseur),
+    ('location', 'LocationVehicule', ('vehicule', 'fournisseur'), _document_location),
+]
+TAILLE_LOT = 1000
+
+
+def remplir_documents(apps, schema_editor):
+    """Documents des objets existants (ensuite tenus à jour par les signaux)"""
+    DocumentRecherche = apps.get_model('fleet_app', 'DocumentRecherche')
+    for type_objet, nom_modele, relations, constructeur in SOURCES:
+        objets = apps.get_model('fleet_app', nom_modele).objects.select_related(*relations).order_by('pk')
+        lot = []
+        for objet in objets.iterator(chunk_size=TAILLE_LOT):
+            valeurs = constructeur(objet)
+            champs = valeurs.pop('champs')
+            lot.append(DocumentRecherche(
+                type_objet=type_objet,
+                objet_id=str(objet.pk),
+                contenu=_normaliser(' '.join(str(champ) for champ in champs if champ)),
+                **valeurs,
+            ))
+            if len(lot) == TAILLE_LOT:
+                DocumentRecherche.objects.bulk_create(lot)
+                lot = []
+        DocumentRecherche.objects.bulk_create(lot)
+
+
+def supprimer_index(apps, schema_editor):
+    from fleet_app.utils_recherche import supprimer_index_plein_texte
+    supprimer_index_plein_texte(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet_app', '0029_index_tenant_dates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('vehicule', 'Véhicule'), ('chauffeur', 'Chauffeur'), ('feuille_route', 'Feuille de route'), ('alerte', 'Alerte'), ('fournisseur', 'Fournisseur'), ('location', 'Location')], max_length=20, verbose_name="Type d'objet")),
+                ('objet_id', models.CharField(max_length=50, verbose_name="Identifiant de l'objet")),
+                ('titre', models.CharField(max_length=255, verbose_name='Titre')),
+                ('contenu', models.TextField(verbose_name='Contenu indexé')),
+                ('statut', models.CharField(blank=True, default='', max_length=50, verbose_name='Statut')),
+                ('categorie', models.CharField(blank=True, default='', max_length=50, verbose_name='Catégorie')),
+                ('niveau', models.CharField(blank=True, default='', max_length=20, verbose_name='Niveau')),
+                ('date', models.DateField(blank=True, null=True, verbose_name='Date')),
+                ('url', models.CharField(blank=True, default='', max_length=255, verbose_name='URL')),
+                ('donnees', models.JSONField(blank=True, default=dict, verbose_name="Données d'affichage")),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Dernière indexation')),
+                ('entreprise', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='fleet_app.entreprise', verbose_name='Entreprise')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'db_table': 'SearchDocument',
+                'indexes': [models.Index(fields=['user', 'type_objet'], name='searchdocument_user_type_idx'), models.Index(fields=['entreprise', 'type_objet'], name='searchdocument_ent_type_idx')],
+                'constraints': [models.UniqueConstraint(fields=('type_objet', 'objet_id'), name='searchdocument_objet_uniq')],
+            },
+        ),
+        migrations.RunPython(remplir_documents, migrations.RunPython.noop),
+        migrations.RunPython(installer_index, supprimer_index),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 from .models_accounts import Entreprise
+from .utils_periode import PeriodeQuerySet
 
 # Import des modèles d'entreprise
 from .models_entreprise import (
@@ -118,6 +119,8 @@ class DistanceParcourue(models.Model):
     type_moteur = models.CharField(max_length=20, verbose_name="Type de moteur")
     limite_annuelle = models.IntegerField(null=True, blank=True, verbose_name="Limite annuelle")
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Utilisateur")
+
+    objects = PeriodeQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.vehicule} - {self.date_debut} à {self.date_fin}"
@@ -49,3 +49,8 @@ class Alerte(models.Model):
         verbose_name = "Alerte"
         verbose_name_plural = "Alertes"
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['vehicule', 'statut'], name='alerte_vehicule_statut_idx'),
+            # Index partiel: seules les alertes actives sont listées et comptées en continu
+            models.Index(fields=['-date_creation'], condition=models.Q(statut='Active'), name='alerte_active_date_idx'),
+        ]
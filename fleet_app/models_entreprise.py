@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 import datetime
+from .utils_periode import PeriodeQuerySet
 
 
 """
@@ -154,10 +155,15 @@ class PresenceJournaliere(models.Model):
     present = models.BooleanField(default=True, verbose_name="Présent")
     statut = models.CharField(max_length=50, choices=STATUT_CHOICES, blank=True, null=True, verbose_name="Statut", default='P(Am_&_Pm)')
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+
+    objects = PeriodeQuerySet.as_manager()
     
     class Meta:
         db_table = 'PresenceJournaliere'
         unique_together = ['employe', 'date']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='presence_user_date_idx'),
+        ]
 
 class SalaireMensuel(models.Model):
     """Salaire mensuel configuré"""
@@ -224,11 +230,16 @@ class PeseeCamion(models.Model):
     observation = models.TextField(blank=True, verbose_name='Observations')
     quantity = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Quantité (tonnes)')
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+
+    objects = PeriodeQuerySet.as_manager()
     
     class Meta:
         db_table = 'PeseeCamions'
         verbose_name = 'Pesée de camion'
         verbose_name_plural = 'Pesées de camions'
+        indexes = [
+            models.Index(fields=['user', 'date'], name='pesee_user_date_idx'),
+        ]
 
 class FicheBordMachine(models.Model):
     """Fiche de bord des machines"""
@@ -386,12 +397,17 @@ class HeureSupplementaire(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PeriodeQuerySet.as_manager()
     
     class Meta:
         db_table = 'HeuresSupplementaires'
         verbose_name = 'Heure supplémentaire'
         verbose_name_plural = 'Heures supplémentaires'
         unique_together = ['employe', 'date', 'heure_debut']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='heuresup_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employe.matricule} - {self.date} ({self.duree}h)"
@@ -462,12 +478,18 @@ class FraisKilometrique(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PeriodeQuerySet.as_manager()
     
     class Meta:
         db_table = 'FraisKilometriques'
         verbose_name = 'Frais kilométrique'
         verbose_name_plural = 'Frais kilométriques'
         ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['employe', 'date'], name='fraiskm_employe_date_idx'),
+            models.Index(fields=['user', 'date'], name='fraiskm_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employe.matricule} - {self.date} ({self.kilometres}km)"
@@ -514,10 +536,8 @@ class FraisKilometrique(models.Model):
         """
         from django.db.models import Sum
         
-        total = FraisKilometrique.objects.filter(
-            employe=employe,
-            date__month=mois,
-            date__year=annee
+        total = FraisKilometrique.objects.for_month(mois, annee).filter(
+            employe=employe
         ).aggregate(total=Sum('total_a_payer'))['total']
         
         return float(total or 0)
@@ -527,10 +547,8 @@ class FraisKilometrique(models.Model):
         """
         Retourne les détails des frais kilométriques pour un employé sur un mois
         """
-        frais = FraisKilometrique.objects.filter(
-            employe=employe,
-            date__month=mois,
-            date__year=annee
+        frais = FraisKilometrique.objects.for_month(mois, annee).filter(
+            employe=employe
         ).order_by('date')
         
         return {
@@ -615,3 +633,66 @@ class DataSynchronizer(models.Model):
     
     class Meta:
         db_table = 'DataSynchronizer'
+
+
+class SynchronisationPaieJob(models.Model):
+    """File d'attente des synchronisations de paies (présences, heures supp., montants) par mois"""
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+    DECLENCHEUR_CHOICES = [
+        ('manuel', 'Manuel'),
+        ('donnees', 'Modification de données'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='synchronisations_paie', verbose_name="Utilisateur")
+    mois = models.IntegerField(verbose_name="Mois")
+    annee = models.IntegerField(verbose_name="Année")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente', verbose_name="Statut")
+    declencheur = models.CharField(max_length=20, choices=DECLENCHEUR_CHOICES, default='manuel', verbose_name="Déclencheur")
+    total = models.IntegerField(default=0, verbose_name="Paies à traiter")
+    traites = models.IntegerField(default=0, verbose_name="Paies traitées")
+    message = models.TextField(blank=True, default='', verbose_name="Message")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début du traitement")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin du traitement")
+    
+    class Meta:
+        db_table = 'SynchronisationPaieJobs'
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'date_creation'], name='syncpaie_statut_idx'),
+            models.Index(fields=['user', 'annee', 'mois'], name='syncpaie_user_periode_idx'),
+        ]
+        verbose_name = 'Synchronisation de paies'
+        verbose_name_plural = 'Synchronisations de paies'
+    
+    def __str__(self):
+        return f"Synchronisation paies {self.mois:02d}/{self.annee} - {self.get_statut_display()}"
+    
+    @property
+    def progression(self):
+        """Pourcentage de paies traitées"""
+        if self.statut == 'termine':
+            return 100
+        return round(self.traites * 100 / self.total) if self.total else 0
+    
+    def as_dict(self):
+        """Représentation JSON pour le suivi de progression"""
+        return {
+            'id': self.pk,
+            'mois': self.mois,
+            'annee': self.annee,
+            'statut': self.statut,
+            'statut_display': self.get_statut_display(),
+            'declencheur': self.declencheur,
+            'total': self.total,
+            'traites': self.traites,
+            'progression': self.progression,
+            'message': self.message,
+            'date_creation': self.date_creation.isoformat() if self.date_creation else None,
+            'date_fin': self.date_fin.isoformat() if self.date_fin else None,
+        }
@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.db.models import Sum
 import os
 
+from .utils_numerotation import prochain_numero, dernier_numero_existant
+
 class Facture(models.Model):
     """Modèle pour les factures"""
     STATUS_CHOICES = [
@@ -71,18 +73,17 @@ class Facture(models.Model):
         self.save(update_fields=['montant_total', 'tva', 'montant_final'])
     
     def save(self, *args, **kwargs):
-        # Si c'est une nouvelle facture, générer automatiquement un numéro
-        if not self.numero:
-            date_str = timezone.now().strftime('%Y%m')
-            last_facture = Facture.objects.filter(numero__startswith=f"FG-{date_str}").order_by('numero').last()
-            
-            if last_facture:
-                last_num = int(last_facture.numero.split('-')[-1])
-                self.numero = f"FG-{date_str}-{last_num+1:03d}"
-            else:
-                self.numero = f"FG-{date_str}-001"
+        with transaction.atomic():
+            # Si c'est une nouvelle facture, prendre le numéro suivant de la séquence du mois
+            if not self.numero:
+                date_str = timezone.now().strftime('%Y%m')
+                numero = prochain_numero(
+                    'FG-', periode=date_str,
+                    valeur_initiale=dernier_numero_existant(Facture.objects.all(), 'numero', f"FG-{date_str}"),
+                )
+                self.numero = f"FG-{date_str}-{numero:03d}"
                 
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Facture"
@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.validators import MinValueValidator
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.contrib.auth.models import User
 from .models_accounts import Entreprise
+from .utils_numerotation import prochain_numero, avancer_sequence, dernier_numero_existant
+from .utils_periode import PeriodeQuerySet
 import os
 
 class Produit(models.Model):
@@ -37,16 +39,56 @@ class Produit(models.Model):
     date_ajout = models.DateField(default=timezone.now, verbose_name="Date d'ajout")
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Utilisateur")
     entreprise = models.ForeignKey(Entreprise, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Entreprise")
+    # Solde entrées - sorties, tenu à jour par EntreeStock / SortieStock (voir ajuster_stock)
+    stock_courant = models.IntegerField(default=0, editable=False, verbose_name="Stock courant")
     
     def __str__(self):
         return f"{self.id_produit} - {self.nom}"
     
+    def save(self, *args, **kwargs):
+        # Le solde n'est écrit que par ajuster_stock : ne pas l'écraser avec la valeur lue au chargement
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != 'stock_courant'
+            ]
+        super().save(*args, **kwargs)
+    
     def get_stock_actuel(self):
-        """Calcule le stock actuel du produit"""
+        """Stock actuel du produit (solde persisté, sans requête)"""
+        return self.stock_courant
+    
+    def calculer_stock_mouvements(self):
+        """Recalcule le stock à partir de toutes les entrées et sorties (contrôle de recompute_stock)"""
         total_entrees = EntreeStock.objects.filter(produit=self).aggregate(Sum('quantite'))['quantite__sum'] or 0
         total_sorties = SortieStock.objects.filter(produit=self).aggregate(Sum('quantite'))['quantite__sum'] or 0
         return total_entrees - total_sorties
     
+    @classmethod
+    def ajuster_stock(cls, produit_id, delta):
+        """
+        Applique une variation au stock d'un produit de manière atomique
+        
+        La ligne du produit est verrouillée (select_for_update) le temps de lire
+        le solde et de l'incrémenter par une expression F(), de sorte que deux
+        mouvements simultanés ne peuvent pas s'écraser.
+        
+        Args:
+            produit_id: Clé du produit
+            delta: Quantité à ajouter (négative pour une sortie)
+        
+        Returns:
+            tuple: (stock avant, stock après), (None, None) si le produit n'existe plus
+        """
+        with transaction.atomic():
+            stock_avant = cls.objects.select_for_update().filter(pk=produit_id).values_list(
+                'stock_courant', flat=True
+            ).first()
+            if stock_avant is None:
+                return None, None
+            if delta:
+                cls.objects.filter(pk=produit_id).update(stock_courant=F('stock_courant') + delta)
+        return stock_avant, stock_avant + delta
+    
     def get_statut_alerte(self):
         """Détermine si le produit est en alerte de stock"""
         stock_actuel = self.get_stock_actuel()
@@ -58,6 +100,71 @@ class Produit(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['id_produit']
+        indexes = [
+            models.Index(fields=['user', 'stock_courant'], name='produit_user_stock_idx'),
+            models.Index(fields=['entreprise', 'stock_courant'], name='produit_ent_stock_idx'),
+        ]
+
+
+def numeroter_mouvement_stock(ligne, modele, champ, prefixe):
+    """
+    Renseigne l'identifiant d'une nouvelle entrée (ENT001...) ou sortie (SRT001...) de stock
+    
+    Un identifiant vide est pris dans la séquence du préfixe ; un identifiant
+    saisi est reporté dans la séquence pour ne pas être réattribué.
+    """
+    valeur_initiale = dernier_numero_existant(modele.objects.all(), champ, prefixe)
+    identifiant = getattr(ligne, champ)
+    if not identifiant:
+        numero = prochain_numero(prefixe, valeur_initiale=valeur_initiale)
+        setattr(ligne, champ, f"{prefixe}{numero:03d}")
+    elif ligne._state.adding and identifiant.startswith(prefixe) and identifiant[len(prefixe):].isdigit():
+        avancer_sequence(prefixe, int(identifiant[len(prefixe):]), valeur_initiale=valeur_initiale)
+
+
+def vehicule_de_destination(destination, user_id):
+    """
+    Véhicule de l'utilisateur dont l'immatriculation figure dans la destination d'une sortie
+    
+    Returns:
+        str: Clé du véhicule (la plus longue immatriculation reconnue), None si aucune
+    """
+    from .models import Vehicule
+    if not destination or user_id is None:
+        return None
+    destination = destination.upper()
+    candidats = [
+        (len(immatriculation), pk)
+        for pk, immatriculation in Vehicule.objects.filter(user_id=user_id).values_list('pk', 'immatriculation')
+        if immatriculation and immatriculation.upper() in destination
+    ]
+    return max(candidats)[1] if candidats else None
+
+
+def _appliquer_mouvement(ligne, modele, sens):
+    """
+    Répercute la création ou la modification d'une entrée / sortie sur Produit.stock_courant
+    
+    Args:
+        ligne: EntreeStock ou SortieStock en cours d'enregistrement
+        modele: Classe de la ligne
+        sens: 1 pour une entrée, -1 pour une sortie
+    
+    Returns:
+        int: Stock du produit après le mouvement
+    """
+    # Ancienne version de la ligne (la clé est saisie : une nouvelle ligne a déjà un pk)
+    ancien = modele.objects.filter(pk=ligne.pk).values_list('produit_id', 'quantite').first() if ligne.pk else None
+    ancienne_quantite = 0
+    if ancien:
+        if ancien[0] != ligne.produit_id:
+            # Produit changé : retirer la ligne de l'ancien produit
+            Produit.ajuster_stock(ancien[0], -sens * ancien[1])
+        else:
+            ancienne_quantite = ancien[1]
+    _, stock_apres = Produit.ajuster_stock(ligne.produit_id, sens * (ligne.quantite - ancienne_quantite))
+    ligne.produit.stock_courant = stock_apres
+    return stock_apres
 
 
 class EntreeStock(models.Model):
@@ -77,32 +184,25 @@ class EntreeStock(models.Model):
         return f"{self.id_entree} - {self.produit.nom} ({self.quantite})"
     
     def save(self, *args, **kwargs):
-        # Calculer le stock avant et après
-        if not self.pk:  # Nouvelle entrée
-            self.stock_avant = self.produit.get_stock_actuel()
-            self.stock_apres = self.stock_avant + self.quantite
-        else:  # Mise à jour d'une entrée existante
-            try:
-                ancien_objet = EntreeStock.objects.get(pk=self.pk)
-                stock_actuel = self.produit.get_stock_actuel() - ancien_objet.quantite  # Soustraire l'ancienne quantité
-                self.stock_avant = stock_actuel
-                self.stock_apres = stock_actuel + self.quantite
-            except EntreeStock.DoesNotExist:
-                self.stock_avant = self.produit.get_stock_actuel()
-                self.stock_apres = self.stock_avant + self.quantite
-        
-        # Créer un mouvement de stock
-        super().save(*args, **kwargs)
-        MouvementStock.objects.create(
-            date=self.date,
-            produit=self.produit,
-            type_mouvement='Entrée',
-            quantite=self.quantite,
-            stock_avant=self.stock_avant,
-            stock_apres=self.stock_apres,
-            observations=f"Entrée {self.id_entree} - Fournisseur: {self.fournisseur}",
-            entreprise=getattr(self.produit, 'entreprise', None),
-        )
+        with transaction.atomic():
+            numeroter_mouvement_stock(self, EntreeStock, 'id_entree', 'ENT')
+            
+            # Mettre à jour le solde du produit et en déduire le stock avant / après
+            self.stock_apres = _appliquer_mouvement(self, EntreeStock, 1)
+            self.stock_avant = self.stock_apres - self.quantite
+            
+            # Créer un mouvement de stock
+            super().save(*args, **kwargs)
+            MouvementStock.objects.create(
+                date=self.date,
+                produit=self.produit,
+                type_mouvement='Entrée',
+                quantite=self.quantite,
+                stock_avant=self.stock_avant,
+                stock_apres=self.stock_apres,
+                observations=f"Entrée {self.id_entree} - Fournisseur: {self.fournisseur}",
+                entreprise=getattr(self.produit, 'entreprise', None),
+            )
     
     class Meta:
         verbose_name = "Entrée en stock"
@@ -117,6 +217,8 @@ class SortieStock(models.Model):
     produit = models.ForeignKey(Produit, on_delete=models.CASCADE, related_name='sorties', verbose_name="Produit")
     quantite = models.PositiveIntegerField(validators=[MinValueValidator(1)], verbose_name="Quantité sortie")
     destination = models.CharField(max_length=100, null=True, blank=True, verbose_name="Destination")
+    # Véhicule destinataire (renseigné ou déduit de l'immatriculation citée dans la destination)
+    vehicule = models.ForeignKey('fleet_app.Vehicule', on_delete=models.SET_NULL, null=True, blank=True, related_name='sorties_stock', verbose_name="Véhicule")
     motif = models.CharField(max_length=100, verbose_name="Motif")
     stock_avant = models.PositiveIntegerField(default=0, verbose_name="Stock avant")
     stock_apres = models.PositiveIntegerField(default=0, verbose_name="Stock après")
@@ -139,42 +241,40 @@ class SortieStock(models.Model):
             raise ValidationError(f"Stock insuffisant. Stock actuel: {stock_actuel}, Quantité demandée: {self.quantite}")
     
     def save(self, *args, **kwargs):
-        # Calculer le stock avant et après
-        if not self.pk:  # Nouvelle sortie
-            self.stock_avant = self.produit.get_stock_actuel()
-            self.stock_apres = self.stock_avant - self.quantite
-        else:  # Mise à jour d'une sortie existante
-            try:
-                ancien_objet = SortieStock.objects.get(pk=self.pk)
-                stock_actuel = self.produit.get_stock_actuel() + ancien_objet.quantite  # Ajouter l'ancienne quantité
-                self.stock_avant = stock_actuel
-                self.stock_apres = stock_actuel - self.quantite
-            except SortieStock.DoesNotExist:
-                self.stock_avant = self.produit.get_stock_actuel()
-                self.stock_apres = self.stock_avant - self.quantite
-        
-        # Vérifier qu'il y a assez de stock
-        if self.stock_apres < 0:
-            from django.core.exceptions import ValidationError
-            raise ValidationError(f"Stock insuffisant. Stock actuel: {self.stock_avant}, Quantité demandée: {self.quantite}")
-        
-        # Créer un mouvement de stock
-        super().save(*args, **kwargs)
-        MouvementStock.objects.create(
-            date=self.date,
-            produit=self.produit,
-            type_mouvement='Sortie',
-            quantite=self.quantite,
-            stock_avant=self.stock_avant,
-            stock_apres=self.stock_apres,
-            observations=f"Sortie {self.id_sortie} - Destination: {self.destination}, Motif: {self.motif}",
-            entreprise=getattr(self.produit, 'entreprise', None),
-        )
+        with transaction.atomic():
+            numeroter_mouvement_stock(self, SortieStock, 'id_sortie', 'SRT')
+            if self.vehicule_id is None and self.destination:
+                self.vehicule_id = vehicule_de_destination(self.destination, self.produit.user_id)
+            
+            # Mettre à jour le solde du produit et en déduire le stock avant / après
+            self.stock_apres = _appliquer_mouvement(self, SortieStock, -1)
+            self.stock_avant = self.stock_apres + self.quantite
+            
+            # Vérifier qu'il y a assez de stock (l'exception annule la mise à jour du solde)
+            if self.stock_apres < 0:
+                from django.core.exceptions import ValidationError
+                raise ValidationError(f"Stock insuffisant. Stock actuel: {self.stock_avant}, Quantité demandée: {self.quantite}")
+            
+            # Créer un mouvement de stock
+            super().save(*args, **kwargs)
+            MouvementStock.objects.create(
+                date=self.date,
+                produit=self.produit,
+                type_mouvement='Sortie',
+                quantite=self.quantite,
+                stock_avant=self.stock_avant,
+                stock_apres=self.stock_apres,
+                observations=f"Sortie {self.id_sortie} - Destination: {self.destination}, Motif: {self.motif}",
+                entreprise=getattr(self.produit, 'entreprise', None),
+            )
     
     class Meta:
         verbose_name = "Sortie de stock"
         verbose_name_plural = "Sorties de stock"
         ordering = ['-date', 'id_sortie']
+        indexes = [
+            models.Index(fields=['vehicule', 'date'], name='sortiestock_vehicule_date_idx'),
+        ]
 
 
 class MouvementStock(models.Model):
@@ -193,6 +293,8 @@ class MouvementStock(models.Model):
     stock_apres = models.PositiveIntegerField(default=0, verbose_name="Stock après")
     observations = models.TextField(blank=True, null=True, verbose_name="Observations")
     entreprise = models.ForeignKey(Entreprise, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Entreprise")
+
+    objects = PeriodeQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.date} - {self.produit.nom} - {self.type_mouvement} ({self.quantite})"
@@ -201,6 +303,10 @@ class MouvementStock(models.Model):
         verbose_name = "Mouvement de stock"
         verbose_name_plural = "Mouvements de stock"
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['produit', 'date'], name='mouvement_produit_date_idx'),
+            models.Index(fields=['entreprise', 'date'], name='mouvement_ent_date_idx'),
+        ]
 
 
 # Les modèles Facture et LigneFacture ont été supprimés
@@ -264,18 +370,17 @@ class Commande(models.Model):
         self.save(update_fields=['montant_total', 'montant_final'])
     
     def save(self, *args, **kwargs):
-        # Si c'est une nouvelle commande, générer automatiquement un numéro
-        if not self.numero:
-            date_str = timezone.now().strftime('%Y%m')
-            last_commande = Commande.objects.filter(numero__startswith=f"CMD{date_str}").order_by('numero').last()
-            
-            if last_commande:
-                last_num = int(last_commande.numero[7:])
-                self.numero = f"CMD{date_str}{last_num+1:04d}"
-            else:
-                self.numero = f"CMD{date_str}0001"
-                
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Si c'est une nouvelle commande, prendre le numéro suivant de la séquence du mois
+            if not self.numero:
+                date_str = timezone.now().strftime('%Y%m')
+                numero = prochain_numero(
+                    'CMD', periode=date_str,
+                    valeur_initiale=dernier_numero_existant(Commande.objects.all(), 'numero', f"CMD{date_str}"),
+                )
+                self.numero = f"CMD{date_str}{numero:04d}"
+                    
+            super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Commande"
@@ -0,0 +1,67 @@
+from django.db import models
+from django.contrib.auth.models import User
+from .models_accounts import Entreprise
+from .models import Vehicule
+
+
+class KpiMensuel(models.Model):
+    """
+    Agrégats KPI mensuels par véhicule (table de cumul matérialisée).
+
+    Maintenue de façon incrémentale par les signaux des tables sources
+    (distances, consommations, disponibilités, utilisations, incidents, coûts)
+    et reconstructible via `python manage.py rebuild_kpi_rollups`.
+    Les colonnes `entreprise` et `user` reprennent celles du véhicule pour
+    permettre un filtrage par tenant sans jointure.
+    """
+    entreprise = models.ForeignKey(Entreprise, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Entreprise")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Utilisateur")
+    vehicule = models.ForeignKey(Vehicule, on_delete=models.CASCADE, related_name='kpi_mensuels', verbose_name="Véhicule")
+    annee = models.IntegerField(verbose_name="Année")
+    mois = models.IntegerField(verbose_name="Mois (1-12)")
+
+    # Distance parcourue (DistanceParcourue, par date de fin)
+    distance_km = models.BigIntegerField(default=0, verbose_name="Distance parcourue (km)")
+    nb_distances = models.IntegerField(default=0, verbose_name="Relevés de distance")
+
+    # Carburant (ConsommationCarburant, par date du second plein)
+    litres_carburant = models.FloatField(default=0, verbose_name="Litres ajoutés")
+    distance_carburant = models.BigIntegerField(default=0, verbose_name="Distance entre pleins (km)")
+    somme_consommation_100km = models.FloatField(default=0, verbose_name="Somme des consommations (L/100km)")
+    nb_consommations = models.IntegerField(default=0, verbose_name="Relevés de consommation")
+
+    # Disponibilité (DisponibiliteVehicule, par date de fin)
+    somme_disponibilite = models.FloatField(default=0, verbose_name="Somme des disponibilités (%)")
+    nb_disponibilites = models.IntegerField(default=0, verbose_name="Relevés de disponibilité")
+    heures_disponibles = models.BigIntegerField(default=0, verbose_name="Heures disponibles")
+    heures_totales = models.BigIntegerField(default=0, verbose_name="Heures totales")
+
+    # Utilisation (UtilisationActif par date de fin, UtilisationVehicule par date de début)
+    jours_utilises = models.IntegerField(default=0, verbose_name="Jours utilisés")
+    jours_disponibles = models.IntegerField(default=0, verbose_name="Jours disponibles")
+    nb_utilisations = models.IntegerField(default=0, verbose_name="Utilisations de véhicule")
+
+    # Sécurité (IncidentSecurite, par date de l'incident)
+    nb_incidents = models.IntegerField(default=0, verbose_name="Incidents")
+
+    # Coûts (CoutFonctionnement / CoutFinancier, par date)
+    cout_fonctionnement = models.FloatField(default=0, verbose_name="Coûts de fonctionnement")
+    somme_cout_fonctionnement_km = models.FloatField(default=0, verbose_name="Somme des coûts de fonctionnement par km")
+    nb_couts_fonctionnement = models.IntegerField(default=0, verbose_name="Coûts de fonctionnement saisis")
+    cout_financier = models.FloatField(default=0, verbose_name="Coûts financiers")
+    somme_cout_financier_km = models.FloatField(default=0, verbose_name="Somme des coûts financiers par km")
+    nb_couts_financiers = models.IntegerField(default=0, verbose_name="Coûts financiers saisis")
+
+    date_mise_a_jour = models.DateTimeField(auto_now=True, verbose_name="Dernière mise à jour")
+
+    def __str__(self):
+        return f"KPI {self.mois:02d}/{self.annee} - {self.vehicule_id}"
+
+    class Meta:
+        verbose_name = "KPI mensuel"
+        verbose_name_plural = "KPI mensuels"
+        unique_together = ('vehicule', 'annee', 'mois')
+        indexes = [
+            models.Index(fields=['entreprise', 'annee', 'mois'], name='kpimensuel_ent_periode_idx'),
+            models.Index(fields=['user', 'annee', 'mois'], name='kpimensuel_user_periode_idx'),
+        ]
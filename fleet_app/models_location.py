@@ -4,6 +4,7 @@ from django.utils import timezone
 from .models_accounts import Entreprise
 
 from .models import Vehicule, FournisseurVehicule
+from .utils_periode import PeriodeQuerySet
 
 
 class LocationVehicule(models.Model):
@@ -64,6 +65,8 @@ class FeuillePontageLocation(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
     entreprise = models.ForeignKey(Entreprise, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Entreprise")
 
+    objects = PeriodeQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.location} - {self.date} ({self.statut})"
 
@@ -71,6 +74,11 @@ class FeuillePontageLocation(models.Model):
         verbose_name = "Feuille de pontage"
         verbose_name_plural = "Feuilles de pontage"
         unique_together = ("location", "date")
+        indexes = [
+            models.Index(fields=['location', 'statut', 'date'], name='pontage_loc_statut_date_idx'),
+            models.Index(fields=['user', 'date'], name='pontage_user_date_idx'),
+            models.Index(fields=['entreprise', 'date'], name='pontage_ent_date_idx'),
+        ]
 
 
 class FactureLocation(models.Model):
@@ -99,3 +107,7 @@ class FactureLocation(models.Model):
     class Meta:
         verbose_name = "Facture location"
         verbose_name_plural = "Factures location"
+        constraints = [
+            # Clé des factures mensuelles générées en masse (LOC-{location}-{YYYYMM})
+            models.UniqueConstraint(fields=['user', 'numero'], name='facture_location_user_numero_uniq'),
+        ]
@@ -0,0 +1,72 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class RenduPdf(models.Model):
+    """
+    Génération d'un document PDF hors de la requête HTTP.
+
+    Le HTML est rendu dans la requête (rapide) ; la conversion en PDF est
+    exécutée par un thread ou par `python manage.py traiter_rendus_pdf`.
+    Le fichier est stocké sous MEDIA_ROOT/pdf_cache/<empreinte>.pdf où
+    l'empreinte est un hash du contenu : un document dont les données n'ont
+    pas changé est resservi sans nouveau rendu.
+    Un lot (moteur 'fusion') est composé de fragments rendus séparément
+    puis concaténés ; `type_lot` et `parametres` décrivent ses fragments.
+    """
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ]
+    MOTEUR_CHOICES = [
+        ('xhtml2pdf', 'xhtml2pdf'),
+        ('weasyprint', 'WeasyPrint'),
+        ('fusion', 'Fusion de fragments'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rendus_pdf', verbose_name="Utilisateur")
+    empreinte = models.CharField(max_length=64, verbose_name="Empreinte du contenu")
+    nom_fichier = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    moteur = models.CharField(max_length=20, choices=MOTEUR_CHOICES, default='xhtml2pdf', verbose_name="Moteur de rendu")
+    html = models.TextField(blank=True, default='', verbose_name="HTML à convertir")
+    type_lot = models.CharField(max_length=50, blank=True, default='', verbose_name="Type de lot")
+    parametres = models.JSONField(default=dict, blank=True, verbose_name="Paramètres du lot")
+    base_url = models.CharField(max_length=500, blank=True, default='', verbose_name="URL de base")
+    fichier = models.FileField(upload_to='pdf_cache/', blank=True, verbose_name="Fichier PDF")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente', verbose_name="Statut")
+    message = models.TextField(blank=True, default='', verbose_name="Message")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin du rendu")
+
+    class Meta:
+        db_table = 'RendusPdf'
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['user', 'empreinte'], name='rendupdf_user_empreinte_idx'),
+            models.Index(fields=['statut', 'date_creation'], name='rendupdf_statut_idx'),
+        ]
+        verbose_name = 'Rendu PDF'
+        verbose_name_plural = 'Rendus PDF'
+
+    def __str__(self):
+        return f"{self.nom_fichier} - {self.get_statut_display()}"
+
+    @property
+    def fichier_disponible(self):
+        """Le PDF est rendu et toujours présent sur le disque"""
+        return self.statut == 'termine' and bool(self.fichier) and self.fichier.storage.exists(self.fichier.name)
+
+    def as_dict(self):
+        """Représentation JSON pour le suivi du rendu"""
+        from django.urls import reverse
+        return {
+            'id': self.pk,
+            'statut': self.statut,
+            'statut_display': self.get_statut_display(),
+            'nom_fichier': self.nom_fichier,
+            'message': self.message,
+            'url_statut': reverse('fleet_app:rendu_pdf_status', args=[self.pk]),
+            'url_fichier': reverse('fleet_app:rendu_pdf_telecharger', args=[self.pk]) if self.statut == 'termine' else None,
+        }
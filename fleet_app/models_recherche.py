@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from .models_accounts import Entreprise
+
+
+class DocumentRecherche(models.Model):
+    """
+    Document dénormalisé de l'index de recherche plein texte.
+
+    Une ligne par objet indexé (véhicule, chauffeur, feuille de route, alerte,
+    fournisseur, location), portée par le tenant de l'objet. `contenu` regroupe
+    les champs cherchables normalisés (minuscules, sans accents) ; il est indexé
+    par une table FTS5 sous SQLite ou par une colonne tsvector + GIN sous
+    PostgreSQL (voir `utils_recherche.installer_index_plein_texte`). Les lignes
+    sont tenues à jour par les signaux de `signals.py`.
+    """
+    TYPE_CHOICES = [
+        ('vehicule', 'Véhicule'),
+        ('chauffeur', 'Chauffeur'),
+        ('feuille_route', 'Feuille de route'),
+        ('alerte', 'Alerte'),
+        ('fournisseur', 'Fournisseur'),
+        ('location', 'Location'),
+    ]
+
+    type_objet = models.CharField(max_length=20, choices=TYPE_CHOICES, verbose_name="Type d'objet")
+    objet_id = models.CharField(max_length=50, verbose_name="Identifiant de l'objet")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Utilisateur")
+    entreprise = models.ForeignKey(Entreprise, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Entreprise")
+    titre = models.CharField(max_length=255, verbose_name="Titre")
+    contenu = models.TextField(verbose_name="Contenu indexé")
+    statut = models.CharField(max_length=50, blank=True, default='', verbose_name="Statut")
+    categorie = models.CharField(max_length=50, blank=True, default='', verbose_name="Catégorie")
+    niveau = models.CharField(max_length=20, blank=True, default='', verbose_name="Niveau")
+    date = models.DateField(null=True, blank=True, verbose_name="Date")
+    url = models.CharField(max_length=255, blank=True, default='', verbose_name="URL")
+    donnees = models.JSONField(default=dict, blank=True, verbose_name="Données d'affichage")
+    date_modification = models.DateTimeField(auto_now=True, verbose_name="Dernière indexation")
+
+    class Meta:
+        db_table = 'SearchDocument'
+        constraints = [
+            models.UniqueConstraint(fields=['type_objet', 'objet_id'], name='searchdocument_objet_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'type_objet'], name='searchdocument_user_type_idx'),
+            models.Index(fields=['entreprise', 'type_objet'], name='searchdocument_ent_type_idx'),
+        ]
+        verbose_name = 'Document de recherche'
+        verbose_name_plural = 'Documents de recherche'
+
+    def __str__(self):
+        return f"{self.get_type_objet_display()} {self.objet_id} - {self.titre}"
+
+    def en_resultat(self):
+        """Résultat JSON de `recherche_dynamique`"""
+        return {
+            'id': self.objet_id,
+            'text': self.titre,
+            'url': self.url,
+            'type': self.get_type_objet_display(),
+            **self.donnees,
+        }
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class SequenceNumerotation(models.Model):
+    """
+    Compteur de numérotation des documents (factures, commandes, mouvements de stock).
+
+    Une ligne par (portée, préfixe, période) : la portée identifie le tenant
+    ('entreprise:3', 'user:5') ou vaut '' pour une numérotation globale (numéros
+    utilisés comme clé primaire). Les numéros sont alloués par
+    `utils_numerotation.allouer_numeros` sous verrou de ligne, dans la
+    transaction qui enregistre le document : pas de doublon entre écrivains
+    concurrents et pas de trou si l'enregistrement est annulé.
+    """
+    portee = models.CharField(max_length=40, blank=True, default='', verbose_name="Portée (tenant)")
+    prefixe = models.CharField(max_length=20, verbose_name="Préfixe")
+    periode = models.CharField(max_length=10, blank=True, default='', verbose_name="Période")
+    dernier_numero = models.PositiveBigIntegerField(default=0, verbose_name="Dernier numéro attribué")
+    date_modification = models.DateTimeField(auto_now=True, verbose_name="Dernière allocation")
+
+    class Meta:
+        db_table = 'NumberSequence'
+        constraints = [
+            models.UniqueConstraint(fields=['portee', 'prefixe', 'periode'], name='sequence_portee_prefixe_periode_uniq'),
+        ]
+        verbose_name = 'Séquence de numérotation'
+        verbose_name_plural = 'Séquences de numérotation'
+
+    def __str__(self):
+        portee = f"{self.portee} " if self.portee else ""
+        return f"{portee}{self.prefixe}{self.periode} → {self.dernier_numero}"
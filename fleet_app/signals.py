@@ -6,9 +6,14 @@ lors de chaque saisie ou modification
 
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from collections import Counter
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import datetime
+import threading
 
 from .models_entreprise import (
     HeureSupplementaire, 
@@ -72,24 +77,178 @@ def recalculer_avant_sauvegarde(sender, instance, **kwargs):
         # Log du calcul
         print(f"🔢 CALC: {instance.employe.matricule} - {instance.duree}h × {instance.total_a_payer} = {montant_calcule}")
 
+# ========== RECALCUL INCRÉMENTAL DES PAIES (POINTAGE) ==========
+#
+# Un pointage ne modifie qu'un jour : au lieu de recompter tout le mois à chaque
+# sauvegarde, l'ancien statut est retiré et le nouveau ajouté aux compteurs de la
+# paie (UPDATE ... SET col = col ± 1). La resynchronisation complète de la paie
+# (heures supplémentaires, salaire) est différée dans un ensemble de couples
+# (employé, mois) « à recalculer », traité une seule fois au commit.
+
+_recalculs_paie = threading.local()
+
+
+def colonnes_paie_pour_statut(statut):
+    """
+    Retourne les colonnes de PaieEmploye comptant un jour de ce statut.
+
+    Mêmes règles que le recomptage complet de `mettre_a_jour_colonnes_presence_paie`
+    (un dimanche travaillé compte aussi comme présence).
+    """
+    statut = (statut or '').upper()
+    if statut == 'P':  # Présent
+        return ('jours_presence',)
+    if statut == 'A':  # Absent
+        return ('absences',)
+    if 'REPOS' in statut or statut == 'R':  # Repos
+        return ('jours_repos',)
+    if 'MALADIE' in statut or statut == 'M':  # Maladie (pas de colonne dédiée)
+        return ()
+    if 'M.PAYER' in statut or 'MPAYER' in statut:  # M.Payer (pas de colonne dédiée)
+        return ()
+    if 'FERIE' in statut or 'FÉRIÉ' in statut or statut == 'F':  # Férié
+        return ('conge',)
+    if 'DIMANCHE' in statut or 'SUNDAY' in statut or 'DIM' in statut:  # Dimanche travaillé
+        return ('dimanches', 'jours_presence')
+    return ()
+
+
+def appliquer_delta_presence(employe, jour, statut, sens):
+    """
+    Ajoute (sens=1) ou retire (sens=-1) un jour de pointage des compteurs de la paie.
+
+    Si la paie du mois n'existe pas encore, elle est créée par un recomptage complet
+    (qui inclut déjà la ligne sauvegardée).
+
+    Args:
+        employe: Instance de l'employé
+        jour: Date du pointage
+        statut: Statut du pointage
+        sens: 1 pour un ajout, -1 pour un retrait
+
+    Returns:
+        bool: True si la paie a été recomptée (elle reflète alors déjà l'état en
+        base : aucun autre delta ne doit être appliqué pour ce mois)
+    """
+    colonnes = Counter(colonnes_paie_pour_statut(statut))
+    paies = PaieEmploye.objects.filter(employe=employe, mois=jour.month, annee=jour.year)
+    if not colonnes:
+        if not paies.exists():
+            mettre_a_jour_colonnes_presence_paie(employe, jour.month, jour.year)
+            return True
+        return False
+    if not paies.update(**{
+        colonne: Coalesce(F(colonne), 0) + sens * nombre for colonne, nombre in colonnes.items()
+    }):
+        mettre_a_jour_colonnes_presence_paie(employe, jour.month, jour.year)
+        return True
+    return False
+
+
+def marquer_paie_a_recalculer(employe, mois, annee):
+    """
+    Programme la resynchronisation de la paie d'un employé pour un mois.
+
+    Dans un bloc `recalcul_paie_differe()`, chaque (employé, mois) n'est traité
+    qu'une fois à la sortie du bloc ; sinon le recalcul a lieu au commit.
+    """
+    en_attente = getattr(_recalculs_paie, 'en_attente', None)
+    if en_attente is not None:
+        en_attente[(employe.pk, mois, annee)] = employe
+        return
+    transaction.on_commit(lambda: executer_recalculs_paie({(employe.pk, mois, annee): employe}))
+
+
+def executer_recalculs_paie(en_attente):
+    """
+    Resynchronise une fois chaque paie (employé, mois) marquée, par mois
+    (requêtes groupées pour tous les employés touchés, voir utils_paie_sync)
+    """
+    from .utils_paie_sync import resynchroniser_paies
+    
+    employes_par_mois = {}
+    for (_, mois, annee), employe in en_attente.items():
+        employes_par_mois.setdefault((mois, annee), []).append(employe)
+    for (mois, annee), employes in employes_par_mois.items():
+        try:
+            resynchroniser_paies(employes, mois, annee)
+        except Exception as e:
+            print(f"❌ SYNC POINTAGE ERROR: {e}")
+
+
+@contextmanager
+def recalcul_paie_differe():
+    """
+    Regroupe les pointages d'un bloc dans une transaction et ne resynchronise
+    chaque paie (employé, mois) touchée qu'une seule fois, après le commit.
+
+    Usage:
+        with recalcul_paie_differe():
+            for ...:
+                PresenceJournaliere.objects.update_or_create(...)
+    """
+    if getattr(_recalculs_paie, 'en_attente', None) is not None:
+        # Bloc imbriqué : le bloc englobant se charge du recalcul
+        yield
+        return
+    en_attente = {}
+    _recalculs_paie.en_attente = en_attente
+    try:
+        with transaction.atomic():
+            yield
+            transaction.on_commit(lambda: executer_recalculs_paie(en_attente))
+            _recalculs_paie.en_attente = None
+    finally:
+        _recalculs_paie.en_attente = None
+
+
+@receiver(pre_save, sender=PresenceJournaliere)
+def memoriser_presence_precedente(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise le pointage enregistré en base avant modification
+    pour retirer l'ancien statut des compteurs de la paie
+    """
+    instance._presence_precedente = None
+    if raw or instance.pk is None:
+        return
+    instance._presence_precedente = PresenceJournaliere.objects.filter(pk=instance.pk).values_list(
+        'employe_id', 'date', 'statut'
+    ).first()
+
+
 @receiver(post_save, sender=PresenceJournaliere)
-def synchroniser_apres_presence_save(sender, instance, created, **kwargs):
+def synchroniser_apres_presence_save(sender, instance, created, raw=False, **kwargs):
     """
     Synchronisation automatique après modification des présences
-    Met à jour AUTOMATIQUEMENT les colonnes de présence dans les paies lors du pointage
+    Met à jour les compteurs de présence de la paie par différence (ancien/nouveau statut)
     """
+    if raw:
+        return
     action = "créée" if created else "modifiée"
     print(f"🔄 SYNC POINTAGE: Présence {action} pour {instance.employe.matricule} - {instance.date} - Statut: {instance.statut}")
     
     try:
-        # Synchroniser immédiatement les colonnes de présence dans les paies
-        mettre_a_jour_colonnes_presence_paie(instance.employe, instance.date.month, instance.date.year)
-        
-        # Synchroniser aussi les autres données de paie
-        synchroniser_paie_employe(instance.employe, instance.date.month, instance.date.year)
-        
-        # Log de confirmation détaillé
-        print(f"✅ SYNC POINTAGE: Colonnes de présence mises à jour automatiquement pour {instance.employe.matricule}")
+        precedente = getattr(instance, '_presence_precedente', None)
+        if precedente == (instance.employe_id, instance.date, instance.statut):
+            return
+        
+        recompte = False
+        if precedente:
+            ancien_employe_id, ancienne_date, ancien_statut = precedente
+            ancien_employe = instance.employe if ancien_employe_id == instance.employe_id else Employe.objects.get(pk=ancien_employe_id)
+            meme_paie = (ancien_employe_id, ancienne_date.year, ancienne_date.month) == (
+                instance.employe_id, instance.date.year, instance.date.month
+            )
+            # Sans paie pour ce mois, le retrait la crée par un recomptage qui inclut déjà le nouveau statut
+            recompte = appliquer_delta_presence(ancien_employe, ancienne_date, ancien_statut, -1) and meme_paie
+            if not meme_paie:
+                marquer_paie_a_recalculer(ancien_employe, ancienne_date.month, ancienne_date.year)
+        
+        if not recompte:
+            appliquer_delta_presence(instance.employe, instance.date, instance.statut, 1)
+        marquer_paie_a_recalculer(instance.employe, instance.date.month, instance.date.year)
+        
+        print(f"✅ SYNC POINTAGE: Compteurs de présence mis à jour pour {instance.employe.matricule}")
         
     except Exception as e:
         print(f"❌ SYNC POINTAGE ERROR: {e}")
@@ -98,18 +257,15 @@ def synchroniser_apres_presence_save(sender, instance, created, **kwargs):
 def synchroniser_apres_presence_delete(sender, instance, **kwargs):
     """
     Synchronisation automatique après suppression d'une présence
-    Met à jour les colonnes de présence dans les paies
+    Retire le pointage supprimé des compteurs de présence de la paie
     """
     print(f"🔄 SYNC POINTAGE: Présence supprimée pour {instance.employe.matricule} - {instance.date}")
     
     try:
-        # Mettre à jour les colonnes de présence après suppression
-        mettre_a_jour_colonnes_presence_paie(instance.employe, instance.date.month, instance.date.year)
-        
-        # Synchroniser les autres données de paie
-        synchroniser_paie_employe(instance.employe, instance.date.month, instance.date.year)
+        appliquer_delta_presence(instance.employe, instance.date, instance.statut, -1)
+        marquer_paie_a_recalculer(instance.employe, instance.date.month, instance.date.year)
         
-        print(f"✅ SYNC POINTAGE: Colonnes de présence mises à jour après suppression pour {instance.employe.matricule}")
+        print(f"✅ SYNC POINTAGE: Compteurs de présence mis à jour après suppression pour {instance.employe.matricule}")
         
     except Exception as e:
         print(f"❌ SYNC POINTAGE ERROR: {e}")
@@ -121,8 +277,7 @@ def mettre_a_jour_colonnes_presence_paie(employe, mois, annee):
     """
     try:
         from .models_entreprise import PaieEmploye, PresenceJournaliere
-        from django.db.models import Q
-        from datetime import datetime
+        from django.db.models import Count
         import calendar
         
         print(f"🔢 CALCUL POINTAGE: Mise à jour des colonnes de présence pour {employe.matricule} - {mois}/{annee}")
@@ -136,43 +291,24 @@ def mettre_a_jour_colonnes_presence_paie(employe, mois, annee):
         )
         
         # Récupérer toutes les présences du mois
-        presences = PresenceJournaliere.objects.filter(
-            employe=employe,
-            date__month=mois,
-            date__year=annee
+        presences = PresenceJournaliere.objects.for_month(mois, annee).filter(
+            employe=employe
         )
         
         # Calculer le total de jours du mois
         total_jours_mois = calendar.monthrange(annee, mois)[1]
         
-        # Initialiser les compteurs
-        jours_presence = 0
-        jours_absents = 0
-        jours_repos = 0
-        jours_maladies = 0
-        jours_m_payer = 0
-        jours_ferie = 0
-        dimanches_travailles = 0
-        
-        # Compter chaque type de présence selon les statuts
-        for presence in presences:
-            statut = presence.statut.upper()
-            
-            if statut == 'P':  # Présent
-                jours_presence += 1
-            elif statut == 'A':  # Absent
-                jours_absents += 1
-            elif 'REPOS' in statut or statut == 'R':  # Repos
-                jours_repos += 1
-            elif 'MALADIE' in statut or statut == 'M':  # Maladie
-                jours_maladies += 1
-            elif 'M.PAYER' in statut or 'MPAYER' in statut:  # M.Payer
-                jours_m_payer += 1
-            elif 'FERIE' in statut or 'FÉRIÉ' in statut or statut == 'F':  # Férié
-                jours_ferie += 1
-            elif 'DIMANCHE' in statut or 'SUNDAY' in statut or 'DIM' in statut:  # Dimanche travaillé
-                dimanches_travailles += 1
-                jours_presence += 1  # Un dimanche travaillé compte aussi comme présence
+        # Compter chaque type de présence selon les statuts (un GROUP BY statut)
+        compteurs = Counter()
+        for ligne in presences.values('statut').annotate(nombre=Count('id')).order_by():
+            for colonne in colonnes_paie_pour_statut(ligne['statut']):
+                compteurs[colonne] += ligne['nombre']
+        
+        jours_presence = compteurs['jours_presence']
+        jours_absents = compteurs['absences']
+        jours_repos = compteurs['jours_repos']
+        jours_ferie = compteurs['conge']
+        dimanches_travailles = compteurs['dimanches']
         
         # Mettre à jour les champs de la paie (utiliser les bons noms d'attributs)
         paie.jours_mois = total_jours_mois
@@ -200,6 +336,55 @@ def mettre_a_jour_colonnes_presence_paie(employe, mois, annee):
         print(f"❌ ERROR dans mettre_a_jour_colonnes_presence_paie: {e}")
         raise
 
+# Colonnes de présence de PaieEmploye alimentées par le pointage
+COLONNES_PRESENCE_PAIE = ['jours_presence', 'absences', 'jours_repos', 'dimanches', 'conge']
+
+
+def mettre_a_jour_colonnes_presence_paies(employes, mois, annee):
+    """
+    Version ensembliste de `mettre_a_jour_colonnes_presence_paie` pour plusieurs employés.
+
+    Un GROUP BY (employé, statut) pour le mois, puis mise à jour / création en masse
+    des paies : le nombre de requêtes ne dépend pas du nombre d'employés.
+    
+    Args:
+        employes: Liste d'instances d'employés
+        mois: Mois (1-12)
+        annee: Année
+    """
+    import calendar
+    from collections import defaultdict
+    from django.db.models import Count
+    
+    compteurs = defaultdict(Counter)
+    presences = PresenceJournaliere.objects.for_month(mois, annee).filter(
+        employe__in=employes
+    ).values('employe_id', 'statut').annotate(nombre=Count('id')).order_by()
+    for ligne in presences:
+        for colonne in colonnes_paie_pour_statut(ligne['statut']):
+            compteurs[ligne['employe_id']][colonne] += ligne['nombre']
+    
+    total_jours_mois = calendar.monthrange(annee, mois)[1]
+    existantes = {
+        paie.employe_id: paie
+        for paie in PaieEmploye.objects.filter(employe__in=employes, mois=mois, annee=annee)
+    }
+    a_mettre_a_jour, a_creer = [], []
+    for employe in employes:
+        paie = existantes.get(employe.pk)
+        if paie is None:
+            paie = PaieEmploye(employe=employe, mois=mois, annee=annee, salaire_base=0)
+            a_creer.append(paie)
+        else:
+            a_mettre_a_jour.append(paie)
+        paie.jours_mois = total_jours_mois
+        for colonne in COLONNES_PRESENCE_PAIE:
+            setattr(paie, colonne, compteurs[employe.pk][colonne])
+    
+    PaieEmploye.objects.bulk_update(a_mettre_a_jour, COLONNES_PRESENCE_PAIE + ['jours_mois'], batch_size=500)
+    PaieEmploye.objects.bulk_create(a_creer, batch_size=500)
+    print(f"✅ COLONNES PRÉSENCE MISES À JOUR: {len(a_mettre_a_jour)} paies mises à jour, {len(a_creer)} créées ({mois}/{annee})")
+
 def synchroniser_paie_employe(employe, mois, annee):
     """
     Fonction utilitaire pour synchroniser les données de paie d'un employé
@@ -335,6 +520,12 @@ def synchroniser_apres_employe_save(sender, instance, created, **kwargs):
         
         print(f"✅ SYNC EMPLOYE: {paies.count()} paies mises à jour pour {instance.matricule}")
         
+        # Programmer la synchronisation des paies du mois en cours (création incluse)
+        if instance.statut == 'Actif' and instance.user_id:
+            from .utils_paie_sync import demander_synchronisation_paies
+            maintenant = datetime.now()
+            demander_synchronisation_paies(instance.user, maintenant.month, maintenant.year, declencheur='donnees')
+        
     except Exception as e:
         print(f"❌ SYNC EMPLOYE ERROR: {e}")
 
@@ -421,13 +612,13 @@ def synchroniser_module_complet(user, mois=None, annee=None):
     
     try:
         # 1. Synchroniser tous les employés
-        employes = Employe.objects.filter(user=user)
-        print(f"👥 SYNC: {employes.count()} employés à synchroniser")
+        employes = list(Employe.objects.filter(user=user))
+        print(f"👥 SYNC: {len(employes)} employés à synchroniser")
+        
+        # 2. Synchroniser les présences -> paies (calcul groupé pour tous les employés)
+        mettre_a_jour_colonnes_presence_paies(employes, mois, annee)
         
         for employe in employes:
-            # 2. Synchroniser les présences -> paies
-            mettre_a_jour_colonnes_presence_paie(employe, mois, annee)
-            
             # 3. Synchroniser les heures supplémentaires -> paies
             synchroniser_paie_employe(employe, mois, annee)
             
@@ -475,10 +666,8 @@ def verifier_coherence_donnees(user, mois=None, annee=None):
             # Vérifier cohérence paies/présences
             paie = PaieEmploye.objects.filter(employe=employe, mois=mois, annee=annee).first()
             if paie:
-                presences = PresenceJournaliere.objects.filter(
-                    employe=employe, 
-                    date__month=mois, 
-                    date__year=annee
+                presences = PresenceJournaliere.objects.for_month(mois, annee).filter(
+                    employe=employe
                 ).count()
                 
                 # Utiliser le bon nom d'attribut : jours_presence au lieu de jours_travailles
@@ -496,3 +685,143 @@ def verifier_coherence_donnees(user, mois=None, annee=None):
         print(f"❌ VERIFICATION ERROR: {e}")
         rapport['statut'] = 'ERREUR'
         return rapport
+
+# ========== CUMULS KPI MENSUELS ==========
+
+from .models import Vehicule
+from .utils_kpi_mensuel import SOURCES_KPI, mettre_a_jour_kpi_mensuel, synchroniser_tenant_kpi
+
+
+def _bucket_kpi(sender, instance):
+    """Retourne (vehicule_id, date de rattachement) d'une ligne source KPI."""
+    champ_date = SOURCES_KPI[sender][0]
+    return instance.vehicule_id, getattr(instance, champ_date)
+
+
+def memoriser_bucket_kpi_precedent(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise le (véhicule, date) enregistré en base avant modification,
+    pour ré-agréger aussi l'ancien mois si la ligne change de mois ou de véhicule.
+    """
+    instance._kpi_bucket_precedent = None
+    if raw or instance.pk is None:
+        return
+    champ_date = SOURCES_KPI[sender][0]
+    instance._kpi_bucket_precedent = sender.objects.filter(pk=instance.pk).values_list(
+        'vehicule_id', champ_date
+    ).first()
+
+
+def mettre_a_jour_kpi_apres_save(sender, instance, raw=False, **kwargs):
+    """Met à jour le cumul KPI du mois de la ligne (et de l'ancien mois si déplacée)."""
+    if raw:
+        return
+    try:
+        vehicule_id, jour = _bucket_kpi(sender, instance)
+        mettre_a_jour_kpi_mensuel(sender, vehicule_id, jour)
+        precedent = getattr(instance, '_kpi_bucket_precedent', None)
+        if precedent and precedent[1] is not None:
+            ancien_vehicule_id, ancien_jour = precedent
+            if (ancien_vehicule_id, ancien_jour.year, ancien_jour.month) != (
+                vehicule_id, jour and jour.year, jour and jour.month
+            ):
+                mettre_a_jour_kpi_mensuel(sender, ancien_vehicule_id, ancien_jour)
+    except Exception as e:
+        print(f"❌ KPI ERROR: {e}")
+
+
+def mettre_a_jour_kpi_apres_delete(sender, instance, **kwargs):
+    """Retire la ligne supprimée du cumul KPI de son mois."""
+    try:
+        vehicule_id, jour = _bucket_kpi(sender, instance)
+        mettre_a_jour_kpi_mensuel(sender, vehicule_id, jour)
+    except Exception as e:
+        print(f"❌ KPI ERROR: {e}")
+
+
+for _source_kpi in SOURCES_KPI:
+    pre_save.connect(memoriser_bucket_kpi_precedent, sender=_source_kpi, dispatch_uid=f'kpi_pre_save_{_source_kpi.__name__}')
+    post_save.connect(mettre_a_jour_kpi_apres_save, sender=_source_kpi, dispatch_uid=f'kpi_post_save_{_source_kpi.__name__}')
+    post_delete.connect(mettre_a_jour_kpi_apres_delete, sender=_source_kpi, dispatch_uid=f'kpi_post_delete_{_source_kpi.__name__}')
+
+
+@receiver(post_save, sender=Vehicule)
+def synchroniser_tenant_kpi_apres_vehicule_save(sender, instance, created, raw=False, **kwargs):
+    """Garde les colonnes tenant du cumul KPI alignées sur le véhicule."""
+    if created or raw:
+        return
+    synchroniser_tenant_kpi(instance)
+
+# ========== SOLDE DE STOCK DES PRODUITS ==========
+
+from .models_inventaire import Produit, EntreeStock, SortieStock
+
+
+@receiver(post_delete, sender=EntreeStock)
+def retirer_entree_du_stock(sender, instance, **kwargs):
+    """Retire du solde du produit la quantité d'une entrée supprimée."""
+    Produit.ajuster_stock(instance.produit_id, -instance.quantite)
+
+
+@receiver(post_delete, sender=SortieStock)
+def restituer_sortie_au_stock(sender, instance, **kwargs):
+    """Restitue au solde du produit la quantité d'une sortie supprimée."""
+    Produit.ajuster_stock(instance.produit_id, instance.quantite)
+
+# ========== INDEX DE RECHERCHE PLEIN TEXTE ==========
+
+from .utils_recherche import (
+    CHAMPS_RECOPIES, TYPE_PAR_MODELE, desindexer_objet, indexer_objet, memoriser_champs_recopies,
+)
+
+
+def indexer_apres_enregistrement(sender, instance, created=False, raw=False, **kwargs):
+    """Met à jour le document de recherche de l'objet et ceux qui recopient ses champs."""
+    if raw:
+        return
+    indexer_objet(instance, created)
+
+
+def desindexer_apres_suppression(sender, instance, **kwargs):
+    """Retire de l'index le document d'un objet supprimé."""
+    desindexer_objet(instance)
+
+
+for _source_recherche, _type_recherche in TYPE_PAR_MODELE.items():
+    if _type_recherche in CHAMPS_RECOPIES:
+        pre_save.connect(memoriser_champs_recopies, sender=_source_recherche,
+                         dispatch_uid=f'recherche_pre_save_{_source_recherche.__name__}')
+    post_save.connect(indexer_apres_enregistrement, sender=_source_recherche,
+                      dispatch_uid=f'recherche_post_save_{_source_recherche.__name__}')
+    post_delete.connect(desindexer_apres_suppression, sender=_source_recherche,
+                        dispatch_uid=f'recherche_post_delete_{_source_recherche.__name__}')
+
+# ========== CACHE PAR TENANT ==========
+
+from .models import FournisseurVehicule, GalleryImage
+from .models_alertes import Alerte
+from .models_entreprise import PeseeCamion
+from .models_location import LocationVehicule, FeuillePontageLocation
+from .utils_alertes import ESPACE_CACHE as ESPACE_COMPTEURS_ALERTES
+from .utils_cache import connecter_invalidations, enregistrer_invalidation
+from .utils_dashboard_kpi import ESPACE_CACHE as ESPACE_KPI_DASHBOARD
+from .utils_locations_metrics import ESPACE_CACHE as ESPACE_METRIQUES_LOCATIONS
+from .utils_pages import ESPACE_GALERIE, ESPACE_LOCATIONS as ESPACE_PAGES_LOCATIONS
+from .utils_pesees import ESPACE_CACHE as ESPACE_PESEES
+from .utils_stock import ESPACE_CACHE as ESPACE_STOCK
+
+# Modèles dont l'enregistrement ou la suppression périme chaque espace de cache du tenant
+enregistrer_invalidation(ESPACE_METRIQUES_LOCATIONS, LocationVehicule, FeuillePontageLocation)
+enregistrer_invalidation(ESPACE_KPI_DASHBOARD, Vehicule)
+enregistrer_invalidation(ESPACE_KPI_DASHBOARD, *SOURCES_KPI, via='vehicule')
+enregistrer_invalidation(ESPACE_COMPTEURS_ALERTES, Vehicule)
+enregistrer_invalidation(ESPACE_COMPTEURS_ALERTES, Alerte, via='vehicule')
+enregistrer_invalidation(ESPACE_STOCK, Produit)
+enregistrer_invalidation(ESPACE_STOCK, EntreeStock, SortieStock, via='produit')
+enregistrer_invalidation(ESPACE_PESEES, PeseeCamion)
+# Pages publiques (voir utils_pages): versions du tenant et globale (accueil public, galerie)
+enregistrer_invalidation(ESPACE_GALERIE, GalleryImage, globale=True)
+enregistrer_invalidation(ESPACE_PAGES_LOCATIONS, LocationVehicule, FeuillePontageLocation, Vehicule,
+                         FournisseurVehicule, globale=True)
+
+connecter_invalidations()
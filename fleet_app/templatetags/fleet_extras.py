@@ -13,6 +13,14 @@ def subtract(value, arg):
         except (ValueError, TypeError):
             return ''
 
+@register.filter
+def split(value, separateur):
+    """
+    Découpe une chaîne en liste
+    Usage: {% for x in "a,b"|split:"," %}
+    """
+    return str(value).split(separateur)
+
 @register.filter
 def lookup(dictionary, key):
     """
@@ -22,3 +30,16 @@ def lookup(dictionary, key):
     if dictionary is None:
         return None
     return dictionary.get(key)
+
+@register.simple_tag(takes_context=True)
+def url_curseur(context, curseur, param='curseur'):
+    """
+    Querystring courante avec le jeton de pagination remplacé (voir utils_pagination)
+    Usage: <a href="{% url_curseur page.next_cursor %}">
+    """
+    params = context['request'].GET.copy()
+    params.pop('page', None)
+    params.pop(param, None)
+    if curseur:
+        params[param] = curseur
+    return '?' + params.urlencode()
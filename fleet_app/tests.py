@@ -1,3 +1,1303 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import date, time, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Vehicule, DistanceParcourue, ConsommationCarburant, DisponibiliteVehicule,
+    UtilisationActif, IncidentSecurite, CoutFonctionnement, CoutFinancier, GalleryImage,
+)
+from .models_accounts import Entreprise, Profil
+from .models_alertes import Alerte
+from .models_inventaire import EntreeStock, Produit, SortieStock
+from .models_entreprise import (
+    Employe, HeureSupplementaire, PaieEmploye, PeseeCamion, PresenceJournaliere, SynchronisationPaieJob,
+)
+from .models_facturation import Facture
+from .models_pdf import RenduPdf
+from .models_recherche import DocumentRecherche
+from .models_sequences import SequenceNumerotation
+from .models_kpi import KpiMensuel
+from .models_location import FactureLocation, FeuillePontageLocation, LocationVehicule
+from .signals import mettre_a_jour_colonnes_presence_paie, recalcul_paie_differe
+from .utils_dashboard_kpi import calculer_kpi_dashboard
+from .utils_explain import analyser_requetes
+from .utils.decorators import _MODEL_FIELDS
+from .utils_alertes import alertes_actives_tenant, compteurs_alertes
+from .utils_cache import REGISTRE_INVALIDATION, en_cache, invalider, versions
+from .utils_kpi_mensuel import CHAMPS_CUMUL, kpi_totaux
+from .utils_numerotation import allouer_numeros, numeroter
+from .utils_pagination import CurseurPaginator, ordre_curseur, paginer_selon_ordre
+from .utils_paie_sync import demander_synchronisation_paies, traiter_jobs_en_attente
+from .utils_periode import month_range
+from .utils_pdf import traiter_rendus_en_attente
+from .utils_presence_paie import calculer_statistiques_presence_batch
+from .utils_recherche import installer_index_plein_texte, rechercher, supprimer_index_plein_texte
+from .utils_typeahead import _caches_tenants, cle_typeahead
+
+
+def creer_vehicule(user, numero, **kwargs):
+    valeurs = {
+        'id_vehicule': f"V{numero:03d}",
+        'immatriculation': f"RC-{numero:04d}",
+        'marque': 'Toyota',
+        'modele': 'Hilux',
+        'type_moteur': 'Diesel',
+        'categorie': '4x4',
+        'statut_actuel': 'Actif',
+        'user': user,
+    }
+    valeurs.update(kwargs)
+    return Vehicule.objects.create(**valeurs)
+
+
+class DashboardKpiTests(TestCase):
+    """Régression du nombre de requêtes du moteur KPI du tableau de bord."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('gestionnaire', password='secret')
+        autre = User.objects.create_user('autre', password='secret')
+        jour = date(2025, 1, 15)
+        statuts = ['Actif', 'Maintenance', 'Hors Service']
+        for numero in range(12):
+            v = creer_vehicule(cls.user, numero, statut_actuel=statuts[numero % 3])
+            DistanceParcourue.objects.create(
+                vehicule=v, date_debut=jour, km_debut=0, date_fin=jour, km_fin=1000 * (numero + 1),
+                distance_parcourue=1000 * (numero + 1), type_moteur='Diesel', user=cls.user,
+            )
+            ConsommationCarburant.objects.create(
+                vehicule=v, date_plein1=jour, km_plein1=0, date_plein2=jour, km_plein2=500,
+                litres_ajoutes=40, distance_parcourue=500, consommation_100km=5 + numero, user=cls.user,
+            )
+            DisponibiliteVehicule.objects.create(
+                vehicule=v, date_debut=jour, date_fin=jour, heures_disponibles=20, heures_totales=24,
+                disponibilite_pourcentage=60 + numero, user=cls.user,
+            )
+            UtilisationActif.objects.create(
+                vehicule=v, date_debut=jour, date_fin=jour, jours_utilises=numero, jours_disponibles=20, user=cls.user,
+            )
+            IncidentSecurite.objects.create(
+                vehicule=v, date_incident=jour, type_incident='Incident', gravite='Faible', user=cls.user,
+            )
+            CoutFonctionnement.objects.create(
+                vehicule=v, date=jour, type_cout='Entretien', montant=100, cout_par_km=0.05 * numero, user=cls.user,
+            )
+            CoutFinancier.objects.create(
+                vehicule=v, date=jour, type_cout='Assurance', montant=100, kilometrage=1000,
+                cout_par_km=0.02 * numero, periode_amortissement=12, user=cls.user,
+            )
+        # Véhicule d'un autre tenant : ne doit jamais apparaître
+        v_autre = creer_vehicule(autre, 99)
+        IncidentSecurite.objects.create(
+            vehicule=v_autre, date_incident=jour, type_incident='Accident', gravite='Élevée', user=autre,
+        )
+
+    def test_nombre_de_requetes_constant(self):
+        vehicules_qs = Vehicule.objects.filter(user=self.user)
+        with self.assertNumQueries(8):
+            kpi = calculer_kpi_dashboard(vehicules_qs)
+
+        self.assertEqual(kpi.total_vehicules, 12)
+        self.assertEqual(kpi.vehicules_actifs, 4)
+        self.assertEqual(kpi.vehicules_maintenance, 4)
+        self.assertEqual(kpi.vehicules_hors_service, 4)
+        self.assertEqual(len(kpi.distances), 5)
+        self.assertEqual(kpi.distances[0]['vehicule'], 'V011')
+        self.assertEqual(kpi.distances[0]['immatriculation'], 'RC-0011')
+        self.assertEqual(kpi.disponibilites[0]['vehicule'], 'V000')
+        self.assertNotIn('V099', [i['vehicule'] for i in kpi.incidents])
+
+    def test_endpoint_json(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('fleet_app:api_dashboard_kpi'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['kpi']['total_vehicules'], 12)
+        self.assertEqual(len(data['kpi']['couts_financiers']), 5)
+
+
+class KpiMensuelTests(TestCase):
+    """Maintenance incrémentale et reconstruction du cumul KPI mensuel."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('gestionnaire', password='secret')
+        self.vehicule = creer_vehicule(self.user, 1)
+
+    def creer_distance(self, jour, distance):
+        return DistanceParcourue.objects.create(
+            vehicule=self.vehicule, date_debut=jour, km_debut=0, date_fin=jour, km_fin=distance,
+            distance_parcourue=distance, type_moteur='Diesel', user=self.user,
+        )
+
+    def cumul(self, annee, mois):
+        return KpiMensuel.objects.get(vehicule=self.vehicule, annee=annee, mois=mois)
+
+    def instantane(self):
+        return sorted(
+            KpiMensuel.objects.values_list('vehicule_id', 'annee', 'mois', *CHAMPS_CUMUL)
+        )
+
+    def test_mise_a_jour_incrementale(self):
+        janvier = self.creer_distance(date(2025, 1, 10), 100)
+        self.creer_distance(date(2025, 1, 20), 50)
+        IncidentSecurite.objects.create(
+            vehicule=self.vehicule, date_incident=date(2025, 1, 5), type_incident='Incident', gravite='Faible', user=self.user,
+        )
+        cumul = self.cumul(2025, 1)
+        self.assertEqual((cumul.distance_km, cumul.nb_distances, cumul.nb_incidents), (150, 2, 1))
+        self.assertEqual(cumul.user, self.user)
+
+        # Déplacement vers février : les deux mois sont ré-agrégés
+        janvier.date_fin = date(2025, 2, 3)
+        janvier.save()
+        self.assertEqual(self.cumul(2025, 1).distance_km, 50)
+        self.assertEqual(self.cumul(2025, 2).distance_km, 100)
+
+        janvier.delete()
+        self.assertEqual(self.cumul(2025, 2).distance_km, 0)
+        self.assertEqual(kpi_totaux(KpiMensuel.objects.filter(user=self.user))['distance_km'], 50)
+
+    def test_reconstruction_identique_a_l_incremental(self):
+        self.creer_distance(date(2025, 3, 1), 120)
+        CoutFinancier.objects.create(
+            vehicule=self.vehicule, date=date(2025, 3, 2), type_cout='Assurance', montant=80,
+            kilometrage=1000, cout_par_km=0.08, periode_amortissement=12, user=self.user,
+        )
+        incremental = self.instantane()
+
+        KpiMensuel.objects.all().delete()
+        call_command('rebuild_kpi_rollups', stdout=StringIO())
+        self.assertEqual(self.instantane(), incremental)
+
+    def test_vue_distance_lit_le_cumul(self):
+        self.creer_distance(date(2025, 4, 1), 300)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('fleet_app:kpi_distance'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['data'], '[300]')
+
+
+class RecalculPaiePointageTests(TestCase):
+    """Compteurs de présence de la paie mis à jour par différence."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rh', password='secret')
+        self.employe = Employe.objects.create(
+            matricule='E001', prenom='Awa', nom='Camara', fonction='Chauffeur', user=self.user,
+        )
+
+    def pointer(self, jour, statut):
+        return PresenceJournaliere.objects.create(employe=self.employe, date=jour, statut=statut, user=self.user)
+
+    def compteurs(self, mois):
+        return PaieEmploye.objects.filter(employe=self.employe, mois=mois, annee=2025).values(
+            'jours_presence', 'absences', 'jours_repos', 'dimanches', 'conge'
+        ).get()
+
+    def test_delta_identique_au_recomptage(self):
+        absence = self.pointer(date(2025, 3, 3), 'A')
+        self.pointer(date(2025, 3, 4), 'A')
+        dimanche = self.pointer(date(2025, 3, 9), 'P(dim_Am)')
+        self.pointer(date(2025, 3, 10), 'OFF')
+
+        absence.statut = 'P(dim_Pm)'
+        absence.save()
+        dimanche.date = date(2025, 4, 6)
+        dimanche.save()
+        PresenceJournaliere.objects.filter(date=date(2025, 3, 4)).get().delete()
+
+        incremental = {mois: self.compteurs(mois) for mois in (3, 4)}
+        self.assertEqual(incremental[3]['dimanches'], 1)
+        self.assertEqual(incremental[3]['absences'], 0)
+        self.assertEqual(incremental[4]['jours_presence'], 1)
+        for mois in (3, 4):
+            mettre_a_jour_colonnes_presence_paie(self.employe, mois, 2025)
+            self.assertEqual(self.compteurs(mois), incremental[mois])
+
+    def test_resynchronisation_unique_par_lot(self):
+        with mock.patch('fleet_app.utils_paie_sync.resynchroniser_paies') as resynchroniser:
+            with self.captureOnCommitCallbacks(execute=True):
+                with recalcul_paie_differe():
+                    for jour in range(1, 11):
+                        self.pointer(date(2025, 5, jour), 'A')
+        resynchroniser.assert_called_once_with([self.employe], 5, 2025)
+        self.assertEqual(self.compteurs(5)['absences'], 10)
+
+    def test_modification_sans_paie_du_mois(self):
+        presence = self.pointer(date(2025, 6, 2), 'A')
+        PaieEmploye.objects.filter(employe=self.employe, mois=6, annee=2025).delete()
+        presence.statut = 'P(dim_Am)'
+        presence.save()
+        compteurs = self.compteurs(6)
+        self.assertEqual((compteurs['dimanches'], compteurs['jours_presence'], compteurs['absences']), (1, 1, 0))
+
+
+class PointageBulkTests(TestCase):
+    """Enregistrement d'une grille de pointage complète."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rh', password='secret')
+        self.employes = [
+            Employe.objects.create(
+                matricule=f'E{numero:03d}', prenom='Awa', nom=f'Camara {numero}', fonction='Chauffeur', user=self.user,
+            )
+            for numero in range(20)
+        ]
+        self.client.force_login(self.user)
+
+    def envoyer(self, pointages):
+        return self.client.post(
+            reverse('fleet_app:pointage_bulk'), json.dumps({'pointages': pointages}), content_type='application/json',
+        )
+
+    def test_grille_mensuelle_en_requetes_constantes(self):
+        PresenceJournaliere.objects.create(employe=self.employes[0], date=date(2025, 3, 1), statut='OFF')
+        grille = [
+            {'employe_id': e.id, 'date': f'2025-03-{jour:02d}', 'statut': 'A'}
+            for e in self.employes for jour in range(1, 31)
+        ]
+        HeureSupplementaire.objects.create(
+            employe=self.employes[1], date=date(2025, 3, 5), heure_debut=time(18), heure_fin=time(20),
+            taux_horaire=2500, user=self.user,
+        )
+        # Resynchronisation des paies au commit comprise
+        with CaptureQueriesContext(connection) as requetes, self.captureOnCommitCallbacks(execute=True):
+            response = self.envoyer(grille)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['nb_pointages'], 600)
+        self.assertLess(len(requetes), 20)
+        self.assertEqual(
+            PaieEmploye.objects.get(employe=self.employes[1], mois=3, annee=2025).montant_heures_supplementaires, 5000
+        )
+
+        self.assertEqual(PresenceJournaliere.objects.filter(statut='A').count(), 600)
+        self.assertEqual(
+            list(PaieEmploye.objects.filter(mois=3, annee=2025).values_list('absences', flat=True).distinct()), [30]
+        )
+
+    def test_statut_invalide_rejete(self):
+        response = self.envoyer([{'employe_id': self.employes[0].id, 'date': '2025-03-01', 'statut': 'X'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PresenceJournaliere.objects.exists())
+
+
+class StatistiquesPresenceBatchTests(TestCase):
+    """Statistiques de présence de tous les employés en une requête."""
+
+    def test_batch_une_requete(self):
+        user = User.objects.create_user('rh', password='secret')
+        employes = [
+            Employe.objects.create(matricule=f'E{n}', prenom='Awa', nom='Camara', fonction='Chauffeur', user=user)
+            for n in range(3)
+        ]
+        statuts = ['P(Am_&_Pm)', 'P(Am)', 'P(dim_Pm)', 'A', 'M', 'M(Payer)', 'OFF']
+        for jour, statut in enumerate(statuts, start=1):
+            PresenceJournaliere.objects.create(employe=employes[0], date=date(2025, 6, jour), statut=statut)
+        PresenceJournaliere.objects.create(employe=employes[1], date=date(2025, 6, 1), statut='A')
+        PresenceJournaliere.objects.create(employe=employes[1], date=date(2025, 7, 1), statut='A')
+
+        with self.assertNumQueries(1):
+            stats = calculer_statistiques_presence_batch(employes, 6, 2025)
+
+        self.assertEqual(
+            {cle: stats[employes[0].pk][cle] for cle in ('jours_presence', 'sundays', 'absent', 'maladies', 'm_payer', 'j_repos')},
+            {'jours_presence': 2, 'sundays': 1, 'absent': 1, 'maladies': 1, 'm_payer': 1, 'j_repos': 1},
+        )
+        self.assertEqual(stats[employes[0].pk]['detail_statuts']['OFF'], {'label': 'Repos', 'count': 1})
+        self.assertEqual(stats[employes[1].pk]['absent'], 1)
+        self.assertEqual(stats[employes[2].pk]['jours_presence'], 0)
+        self.assertEqual(stats[employes[2].pk]['total_jours_mois'], 30)
+
+
+@override_settings(PAIE_SYNC_ARRIERE_PLAN=False)
+class SynchronisationPaieJobTests(TestCase):
+    """Liste des paies en lecture seule et synchronisation par job."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rh', password='secret')
+        self.employes = [
+            Employe.objects.create(
+                matricule=f'E{n}', prenom='Awa', nom='Camara', fonction='Chauffeur',
+                salaire_journalier=500000, user=self.user,
+            )
+            for n in range(3)
+        ]
+        PresenceJournaliere.objects.create(employe=self.employes[0], date=date(2025, 6, 2), statut='P(Am_&_Pm)')
+        SynchronisationPaieJob.objects.all().delete()
+        self.client.force_login(self.user)
+
+    def test_liste_sans_ecriture(self):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:paies_list'), {'mois': 6, 'annee': 2025})
+        self.assertEqual(response.status_code, 200)
+        ecritures = [q['sql'] for q in requetes if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(ecritures, [])
+
+        # La liste enrichie ne synchronise plus sur un GET (ancien paramètre auto_sync)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(
+                reverse('fleet_app:paie_employe_list_enhanced'), {'mois': 6, 'annee': 2025, 'auto_sync': 'true'},
+            )
+        self.assertEqual(response.status_code, 200)
+        ecritures = [q['sql'] for q in requetes if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(ecritures, [])
+
+    def test_job_cree_et_calcule_les_paies(self):
+        job = demander_synchronisation_paies(self.user, 6, 2025)
+        self.assertEqual(demander_synchronisation_paies(self.user, 6, 2025), job)
+        self.assertEqual(traiter_jobs_en_attente(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.statut, 'termine')
+        self.assertEqual((job.traites, job.total, job.progression), (3, 3, 100))
+        paie = PaieEmploye.objects.get(employe=self.employes[0], mois=6, annee=2025)
+        self.assertEqual(paie.jours_presence, 1)
+        self.assertEqual(paie.salaire_brut, 500000)
+        self.assertEqual(paie.cnss, 25000)
+
+        response = self.client.get(reverse('fleet_app:synchronisation_job_status', args=[job.pk]))
+        self.assertEqual(response.json()['statut'], 'termine')
+
+    def test_job_abandonne_repris(self):
+        job = demander_synchronisation_paies(self.user, 6, 2025)
+        SynchronisationPaieJob.objects.filter(pk=job.pk).update(statut='en_cours', date_debut=timezone.now())
+        self.assertEqual(traiter_jobs_en_attente(), 0)
+
+        SynchronisationPaieJob.objects.filter(pk=job.pk).update(date_debut=timezone.now() - timedelta(hours=1))
+        self.assertEqual(demander_synchronisation_paies(self.user, 6, 2025), job)
+        self.assertEqual(traiter_jobs_en_attente(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.statut, 'termine')
+
+
+@override_settings(PDF_RENDU_ARRIERE_PLAN=False, MEDIA_ROOT=tempfile.mkdtemp())
+class RenduPdfTests(TestCase):
+    """File de rendu PDF et cache par empreinte du contenu."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('flotte', password='secret')
+        creer_vehicule(self.user, 1)
+        self.client.force_login(self.user)
+        self.url = reverse('fleet_app:export_vehicules_pdf')
+
+    def test_pdf_resservi_depuis_le_cache(self):
+        premier = self.client.get(self.url)
+        self.assertEqual(premier['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(premier.streaming_content).startswith(b'%PDF'))
+
+        with mock.patch('fleet_app.utils_pdf.convertir_html_en_pdf') as convertir:
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        convertir.assert_not_called()
+        self.assertEqual(RenduPdf.objects.count(), 1)
+
+        creer_vehicule(self.user, 2)
+        self.client.get(self.url)
+        self.assertEqual(RenduPdf.objects.filter(statut='termine').count(), 2)
+
+    def test_rendu_asynchrone_suivi_par_identifiant(self):
+        response = self.client.get(self.url, {'async': '1'})
+        self.assertEqual(response.status_code, 202)
+        rendu = response.json()
+        self.assertEqual(rendu['statut'], 'en_attente')
+
+        self.assertEqual(traiter_rendus_en_attente(), 1)
+        statut = self.client.get(rendu['url_statut']).json()
+        self.assertEqual(statut['statut'], 'termine')
+        telechargement = self.client.get(statut['url_fichier'])
+        self.assertEqual(telechargement.status_code, 200)
+        self.assertEqual(self.client.get(self.url, {'async': '1'}).json()['id'], rendu['id'])
+
+    def test_purge_des_anciens_rendus(self):
+        self.client.get(self.url)
+        rendu = RenduPdf.objects.get()
+        chemin = rendu.fichier.name
+        call_command('traiter_rendus_pdf', stdout=StringIO())
+        self.assertTrue(RenduPdf.objects.exists())
+
+        RenduPdf.objects.update(date_fin=timezone.now() - timedelta(days=31))
+        ancien = (timezone.now() - timedelta(days=31)).timestamp()
+        os.utime(default_storage.path(chemin), (ancien, ancien))
+        call_command('traiter_rendus_pdf', stdout=StringIO())
+        self.assertFalse(RenduPdf.objects.exists())
+        self.assertFalse(default_storage.exists(chemin))
+
+
+@override_settings(PDF_RENDU_ARRIERE_PLAN=False, PDF_PROCESSUS=2, MEDIA_ROOT=tempfile.mkdtemp())
+class LotFacturesPdfTests(TestCase):
+    """Lot de factures rendu facture par facture puis fusionné."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('loueur', password='secret')
+        location = LocationVehicule.objects.create(
+            vehicule=creer_vehicule(self.user, 1), type_location='Externe', date_debut=date(2025, 1, 1), user=self.user,
+        )
+        self.factures = [
+            FactureLocation.objects.create(
+                location=location, numero=f'FL-{n}', date=date(2025, 2, 20), montant_ht=1000 * n, user=self.user,
+            )
+            for n in range(1, 4)
+        ]
+        self.client.force_login(self.user)
+
+    def generer(self, factures):
+        return self.client.post(reverse('fleet_app:factures_batch_pdf'), {
+            'async': '1', 'facture_ids[]': [facture.pk for facture in factures],
+        })
+
+    def test_fragments_fusionnes_et_reutilises(self):
+        from pypdf import PdfReader
+
+        def fichiers_cache():
+            return len(default_storage.listdir('pdf_cache')[1]) if default_storage.exists('pdf_cache') else 0
+
+        avant = fichiers_cache()
+        lot = self.generer(self.factures).json()
+        self.assertEqual(traiter_rendus_en_attente(), 1)
+        fusion = RenduPdf.objects.get(pk=lot['id'])
+        self.assertEqual(fusion.statut, 'termine')
+        with fusion.fichier.open('rb') as fichier:
+            lecteur = PdfReader(fichier, strict=True)
+            self.assertGreaterEqual(len(lecteur.pages), 4)
+            self.assertIn('FL-3', ''.join(page.extract_text() for page in lecteur.pages))
+        # Quatre fragments et la fusion en cache, sans ligne RenduPdf pour les fragments
+        self.assertEqual(fichiers_cache() - avant, 5)
+        self.assertEqual(RenduPdf.objects.count(), 1)
+
+        # Nouvelle sélection: seule la page de résumé est rendue, les factures viennent du cache
+        second = self.generer(self.factures[:2]).json()
+        traiter_rendus_en_attente()
+        self.assertEqual(RenduPdf.objects.get(pk=second['id']).statut, 'termine')
+        self.assertEqual(fichiers_cache() - avant, 7)
+
+
+class FacturesMensuellesLocationTests(TestCase):
+    """Génération des factures mensuelles de location en requêtes constantes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('loueur', password='secret')
+        self.locations = []
+        for numero in range(1, 6):
+            location = LocationVehicule.objects.create(
+                vehicule=creer_vehicule(self.user, numero), type_location='Externe',
+                date_debut=date(2025, 3, 10), tarif_journalier=100, user=self.user,
+            )
+            for jour in range(1, 6 + numero):
+                FeuillePontageLocation.objects.create(location=location, date=date(2025, 3, jour), user=self.user)
+            self.locations.append(location)
+        self.client.force_login(self.user)
+
+    def generer(self):
+        return self.client.post(reverse('fleet_app:generer_factures_mensuelles'), {'year': 2025, 'month': 3})
+
+    def test_generation_et_mise_a_jour(self):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.generer()
+        self.assertLess(len(requetes), 15)
+        details = {detail['location_id']: detail for detail in response.json()['details']}
+        # Seules les feuilles à partir du début de la location (10/03) comptent
+        self.assertEqual(details[self.locations[0].pk]['jours_travail'], 0)
+        self.assertEqual(details[self.locations[4].pk]['jours_travail'], 1)
+        self.assertEqual(details[self.locations[4].pk]['jours_non_travail'], 21)
+        self.assertTrue(all(detail['created'] for detail in details.values()))
+
+        FeuillePontageLocation.objects.create(location=self.locations[0], date=date(2025, 3, 20), user=self.user)
+        call_command('generer_factures_location', mois=3, annee=2025, stdout=StringIO())
+        self.assertEqual(FactureLocation.objects.count(), 5)
+        facture = FactureLocation.objects.get(numero=f'LOC-{self.locations[0].pk}-202503')
+        self.assertEqual((facture.jours_travail_mois, facture.montant_ht), (1, 100))
+        self.assertEqual(facture.pk, details[self.locations[0].pk]['facture_id'])
+
+    def test_numero_en_double_refuse_par_le_formulaire(self):
+        self.generer()
+        numero = f'LOC-{self.locations[0].pk}-202503'
+        donnees = {'location': self.locations[1].pk, 'numero': numero, 'date': '2025-03-31',
+                   'montant_ht': 10, 'tva': 0, 'montant_ttc': 10, 'statut': 'Brouillon'}
+        response = self.client.post(reverse('fleet_app:facture_location_create'), donnees)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('numero', response.context['form'].errors)
+
+        # La facture elle-même garde son numéro à la modification
+        facture = FactureLocation.objects.get(numero=numero)
+        donnees['location'] = facture.location_id
+        response = self.client.post(reverse('fleet_app:facture_location_update', args=[facture.pk]), donnees)
+        self.assertEqual(response.status_code, 302)
+
+
+class MetriquesLocationsTests(TestCase):
+    """Indicateurs du tableau de bord des locations agrégés en base et mis en cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user('loueur', password='secret')
+        self.today = date.today()
+        self.location = LocationVehicule.objects.create(
+            vehicule=creer_vehicule(self.user, 1), type_location='Externe',
+            date_debut=self.today.replace(month=1, day=1), tarif_journalier=100, user=self.user,
+        )
+        FeuillePontageLocation.objects.create(location=self.location, date=self.today, user=self.user)
+        if self.today.day > 1:
+            FeuillePontageLocation.objects.create(
+                location=self.location, date=self.today.replace(day=1), statut='Entretien', user=self.user,
+            )
+        self.client.force_login(self.user)
+
+    def metriques(self):
+        return self.client.get(
+            reverse('fleet_app:locations_dashboard_metrics_ajax'), {'vehicule_id': 'V001'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        ).json()
+
+    def test_agregation_cache_et_invalidation(self):
+        metriques = self.metriques()
+        self.assertEqual(metriques['actifs'], 1)
+        self.assertEqual(metriques['revenu_jour'], 100)
+        self.assertEqual(metriques['revenu_annee'], 100)
+        self.assertEqual(metriques['entretien_perte_mois'], 100 if self.today.day > 1 else 0)
+
+        with CaptureQueriesContext(connection) as requetes:
+            self.metriques()
+        self.assertFalse([q for q in requetes.captured_queries if 'feuillepontagelocation' in q['sql'].lower()])
+
+        feuille = FeuillePontageLocation.objects.get(date=self.today)
+        feuille.statut = 'Hors service'
+        with self.captureOnCommitCallbacks(execute=True):
+            feuille.save()
+        metriques = self.metriques()
+        self.assertEqual((metriques['revenu_jour'], metriques['jours_hs']), (0, 1))
+
+
+class StockCourantTests(TestCase):
+    """Solde de stock persisté et tenu à jour par les entrées / sorties."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('magasinier', password='secret')
+        self.produit = Produit.objects.create(
+            id_produit='PRD001', nom='Filtre', categorie='Pièce', unite='Pièce',
+            seuil_minimum=5, prix_unitaire=1000, fournisseur='Total', user=self.user,
+        )
+
+    def stock(self):
+        return Produit.objects.get(pk=self.produit.pk).stock_courant
+
+    def test_mouvements_et_recompute(self):
+        from django.core.exceptions import ValidationError
+        entree = EntreeStock.objects.create(
+            id_entree='ENT001', produit=self.produit, quantite=10, prix_unitaire=1000,
+            fournisseur='Total', reference_facture='F1',
+        )
+        sortie = SortieStock.objects.create(id_sortie='SRT001', produit=self.produit, quantite=3, motif='Atelier')
+        self.assertEqual((sortie.stock_avant, sortie.stock_apres), (10, 7))
+
+        sortie.quantite = 4
+        sortie.save()
+        self.assertEqual((self.stock(), sortie.stock_avant), (6, 10))
+        with self.assertRaises(ValidationError):
+            SortieStock.objects.create(id_sortie='SRT002', produit=self.produit, quantite=50, motif='Atelier')
+        self.assertEqual(self.stock(), 6)
+
+        # Un enregistrement du produit chargé avant le mouvement n'écrase pas le solde
+        self.produit.nom = 'Filtre à huile'
+        self.produit.save()
+        sortie.delete()
+        self.assertEqual(self.stock(), 10)
+        self.assertEqual(Produit.objects.filter(stock_courant__lte=F('seuil_minimum')).count(), 0)
+
+        entree.delete()
+        self.assertEqual(self.stock(), 0)
+        Produit.objects.filter(pk=self.produit.pk).update(stock_courant=42)
+        call_command('recompute_stock', stdout=StringIO())
+        self.assertEqual(self.stock(), 0)
+
+    def test_stock_actuel_filtre_et_compte_en_base(self):
+        autre = User.objects.create_user('autre', password='secret')
+        Produit.objects.create(
+            id_produit='PRD002', nom='Huile', categorie='Pièce', unite='Litre',
+            seuil_minimum=0, prix_unitaire=500, fournisseur='Total', user=autre,
+        )
+        for numero in range(2, 8):
+            produit = Produit.objects.create(
+                id_produit=f'PRD1{numero:02d}', nom='Bougie', categorie='Pièce', unite='Pièce',
+                seuil_minimum=5, prix_unitaire=100, fournisseur='NGK', user=self.user,
+            )
+            EntreeStock.objects.create(
+                id_entree=f'ENT{numero:03d}', produit=produit, quantite=numero, prix_unitaire=100,
+                fournisseur='NGK', reference_facture='F2',
+            )
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:stock_actuel'), {'alerte': 'alerte'})
+        self.assertLess(len(requetes), 12)
+        self.assertEqual(response.context['total_produits'], 7)
+        self.assertEqual(
+            (response.context['produits_rupture'], response.context['produits_alerte'], response.context['produits_normaux']),
+            (1, 4, 2),
+        )
+        self.assertEqual(response.context['valeur_totale'], 2700)
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+
+
+class SequenceNumerotationTests(TestCase):
+    """Numérotation des documents par séquence verrouillée, sans balayage."""
+
+    def test_factures_et_mouvements(self):
+        from django.utils import timezone
+        periode = timezone.now().strftime('%Y%m')
+        # Reprise de l'existant à la création de la séquence
+        Facture.objects.create(numero=f'FG-{periode}-007', tiers_nom='Client A')
+        self.assertEqual(Facture.objects.create(tiers_nom='Client B').numero, f'FG-{periode}-008')
+        with CaptureQueriesContext(connection) as requetes:
+            facture = Facture.objects.create(tiers_nom='Client C')
+        self.assertEqual(facture.numero, f'FG-{periode}-009')
+        self.assertFalse([q for q in requetes.captured_queries if 'LIKE' in q['sql'].upper()])
+
+        # Un enregistrement annulé rend son numéro
+        try:
+            with transaction.atomic():
+                Facture.objects.create(tiers_nom='Client D')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(Facture.objects.create(tiers_nom='Client E').numero, f'FG-{periode}-010')
+
+        # Bloc réservé pour un import, puis saisie manuelle reportée dans la séquence
+        self.assertEqual(list(allouer_numeros('IMP', quantite=3)), [1, 2, 3])
+        user = User.objects.create_user('magasinier', password='secret')
+        produit = Produit.objects.create(
+            id_produit='PRD001', nom='Filtre', categorie='Pièce', unite='Pièce',
+            prix_unitaire=1000, fournisseur='Total', user=user,
+        )
+        entrees = numeroter([
+            EntreeStock(id_entree='', produit=produit, quantite=1, prix_unitaire=1, fournisseur='T', reference_facture='F')
+            for _ in range(2)
+        ], 'id_entree', 'ENT')
+        self.assertEqual([entree.id_entree for entree in entrees], ['ENT001', 'ENT002'])
+        EntreeStock.objects.create(
+            id_entree='ENT010', produit=produit, quantite=1, prix_unitaire=1, fournisseur='T', reference_facture='F',
+        )
+        entree = EntreeStock.objects.create(produit=produit, quantite=1, prix_unitaire=1, fournisseur='T', reference_facture='F')
+        self.assertEqual(entree.id_entree, 'ENT011')
+        self.assertEqual(SequenceNumerotation.objects.get(prefixe='ENT').dernier_numero, 11)
+
+
+class StatsVehiculeTests(TestCase):
+    """Séries mensuelles des véhicules en requêtes groupées."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('statisticien', password='secret')
+        self.vehicules = [creer_vehicule(self.user, numero) for numero in range(1, 4)]
+        for vehicule in self.vehicules:
+            location = LocationVehicule.objects.create(
+                vehicule=vehicule, type_location='Externe', date_debut=date(2025, 1, 1),
+                date_fin=date(2025, 12, 31), tarif_journalier=100, user=self.user,
+            )
+            for mois in range(1, 4):
+                FeuillePontageLocation.objects.create(location=location, date=date(2025, mois, 2), user=self.user)
+            FeuillePontageLocation.objects.create(
+                location=location, date=date(2025, 2, 3), statut='Entretien', user=self.user,
+            )
+            CoutFonctionnement.objects.create(
+                vehicule=vehicule, date=date(2025, 2, 10), type_cout='Entretien', montant=500,
+                cout_par_km=1, user=self.user,
+            )
+            ConsommationCarburant.objects.create(
+                vehicule=vehicule, date_plein1=date(2025, 3, 1), km_plein1=0, date_plein2=date(2025, 3, 5),
+                km_plein2=100, litres_ajoutes=40, distance_parcourue=100, consommation_100km=40, user=self.user,
+            )
+
+    def test_series_mensuelles(self):
+        from .views_vehicule_stats import calculer_stats_mensuelles, calculer_stats_vehicule
+        with CaptureQueriesContext(connection) as requetes:
+            mensuelles = calculer_stats_mensuelles(self.vehicules[0], date(2025, 1, 1), date(2025, 12, 31), self.user)
+        self.assertLessEqual(len(requetes), 6)
+        self.assertEqual(len(mensuelles), 12)
+        self.assertEqual(mensuelles['2025-02']['jours_entretien'], 1)
+        self.assertEqual(mensuelles['2025-02']['cout_entretien'], 500)
+        self.assertEqual(mensuelles['2025-03']['cout_carburant'], 40)
+        self.assertEqual(mensuelles['2025-03']['frais_location'], 100)
+
+        stats = calculer_stats_vehicule(self.vehicules[1], date(2025, 1, 1), date(2025, 3, 31), self.user)
+        self.assertEqual((stats['jours_actifs'], stats['frais_location']['total']), (3, 300))
+
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:vehicule_comparaison_stats'), {
+                'vehicules': [vehicule.pk for vehicule in self.vehicules],
+                'start_date': '2025-01-01', 'end_date': '2025-12-31',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['vehicules_stats']), 3)
+        self.assertLess(len(requetes), 20)
+
+    def test_comparaison_colonnes_et_sorties_par_vehicule(self):
+        produit = Produit.objects.create(
+            id_produit='PRD001', nom='Filtre', categorie='Pièce', unite='Pièce',
+            prix_unitaire=1000, fournisseur='Total', user=self.user,
+        )
+        EntreeStock.objects.create(produit=produit, quantite=10, prix_unitaire=1, fournisseur='T', reference_facture='F')
+        sortie = SortieStock.objects.create(
+            produit=produit, quantite=2, destination='Atelier RC-0002', motif='Vidange', date=date(2025, 2, 1),
+        )
+        self.assertEqual(sortie.vehicule, self.vehicules[1])
+
+        self.client.force_login(self.user)
+        for numero in range(4, 40):
+            creer_vehicule(self.user, numero)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:vehicule_comparaison_api'), {
+                'start_date': '2025-01-01', 'end_date': '2025-12-31',
+            })
+        donnees = response.json()
+        self.assertLess(len(requetes), 12)
+        self.assertEqual(len(donnees['vehicules']['id']), 39)
+        self.assertEqual(donnees['metriques']['pieces_utilisees'][:3], [0, 2, 0])
+        self.assertEqual(donnees['metriques']['frais_location'][0], 300)
+
+
+class IndexRequetesTests(TestCase):
+    def test_requetes_critiques_indexees(self):
+        for libelle, table, plan, sequentiel in analyser_requetes():
+            self.assertFalse(sequentiel, f'{libelle}: {plan}')
+
+    def test_detection_parcours_sequentiel(self):
+        requete = [('Sans index', PresenceJournaliere.objects.filter(statut='Absent'))]
+        self.assertTrue(analyser_requetes(requete)[0][3])
+
+        sortie = StringIO()
+        call_command('bench_index_requetes', stdout=sortie)
+        self.assertIn('utilisent un index', sortie.getvalue())
+
+
+class FiltreMoisTests(TestCase):
+    def test_for_month_borne_le_mois_sans_extraction(self):
+        self.assertEqual(month_range(2, 2024), (date(2024, 2, 1), date(2024, 2, 29)))
+        user = User.objects.create_user('mois', password='x')
+        employe = Employe.objects.create(matricule='E1', prenom='Awa', nom='Camara', fonction='Chauffeur', user=user)
+        for jour in (date(2025, 1, 31), date(2025, 2, 1), date(2025, 2, 28), date(2025, 3, 1)):
+            PresenceJournaliere.objects.create(employe=employe, date=jour, user=user)
+
+        presences = PresenceJournaliere.objects.for_month(2, 2025).filter(user=user)
+        self.assertEqual(presences.count(), 2)
+        sql = str(presences.query).lower()
+        self.assertNotIn('strftime', sql)
+        self.assertNotIn('extract', sql)
+
+        sortie = StringIO()
+        call_command('bench_filtre_mois', lignes=800, repetitions=1, stdout=sortie)
+        self.assertIn('for_month', sortie.getvalue())
+        self.assertEqual(PresenceJournaliere.objects.count(), 4)
+
+    def test_mois_invalide_ne_modifie_rien(self):
+        user = User.objects.create_user('mois-invalide', password='x')
+        employe = Employe.objects.create(matricule='E2', prenom='Ibrahima', nom='Bah', fonction='Chauffeur', user=user)
+        heure = HeureSupplementaire.objects.create(
+            employe=employe, date=date(2025, 3, 5), heure_debut=time(18), heure_fin=time(20),
+            taux_horaire=2500, user=user,
+        )
+        self.assertFalse(HeureSupplementaire.objects.for_month('abc', 2025).exists())
+        self.assertFalse(HeureSupplementaire.objects.for_month(13, 2025).exists())
+
+        self.client.force_login(user)
+        for action in ('definir_montant_global', 'reinitialiser_montant_global'):
+            for mois in ('abc', '13', '0'):
+                response = self.client.post(reverse('fleet_app:heure_supplementaire_list'), {
+                    'action': action, 'montant_global': '4000', 'mois': mois, 'annee': '2025',
+                })
+                self.assertEqual(response.status_code, 302)
+        heure.refresh_from_db()
+        self.assertEqual(heure.taux_horaire, 2500)
+
+
+class RechercheTests(TestCase):
+    def setUp(self):
+        installer_index_plein_texte(connection)
+        self.addCleanup(supprimer_index_plein_texte, connection)
+        self.user = User.objects.create_user('recherche', password='x')
+        self.autre = User.objects.create_user('autre_tenant', password='x')
+        self.vehicule = creer_vehicule(self.user, 1, marque='Nissan', modele='Patrol')
+        creer_vehicule(self.user, 2)
+        creer_vehicule(self.autre, 3, marque='Nissan')
+        self.alerte = Alerte.objects.create(titre='Vidange dépassée', description='Huile', vehicule=self.vehicule)
+
+    def test_index_tenu_a_jour_et_scope(self):
+        resultats = rechercher(self.user, 'niss')
+        self.assertEqual([(d.type_objet, d.objet_id) for d in resultats][:1], [('vehicule', 'V001')])
+        self.assertEqual({d.type_objet for d in resultats}, {'vehicule', 'alerte'})
+        self.assertEqual(rechercher(self.user, 'vidange depas', types=['alerte'])[0].objet_id, str(self.alerte.pk))
+
+        # Le document de l'alerte recopie l'immatriculation du véhicule
+        self.vehicule.immatriculation = 'KA-7777'
+        self.vehicule.save()
+        self.assertEqual(len(rechercher(self.user, 'ka 77', types=['alerte'])), 1)
+
+        self.alerte.delete()
+        self.assertEqual(rechercher(self.user, 'vidange'), [])
+        with mock.patch('fleet_app.utils_recherche.index_plein_texte_disponible', return_value=False):
+            self.assertEqual([d.objet_id for d in rechercher(self.user, 'niss')], ['V001'])
+
+    def test_dependants_reconstruits_si_champ_recopie_change(self):
+        from fleet_app import utils_recherche
+
+        def types_indexes():
+            return [appel.args[0] for appel in indexer.call_args_list]
+
+        with mock.patch.object(utils_recherche, 'indexer_objets', wraps=utils_recherche.indexer_objets) as indexer:
+            self.vehicule.numero_chassis = 'CH-NOUVEAU'
+            self.vehicule.save()
+            self.assertEqual(types_indexes(), ['vehicule'])
+
+            indexer.reset_mock()
+            self.vehicule.marque = 'Toyota'
+            self.vehicule.save(update_fields=['marque'])
+            self.assertEqual(types_indexes(), ['vehicule', 'feuille_route', 'alerte', 'location'])
+
+        self.assertEqual(rechercher(self.user, 'toyota', types=['alerte'])[0].objet_id, str(self.alerte.pk))
+
+    def test_ids_correspondants_en_sous_requete(self):
+        from fleet_app.utils_recherche import ids_correspondants
+
+        for index in (True, False):
+            with mock.patch('fleet_app.utils_recherche.index_plein_texte_disponible', return_value=index):
+                alertes = Alerte.objects.filter(pk__in=ids_correspondants(self.user, 'alerte', 'vidange'))
+                vehicules = Vehicule.objects.filter(pk__in=ids_correspondants(self.user, 'vehicule', 'niss'))
+                with CaptureQueriesContext(connection) as requetes:
+                    self.assertEqual(list(alertes), [self.alerte])
+                    self.assertEqual(list(vehicules), [self.vehicule])
+                self.assertEqual(len(requetes), 2)
+                self.assertFalse(Alerte.objects.filter(pk__in=ids_correspondants(self.user, 'alerte', '--')).exists())
+
+    def test_remplissage_par_la_migration(self):
+        from django.apps import apps
+
+        migration = import_module('fleet_app.migrations.0030_search_document')
+        attendus = set(DocumentRecherche.objects.values_list('type_objet', 'objet_id', 'contenu'))
+        DocumentRecherche.objects.all().delete()
+        migration.remplir_documents(apps, None)
+        self.assertEqual(set(DocumentRecherche.objects.values_list('type_objet', 'objet_id', 'contenu')), attendus)
+        self.assertEqual(rechercher(self.user, 'vidange')[0].objet_id, str(self.alerte.pk))
+
+    def test_endpoints(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:api_recherche'), {'q': 'Toyo', 'table': 'vehicules'})
+        self.assertEqual([r['id'] for r in response.json()['results']], ['V002'])
+        self.assertLess(len(requetes), 8)
+
+        response = self.client.get(reverse('fleet_app:api_typeahead'), {'q': 'nissan', 'types': 'vehicule'})
+        self.assertEqual([r['id'] for r in response.json()['results']], ['V001'])
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        installer_index_plein_texte(connection)
+        self.addCleanup(supprimer_index_plein_texte, connection)
+        cache.clear()
+        _caches_tenants.clear()
+        self.user = User.objects.create_user('typeahead', password='x')
+        for numero in range(1, 6):
+            creer_vehicule(self.user, numero)
+        self.client.force_login(self.user)
+        self.url = reverse('fleet_app:api_typeahead')
+
+    def test_pages_par_curseur(self):
+        vus, curseur = [], ''
+        for _ in range(3):
+            donnees = self.client.get(self.url, {'q': 'toyo', 'types': 'vehicule', 'limit': 2, 'apres': curseur}).json()
+            vus += [r['id'] for r in donnees['results']]
+            curseur = donnees['next']
+            if not curseur:
+                break
+        self.assertEqual(vus, ['V001', 'V002', 'V003', 'V004', 'V005'])
+        # Saisie vide: parcours alphabétique pour les listes déroulantes
+        donnees = self.client.get(self.url, {'types': 'vehicule', 'limit': 3}).json()
+        self.assertEqual(len(donnees['results']), 3)
+
+    def test_etag_cache_et_invalidation(self):
+        parametres = {'q': 'rc 00', 'types': 'vehicule'}
+        response = self.client.get(self.url, parametres)
+        etag = response['ETag']
+        self.assertEqual(len(response.json()['results']), 5)
+        self.assertEqual(self.client.get(self.url, parametres, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Saisie déjà vue: servie par le LRU du tenant, sans requête sur l'index
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(self.url, parametres)
+        self.assertFalse([q for q in requetes if 'SearchDocument' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_vehicule(self.user, 6)
+        response = self.client.get(self.url, parametres, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 6)
+
+
+class CurseurPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('curseur', password='x')
+        vehicule = creer_vehicule(self.user, 1)
+        # Dates en doublon: la clé primaire départage les lignes
+        for numero in range(23):
+            jour = date(2025, 1, 1 + numero // 3)
+            DistanceParcourue.objects.create(
+                vehicule=vehicule, date_debut=jour, km_debut=0, date_fin=jour, km_fin=numero,
+                distance_parcourue=numero, type_moteur='Diesel', user=self.user,
+            )
+        self.queryset = DistanceParcourue.objects.filter(user=self.user)
+        self.attendu = list(self.queryset.order_by('-date_debut', '-pk').values_list('pk', flat=True))
+
+    def test_parcours_avant_et_arriere(self):
+        paginator = CurseurPaginator(self.queryset, 5, ordering=('-date_debut',), total='exact')
+        pages, page = [], paginator.page()
+        while True:
+            pages.append([d.pk for d in page])
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(sum(pages, []), self.attendu)
+        self.assertEqual([len(p) for p in pages], [5, 5, 5, 5, 3])
+        self.assertEqual(page.count, 23)
+
+        # Retour en arrière jusqu'à la première page
+        precedentes = []
+        while page.has_previous():
+            page = paginator.page(page.previous_cursor)
+            precedentes.append([d.pk for d in page])
+        self.assertEqual(precedentes, pages[-2::-1])
+        self.assertTrue(page.has_next())
+
+    def test_page_profonde_en_une_requete(self):
+        paginator = CurseurPaginator(self.queryset, 5, ordering=('-date_debut',))
+        page = paginator.page()
+        with self.assertNumQueries(1):
+            premiere = paginator.page()
+        for _ in range(3):
+            page = paginator.page(page.next_cursor)
+        with CaptureQueriesContext(connection) as requetes:
+            paginator.page(page.next_cursor)
+        self.assertEqual(len(requetes), 1)
+        self.assertNotIn('OFFSET', requetes[0]['sql'].upper())
+        # Jeton invalide: première page
+        self.assertEqual([d.pk for d in paginator.page('pas-un-jeton')], [d.pk for d in premiere])
+
+    def test_ordre_de_repli_et_pagination_par_decalage(self):
+        self.assertEqual(ordre_curseur(Alerte.objects.all()), ('-date_creation',))
+        self.assertEqual(ordre_curseur(self.queryset.order_by('-date_fin')), ('-date_fin',))
+        self.assertEqual(ordre_curseur(self.queryset.order_by()), ('-pk',))
+        for queryset in (
+            self.queryset.order_by('vehicule__immatriculation'),
+            self.queryset.order_by('vehicule'),
+            self.queryset.order_by(F('km_fin').desc()),
+            self.queryset.order_by('?'),
+        ):
+            self.assertIsNone(ordre_curseur(queryset))
+
+        # Ordre par expression: pages LIMIT / OFFSET dans l'ordre du queryset
+        queryset = self.queryset.order_by(F('km_fin').desc(), 'pk')
+        requete, pages = RequestFactory().get('/'), []
+        while True:
+            page = paginer_selon_ordre(requete, queryset, per_page=10)
+            pages.append([d.pk for d in page])
+            if not page.has_next():
+                break
+            requete = RequestFactory().get('/', {'curseur': page.next_cursor})
+        self.assertEqual(sum(pages, []), list(queryset.values_list('pk', flat=True)))
+        self.assertEqual([len(p) for p in pages], [10, 10, 3])
+        precedente = paginer_selon_ordre(RequestFactory().get('/', {'curseur': page.previous_cursor}), queryset, 10)
+        self.assertEqual([d.pk for d in precedente], pages[1])
+
+    def test_synthese_des_pesees_en_cache(self):
+        cache.clear()
+
+        def creer_pesee(numero):
+            PeseeCamion.objects.create(
+                date=date(2025, 1, 1 + numero), first_name='A', last_name='B', phone_number='600',
+                plate=f'RC-{numero % 3}', entry_card_number=str(numero), loading_zone='Mine-1',
+                departure_time=time(8), weighing_start=time(9), weighing_end=time(10), quantity=10, user=self.user,
+            )
+
+        for numero in range(30):
+            creer_pesee(numero)
+        self.client.force_login(self.user)
+        url = reverse('fleet_app:pesee_camion_list')
+        response = self.client.get(url)
+        self.assertEqual(response.context['stats']['total_pesees'], 30)
+        self.assertEqual(response.context['stats']['top_zones'], [{'loading_zone': 'Mine-1', 'total': 300, 'n': 30}])
+
+        # Page suivante: la liste seule, sans agrégat
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(url, {'curseur': response.context['pesees'].next_cursor})
+        self.assertFalse([q for q in requetes if 'PeseeCamions' in q['sql'] and 'SUM(' in q['sql'].upper()])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creer_pesee(30)
+        self.assertEqual(self.client.get(url).context['stats']['total_pesees'], 31)
+
+
+class CompteursAlertesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('compteurs', password='x')
+        autre = User.objects.create_user('compteurs_autre', password='x')
+        self.vehicule = creer_vehicule(self.user, 1)
+        Alerte.objects.create(titre='Vidange', description='-', niveau='Élevé', vehicule=self.vehicule)
+        Alerte.objects.create(titre='Pneus', description='-', niveau='Critique', vehicule=self.vehicule)
+        Alerte.objects.create(titre='Résolue', description='-', statut='Résolue', vehicule=self.vehicule)
+        Alerte.objects.create(titre='Autre tenant', description='-', vehicule=creer_vehicule(autre, 2))
+
+    def test_compteurs_du_tenant_en_cache(self):
+        self.assertEqual(compteurs_alertes(self.user), {'total_actives': 2, 'par_niveau': {'Élevé': 1, 'Critique': 1}})
+        with CaptureQueriesContext(connection) as requetes:
+            compteurs_alertes(self.user)
+        self.assertFalse([q for q in requetes if 'Alerte' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alerte = Alerte.objects.create(titre='Freins', description='-', vehicule=self.vehicule)
+        self.assertEqual(compteurs_alertes(self.user)['total_actives'], 3)
+        alerte.statut = 'Résolue'
+        with self.captureOnCommitCallbacks(execute=True):
+            alerte.save()
+        self.assertEqual(compteurs_alertes(self.user)['total_actives'], 2)
+
+    def test_badge_paresseux_et_api(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('fleet_app:alerte_list'))
+        self.assertEqual(str(response.context['alerts_count']), '2')
+
+        # Un fragment qui n'affiche pas le badge ne compte rien
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(reverse('fleet_app:alerte_search_ajax'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertFalse([q for q in requetes if 'COUNT' in q['sql'] and 'GROUP BY' in q['sql']])
+
+        donnees = self.client.get(reverse('fleet_app:api_alertes_kpi')).json()
+        self.assertEqual(donnees['total_actives'], 2)
+        self.assertEqual(len(donnees['alertes_recentes']), 2)
+
+    def test_tableau_de_bord_interroge_les_alertes_enregistrees(self):
+        Profil.objects.create(
+            user=self.user, type_compte='entreprise', telephone='600', email='c@example.com', role='admin',
+            compte_complete=True,
+        )
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('fleet_app:dashboard'))
+        self.assertContains(response, reverse('fleet_app:api_alertes_kpi'))
+        self.assertContains(response, 'btn-resoudre')
+        self.assertContains(response, 'btn-ignorer')
+
+
+class ContexteTenantTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('tenant', password='x')
+        profil = Profil.objects.create(
+            user=self.user, type_compte='entreprise', telephone='600', email='t@example.com', role='admin',
+            compte_complete=True,
+        )
+        self.entreprise = Entreprise.objects.create(
+            profil=profil, nom_entreprise='Transports', forme_juridique='sarl', nom_responsable='Responsable',
+        )
+        creer_vehicule(self.user, 1, entreprise=self.entreprise)
+        creer_vehicule(User.objects.create_user('tenant_autre', password='x'), 2)
+        self.client.force_login(self.user)
+
+    def test_profil_et_entreprise_charges_avec_l_utilisateur(self):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse('fleet_app:vehicule_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.tenant.entreprise, self.entreprise)
+        self.assertEqual(response.wsgi_request.tenant.portee, ('entreprise', self.entreprise.pk))
+        # Une seule requête lit le profil: celle de l'utilisateur (jointure)
+        lectures_profil = [q['sql'] for q in requetes if 'fleet_app_profil' in q['sql']]
+        self.assertEqual(len(lectures_profil), 1)
+        self.assertIn('auth_user', lectures_profil[0])
+        self.assertIn(Vehicule, _MODEL_FIELDS)
+
+    def test_utilitaires_par_utilisateur_sur_la_meme_portee(self):
+        attendu = ('entreprise', self.entreprise.pk)
+        self.assertEqual(cle_typeahead(self.user, 'toyota')[0], attendu)
+        self.assertIn('"entreprise_id" =', str(alertes_actives_tenant(self.user).query))
+
+    def test_echec_de_connexion_hache_une_seule_fois(self):
+        from django.contrib.auth import authenticate
+
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as verification:
+            self.assertIsNone(authenticate(username='tenant', password='mauvais'))
+        self.assertEqual(verification.call_count, 1)
+
+    def test_profil_incomplet_redirige(self):
+        Profil.objects.filter(user=self.user).update(compte_complete=False)
+        response = self.client.get(reverse('fleet_app:dashboard'))
+        self.assertRedirects(response, reverse('fleet_app:creation_compte'), fetch_redirect_response=False)
+
+
+class SynchronisationSessionTests(TestCase):
+    def test_periode_ecrite_seulement_si_elle_change(self):
+        self.client.force_login(User.objects.create_user('sync', password='x'))
+        url = '/management/paies/'
+
+        def ecritures_session(parametres=None):
+            with CaptureQueriesContext(connection) as requetes:
+                response = self.client.get(url, parametres or {})
+            self.assertEqual(response['X-Sync-Month'], str((parametres or {}).get('mois', response['X-Sync-Month'])))
+            return [q for q in requetes if 'django_session' in q['sql'] and not q['sql'].startswith('SELECT')]
+
+        ecritures_session({'mois': 3, 'annee': 2025})
+        self.assertEqual(ecritures_session(), [])
+        self.assertEqual(ecritures_session({'mois': 3, 'annee': 2025}), [])
+        self.assertTrue(ecritures_session({'mois': 4, 'annee': 2025}))
+        self.assertEqual(self.client.session['management_period'], {'month': 4, 'year': 2025})
+
+
+class CacheTenantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cache', password='x')
+        self.autre = User.objects.create_user('cache_autre', password='x')
+        self.vehicule = creer_vehicule(self.user, 1)
+        self.client.force_login(self.user)
+
+    def test_registre_perime_les_espaces_du_tenant(self):
+        self.assertIn(('dashboard_kpi', 'vehicule'), REGISTRE_INVALIDATION[DistanceParcourue])
+        url = reverse('fleet_app:api_dashboard_kpi')
+        self.assertEqual(self.client.get(url).json()['kpi']['distances'], [])
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(url)
+        self.assertFalse([q for q in requetes if 'fleet_app_distanceparcourue' in q['sql']])
+
+        version_autre = versions('dashboard_kpi', [('user', self.autre.pk)])
+        jour = date(2025, 5, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            DistanceParcourue.objects.create(
+                vehicule=self.vehicule, date_debut=jour, km_debut=0, date_fin=jour, km_fin=80,
+                distance_parcourue=80, type_moteur='Diesel', user=self.user,
+            )
+        self.assertEqual(len(self.client.get(url).json()['kpi']['distances']), 1)
+        self.assertEqual(versions('dashboard_kpi', [('user', self.autre.pk)]), version_autre)
+
+    def test_changement_de_tenant_perime_les_deux(self):
+        alerte = Alerte.objects.create(titre='Vidange', description='Huile', vehicule=self.vehicule)
+        vehicule_autre = creer_vehicule(self.autre, 2)
+        avant = versions('alertes:compteurs', [('user', self.user.pk), ('user', self.autre.pk)])
+        alerte.vehicule = vehicule_autre
+        with self.captureOnCommitCallbacks(execute=True):
+            alerte.save()
+            # Les versions ne changent qu'à la validation de la transaction
+            self.assertEqual(versions('alertes:compteurs', [('user', self.user.pk), ('user', self.autre.pk)]), avant)
+        apres = versions('alertes:compteurs', [('user', self.user.pk), ('user', self.autre.pk)])
+        self.assertTrue(all(nouvelle != ancienne for nouvelle, ancienne in zip(apres, avant)))
+
+        # Sans changement de véhicule, seul le tenant courant est périmé (pas de lecture préalable)
+        with CaptureQueriesContext(connection) as requetes, self.captureOnCommitCallbacks(execute=True):
+            alerte.save(update_fields=['statut'])
+        self.assertEqual(versions('alertes:compteurs', [('user', self.user.pk)]), apres[:1])
+        self.assertFalse([q for q in requetes if q['sql'].startswith('SELECT "fleet_app_alerte"."vehicule_id" FROM')])
+
+    def test_statistiques_stock_invalidees_par_les_mouvements(self):
+        produit = Produit.objects.create(
+            id_produit='PRD001', nom='Filtre', categorie='Pièce', unite='Pièce',
+            seuil_minimum=5, prix_unitaire=1000, fournisseur='Total', user=self.user,
+        )
+        url = reverse('fleet_app:stock_actuel')
+        self.assertEqual(self.client.get(url).context['produits_rupture'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            EntreeStock.objects.create(
+                id_entree='ENT001', produit=produit, quantite=10, prix_unitaire=1000, fournisseur='Total',
+                reference_facture='F1',
+            )
+        response = self.client.get(url)
+        self.assertEqual((response.context['produits_rupture'], response.context['valeur_totale']), (0, 10000))
+
+    def test_cache_memoire_pendant_les_tests(self):
+        # Le lanceur de tests (settings.TEST_RUNNER) remplace le cache partagé configuré
+        from django.core.cache import caches
+        self.assertEqual(type(caches['default']).__name__, 'LocMemCache')
+
+    def test_cache_fichiers_partage(self):
+        with tempfile.TemporaryDirectory() as dossier, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': dossier,
+        }}):
+            calculs = []
+            calcul = lambda: calculs.append(1) or {'total': len(calculs)}
+            self.assertEqual(en_cache('essai', 'user', 1, ('a',), calcul, 60), {'total': 1})
+            self.assertEqual(en_cache('essai', 'user', 1, ('a',), calcul, 60), {'total': 1})
+            invalider('essai', user_id=1)
+            self.assertEqual(en_cache('essai', 'user', 1, ('a',), calcul, 60), {'total': 2})
+
+
+class PagesConditionnellesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('accueil', password='x')
+        Profil.objects.create(
+            user=self.user, type_compte='entreprise', telephone='600', email='a@example.com', role='admin',
+            compte_complete=True,
+        )
+        self.location = LocationVehicule.objects.create(
+            vehicule=creer_vehicule(self.user, 1), type_location='Externe',
+            date_debut=date.today().replace(day=1), tarif_journalier=100, user=self.user,
+        )
+        self.feuille = FeuillePontageLocation.objects.create(location=self.location, date=date.today(), user=self.user)
+
+    def test_accueil_public_304_fragment_et_invalidation(self):
+        url = reverse('accueil_public')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Sans ETag (autre visiteur): l'état du jour vient du cache de fragments
+        with CaptureQueriesContext(connection) as requetes:
+            self.assertContains(self.client.get(url), 'RC-0001')
+        self.assertFalse([q for q in requetes if 'fleet_app_fournisseurvehicule' in q['sql']])
+
+        self.feuille.statut = 'Hors service'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.feuille.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.context['etat']['vehicules_panne'], 1)
+
+    def test_galerie_ecriture_sans_signal(self):
+        url = reverse('fleet_app:gallery')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # bulk_create n'envoie pas de signal: le filigrane change l'ETag et la clé du fragment
+        GalleryImage.objects.bulk_create([GalleryImage(title='Flotte 2025', image='gallery/flotte.jpg')])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Flotte 2025')
+
+    def test_accueil_connecte(self):
+        self.client.force_login(self.user)
+        url = reverse('fleet_app:home')
+        # Première visite: le rendu crée le cookie CSRF, pas d'ETag
+        self.assertFalse(self.client.get(url).has_header('ETag'))
+        response = self.client.get(url)
+        self.assertEqual(response.context['locations_jour']['locations_travail'], 1)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Profil.objects.filter(user=self.user).update(compte_complete=False)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header('ETag'))
@@ -21,6 +21,8 @@ from . import views_location
 from . import views_vehicule_stats
 from . import views_vehicule_simple
 from . import views_fournisseur_simple
+from . import views_pdf
+from . import views_typeahead
 
 app_name = 'fleet_app'
 
@@ -31,6 +33,7 @@ urlpatterns = [
     path('galerie/', views.gallery, name='gallery'),
     # Tableau de bord
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('api/dashboard/kpi/', views.dashboard_kpi_json, name='api_dashboard_kpi'),
     
     # Création de compte après première connexion
     path('creation-compte/', views_accounts.creation_compte, name='creation_compte'),
@@ -168,6 +171,7 @@ urlpatterns = [
     # URLs pour le pointage journalier
     path('pointage/', views_pointage.pointage_journalier, name='pointage_journalier'),
     path('pointage/ajax/', views_pointage.pointage_ajax, name='pointage_ajax'),
+    path('pointage/bulk/', views_pointage.pointage_bulk, name='pointage_bulk'),
     path('pointage/formulaire/', views_pointage.pointage_formulaire, name='pointage_formulaire'),
     path('pointage/rapide/', views_pointage.pointage_rapide, name='pointage_rapide'),
     path('pointage/historique/', views_pointage.historique_pointage, name='historique_pointage'),
@@ -266,6 +270,10 @@ urlpatterns = [
     path('locations/factures/<int:pk>/', views_location.facture_detail, name='facture_location_detail'),
     path('locations/factures/<int:pk>/pdf/', views_location.facture_pdf, name='facture_location_pdf'),
     path('locations/factures/batch-pdf/', views_location.factures_batch_pdf, name='factures_batch_pdf'),
+    
+    # Rendus PDF en file d'attente (suivi et téléchargement)
+    path('pdf/rendus/<int:rendu_id>/', views_pdf.rendu_pdf_status, name='rendu_pdf_status'),
+    path('pdf/rendus/<int:rendu_id>/telecharger/', views_pdf.rendu_pdf_telecharger, name='rendu_pdf_telecharger'),
     path('locations/factures/generation-mensuelle/', views_location.generer_factures_mensuelles, name='generer_factures_mensuelles'),
     
     # AJAX
@@ -277,8 +285,6 @@ urlpatterns = [
     path('locations/factures/search-ajax/', views_location.facture_search_ajax, name='facture_search_ajax'),
     path('alertes/search-ajax/', views_alertes.alerte_search_ajax, name='alerte_search_ajax'),
     # AJAX for selects in location form
-    path('ajax/search-vehicules/', views_location.search_vehicules_ajax, name='search_vehicules_ajax'),
-    path('ajax/search-fournisseurs/', views_location.search_fournisseurs_ajax, name='search_fournisseurs_ajax'),
     path('ajax/fournisseur/quick-create/', views_location.fournisseur_quick_create_ajax, name='fournisseur_quick_create_ajax'),
     path('ajax/vehicule/quick-create/', views_location.vehicule_quick_create_ajax, name='vehicule_quick_create_ajax'),
     path('ajax/vehicule/get-fournisseur/', views_location.get_vehicule_fournisseur_ajax, name='get_vehicule_fournisseur_ajax'),
@@ -286,6 +292,7 @@ urlpatterns = [
     # URLs pour les statistiques des véhicules
     path('stats/vehicules/', views_vehicule_stats.vehicule_stats_dashboard, name='vehicule_stats_dashboard'),
     path('stats/vehicules/comparaison/', views_vehicule_stats.vehicule_comparaison_stats, name='vehicule_comparaison_stats'),
+    path('stats/vehicules/comparaison/api/', views_vehicule_stats.vehicule_comparaison_api, name='vehicule_comparaison_api'),
     path('stats/vehicules/export/', views_vehicule_stats.vehicule_stats_export, name='vehicule_stats_export'),
     path('stats/vehicules/<str:vehicule_id>/', views_vehicule_stats.vehicule_stats_detail, name='vehicule_stats_detail'),
     
@@ -325,6 +332,7 @@ urlpatterns = [
     # URLs pour la synchronisation des données
     path('synchronization/', views_synchronization.synchronization_dashboard, name='synchronization_dashboard'),
     path('synchronization/ajax/sync/', views_synchronization.synchroniser_donnees_ajax, name='synchroniser_donnees_ajax'),
+    path('synchronization/jobs/<int:job_id>/', views_synchronization.synchronisation_job_status, name='synchronisation_job_status'),
     path('synchronization/ajax/coherence/', views_synchronization.verifier_coherence_ajax, name='verifier_coherence_ajax'),
     path('synchronization/corriger/', views_synchronization.corriger_incoherences, name='corriger_incoherences'),
     path('synchronization/export/', views_synchronization.export_rapport_coherence, name='export_rapport_coherence'),
@@ -333,5 +341,6 @@ urlpatterns = [
     
     # API de recherche dynamique
     path('api/recherche/', views.recherche_dynamique, name='api_recherche'),
+    path('api/typeahead/', views_typeahead.typeahead, name='api_typeahead'),
 
 ]
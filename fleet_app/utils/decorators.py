@@ -1,17 +1,27 @@
 from functools import wraps
+from django.apps import apps
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 
+from .tenant import get_tenant_context
 
-def _get_user_entreprise(user):
-    """Return entreprise instance from user if available (user.entreprise or user.profil.entreprise)."""
-    ent = getattr(user, 'entreprise', None)
-    if ent is not None:
-        return ent
-    profil = getattr(user, 'profil', None)
-    if profil is not None:
-        return getattr(profil, 'entreprise', None)
-    return None
+
+# Concrete field names per model, computed once at startup (see FleetAppConfig.ready)
+_MODEL_FIELDS = {}
+
+
+def index_model_fields():
+    """Cache the field names of every installed model for tenant scoping."""
+    for model in apps.get_models():
+        _MODEL_FIELDS[model] = frozenset(f.name for f in model._meta.fields)
+
+
+def _model_fields(model):
+    """Field names of a model (computed on first use for models outside the startup index)."""
+    fields = _MODEL_FIELDS.get(model)
+    if fields is None:
+        fields = _MODEL_FIELDS[model] = frozenset(f.name for f in model._meta.fields) if hasattr(model, '_meta') else frozenset()
+    return fields
 
 
 def object_belongs_to_tenant(model, lookup_kwarg='pk', entreprise_field='entreprise', user_field='user'):
@@ -32,8 +42,8 @@ def object_belongs_to_tenant(model, lookup_kwarg='pk', entreprise_field='entrepr
 
             filters = {'pk': lookup_value}
             # Prefer entreprise scoping when available
-            user_ent = _get_user_entreprise(request.user)
-            if hasattr(model, '_meta') and any(f.name == entreprise_field for f in model._meta.fields) and user_ent is not None:
+            user_ent = get_tenant_context(request).entreprise
+            if entreprise_field in _model_fields(model) and user_ent is not None:
                 filters[entreprise_field] = user_ent
             else:
                 filters[user_field] = request.user
@@ -52,11 +62,12 @@ def object_belongs_to_tenant(model, lookup_kwarg='pk', entreprise_field='entrepr
 def queryset_filter_by_tenant(qs, request, entreprise_field='entreprise', user_field='user'):
     """Filter a queryset by entreprise when available, else by user. Avoid FieldError when fields are missing."""
     model = qs.model
-    # Check model fields
-    has_ent = hasattr(model, '_meta') and any(f.name == entreprise_field for f in model._meta.fields)
-    has_user = hasattr(model, '_meta') and any(f.name == user_field for f in model._meta.fields)
+    # Check model fields (indexed once per model)
+    fields = _model_fields(model)
+    has_ent = entreprise_field in fields
+    has_user = user_field in fields
 
-    user_ent = _get_user_entreprise(request.user)
+    user_ent = get_tenant_context(request).entreprise
 
     # Prefer entreprise scoping when available
     if has_ent and user_ent is not None:
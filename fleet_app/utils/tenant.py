@@ -0,0 +1,63 @@
+from django.core.exceptions import ObjectDoesNotExist
+
+
+class TenantContext:
+    """Tenant of the current request: user, profil and entreprise resolved once.
+
+    Built by `TenantMiddleware` and stored on `request.tenant`. When the user was
+    loaded by `fleet_app.backends.TenantModelBackend`, profil and entreprise come
+    from the same `select_related` query and building the context costs nothing.
+    """
+
+    __slots__ = ('user', 'profil', 'entreprise')
+
+    def __init__(self, user=None, profil=None, entreprise=None):
+        self.user = user
+        self.profil = profil
+        self.entreprise = entreprise
+
+    def __repr__(self):
+        return f'<TenantContext user={getattr(self.user, "pk", None)} entreprise={getattr(self.entreprise, "pk", None)}>'
+
+    @property
+    def portee(self):
+        """Scope applied by `queryset_filter_by_tenant`: ('entreprise', id) or ('user', id)."""
+        if self.entreprise is not None:
+            return 'entreprise', self.entreprise.pk
+        return 'user', getattr(self.user, 'pk', None)
+
+
+def _related(instance, name):
+    """Reverse one-to-one relation of an instance, None when it does not exist."""
+    if instance is None:
+        return None
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def build_tenant_context(user):
+    """Resolve profil and entreprise of a user (user.profil.entreprise first, then user.entreprise)."""
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return TenantContext(user=user)
+    if 'profil' not in user._state.fields_cache:
+        # User not loaded by TenantModelBackend (older session, tests): one query for both relations
+        from ..models_accounts import Profil
+        profil = Profil.objects.select_related('entreprise').filter(user_id=user.pk).first()
+        Profil._meta.get_field('user').remote_field.set_cached_value(user, profil)
+    profil = _related(user, 'profil')
+    entreprise = _related(profil, 'entreprise') or getattr(user, 'entreprise', None)
+    return TenantContext(user=user, profil=profil, entreprise=entreprise)
+
+
+def get_tenant_context(request):
+    """Tenant context of a request, built on first use when the middleware did not run."""
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None or tenant.user is not getattr(request, 'user', None):
+        tenant = build_tenant_context(getattr(request, 'user', None))
+        try:
+            request.tenant = tenant
+        except AttributeError:
+            pass
+    return tenant
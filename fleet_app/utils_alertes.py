@@ -0,0 +1,50 @@
+"""
+Compteurs d'alertes actives par tenant
+
+Le badge du menu (`context_processors.alerts_count`) et l'API de rafraîchissement
+du tableau de bord (`views_alertes.get_alertes_kpi`) lisaient les alertes actives
+par `COUNT(*)` à chaque rendu, sans filtre de tenant. Les compteurs sont
+désormais calculés en une requête groupée par niveau, sur les véhicules du
+tenant, puis gardés dans le cache jusqu'à la prochaine modification d'une
+alerte ou d'un véhicule du tenant (espace `ESPACE_CACHE` du registre
+d'invalidation, voir utils_cache).
+"""
+
+from django.db.models import Count
+
+from .models_alertes import Alerte
+from .utils.tenant import build_tenant_context
+from .utils_cache import en_cache
+
+
+# Filet de sécurité: les signaux invalident les compteurs à chaque modification
+DUREE_CACHE_COMPTEURS = 60 * 60
+
+# Espace de cache (voir utils_cache), périmé par les signaux des alertes et véhicules
+ESPACE_CACHE = 'alertes:compteurs'
+
+
+def alertes_actives_tenant(user):
+    """Alertes actives des véhicules du tenant (même portée que `queryset_filter_by_tenant`)"""
+    portee, identifiant = build_tenant_context(user).portee
+    return Alerte.objects.filter(statut='Active', **{f'vehicule__{portee}_id': identifiant})
+
+
+def compteurs_alertes(user):
+    """
+    Nombre d'alertes actives du tenant, au total et par niveau
+
+    Args:
+        user: Utilisateur connecté
+
+    Returns:
+        dict: {'total_actives': int, 'par_niveau': {niveau: int}}
+    """
+    def calculer():
+        par_niveau = dict(
+            alertes_actives_tenant(user).values_list('niveau').annotate(total=Count('pk')).order_by()
+        )
+        return {'total_actives': sum(par_niveau.values()), 'par_niveau': par_niveau}
+
+    portee, identifiant = build_tenant_context(user).portee
+    return en_cache(ESPACE_CACHE, portee, identifiant, (), calculer, DUREE_CACHE_COMPTEURS)
@@ -0,0 +1,220 @@
+"""
+Cache partagé par tenant et invalidation par signaux
+
+Le cache (`settings.CACHES`: Redis ou Memcached pour plusieurs workers,
+mémoire du processus en développement) doit offrir un `incr` atomique.
+Les données sont rangées par *espace* (indicateurs des locations, compteurs
+d'alertes, KPI du tableau de bord, stock...) et par tenant : chaque clé
+contient la version de l'espace pour l'utilisateur ou l'entreprise, si bien
+qu'invalider revient à incrémenter cette version, sans rechercher ni supprimer
+les anciennes clés (elles expirent d'elles-mêmes).
+
+Les versions initiales sont horodatées : une version évincée du cache ne
+retombe jamais sur une valeur déjà utilisée, donc jamais sur une entrée périmée.
+
+Le registre (`enregistrer_invalidation`) indique quels modèles périment quels
+espaces ; `connecter_invalidations` branche un seul récepteur post_save /
+post_delete par modèle (voir la section CACHE PAR TENANT de signals.py), plus
+un récepteur pre_save qui mémorise le tenant enregistré en base : une ligne qui
+change de tenant (véhicule d'une alerte, propriétaire d'un véhicule) périme
+l'ancien comme le nouveau. Les versions changent à la validation de la
+transaction (`invalider_apres_commit`). Un
+espace déclaré global a en plus une version commune à tous les tenants
+(`PORTEE_GLOBALE`), périmée par toute modification, pour les pages qui
+affichent les données de tous les tenants (accueil public, galerie).
+"""
+
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+PORTEES = ('user', 'entreprise')
+
+# Portée des espaces globaux: une seule version pour tous les tenants
+PORTEE_GLOBALE = ('global', 0)
+
+# Espaces dont la version globale est périmée en plus de celle du tenant
+ESPACES_GLOBAUX = set()
+
+# Modèle -> [(espace, relation portant le tenant ou None si le modèle le porte lui-même)]
+REGISTRE_INVALIDATION = defaultdict(list)
+
+
+def _cle_version(espace, portee, identifiant):
+    return f"{espace}:version:{portee}:{identifiant}"
+
+
+def versions(espace, portees):
+    """
+    Versions courantes d'un espace pour plusieurs portées (une lecture groupée)
+
+    Args:
+        espace: Nom de l'espace de cache
+        portees: Itérable de (portée, identifiant)
+
+    Returns:
+        tuple: Versions dans l'ordre des portées
+    """
+    cles = [_cle_version(espace, portee, identifiant) for portee, identifiant in portees]
+    trouvees = cache.get_many(cles)
+    for cle in cles:
+        if cle not in trouvees:
+            # Version initiale horodatée: une clé évincée ne retombe jamais sur une ancienne valeur
+            cache.add(cle, time.time_ns(), None)
+            trouvees[cle] = cache.get(cle)
+    return tuple(trouvees[cle] for cle in cles)
+
+
+def cle_tenant(espace, portee, identifiant, *parties):
+    """Clé versionnée d'une entrée d'un espace pour un tenant"""
+    version, = versions(espace, [(portee, identifiant)])
+    return ':'.join([espace, portee, str(identifiant), f'v{version}', *map(str, parties)])
+
+
+def en_cache(espace, portee, identifiant, parties, calcul, duree):
+    """
+    Valeur en cache d'un tenant, calculée puis mise en cache si absente
+
+    Args:
+        espace: Nom de l'espace de cache
+        portee, identifiant: Tenant (voir utils.tenant.TenantContext.portee)
+        parties: Éléments complétant la clé (date, filtre...)
+        calcul: Fonction sans argument produisant la valeur (jamais None)
+        duree: Durée de vie en secondes (filet de sécurité, l'invalidation est explicite)
+    """
+    cle = cle_tenant(espace, portee, identifiant, *parties)
+    valeur = cache.get(cle)
+    if valeur is None:
+        valeur = calcul()
+        cache.set(cle, valeur, duree)
+    return valeur
+
+
+def invalider(espace, user_id=None, entreprise_id=None):
+    """
+    Périme les entrées d'un espace pour les tenants concernés par une modification
+
+    Args:
+        espace: Nom de l'espace de cache
+        user_id: Utilisateur propriétaire de la ligne modifiée
+        entreprise_id: Entreprise de la ligne modifiée
+    """
+    portees = [(portee, identifiant) for portee, identifiant in zip(PORTEES, (user_id, entreprise_id))
+               if identifiant is not None]
+    if espace in ESPACES_GLOBAUX:
+        portees.append(PORTEE_GLOBALE)
+    for portee, identifiant in portees:
+        try:
+            cache.incr(_cle_version(espace, portee, identifiant))
+        except ValueError:
+            # Pas encore de version: la prochaine lecture en créera une nouvelle
+            pass
+
+
+def invalider_apres_commit(espace, user_id=None, entreprise_id=None):
+    """
+    Comme `invalider`, une fois la transaction courante validée (aussitôt hors transaction)
+
+    Changer la version avant la validation laisserait une requête concurrente
+    recalculer l'entrée depuis les données encore non validées et la ranger sous
+    la nouvelle version ; après un rollback, la version reste inchangée.
+    """
+    transaction.on_commit(lambda: invalider(espace, user_id, entreprise_id))
+
+
+def enregistrer_invalidation(espace, *modeles, via=None, globale=False):
+    """
+    Déclare que l'enregistrement ou la suppression des modèles périme l'espace
+
+    Args:
+        espace: Nom de l'espace de cache
+        modeles: Modèles dont les signaux invalident l'espace
+        via: Clé étrangère portant le tenant (ex. 'vehicule'), None si le modèle
+            a lui-même ses champs user / entreprise
+        globale: Périme aussi la version globale de l'espace (`PORTEE_GLOBALE`)
+    """
+    if globale:
+        ESPACES_GLOBAUX.add(espace)
+    for modele in modeles:
+        if (espace, via) not in REGISTRE_INVALIDATION[modele]:
+            REGISTRE_INVALIDATION[modele].append((espace, via))
+
+
+def tenant_de(instance, via=None, valeurs=None):
+    """
+    (user_id, entreprise_id) d'une instance, ou de l'objet lié par la clé étrangère `via`
+
+    Args:
+        instance: Instance d'un modèle du registre
+        via: Clé étrangère portant le tenant, None si l'instance le porte elle-même
+        valeurs: Attributs lus en base à la place de ceux de l'instance (tenant précédent)
+    """
+    def lire(attribut):
+        return valeurs.get(attribut) if valeurs is not None else getattr(instance, attribut, None)
+
+    if via is None:
+        return lire('user_id'), lire('entreprise_id')
+    champ = instance._meta.get_field(via)
+    identifiant = lire(champ.attname)
+    if identifiant is None:
+        return None, None
+    ligne = champ.related_model.objects.filter(pk=identifiant).values('user_id', 'entreprise_id').first()
+    return (ligne['user_id'], ligne['entreprise_id']) if ligne else (None, None)
+
+
+def _attributs_tenant(modele):
+    """Attributs d'un modèle du registre qui portent son tenant (directement ou par `via`)"""
+    attributs = set()
+    for _, via in REGISTRE_INVALIDATION.get(modele, ()):
+        if via is None:
+            attributs.update(champ.attname for champ in modele._meta.concrete_fields if champ.name in PORTEES)
+        else:
+            attributs.add(modele._meta.get_field(via).attname)
+    return sorted(attributs)
+
+
+def memoriser_tenant_precedent(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Mémorise les attributs portant le tenant enregistrés en base avant modification
+    pour périmer aussi l'ancien tenant quand la ligne en change
+    """
+    instance._tenant_precedent = None
+    if raw or instance._state.adding:
+        return
+    attributs = _attributs_tenant(sender)
+    if update_fields is not None:
+        noms = {nom for attribut in attributs for nom in (attribut, attribut.removesuffix('_id'))}
+        if not noms.intersection(update_fields):
+            return
+    if attributs:
+        instance._tenant_precedent = sender._base_manager.filter(pk=instance.pk).values(*attributs).first()
+
+
+def invalider_apres_modification(sender, instance, raw=False, **kwargs):
+    """Périme les espaces enregistrés pour le modèle, pour l'ancien et le nouveau tenant de l'instance."""
+    if raw:
+        return
+    precedent = instance.__dict__.pop('_tenant_precedent', None)
+    tenants = {}
+    for espace, via in REGISTRE_INVALIDATION.get(sender, ()):
+        if via not in tenants:
+            tenants[via] = {tenant_de(instance, via)}
+            if precedent is not None:
+                tenants[via].add(tenant_de(instance, via, precedent))
+        for tenant in tenants[via]:
+            invalider_apres_commit(espace, *tenant)
+
+
+def connecter_invalidations():
+    """Branche le récepteur d'invalidation sur chaque modèle du registre"""
+    for modele in REGISTRE_INVALIDATION:
+        pre_save.connect(memoriser_tenant_precedent, sender=modele,
+                         dispatch_uid=f'cache_tenant_pre_save_{modele.__name__}')
+        post_save.connect(invalider_apres_modification, sender=modele,
+                          dispatch_uid=f'cache_tenant_post_save_{modele.__name__}')
+        post_delete.connect(invalider_apres_modification, sender=modele,
+                            dispatch_uid=f'cache_tenant_post_delete_{modele.__name__}')
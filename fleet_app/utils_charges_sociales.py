@@ -214,10 +214,8 @@ def calculer_salaire_base_depuis_presences(employe, mois, annee) -> Decimal:
     from .models_entreprise import ConfigurationMontantEmploye
     
     # Récupérer les présences du mois
-    presences = PresenceJournaliere.objects.filter(
-        employe=employe,
-        date__month=mois,
-        date__year=annee
+    presences = PresenceJournaliere.objects.for_month(mois, annee).filter(
+        employe=employe
     )
     
     # Récupérer la configuration des montants pour cet employé
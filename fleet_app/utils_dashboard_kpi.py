@@ -0,0 +1,246 @@
+"""
+Moteur d'agrégation des KPI du tableau de bord principal.
+
+Construit les 7 blocs KPI (distance, consommation, disponibilité, utilisation,
+incidents, coûts de fonctionnement et coûts financiers) ainsi que la
+répartition des véhicules par statut à partir de quelques requêtes annotées.
+Les attributs du véhicule (immatriculation, marque, modèle...) sont joints
+dans la même requête au lieu d'un `get()` par ligne.
+
+Le résultat est un objet typé utilisable aussi bien par le template
+`dashboard.html` que par l'endpoint JSON `dashboard_kpi_json`. Il est mis en
+cache par tenant (`kpi_dashboard_tenant`) et périmé par les signaux des
+véhicules et des sources KPI (voir utils_cache).
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List
+
+from django.db.models import Avg, Count, F, Q, Sum
+
+from .utils.decorators import queryset_filter_by_tenant
+from .utils.tenant import get_tenant_context
+from .utils_cache import en_cache
+from .models import (
+    Vehicule, DistanceParcourue, ConsommationCarburant, DisponibiliteVehicule,
+    UtilisationActif, IncidentSecurite, CoutFonctionnement, CoutFinancier,
+)
+
+
+# Nombre de véhicules affichés dans chaque bloc "top"
+TOP_N = 5
+
+# Objectifs annuels de distance par type de moteur (km/an)
+OBJECTIFS_DISTANCE = {'Diesel': 30000, 'Essence': 15000}
+OBJECTIF_DISTANCE_DEFAUT = 10000
+
+# Consommation cible par type de moteur (L/100km)
+CIBLES_CONSOMMATION = {'Diesel': 6.0, 'Essence': 7.0}
+CIBLE_CONSOMMATION_DEFAUT = 5.0
+
+# Seuils de coût par catégorie (€/km)
+SEUILS_COUT_FONCTIONNEMENT = {'Utilitaire': 0.15, 'Berline': 0.12}
+SEUIL_COUT_FONCTIONNEMENT_DEFAUT = 0.10
+SEUILS_COUT_FINANCIER = {'Utilitaire': 0.20, 'Berline': 0.15}
+SEUIL_COUT_FINANCIER_DEFAUT = 0.12
+
+# Filet de sécurité: les signaux invalident les KPI à chaque modification
+DUREE_CACHE_KPI = 60 * 60
+
+# Espace de cache (voir utils_cache), périmé par les signaux des véhicules et sources KPI
+ESPACE_CACHE = 'dashboard_kpi'
+
+# Attributs du véhicule joints à chaque ligne KPI
+CHAMPS_VEHICULE = ('immatriculation', 'marque', 'modele', 'type_moteur', 'categorie')
+
+
+@dataclass
+class DashboardKpi:
+    """Résultat complet des KPI du tableau de bord pour un tenant."""
+    total_vehicules: int = 0
+    vehicules_actifs: int = 0
+    vehicules_maintenance: int = 0
+    vehicules_hors_service: int = 0
+    distances: List[Dict] = field(default_factory=list)
+    consommations: List[Dict] = field(default_factory=list)
+    disponibilites: List[Dict] = field(default_factory=list)
+    utilisations: List[Dict] = field(default_factory=list)
+    incidents: List[Dict] = field(default_factory=list)
+    couts_fonctionnement: List[Dict] = field(default_factory=list)
+    couts_financiers: List[Dict] = field(default_factory=list)
+
+    def as_context(self):
+        """Retourne les clés attendues par le template du tableau de bord."""
+        return {
+            'total_vehicules': self.total_vehicules,
+            'vehicules_actifs': self.vehicules_actifs,
+            'vehicules_maintenance': self.vehicules_maintenance,
+            'vehicules_hors_service': self.vehicules_hors_service,
+            'distances': self.distances,
+            'consommations': self.consommations,
+            'disponibilites': self.disponibilites,
+            'utilisations': self.utilisations,
+            'incidents': self.incidents,
+            'couts_fonctionnement': self.couts_fonctionnement,
+            'couts_financiers': self.couts_financiers,
+        }
+
+    def as_dict(self):
+        """Représentation sérialisable en JSON."""
+        return asdict(self)
+
+
+def _lignes_par_vehicule(queryset, vehicules_qs, **aggregats):
+    """
+    Agrège `queryset` par véhicule en joignant les attributs du véhicule.
+
+    Une seule requête SQL (GROUP BY véhicule + colonnes jointes) ; les clés
+    `vehicule__<champ>` sont renommées en `<champ>` pour le template.
+    """
+    champs = ['vehicule'] + [f'vehicule__{c}' for c in CHAMPS_VEHICULE]
+    return queryset.filter(vehicule__in=vehicules_qs).values(*champs).annotate(**aggregats)
+
+
+def _aplatir(ligne):
+    """Renomme les attributs joints du véhicule (`vehicule__marque` -> `marque`)."""
+    for champ in CHAMPS_VEHICULE:
+        ligne[champ] = ligne.pop(f'vehicule__{champ}')
+    return ligne
+
+
+def calculer_statuts_vehicules(vehicules_qs):
+    """Compte les véhicules par statut en une seule requête d'agrégation conditionnelle."""
+    return vehicules_qs.aggregate(
+        total=Count('pk'),
+        actifs=Count('pk', filter=Q(statut_actuel='Actif')),
+        maintenance=Count('pk', filter=Q(statut_actuel='Maintenance')),
+        hors_service=Count('pk', filter=Q(statut_actuel='Hors Service')),
+    )
+
+
+def calculer_kpi_dashboard(vehicules_qs, top_n=TOP_N):
+    """
+    Calcule tous les blocs KPI du tableau de bord.
+
+    Args:
+        vehicules_qs: Queryset des véhicules du tenant (déjà filtré)
+        top_n: Nombre de véhicules retenus par bloc
+
+    Returns:
+        DashboardKpi: Résultat typé (8 requêtes SQL au total)
+    """
+    statuts = calculer_statuts_vehicules(vehicules_qs)
+    resultat = DashboardKpi(
+        total_vehicules=statuts['total'],
+        vehicules_actifs=statuts['actifs'],
+        vehicules_maintenance=statuts['maintenance'],
+        vehicules_hors_service=statuts['hors_service'],
+    )
+
+    # 1. Distance parcourue - Top des véhicules par distance
+    distances = _lignes_par_vehicule(
+        DistanceParcourue.objects, vehicules_qs,
+        distance_totale=Sum('distance_parcourue'),
+    ).order_by('-distance_totale')[:top_n]
+    for d in distances:
+        d = _aplatir(d)
+        d['distance_totale'] = d['distance_totale'] or 0
+        d['objectif'] = OBJECTIFS_DISTANCE.get(d['type_moteur'], OBJECTIF_DISTANCE_DEFAUT)
+        d['pourcentage'] = min(100, (d['distance_totale'] / d['objectif']) * 100)
+        resultat.distances.append(d)
+
+    # 2. Consommation de carburant - Top des véhicules par consommation
+    consommations = _lignes_par_vehicule(
+        ConsommationCarburant.objects, vehicules_qs,
+        consommation_moyenne=Avg('consommation_100km'),
+    ).order_by('-consommation_moyenne')[:top_n]
+    for c in consommations:
+        c = _aplatir(c)
+        c['consommation_moyenne'] = c['consommation_moyenne'] or 0
+        c['cible'] = CIBLES_CONSOMMATION.get(c['type_moteur'], CIBLE_CONSOMMATION_DEFAUT)
+        c['depassement'] = max(0, c['consommation_moyenne'] - c['cible'])
+        c['alerte'] = c['consommation_moyenne'] > c['cible'] * 1.2  # 20% au-dessus de la cible
+        resultat.consommations.append(c)
+
+    # 3. Disponibilité - Véhicules les moins disponibles
+    disponibilites = _lignes_par_vehicule(
+        DisponibiliteVehicule.objects, vehicules_qs,
+        disponibilite_moyenne=Avg('disponibilite_pourcentage'),
+    ).order_by('disponibilite_moyenne')[:top_n]
+    for d in disponibilites:
+        d = _aplatir(d)
+        d['disponibilite_moyenne'] = d['disponibilite_moyenne'] or 0
+        d['alerte'] = d['disponibilite_moyenne'] < 80
+        resultat.disponibilites.append(d)
+
+    # 4. Utilisation des actifs
+    utilisations = _lignes_par_vehicule(
+        UtilisationActif.objects, vehicules_qs,
+        jours_utilises_total=Sum('jours_utilises'),
+        jours_disponibles_total=Sum('jours_disponibles'),
+    ).order_by('vehicule')[:top_n]
+    for u in utilisations:
+        u = _aplatir(u)
+        jours_utilises = u['jours_utilises_total'] or 0
+        jours_disponibles = u['jours_disponibles_total'] or 0
+        if jours_disponibles > 0:
+            u['utilisation_moyenne'] = (jours_utilises / jours_disponibles) * 100
+        else:
+            u['utilisation_moyenne'] = 0
+        u['alerte'] = u['utilisation_moyenne'] < 70
+        resultat.utilisations.append(u)
+
+    # 5. Sécurité - Véhicules avec le plus d'incidents
+    incidents = _lignes_par_vehicule(
+        IncidentSecurite.objects, vehicules_qs,
+        total_incidents=Count('id'),
+    ).order_by('-total_incidents')[:top_n]
+    for i in incidents:
+        i = _aplatir(i)
+        i['alerte'] = i['total_incidents'] > 0
+        resultat.incidents.append(i)
+
+    # 6. Coûts de fonctionnement par km
+    couts_fonctionnement = _lignes_par_vehicule(
+        CoutFonctionnement.objects, vehicules_qs,
+        cout_moyen=Avg('cout_par_km'),
+    ).order_by('-cout_moyen')[:top_n]
+    for c in couts_fonctionnement:
+        c = _aplatir(c)
+        c['cout_moyen'] = c['cout_moyen'] or 0
+        c['seuil'] = SEUILS_COUT_FONCTIONNEMENT.get(c['categorie'], SEUIL_COUT_FONCTIONNEMENT_DEFAUT)
+        c['alerte'] = c['cout_moyen'] > c['seuil']
+        resultat.couts_fonctionnement.append(c)
+
+    # 7. Coûts financiers par km
+    couts_financiers = _lignes_par_vehicule(
+        CoutFinancier.objects, vehicules_qs,
+        cout_moyen=Avg('cout_par_km'),
+    ).order_by('-cout_moyen')[:top_n]
+    for c in couts_financiers:
+        c = _aplatir(c)
+        c['cout_moyen'] = c['cout_moyen'] or 0
+        c['seuil'] = SEUILS_COUT_FINANCIER.get(c['categorie'], SEUIL_COUT_FINANCIER_DEFAUT)
+        c['alerte'] = c['cout_moyen'] > c['seuil']
+        resultat.couts_financiers.append(c)
+
+    return resultat
+
+
+def kpi_dashboard_tenant(request, top_n=TOP_N):
+    """
+    KPI du tableau de bord du tenant, depuis le cache si possible
+
+    Args:
+        request: Requête (utilisateur connecté)
+        top_n: Nombre de véhicules retenus par bloc
+
+    Returns:
+        DashboardKpi: Voir `calculer_kpi_dashboard`
+    """
+    portee, identifiant = get_tenant_context(request).portee
+    return en_cache(
+        ESPACE_CACHE, portee, identifiant, (top_n,),
+        lambda: calculer_kpi_dashboard(queryset_filter_by_tenant(Vehicule.objects.all(), request), top_n),
+        DUREE_CACHE_KPI,
+    )
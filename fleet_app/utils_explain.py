@@ -0,0 +1,99 @@
+"""
+Contrôle des plans d'exécution des requêtes critiques
+
+Chaque requête chaude (listes et KPI filtrés par tenant / employé / produit
+et période) est passée à EXPLAIN ; un parcours séquentiel de sa table
+principale signifie qu'aucun index de `Meta.indexes` ne la couvre.
+Sous PostgreSQL, `enable_seqscan` est désactivé le temps de l'analyse : sur
+des tables peu remplies le planificateur préfère sinon un Seq Scan même
+lorsqu'un index est utilisable.
+Utilisé par `python manage.py bench_index_requetes`.
+"""
+
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models_alertes import Alerte
+from .models_entreprise import FraisKilometrique, HeureSupplementaire, PeseeCamion, PresenceJournaliere
+from .models_inventaire import MouvementStock
+from .models_location import FeuillePontageLocation
+
+
+def requetes_critiques(debut=None, fin=None):
+    """
+    Requêtes chaudes à contrôler (les identifiants sont fictifs: seul le plan compte)
+
+    Args:
+        debut: Début de période (1er du mois courant par défaut)
+        fin: Fin de période (aujourd'hui par défaut)
+
+    Returns:
+        list: [(libellé, queryset)]
+    """
+    fin = fin or date.today()
+    debut = debut or fin.replace(day=1)
+    periode = [debut, fin]
+    return [
+        ('Présences du mois d\'un employé', PresenceJournaliere.objects.filter(employe_id=0, date__range=periode)),
+        ('Présences du tenant', PresenceJournaliere.objects.filter(user_id=0, date__range=periode)),
+        ('Heures supplémentaires d\'un employé', HeureSupplementaire.objects.filter(employe_id=0, date__range=periode)),
+        ('Heures supplémentaires du tenant', HeureSupplementaire.objects.filter(user_id=0, date__range=periode)),
+        ('Frais kilométriques d\'un employé', FraisKilometrique.objects.filter(employe_id=0, date__range=periode)),
+        ('Frais kilométriques du tenant', FraisKilometrique.objects.filter(user_id=0, date__range=periode)),
+        ('Pesées du tenant', PeseeCamion.objects.filter(user_id=0, date__range=periode)),
+        ('Jours travaillés d\'une location', FeuillePontageLocation.objects.filter(
+            location_id=0, statut='Travail', date__range=periode)),
+        ('Feuilles de pontage du tenant', FeuillePontageLocation.objects.filter(user_id=0, date__range=periode)),
+        ('Feuilles de pontage de l\'entreprise', FeuillePontageLocation.objects.filter(
+            entreprise_id=0, date__range=periode)),
+        ('Alertes actives récentes', Alerte.objects.filter(statut='Active').order_by('-date_creation')[:5]),
+        ('Alertes actives d\'un véhicule', Alerte.objects.filter(vehicule_id='0', statut='Active')),
+        ('Derniers mouvements d\'un produit', MouvementStock.objects.filter(produit_id='0').order_by('-date')[:20]),
+        ('Mouvements de l\'entreprise', MouvementStock.objects.filter(entreprise_id=0, date__range=periode)),
+    ]
+
+
+def parcours_sequentiel(plan, table):
+    """
+    Indique si un plan EXPLAIN parcourt séquentiellement la table
+
+    Args:
+        plan: Texte renvoyé par `QuerySet.explain()`
+        table: Nom de la table principale
+
+    Returns:
+        bool: True si la table est lue sans index
+    """
+    table = re.escape(table)
+    if connection.vendor == 'postgresql':
+        return re.search(rf'Seq Scan on "?{table}"?(\s|$)', plan) is not None
+    if connection.vendor == 'sqlite':
+        # "SCAN table" sans "USING ... INDEX" (SEARCH = accès par index)
+        return re.search(rf'\bSCAN "?{table}"?(?! USING)', plan) is not None
+    # MySQL: type d'accès ALL sur la table
+    return re.search(rf'\b{table}\b.*\bALL\b', plan) is not None
+
+
+def analyser_requetes(requetes=None):
+    """
+    Exécute EXPLAIN sur chaque requête critique
+
+    Args:
+        requetes: Liste [(libellé, queryset)] (`requetes_critiques()` par défaut)
+
+    Returns:
+        list: [(libellé, table, plan, parcours séquentiel)]
+    """
+    requetes = requetes_critiques() if requetes is None else requetes
+    resultats = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for libelle, queryset in requetes:
+            table = queryset.model._meta.db_table
+            plan = queryset.explain()
+            resultats.append((libelle, table, plan, parcours_sequentiel(plan, table)))
+    return resultats
@@ -0,0 +1,158 @@
+"""
+Génération ensembliste des factures mensuelles de location
+
+Les jours "Travail" de toutes les locations sont comptés par une seule
+requête groupée sur FeuillePontageLocation (restreinte à la période de
+chaque location), puis toutes les factures du mois sont écrites par un
+unique `bulk_create(update_conflicts=True)` sur (utilisateur, numéro).
+Utilisé par la vue `generer_factures_mensuelles` et par la commande
+`python manage.py generer_factures_location` (tous les tenants).
+"""
+
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, F, Q
+
+from .models_location import FactureLocation, FeuillePontageLocation, LocationVehicule
+
+
+TAUX_TVA = Decimal('0.18')
+
+# Colonnes mises à jour quand la facture du mois existe déjà
+CHAMPS_FACTURE_MENSUELLE = [
+    'location', 'date', 'montant_ht', 'tva', 'montant_ttc',
+    'jours_travail_mois', 'jours_non_travail_mois', 'statut', 'entreprise',
+]
+
+
+def numero_facture_mensuelle(location_id, annee, mois):
+    """Numéro unique de la facture mensuelle d'une location: LOC-{pk}-{YYYYMM}"""
+    return f"LOC-{location_id}-{annee}{mois:02d}"
+
+
+def jours_travail_par_location(locations, premier_jour, dernier_jour):
+    """
+    Jours "Travail" du mois par location, limités à la période de chaque location
+
+    Returns:
+        dict: {location_id: nombre de jours} (une requête groupée)
+    """
+    lignes = FeuillePontageLocation.objects.filter(
+        location__in=locations,
+        statut="Travail",
+        date__gte=premier_jour,
+        date__lte=dernier_jour,
+    ).filter(
+        Q(date__gte=F('location__date_debut')),
+        Q(location__date_fin__isnull=True) | Q(date__lte=F('location__date_fin')),
+    ).values('location').annotate(jours=Count('pk')).order_by()
+    return {ligne['location']: ligne['jours'] for ligne in lignes}
+
+
+def generer_factures_mensuelles_locations(locations, annee, mois, user=None, entreprise=None):
+    """
+    Crée ou met à jour les factures mensuelles d'un ensemble de locations
+
+    Args:
+        locations: Queryset de LocationVehicule (déjà filtré par tenant)
+        annee: Année facturée
+        mois: Mois facturé (1-12)
+        user: Propriétaire des factures (par défaut celui de chaque location)
+        entreprise: Entreprise des factures (par défaut celle de chaque location)
+
+    Returns:
+        list: Un dict par location facturée (jours, montant, facture_id, numero, created)
+    """
+    premier_jour = date(annee, mois, 1)
+    dernier_jour = date(annee, mois, calendar.monthrange(annee, mois)[1])
+
+    # Locations dont la période recouvre le mois
+    locations = list(locations.filter(date_debut__lte=dernier_jour).filter(
+        Q(date_fin__isnull=True) | Q(date_fin__gte=premier_jour)
+    ).select_related('vehicule'))
+    jours_par_location = jours_travail_par_location(locations, premier_jour, dernier_jour)
+
+    factures = []
+    details = []
+    for loc in locations:
+        period_start = max(loc.date_debut or premier_jour, premier_jour)
+        period_end = min(loc.date_fin or dernier_jour, dernier_jour)
+
+        # Nombre de jours calendaires couverts ce mois pour cette location
+        jours_couverts = (period_end - period_start).days + 1
+        jours_travail = jours_par_location.get(loc.pk, 0)
+        jours_non_travail = max(jours_couverts - jours_travail, 0)
+
+        # Montants
+        tarif = loc.tarif_journalier or Decimal('0')
+        montant_ht = jours_travail * tarif
+        tva = montant_ht * TAUX_TVA
+        montant_ttc = montant_ht + tva
+
+        numero = numero_facture_mensuelle(loc.pk, annee, mois)
+        factures.append(FactureLocation(
+            location=loc,
+            numero=numero,
+            date=period_end,
+            montant_ht=montant_ht,
+            tva=tva,
+            montant_ttc=montant_ttc,
+            jours_travail_mois=jours_travail,
+            jours_non_travail_mois=jours_non_travail,
+            statut='Brouillon',
+            user_id=user.pk if user else loc.user_id,
+            entreprise_id=entreprise.pk if entreprise else loc.entreprise_id,
+        ))
+        details.append({
+            'location_id': loc.pk,
+            'vehicule': str(loc.vehicule),
+            'jours_travail': jours_travail,
+            'jours_non_travail': jours_non_travail,
+            'montant_ttc': float(montant_ttc),
+            'numero': numero,
+            'user_id': factures[-1].user_id,
+        })
+
+    if not factures:
+        return []
+
+    numeros = [facture.numero for facture in factures]
+    existantes = set(FactureLocation.objects.filter(numero__in=numeros).values_list('user_id', 'numero'))
+
+    # MySQL ne permet pas de cibler la contrainte: le conflit porte alors sur toute clé unique
+    cible = ['user', 'numero'] if connection.features.supports_update_conflicts_with_target else None
+    FactureLocation.objects.bulk_create(
+        factures, batch_size=500,
+        update_conflicts=True, unique_fields=cible, update_fields=CHAMPS_FACTURE_MENSUELLE,
+    )
+
+    ids = {
+        (user_id, numero): pk
+        for pk, user_id, numero in FactureLocation.objects.filter(numero__in=numeros).values_list('pk', 'user_id', 'numero')
+    }
+    for detail in details:
+        cle = (detail.pop('user_id'), detail['numero'])
+        detail['facture_id'] = ids.get(cle)
+        detail['created'] = cle not in existantes
+    return details
+
+
+def generer_factures_mensuelles_tous_tenants(annee, mois, users=None):
+    """
+    Génère les factures du mois pour toutes les locations (traitement de nuit)
+
+    Args:
+        annee: Année facturée
+        mois: Mois facturé
+        users: Queryset d'utilisateurs à traiter (tous si None)
+
+    Returns:
+        list: Détails de toutes les factures écrites
+    """
+    locations = LocationVehicule.objects.all()
+    if users is not None:
+        locations = locations.filter(user__in=users)
+    return generer_factures_mensuelles_locations(locations, annee, mois)
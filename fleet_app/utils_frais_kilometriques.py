@@ -25,10 +25,8 @@ def calculer_frais_km_mois(employe, mois, annee):
             'details': QuerySet
         }
     """
-    frais = FraisKilometrique.objects.filter(
-        employe=employe,
-        date__month=mois,
-        date__year=annee
+    frais = FraisKilometrique.objects.for_month(mois, annee).filter(
+        employe=employe
     ).order_by('date')
     
     total_montant = frais.aggregate(total=Sum('total_a_payer'))['total'] or Decimal('0')
@@ -156,10 +154,8 @@ def obtenir_statistiques_globales_mois(user, mois, annee):
         dict: Statistiques globales
     """
     # Tous les frais du mois pour cet utilisateur
-    frais_mois = FraisKilometrique.objects.filter(
-        employe__user=user,
-        date__month=mois,
-        date__year=annee
+    frais_mois = FraisKilometrique.objects.for_month(mois, annee).filter(
+        employe__user=user
     )
     
     total_montant = frais_mois.aggregate(total=Sum('total_a_payer'))['total'] or Decimal('0')
@@ -201,10 +197,8 @@ def exporter_frais_km_csv(user, mois, annee):
     Returns:
         list: Liste de dictionnaires pour export CSV
     """
-    frais = FraisKilometrique.objects.filter(
-        employe__user=user,
-        date__month=mois,
-        date__year=annee
+    frais = FraisKilometrique.objects.for_month(mois, annee).filter(
+        employe__user=user
     ).select_related('employe').order_by('employe__matricule', 'date')
     
     data = []
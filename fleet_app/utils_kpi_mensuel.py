@@ -0,0 +1,218 @@
+"""
+Maintenance et lecture de la table de cumul `KpiMensuel`.
+
+Chaque table source alimente un sous-ensemble de colonnes du cumul :
+- Mise à jour incrémentale : à chaque sauvegarde/suppression, seul le
+  couple (véhicule, mois) concerné est ré-agrégé, et seulement pour les
+  colonnes de la table source modifiée (une requête d'agrégation + un UPDATE).
+- Reconstruction complète : une requête groupée (véhicule, année, mois) par
+  table source, puis insertion en masse (commande `rebuild_kpi_rollups`).
+
+Les vues KPI et les exports lisent ensuite le cumul : le coût d'une page
+dépend du nombre de mois affichés et non plus de l'historique brut.
+"""
+
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import (
+    Vehicule, DistanceParcourue, ConsommationCarburant, DisponibiliteVehicule,
+    UtilisationActif, UtilisationVehicule, IncidentSecurite, CoutFonctionnement, CoutFinancier,
+)
+from .models_kpi import KpiMensuel
+
+
+# Table source -> (champ date de rattachement, agrégats alimentant le cumul)
+SOURCES_KPI = {
+    DistanceParcourue: ('date_fin', {
+        'distance_km': Sum('distance_parcourue'),
+        'nb_distances': Count('pk'),
+    }),
+    ConsommationCarburant: ('date_plein2', {
+        'litres_carburant': Sum('litres_ajoutes'),
+        'distance_carburant': Sum('distance_parcourue'),
+        'somme_consommation_100km': Sum('consommation_100km'),
+        'nb_consommations': Count('pk'),
+    }),
+    DisponibiliteVehicule: ('date_fin', {
+        'somme_disponibilite': Sum('disponibilite_pourcentage'),
+        'nb_disponibilites': Count('pk'),
+        'heures_disponibles': Sum('heures_disponibles'),
+        'heures_totales': Sum('heures_totales'),
+    }),
+    UtilisationActif: ('date_fin', {
+        'jours_utilises': Sum('jours_utilises'),
+        'jours_disponibles': Sum('jours_disponibles'),
+    }),
+    UtilisationVehicule: ('date_debut', {
+        'nb_utilisations': Count('pk'),
+    }),
+    IncidentSecurite: ('date_incident', {
+        'nb_incidents': Count('pk'),
+    }),
+    CoutFonctionnement: ('date', {
+        'cout_fonctionnement': Sum('montant'),
+        'somme_cout_fonctionnement_km': Sum('cout_par_km'),
+        'nb_couts_fonctionnement': Count('pk'),
+    }),
+    CoutFinancier: ('date', {
+        'cout_financier': Sum('montant'),
+        'somme_cout_financier_km': Sum('cout_par_km'),
+        'nb_couts_financiers': Count('pk'),
+    }),
+}
+
+# Colonnes de cumul additives (toutes les colonnes alimentées par les sources)
+CHAMPS_CUMUL = [champ for _, aggregats in SOURCES_KPI.values() for champ in aggregats]
+
+
+def bornes_mois(annee, mois):
+    """Retourne (premier jour du mois, premier jour du mois suivant)."""
+    debut = date(annee, mois, 1)
+    fin = date(annee + 1, 1, 1) if mois == 12 else date(annee, mois + 1, 1)
+    return debut, fin
+
+
+def filtre_periode(debut=None, fin=None):
+    """
+    Construit un filtre (annee, mois) couvrant les mois de `debut` à `fin` inclus.
+
+    Les bornes sont des dates ; seuls leur année et leur mois sont utilisés.
+    """
+    condition = Q()
+    if debut:
+        condition &= Q(annee__gt=debut.year) | Q(annee=debut.year, mois__gte=debut.month)
+    if fin:
+        condition &= Q(annee__lt=fin.year) | Q(annee=fin.year, mois__lte=fin.month)
+    return condition
+
+
+def mettre_a_jour_kpi_mensuel(model, vehicule_id, jour):
+    """
+    Ré-agrège les colonnes alimentées par `model` pour le couple (véhicule, mois de `jour`).
+
+    Args:
+        model: Classe de la table source (clé de SOURCES_KPI)
+        vehicule_id: Identifiant du véhicule
+        jour: Date quelconque du mois concerné
+    """
+    if vehicule_id is None or jour is None:
+        return
+    champ_date, aggregats = SOURCES_KPI[model]
+    debut, fin = bornes_mois(jour.year, jour.month)
+    valeurs = model.objects.filter(
+        vehicule_id=vehicule_id,
+        **{f'{champ_date}__gte': debut, f'{champ_date}__lt': fin}
+    ).aggregate(**aggregats)
+    valeurs = {champ: valeur or 0 for champ, valeur in valeurs.items()}
+
+    cumul = KpiMensuel.objects.filter(vehicule_id=vehicule_id, annee=jour.year, mois=jour.month)
+    if cumul.update(**valeurs):
+        return
+
+    tenant = Vehicule.objects.filter(pk=vehicule_id).values('entreprise_id', 'user_id').first()
+    if tenant is None:
+        return
+    try:
+        with transaction.atomic():
+            KpiMensuel.objects.create(
+                vehicule_id=vehicule_id, annee=jour.year, mois=jour.month, **tenant, **valeurs
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une écriture concurrente
+        cumul.update(**valeurs)
+
+
+def reconstruire_kpi_mensuels(vehicules=None):
+    """
+    Reconstruit entièrement le cumul mensuel à partir des tables sources.
+
+    Args:
+        vehicules: Queryset de véhicules à reconstruire (tous si None)
+
+    Returns:
+        int: Nombre de lignes de cumul écrites
+    """
+    cumuls = defaultdict(dict)
+    for model, (champ_date, aggregats) in SOURCES_KPI.items():
+        lignes = model.objects.filter(**{f'{champ_date}__isnull': False})
+        if vehicules is not None:
+            lignes = lignes.filter(vehicule__in=vehicules)
+        lignes = lignes.annotate(
+            kpi_annee=ExtractYear(champ_date), kpi_mois=ExtractMonth(champ_date)
+        ).values('vehicule_id', 'kpi_annee', 'kpi_mois').annotate(**aggregats).order_by()
+        for ligne in lignes:
+            cle = (ligne['vehicule_id'], ligne['kpi_annee'], ligne['kpi_mois'])
+            for champ in aggregats:
+                cumuls[cle][champ] = ligne[champ] or 0
+
+    vehicule_ids = {cle[0] for cle in cumuls}
+    tenants = {
+        pk: (entreprise_id, user_id)
+        for pk, entreprise_id, user_id in Vehicule.objects.filter(pk__in=vehicule_ids).values_list('pk', 'entreprise_id', 'user_id')
+    }
+
+    objets = []
+    for (vehicule_id, annee, mois), valeurs in cumuls.items():
+        entreprise_id, user_id = tenants[vehicule_id]
+        objets.append(KpiMensuel(
+            vehicule_id=vehicule_id, annee=annee, mois=mois,
+            entreprise_id=entreprise_id, user_id=user_id, **valeurs
+        ))
+
+    with transaction.atomic():
+        existants = KpiMensuel.objects.all()
+        if vehicules is not None:
+            existants = existants.filter(vehicule__in=vehicules)
+        existants.delete()
+        KpiMensuel.objects.bulk_create(objets, batch_size=500)
+    return len(objets)
+
+
+def synchroniser_tenant_kpi(vehicule):
+    """Répercute l'entreprise et l'utilisateur d'un véhicule sur ses lignes de cumul."""
+    KpiMensuel.objects.filter(vehicule_id=vehicule.pk).exclude(
+        entreprise_id=vehicule.entreprise_id, user_id=vehicule.user_id
+    ).update(entreprise_id=vehicule.entreprise_id, user_id=vehicule.user_id)
+
+
+def kpi_totaux(cumuls, debut=None, fin=None):
+    """
+    Somme les colonnes de cumul sur une période.
+
+    Args:
+        cumuls: Queryset de KpiMensuel déjà filtré par tenant
+        debut, fin: Bornes de période (dates, optionnelles)
+
+    Returns:
+        dict: Totaux de chaque colonne de CHAMPS_CUMUL
+    """
+    totaux = cumuls.filter(filtre_periode(debut, fin)).aggregate(
+        **{champ: Sum(champ) for champ in CHAMPS_CUMUL}
+    )
+    return {champ: valeur or 0 for champ, valeur in totaux.items()}
+
+
+def kpi_par_vehicule(cumuls, debut=None, fin=None):
+    """
+    Totaux du cumul par véhicule sur une période.
+
+    Returns:
+        dict: {vehicule_id: {colonne: total}} (une seule requête)
+    """
+    lignes = cumuls.filter(filtre_periode(debut, fin)).values('vehicule_id').annotate(
+        **{f'total_{champ}': Sum(champ) for champ in CHAMPS_CUMUL}
+    ).order_by()
+    return {
+        ligne['vehicule_id']: {champ: ligne[f'total_{champ}'] or 0 for champ in CHAMPS_CUMUL}
+        for ligne in lignes
+    }
+
+
+def moyenne(somme, nombre):
+    """Moyenne protégée contre la division par zéro."""
+    return somme / nombre if nombre else 0
@@ -0,0 +1,97 @@
+"""
+Indicateurs du tableau de bord des locations
+
+Les compteurs de feuilles de pontage, revenus (jour / mois / année) et pertes
+d'entretien du mois sont calculés par une seule requête d'agrégation
+conditionnelle (`Sum(F('location__tarif_journalier'), filter=...)`) au lieu de
+charger les feuilles en Python. Le résultat est mis en cache par tenant,
+filtre véhicule et jour ; toute modification d'une feuille ou d'une location
+du tenant change sa version de cache (espace `ESPACE_CACHE` du registre
+d'invalidation, voir utils_cache).
+"""
+
+from decimal import Decimal
+from urllib.parse import quote
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models_location import FeuillePontageLocation, LocationVehicule
+from .utils.decorators import queryset_filter_by_tenant
+from .utils.tenant import get_tenant_context
+from .utils_cache import en_cache
+
+
+# Durée de vie d'une entrée (la clé contient déjà le jour courant)
+DUREE_CACHE_METRIQUES = 60 * 60
+
+# Espace de cache (voir utils_cache), périmé par les signaux des locations et feuilles
+ESPACE_CACHE = 'locations_metriques'
+
+
+def calculer_metriques_locations(feuilles, locations, today=None):
+    """
+    Calcule les indicateurs en base (une agrégation par table)
+
+    Args:
+        feuilles: Queryset de FeuillePontageLocation (filtré par tenant / véhicule)
+        locations: Queryset de LocationVehicule (filtré par tenant / véhicule)
+        today: Date de référence (aujourd'hui par défaut)
+
+    Returns:
+        dict: Compteurs, revenus et pertes d'entretien
+    """
+    today = today or timezone.now().date()
+    start_month = today.replace(day=1)
+    start_year = today.replace(month=1, day=1)
+
+    tarif = F('location__tarif_journalier')
+    travail = Q(statut="Travail")
+    entretien_mois = Q(statut="Entretien", date__gte=start_month, date__lte=today)
+
+    feuilles_stats = feuilles.order_by().aggregate(
+        jours_travail=Count('pk', filter=travail),
+        jours_entretien=Count('pk', filter=Q(statut="Entretien")),
+        jours_hs=Count('pk', filter=Q(statut="Hors service")),
+        revenu_jour=Sum(tarif, filter=travail & Q(date=today)),
+        revenu_mois=Sum(tarif, filter=travail & Q(date__gte=start_month, date__lte=today)),
+        revenu_annee=Sum(tarif, filter=travail & Q(date__gte=start_year, date__lte=today)),
+        entretien_jours_mois=Count('pk', filter=entretien_mois),
+        entretien_perte_mois=Sum(tarif, filter=entretien_mois),
+    )
+    locations_stats = locations.order_by().aggregate(
+        actifs=Count('pk', filter=Q(statut="Active")),
+        inactifs=Count('pk', filter=Q(statut__in=["Inactive", "Clôturée"])),
+    )
+
+    metriques = {**locations_stats, **feuilles_stats}
+    for cle in ('revenu_jour', 'revenu_mois', 'revenu_annee', 'entretien_perte_mois'):
+        metriques[cle] = metriques[cle] or Decimal('0')
+    return metriques
+
+
+def metriques_locations(request, vehicule_id=''):
+    """
+    Indicateurs du tableau de bord des locations du tenant, depuis le cache si possible
+
+    Args:
+        request: Requête (utilisateur connecté)
+        vehicule_id: Identifiant (id_vehicule) pour restreindre à un véhicule
+
+    Returns:
+        dict: Résultat de `calculer_metriques_locations`
+    """
+    today = timezone.now().date()
+    portee, identifiant = get_tenant_context(request).portee
+
+    def calculer():
+        feuilles = queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request)
+        locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request)
+        if vehicule_id:
+            feuilles = feuilles.filter(location__vehicule__id_vehicule=vehicule_id)
+            locations = locations.filter(vehicule__id_vehicule=vehicule_id)
+        return calculer_metriques_locations(feuilles, locations, today)
+
+    return en_cache(
+        ESPACE_CACHE, portee, identifiant, (today.isoformat(), quote(vehicule_id)), calculer, DUREE_CACHE_METRIQUES,
+    )
@@ -202,10 +202,8 @@ def obtenir_statistiques_mois(user, mois, annee):
     from django.db.models import Count, Sum
     
     # Statistiques des présences
-    presences_stats = PresenceJournaliere.objects.filter(
-        employe__user=user,
-        date__month=mois,
-        date__year=annee
+    presences_stats = PresenceJournaliere.objects.for_month(mois, annee).filter(
+        employe__user=user
     ).values('statut').annotate(count=Count('id'))
     
     presences_par_statut = {}
@@ -224,10 +222,8 @@ def obtenir_statistiques_mois(user, mois, annee):
     )
     
     # Statistiques des heures supplémentaires
-    heures_stats = HeureSupplementaire.objects.filter(
-        employe__user=user,
-        date__month=mois,
-        date__year=annee
+    heures_stats = HeureSupplementaire.objects.for_month(mois, annee).filter(
+        employe__user=user
     ).aggregate(
         total_heures=Sum('duree'),
         total_montant=Sum('total_a_payer'),
@@ -0,0 +1,105 @@
+"""
+Numérotation des documents sans balayage ni collision
+
+Chaque numéro est pris dans un compteur `SequenceNumerotation` par
+(portée, préfixe, période) : la ligne est verrouillée (select_for_update),
+incrémentée par une expression F() puis libérée au commit. L'allocation doit
+se faire dans la transaction qui enregistre le document pour qu'un
+enregistrement annulé rende son numéro (numérotation sans trou).
+`allouer_numeros(..., quantite=n)` réserve un bloc contigu pour les imports.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models_sequences import SequenceNumerotation
+
+
+def allouer_numeros(prefixe, periode='', portee='', quantite=1, valeur_initiale=None):
+    """
+    Réserve `quantite` numéros consécutifs dans une séquence
+
+    Args:
+        prefixe: Préfixe du document (ex: 'FG-', 'CMD', 'ENT')
+        periode: Période de remise à zéro (ex: '202510'), '' pour une séquence continue
+        portee: Tenant de la séquence, '' pour une séquence globale
+        quantite: Taille du bloc à réserver
+        valeur_initiale: Fonction retournant le dernier numéro déjà utilisé,
+            appelée une seule fois à la création de la séquence (reprise de l'existant)
+
+    Returns:
+        range: Numéros réservés
+    """
+    with transaction.atomic():
+        sequence, _ = SequenceNumerotation.objects.select_for_update().get_or_create(
+            portee=portee, prefixe=prefixe, periode=periode,
+            defaults={'dernier_numero': valeur_initiale or 0},
+        )
+        premier = sequence.dernier_numero + 1
+        SequenceNumerotation.objects.filter(pk=sequence.pk).update(
+            dernier_numero=F('dernier_numero') + quantite
+        )
+    return range(premier, premier + quantite)
+
+
+def prochain_numero(prefixe, periode='', portee='', valeur_initiale=None):
+    """Alloue un seul numéro (voir `allouer_numeros`)"""
+    return allouer_numeros(prefixe, periode, portee, 1, valeur_initiale)[0]
+
+
+def avancer_sequence(prefixe, numero, periode='', portee='', valeur_initiale=None):
+    """
+    Reporte dans la séquence un numéro saisi manuellement, pour que les
+    allocations suivantes ne le réattribuent pas
+
+    Args:
+        prefixe: Préfixe de la séquence
+        numero: Partie numérique du numéro saisi
+    """
+    with transaction.atomic():
+        sequence, _ = SequenceNumerotation.objects.select_for_update().get_or_create(
+            portee=portee, prefixe=prefixe, periode=periode,
+            defaults={'dernier_numero': valeur_initiale or 0},
+        )
+        SequenceNumerotation.objects.filter(pk=sequence.pk, dernier_numero__lt=numero).update(dernier_numero=numero)
+
+
+def dernier_numero_existant(queryset, champ, prefixe):
+    """
+    Plus grand numéro déjà utilisé pour un préfixe (reprise des données
+    antérieures à la séquence ; appelé une fois par séquence)
+
+    Args:
+        queryset: Documents existants
+        champ: Champ portant le numéro complet
+        prefixe: Début du numéro, suivi de la partie numérique
+
+    Returns:
+        int: Dernier numéro, 0 si aucun
+    """
+    def calculer():
+        numeros = queryset.filter(**{f'{champ}__startswith': prefixe}).values_list(champ, flat=True)
+        suffixes = (numero[len(prefixe):].lstrip('-') for numero in numeros)
+        return max((int(suffixe) for suffixe in suffixes if suffixe.isdigit()), default=0)
+    return calculer
+
+
+def numeroter(objets, champ, prefixe, largeur=3, periode='', portee='', valeur_initiale=None):
+    """
+    Attribue en un bloc un numéro aux objets qui n'en ont pas (imports en masse)
+
+    Args:
+        objets: Instances non enregistrées
+        champ: Champ à renseigner (ex: 'id_entree')
+        prefixe: Préfixe du numéro
+        largeur: Nombre minimal de chiffres
+
+    Returns:
+        list: Les objets numérotés
+    """
+    a_numeroter = [objet for objet in objets if not getattr(objet, champ)]
+    if a_numeroter:
+        numeros = allouer_numeros(prefixe, periode, portee, len(a_numeroter), valeur_initiale)
+        for objet, numero in zip(a_numeroter, numeros):
+            setattr(objet, champ, f"{prefixe}{periode}{numero:0{largeur}d}")
+    return objets
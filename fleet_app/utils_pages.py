@@ -0,0 +1,229 @@
+"""
+GET conditionnels et fragments en cache des pages publiques et semi-statiques
+
+L'accueil, la galerie et l'accueil public des locations étaient entièrement
+recalculés à chaque visite, et l'état du jour de chaque location lu par une
+requête séparée. Chaque page a désormais un ETag calculé sans rendu :
+
+- la version de cache de ses données (espaces `ESPACE_GALERIE` et
+  `ESPACE_LOCATIONS`, périmés par les signaux, voir utils_cache) ;
+- le filigrane des tables sources (plus grande clé primaire, nombre de lignes
+  et dernière date), qui couvre aussi les écritures sans signal (bulk_create) ;
+- pour un utilisateur connecté, ce que le menu affiche (utilisateur, jeton
+  CSRF du formulaire de déconnexion, compteur d'alertes).
+
+Une visite répétée reçoit un 304 du navigateur ou du proxy inverse, sans rendu.
+Sinon les blocs galerie et locations sont lus depuis le cache de fragments
+(`{% cache %}`). Leur clé (`cles_fragments`) contient la version et le
+filigrane de leurs données, et l'ETag est construit à partir de ces mêmes
+clés : un changement qui produit un nouvel ETag produit aussi de nouveaux
+fragments. Les requêtes des blocs ne sont exécutées qu'à l'expiration ou
+après une modification.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import GalleryImage
+from .models_location import FeuillePontageLocation, LocationVehicule
+from .utils.decorators import queryset_filter_by_tenant
+from .utils.tenant import get_tenant_context
+from .utils_alertes import ESPACE_CACHE as ESPACE_COMPTEURS_ALERTES
+from .utils_cache import PORTEE_GLOBALE, versions
+
+
+# Durée de vie des fragments (la clé contient déjà les versions des données)
+DUREE_CACHE_FRAGMENTS = 60 * 60
+
+# Espaces de cache (voir utils_cache), périmés par les signaux des images et des locations
+ESPACE_GALERIE = 'pages:galerie'
+ESPACE_LOCATIONS = 'pages:locations'
+
+NB_IMAGES_ACCUEIL = 12
+NB_LOCATIONS_ACCUEIL = 6
+
+# Fragments de chaque page: l'ETag ne dépend que de leurs clés et du menu
+FRAGMENTS_GALERIE = ('galerie',)
+FRAGMENTS_ACCUEIL = ('galerie', 'locations')
+FRAGMENTS_ACCUEIL_PUBLIC = ('locations_public',)
+
+
+def etat_locations_du_jour(locations, feuilles):
+    """
+    État du jour de chaque location, les feuilles de pontage étant lues en une requête
+
+    Args:
+        locations: Locations (avec vehicule et fournisseur chargés)
+        feuilles: Feuilles de pontage du jour
+
+    Returns:
+        list: {location, vehicule, fournisseur, feuille, statut_jour, commentaire,
+        a_travaille, en_panne, en_entretien} dans l'ordre des locations
+    """
+    par_location = {feuille.location_id: feuille for feuille in feuilles}
+    etats = []
+    for location in locations:
+        feuille = par_location.get(location.pk)
+        etats.append({
+            'location': location,
+            'vehicule': location.vehicule,
+            'fournisseur': location.fournisseur,
+            'feuille': feuille,
+            'statut_jour': feuille.statut if feuille else 'Non renseigné',
+            'commentaire': feuille.commentaire if feuille else '',
+            'a_travaille': feuille and feuille.statut == 'Travail',
+            'en_panne': feuille and feuille.statut in ['Hors service', 'Panne'],
+            'en_entretien': feuille and feuille.statut == 'Entretien',
+        })
+    return etats
+
+
+def _filigrane(queryset, champ_date=None):
+    """Plus grande clé primaire, nombre de lignes et dernière date d'une table (une requête)"""
+    agregats = {'dernier': Max('pk'), 'nombre': Count('pk')}
+    if champ_date:
+        agregats['modifie'] = Max(champ_date)
+    return list(queryset.order_by().aggregate(**agregats).values())
+
+
+def _condenser(*parties):
+    """Condensé d'éléments de clé (versions, dates, filigranes)"""
+    return hashlib.sha1(json.dumps(parties, default=str).encode()).hexdigest()
+
+
+def _cle_galerie(request):
+    version, = versions(ESPACE_GALERIE, [PORTEE_GLOBALE])
+    return _condenser(version, _filigrane(GalleryImage.objects.all(), 'created_at'))
+
+
+def _cle_locations(request):
+    if not request.user.is_authenticated:
+        return None
+    portee = get_tenant_context(request).portee
+    version, = versions(ESPACE_LOCATIONS, [portee])
+    jour = timezone.now().date()
+    return _condenser(
+        portee, version, jour,
+        _filigrane(queryset_filter_by_tenant(LocationVehicule.objects.all(), request)),
+        _filigrane(queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request).filter(date=jour)),
+    )
+
+
+def _cle_locations_public(request):
+    version, = versions(ESPACE_LOCATIONS, [PORTEE_GLOBALE])
+    jour = timezone.now().date()
+    return _condenser(
+        version, jour,
+        _filigrane(LocationVehicule.objects.all()),
+        _filigrane(FeuillePontageLocation.objects.filter(date=jour)),
+    )
+
+
+# Fragment -> calcul de sa clé
+CLES_FRAGMENTS = {
+    'galerie': _cle_galerie,
+    'locations': _cle_locations,
+    'locations_public': _cle_locations_public,
+}
+
+
+def cles_fragments(request, *noms):
+    """
+    Clés des fragments d'une page, pour l'ETag et les clés de `{% cache %}`
+
+    Chaque clé condense la version de cache des données (sans requête SQL) et
+    leur filigrane (une requête par table) ; elle est calculée une fois par
+    requête, seulement pour les fragments demandés.
+
+    Args:
+        request: Requête HTTP
+        noms: Fragments de la page ('galerie', 'locations' (None si anonyme),
+            'locations_public')
+
+    Returns:
+        dict: {nom: clé}
+    """
+    cles = request.__dict__.setdefault('_cles_fragments', {})
+    for nom in noms:
+        if nom not in cles:
+            cles[nom] = CLES_FRAGMENTS[nom](request)
+    return {nom: cles[nom] for nom in noms}
+
+
+def _parties_utilisateur(request):
+    """Ce que le menu de base.html affiche et qui dépend de l'utilisateur"""
+    if not request.user.is_authenticated:
+        return ['anonyme']
+    contexte = get_tenant_context(request)
+    compteurs, = versions(ESPACE_COMPTEURS_ALERTES, [contexte.portee])
+    return [
+        request.user.pk,
+        getattr(contexte.profil, 'compte_complete', None),
+        request.META.get('CSRF_COOKIE', ''),
+        compteurs,
+    ]
+
+
+def _etag(request, *parties):
+    """
+    ETag d'une page, None (pas de GET conditionnel) si le rendu ne peut pas être rejoué:
+    messages en attente d'affichage, ou utilisateur connecté sans cookie CSRF
+    (le rendu crée le jeton du formulaire de déconnexion)
+    """
+    if get_messages(request):
+        return None
+    if request.user.is_authenticated and not request.META.get('CSRF_COOKIE'):
+        return None
+    return _condenser(*parties)
+
+
+def etag_galerie(request, *args, **kwargs):
+    return _etag(request, 'galerie', cles_fragments(request, *FRAGMENTS_GALERIE), _parties_utilisateur(request))
+
+
+def etag_accueil(request, *args, **kwargs):
+    return _etag(request, 'accueil', cles_fragments(request, *FRAGMENTS_ACCUEIL), _parties_utilisateur(request))
+
+
+def etag_accueil_public(request, *args, **kwargs):
+    return _etag(request, 'accueil_public', cles_fragments(request, *FRAGMENTS_ACCUEIL_PUBLIC))
+
+
+def get_conditionnel(etag_func):
+    """
+    Décorateur de vue: ETag sans rendu, 304 si le client (ou le proxy) l'a déjà
+
+    La réponse doit être revalidée à chaque visite (`no-cache`) ; elle est
+    `public` pour un visiteur anonyme (stockable par le proxy inverse),
+    `private` sinon. Les réponses autres que 200 ne gardent pas d'ETag (redirection
+    vers la complétion du profil par exemple).
+
+    Args:
+        etag_func: Fonction (request, *args, **kwargs) -> ETag ou None
+    """
+    def decorateur(vue):
+        vue_conditionnelle = condition(etag_func=etag_func)(vue)
+
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            reponse = vue_conditionnelle(request, *args, **kwargs)
+            if not reponse.has_header('ETag'):
+                return reponse
+            if reponse.status_code not in (200, 304):
+                del reponse['ETag']
+                return reponse
+            if request.user.is_authenticated:
+                patch_cache_control(reponse, private=True, no_cache=True)
+            else:
+                patch_cache_control(reponse, public=True, no_cache=True)
+            patch_vary_headers(reponse, ['Cookie'])
+            return reponse
+        return enveloppe
+    return decorateur
@@ -0,0 +1,305 @@
+"""
+Pagination par curseur (keyset / seek)
+
+`Paginator` de Django exécute `COUNT(*)` puis `LIMIT n OFFSET k` : la base
+parcourt et jette les k premières lignes, si bien qu'une page profonde d'une
+table de 500 000 lignes coûte autant qu'un balayage. Ici la page suivante est
+demandée par `WHERE (date, id) < (dernière date, dernier id) ORDER BY date
+DESC, id DESC LIMIT n + 1`, lue directement dans l'index (user, date) ou
+(entreprise, date) : la page 1 000 coûte le même temps que la page 1.
+
+Les jetons de page sont opaques (base64 de la direction et des valeurs de tri
+de la ligne de bord). Le total est optionnel : exact (`COUNT(*)`), approximatif
+(estimation du planificateur PostgreSQL, ou comptage mis en cache quelques
+minutes ailleurs) ou absent. Les colonnes de tri doivent être non nulles ; la
+clé primaire est ajoutée en dernier critère si elle manque, pour un ordre total.
+
+`paginer_selon_ordre` pagine un queryset selon son propre ordre (ou, à défaut,
+`Meta.ordering`) : par curseur si chaque colonne est un champ concret, local et
+non nul du modèle, sinon (relation, expression, colonne nullable) par
+`DecalagePaginator`, repli LIMIT / OFFSET aux mêmes jetons opaques.
+"""
+
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+
+# Durée de vie d'un total approximatif mis en cache (hors PostgreSQL)
+DUREE_CACHE_TOTAL = 5 * 60
+
+SUIVANT = 'n'
+PRECEDENT = 'p'
+
+
+def compter_approximatif(queryset):
+    """
+    Nombre approximatif de lignes d'un queryset
+
+    Sous PostgreSQL : estimation du planificateur (EXPLAIN, sans parcours).
+    Ailleurs : COUNT(*) mis en cache quelques minutes par requête SQL.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    sql, params = queryset.order_by().query.sql_with_params()
+    cle = 'pagination:total:' + hashlib.sha1(repr((sql, params)).encode()).hexdigest()
+    return cache.get_or_set(cle, queryset.count, DUREE_CACHE_TOTAL)
+
+
+class PageCurseur:
+    """Page d'un `CurseurPaginator` (interface proche de `django.core.paginator.Page`)"""
+
+    def __init__(self, object_list, paginator, curseur_suivant=None, curseur_precedent=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = curseur_suivant
+        self.previous_cursor = curseur_precedent
+
+    def __repr__(self):
+        return f'<Page par curseur de {len(self.object_list)} élément(s)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def count(self):
+        """Total du paginator (None si non demandé)"""
+        return self.paginator.count
+
+    def en_json(self):
+        """Métadonnées de pagination pour les réponses AJAX"""
+        return {
+            'has_next': self.has_next(),
+            'has_previous': self.has_previous(),
+            'next': self.next_cursor,
+            'previous': self.previous_cursor,
+            'count': self.count,
+        }
+
+
+class CurseurPaginator:
+    """
+    Paginateur par curseur sur un ordre total de colonnes non nulles
+
+    Args:
+        queryset: Queryset à paginer (déjà filtré)
+        per_page: Taille de page
+        ordering: Colonnes de tri, ex. ('-date', '-pk')
+        total: None (pas de COUNT), 'exact' ou 'approx'
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-date', '-pk'), total=None):
+        self.per_page = int(per_page)
+        self.total = total
+        modele = queryset.model
+        pk = modele._meta.pk.name
+        champs = []
+        for colonne in ordering:
+            nom = colonne.lstrip('-')
+            champs.append((pk if nom == 'pk' else nom, colonne.startswith('-')))
+        if pk not in [nom for nom, _ in champs]:
+            champs.append((pk, champs[0][1] if champs else True))
+        self.champs = champs
+        self.queryset = queryset
+        self._count = None
+
+    @property
+    def count(self):
+        if self.total is None:
+            return None
+        if self._count is None:
+            self._count = self.queryset.count() if self.total == 'exact' else compter_approximatif(self.queryset)
+        return self._count
+
+    def _ordre(self, direction):
+        # Page précédente: même critère lu dans l'autre sens, puis remis à l'endroit
+        inverse = direction == PRECEDENT
+        return [('-' if desc != inverse else '') + nom for nom, desc in self.champs]
+
+    def _condition(self, valeurs, direction):
+        condition = Q()
+        egalites = {}
+        for (nom, desc), valeur in zip(self.champs, valeurs):
+            vers_le_bas = desc != (direction == PRECEDENT)
+            condition |= Q(**egalites, **{f'{nom}__{"lt" if vers_le_bas else "gt"}': valeur})
+            egalites[nom] = valeur
+        return condition
+
+    def _valeurs(self, objet):
+        return [getattr(objet, nom) for nom, _ in self.champs]
+
+    def encoder(self, direction, objet):
+        """Jeton opaque désignant la page avant / après `objet`"""
+        brut = json.dumps([direction, self._valeurs(objet)], cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(brut.encode()).decode().rstrip('=')
+
+    def decoder(self, curseur):
+        """(direction, valeurs typées) d'un jeton, None s'il est absent ou invalide"""
+        if not curseur:
+            return None
+        try:
+            direction, valeurs = json.loads(base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)))
+            if direction not in (SUIVANT, PRECEDENT) or len(valeurs) != len(self.champs):
+                return None
+            meta = self.queryset.model._meta
+            return direction, [meta.get_field(nom).to_python(valeur) for (nom, _), valeur in zip(self.champs, valeurs)]
+        except Exception:
+            return None
+
+    def page(self, curseur=None):
+        """
+        Page désignée par un jeton (première page si absent ou invalide)
+
+        Une seule requête `LIMIT per_page + 1` : la ligne en plus indique
+        s'il existe une page au-delà dans le sens de lecture.
+        """
+        position = self.decoder(curseur)
+        direction = position[0] if position else SUIVANT
+        lignes = self.queryset.order_by(*self._ordre(direction))
+        if position:
+            lignes = lignes.filter(self._condition(position[1], direction))
+        lignes = list(lignes[:self.per_page + 1])
+        au_dela = len(lignes) > self.per_page
+        lignes = lignes[:self.per_page]
+
+        if direction == PRECEDENT:
+            lignes.reverse()
+            a_suivante, a_precedente = True, au_dela
+        else:
+            a_suivante, a_precedente = au_dela, position is not None
+        return PageCurseur(
+            lignes, self,
+            curseur_suivant=self.encoder(SUIVANT, lignes[-1]) if a_suivante and lignes else None,
+            curseur_precedent=self.encoder(PRECEDENT, lignes[0]) if a_precedente and lignes else None,
+        )
+
+
+class DecalagePaginator:
+    """
+    Paginateur LIMIT / OFFSET pour un ordre inutilisable par curseur
+
+    Mêmes pages (`PageCurseur`) et jetons opaques que `CurseurPaginator`,
+    le jeton portant le décalage de la page.
+    """
+
+    def __init__(self, queryset, per_page, total=None):
+        self.per_page = int(per_page)
+        self.total = total
+        self.queryset = queryset
+        self._count = None
+
+    count = CurseurPaginator.count
+
+    def encoder(self, decalage):
+        brut = json.dumps(['o', decalage], separators=(',', ':'))
+        return base64.urlsafe_b64encode(brut.encode()).decode().rstrip('=')
+
+    def decoder(self, curseur):
+        """Décalage désigné par un jeton (0 s'il est absent ou invalide)"""
+        if not curseur:
+            return 0
+        try:
+            marque, decalage = json.loads(base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)))
+            return decalage if marque == 'o' and isinstance(decalage, int) and decalage > 0 else 0
+        except Exception:
+            return 0
+
+    def page(self, curseur=None):
+        debut = self.decoder(curseur)
+        lignes = list(self.queryset[debut:debut + self.per_page + 1])
+        au_dela = len(lignes) > self.per_page
+        return PageCurseur(
+            lignes[:self.per_page], self,
+            curseur_suivant=self.encoder(debut + self.per_page) if au_dela else None,
+            curseur_precedent=self.encoder(max(debut - self.per_page, 0)) if debut else None,
+        )
+
+
+def ordre_curseur(queryset):
+    """
+    Colonnes de tri d'un queryset utilisables par curseur
+
+    L'ordre est celui du queryset, à défaut `Meta.ordering` du modèle, à défaut
+    la clé primaire décroissante. La clé primaire est ajoutée ensuite par
+    `CurseurPaginator` pour départager les ex æquo.
+
+    Returns:
+        tuple | None: Colonnes, ou None si l'une d'elles n'est pas un champ
+        concret, local et non nul du modèle (relation, expression, aléatoire)
+    """
+    query = queryset.query
+    ordering = query.order_by or (queryset.model._meta.ordering if query.default_ordering else ())
+    if query.extra_order_by:
+        return None
+    meta = queryset.model._meta
+    for colonne in ordering:
+        if not isinstance(colonne, str):
+            return None
+        nom = colonne.removeprefix('-')
+        if nom == 'pk':
+            continue
+        try:
+            champ = meta.get_field(nom)
+        except FieldDoesNotExist:
+            return None
+        if champ not in meta.local_concrete_fields or champ.is_relation or champ.null:
+            return None
+    return tuple(ordering) or ('-pk',)
+
+
+def paginer_selon_ordre(request, queryset, per_page=20, param='curseur', total=None):
+    """
+    Page courante d'un queryset dans son propre ordre
+
+    Par curseur quand `ordre_curseur` le permet, sinon par décalage.
+
+    Returns:
+        PageCurseur
+    """
+    ordering = ordre_curseur(queryset)
+    if ordering is None:
+        paginator = DecalagePaginator(queryset, per_page, total)
+    else:
+        paginator = CurseurPaginator(queryset, per_page, ordering, total)
+    return paginator.page(request.GET.get(param))
+
+
+def paginer_par_curseur(request, queryset, ordering=('-date', '-pk'), per_page=20, param='curseur', total=None):
+    """
+    Page courante d'un queryset d'après le paramètre GET `param`
+
+    Args:
+        request: La requête HTTP
+        queryset: Le queryset filtré par tenant et critères de recherche
+        ordering: Colonnes de tri non nulles (la clé primaire est ajoutée si absente)
+        per_page: Nombre d'éléments par page
+        param: Nom du paramètre GET portant le jeton
+        total: None, 'exact' ou 'approx' (voir `CurseurPaginator`)
+
+    Returns:
+        PageCurseur
+    """
+    return CurseurPaginator(queryset, per_page, ordering, total).page(request.GET.get(param))
@@ -0,0 +1,316 @@
+"""
+Synchronisation des paies en tâche de fond
+
+La liste des paies est en lecture seule : la création des paies manquantes,
+la recopie des présences / heures supplémentaires et le recalcul des montants
+(brut, CNSS, RTS, net) sont faits par un job `SynchronisationPaieJob` :
+- déclenché à la demande (tableau de bord de synchronisation, liste des paies)
+  ou par une modification de données (employé créé / modifié) ;
+- exécuté dans un thread après le commit (PAIE_SYNC_ARRIERE_PLAN) et/ou par
+  la commande `python manage.py traiter_jobs_paie` (tâche planifiée) ;
+- qui publie sa progression (traites / total) lue par le tableau de bord.
+
+Un job resté « en cours » au-delà de `PAIE_SYNC_DELAI_BLOQUE` (worker arrêté
+pendant le traitement) est considéré comme abandonné : il est repris par le
+prochain passage de la file ou par une nouvelle demande pour le même mois.
+"""
+
+import calendar
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models_entreprise import (
+    Employe, PaieEmploye, HeureSupplementaire, ParametrePaie,
+    SynchronisationPaieJob,
+)
+from .utils_presence_paie import calculer_statistiques_presence_batch
+
+
+# Nombre de paies écrites par lot (et entre deux mises à jour de progression)
+TAILLE_LOT = 50
+
+# Champs de PaieEmploye écrits par la synchronisation
+CHAMPS_SYNCHRONISES = [
+    'jours_mois', 'jours_presence', 'absences', 'jours_repos', 'dimanches',
+    'heures_supplementaires', 'montant_heures_supplementaires',
+    'salaire_brut', 'cnss', 'rts', 'salaire_net_a_payer',
+]
+
+CLES_PARAMETRES_PAIE = ['CNSS_ACTIVER', 'CNSS_TAUX', 'RTS_TYPE', 'RTS_TAUX_FIXE']
+
+# Durée après laquelle un job « en cours » est considéré comme abandonné (secondes)
+DELAI_JOB_BLOQUE = 30 * 60
+
+
+def charger_parametres_paie(user):
+    """Charge en une requête les paramètres CNSS / RTS de l'utilisateur."""
+    return dict(
+        ParametrePaie.objects.filter(user=user, cle__in=CLES_PARAMETRES_PAIE).values_list('cle', 'valeur')
+    )
+
+
+def calculer_montants_paie(paie, montant_heures_supp, parametres):
+    """
+    Calcule brut, CNSS, RTS et net à payer d'une paie (sans sauvegarder)
+
+    Args:
+        paie: Instance PaieEmploye (employé chargé)
+        montant_heures_supp: Montant des heures supplémentaires du mois
+        parametres: Paramètres retournés par `charger_parametres_paie`
+
+    Returns:
+        dict: salaire_brut, cnss, rts, salaire_net_a_payer
+    """
+    # Salaire brut = salaire_base + primes/indemnités + montant HS
+    salaire_base = paie.salaire_base or (paie.employe.salaire_journalier or 0)
+    primes_indemnites = (
+        (paie.prime_discipline or 0) +
+        (paie.cherete_vie or 0) +
+        (paie.indemnite_transport or 0) +
+        (paie.indemnite_logement or 0)
+    )
+    salaire_brut = Decimal(str(salaire_base)) + Decimal(str(primes_indemnites)) + Decimal(str(montant_heures_supp or 0))
+
+    # CNSS: par défaut 5% activé
+    appliquer_cnss = str(parametres.get('CNSS_ACTIVER', '1')).strip() in ['1', 'true', 'True', 'on']
+    taux_cnss = Decimal(str(parametres.get('CNSS_TAUX', '5.0')))
+    cnss_employe = (salaire_brut * taux_cnss / Decimal('100')) if appliquer_cnss else Decimal('0.00')
+
+    # RTS: type FIXE avec taux, sinon barème progressif par défaut
+    rts_type = (parametres.get('RTS_TYPE') or 'PROGRESSIF').upper()
+    rts_taux_fixe = Decimal(str(parametres.get('RTS_TAUX_FIXE', '10.0')))
+    salaire_net_imposable = salaire_brut - cnss_employe
+    if rts_type == 'FIXE':
+        rts_employe = (salaire_net_imposable * rts_taux_fixe) / Decimal('100')
+    elif salaire_net_imposable <= Decimal('1000000'):
+        rts_employe = Decimal('0.00')
+    elif salaire_net_imposable <= Decimal('3000000'):
+        rts_employe = (salaire_net_imposable - Decimal('1000000')) * Decimal('0.05')
+    else:
+        rts_tranche_2 = Decimal('2000000') * Decimal('0.05')
+        rts_tranche_3 = (salaire_net_imposable - Decimal('3000000')) * Decimal('0.15')
+        rts_employe = rts_tranche_2 + rts_tranche_3
+
+    avance = Decimal(str(paie.avance_sur_salaire or paie.employe.avances or 0))
+    sanctions = Decimal(str(paie.sanction_vol_carburant or 0))
+
+    return {
+        'salaire_brut': salaire_brut,
+        'cnss': cnss_employe,
+        'rts': rts_employe,
+        'salaire_net_a_payer': salaire_brut - (cnss_employe + rts_employe + avance + sanctions),
+    }
+
+
+def heures_supplementaires_mois(employes, mois, annee):
+    """
+    Totaux des heures supplémentaires du mois par employé (une requête groupée)
+
+    Returns:
+        dict: {employe_id: {'total_heures': float, 'total_montant': float}}
+    """
+    premier_jour = date(annee, mois, 1)
+    dernier_jour = date(annee, mois, calendar.monthrange(annee, mois)[1])
+    lignes = HeureSupplementaire.objects.filter(
+        employe__in=employes, date__gte=premier_jour, date__lte=dernier_jour
+    ).values('employe').annotate(total_heures=Sum('duree'), total_montant=Sum('total_a_payer')).order_by()
+    return {
+        ligne['employe']: {
+            'total_heures': float(ligne['total_heures'] or 0),
+            'total_montant': float(ligne['total_montant'] or 0),
+        }
+        for ligne in lignes
+    }
+
+
+def synchroniser_paies_mois(user, mois, annee, progression=None):
+    """
+    Crée les paies manquantes des employés actifs puis met à jour toutes les
+    paies du mois (présences, heures supplémentaires, montants) par lots
+
+    Args:
+        user: Utilisateur propriétaire des employés
+        mois: Mois (1-12)
+        annee: Année
+        progression: Fonction appelée avec (traites, total) après chaque lot
+
+    Returns:
+        int: Nombre de paies synchronisées
+    """
+    # 1. Créer les paies manquantes des employés actifs
+    employes_actifs = list(Employe.objects.filter(user=user, statut='Actif'))
+    existantes = set(PaieEmploye.objects.filter(
+        employe__in=employes_actifs, mois=mois, annee=annee
+    ).values_list('employe_id', flat=True))
+    PaieEmploye.objects.bulk_create([
+        PaieEmploye(
+            employe=employe, user=user, mois=mois, annee=annee,
+            salaire_base=getattr(employe, 'salaire_base', 0),
+        )
+        for employe in employes_actifs if employe.pk not in existantes
+    ], batch_size=500)
+
+    # 2. Charger toutes les données du mois en quelques requêtes
+    paies = list(PaieEmploye.objects.filter(
+        employe__user=user, mois=mois, annee=annee
+    ).select_related('employe').order_by('employe__matricule'))
+    employes = [paie.employe for paie in paies]
+    stats_par_employe = calculer_statistiques_presence_batch(employes, mois, annee)
+    heures_par_employe = heures_supplementaires_mois(employes, mois, annee)
+    parametres = charger_parametres_paie(user)
+
+    if progression:
+        progression(0, len(paies))
+
+    # 3. Recalculer et écrire les paies par lots
+    for debut in range(0, len(paies), TAILLE_LOT):
+        lot = paies[debut:debut + TAILLE_LOT]
+        for paie in lot:
+            stats = stats_par_employe[paie.employe_id]
+            heures = heures_par_employe.get(paie.employe_id, {'total_heures': 0, 'total_montant': 0})
+            paie.jours_mois = stats['total_jours_mois']
+            paie.jours_presence = stats['jours_presence']
+            paie.absences = stats['absent']
+            paie.jours_repos = stats['j_repos']
+            paie.dimanches = stats['sundays']
+            paie.heures_supplementaires = heures['total_heures']
+            paie.montant_heures_supplementaires = heures['total_montant']
+            for champ, valeur in calculer_montants_paie(paie, heures['total_montant'], parametres).items():
+                setattr(paie, champ, valeur)
+        PaieEmploye.objects.bulk_update(lot, CHAMPS_SYNCHRONISES)
+        if progression:
+            progression(debut + len(lot), len(paies))
+
+    return len(paies)
+
+
+# Champs écrits par la resynchronisation après pointage (présences déjà à jour par différence)
+CHAMPS_MONTANTS = [
+    'heures_supplementaires', 'montant_heures_supplementaires',
+    'salaire_brut', 'cnss', 'rts', 'salaire_net_a_payer',
+]
+
+
+def resynchroniser_paies(employes, mois, annee):
+    """
+    Recopie les heures supplémentaires et recalcule les montants des paies
+    existantes de plusieurs employés pour un mois, en requêtes groupées
+
+    Appelée au commit d'un pointage (voir signals.executer_recalculs_paie) :
+    le nombre de requêtes ne dépend pas du nombre d'employés touchés.
+
+    Args:
+        employes: Employés dont la paie du mois est à resynchroniser
+        mois: Mois (1-12)
+        annee: Année
+
+    Returns:
+        int: Nombre de paies mises à jour
+    """
+    paies = list(PaieEmploye.objects.filter(
+        employe__in=employes, mois=mois, annee=annee
+    ).select_related('employe'))
+    heures_par_employe = heures_supplementaires_mois(employes, mois, annee)
+    parametres_par_user = {}
+    for paie in paies:
+        user_id = paie.employe.user_id
+        if user_id not in parametres_par_user:
+            parametres_par_user[user_id] = charger_parametres_paie(user_id)
+        heures = heures_par_employe.get(paie.employe_id, {'total_heures': 0, 'total_montant': 0})
+        paie.heures_supplementaires = heures['total_heures']
+        paie.montant_heures_supplementaires = heures['total_montant']
+        montants = calculer_montants_paie(paie, heures['total_montant'], parametres_par_user[user_id])
+        for champ, valeur in montants.items():
+            setattr(paie, champ, valeur)
+    PaieEmploye.objects.bulk_update(paies, CHAMPS_MONTANTS, batch_size=500)
+    return len(paies)
+
+
+def filtre_jobs_a_executer():
+    """Jobs en attente, ou en cours depuis plus de `PAIE_SYNC_DELAI_BLOQUE` (abandonnés)"""
+    delai = getattr(settings, 'PAIE_SYNC_DELAI_BLOQUE', DELAI_JOB_BLOQUE)
+    limite = timezone.now() - timedelta(seconds=delai)
+    return Q(statut='en_attente') | Q(statut='en_cours', date_debut__lt=limite)
+
+
+def demander_synchronisation_paies(user, mois, annee, declencheur='manuel'):
+    """
+    Met en file une synchronisation des paies du mois (une seule en attente par mois)
+
+    Un job abandonné du même mois est repris plutôt que doublé.
+
+    Returns:
+        SynchronisationPaieJob: Job créé ou job déjà en attente
+    """
+    job = SynchronisationPaieJob.objects.filter(
+        filtre_jobs_a_executer(), user=user, mois=mois, annee=annee
+    ).first()
+    if job is None:
+        job = SynchronisationPaieJob.objects.create(
+            user=user, mois=mois, annee=annee, declencheur=declencheur
+        )
+    if getattr(settings, 'PAIE_SYNC_ARRIERE_PLAN', True):
+        transaction.on_commit(lambda: lancer_job_en_arriere_plan(job.pk))
+    return job
+
+
+def lancer_job_en_arriere_plan(job_id):
+    """Exécute un job dans un thread séparé (sans bloquer la requête)."""
+    def executer():
+        try:
+            executer_job_synchronisation(job_id)
+        finally:
+            close_old_connections()
+    threading.Thread(target=executer, name=f'sync-paie-{job_id}', daemon=True).start()
+
+
+def executer_job_synchronisation(job_id):
+    """
+    Exécute un job en attente (ou abandonné) ; sans effet si un autre processus l'a déjà pris
+
+    Returns:
+        bool: True si le job a été exécuté par cet appel
+    """
+    pris = SynchronisationPaieJob.objects.filter(filtre_jobs_a_executer(), pk=job_id).update(
+        statut='en_cours', date_debut=timezone.now(), traites=0
+    )
+    if not pris:
+        return False
+
+    job = SynchronisationPaieJob.objects.select_related('user').get(pk=job_id)
+
+    def progression(traites, total):
+        SynchronisationPaieJob.objects.filter(pk=job_id).update(traites=traites, total=total)
+
+    try:
+        nb_paies = synchroniser_paies_mois(job.user, job.mois, job.annee, progression=progression)
+        SynchronisationPaieJob.objects.filter(pk=job_id).update(
+            statut='termine', date_fin=timezone.now(),
+            message=f"{nb_paies} paie(s) synchronisée(s) pour {job.mois:02d}/{job.annee}",
+        )
+        print(f"✅ SYNC PAIE JOB {job_id}: {nb_paies} paies synchronisées")
+    except Exception as e:
+        SynchronisationPaieJob.objects.filter(pk=job_id).update(
+            statut='erreur', date_fin=timezone.now(), message=str(e)
+        )
+        print(f"❌ SYNC PAIE JOB {job_id} ERROR: {e}")
+    return True
+
+
+def traiter_jobs_en_attente():
+    """
+    Exécute tous les jobs en attente (et reprend les jobs abandonnés), du plus ancien au plus récent
+
+    Returns:
+        int: Nombre de jobs exécutés
+    """
+    job_ids = list(SynchronisationPaieJob.objects.filter(
+        filtre_jobs_a_executer()
+    ).order_by('date_creation').values_list('pk', flat=True))
+    return sum(1 for job_id in job_ids if executer_job_synchronisation(job_id))
@@ -0,0 +1,438 @@
+"""
+File de rendu PDF avec cache des documents générés
+
+Les vues rendent leur template HTML (rapide) puis confient la conversion en
+PDF (xhtml2pdf / WeasyPrint, lente) à un `RenduPdf` :
+- l'empreinte SHA-256 du HTML, calculée sans les horodatages de génération,
+  identifie le document : si un PDF de même empreinte existe déjà pour
+  l'utilisateur, il est resservi sans nouveau rendu ;
+- sinon le rendu est exécuté dans un thread après le commit
+  (PDF_RENDU_ARRIERE_PLAN) et/ou par `python manage.py traiter_rendus_pdf` ;
+- le client reçoit l'identifiant du rendu et interroge `rendu_pdf_status`
+  jusqu'à ce que le fichier soit disponible.
+
+Les liens de téléchargement classiques (sans `?async=1`) restent supportés :
+le rendu est alors exécuté dans la requête, mais profite du même cache.
+
+Les rendus terminés ou en erreur et les PDF du cache plus anciens que
+PDF_RETENTION_JOURS sont purgés par `purger_rendus_pdf` (appelée par
+`python manage.py traiter_rendus_pdf`).
+
+Les lots (`reponse_lot_pdf`) sont découpés en fragments (une facture par
+fragment) : chaque fragment est un PDF du cache (sans ligne RenduPdf),
+converti dans un pool de processus (PDF_PROCESSUS) s'il n'y est pas encore,
+puis les fichiers sont concaténés avec pypdf (`concatener_pdf`). Les PDF
+convertis ne restent pas en mémoire pendant le rendu des fragments ; la
+concaténation, elle, tient le document fusionné en mémoire jusqu'à son
+écriture.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+
+import django
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models_pdf import RenduPdf
+
+
+# Clés de contexte qui varient à chaque génération sans changer le document
+CLES_VOLATILES = ('today', 'generated_at', 'date_impression', 'date_export', 'date_generation')
+
+DOSSIER_CACHE = 'pdf_cache'
+
+# Lots de documents: type -> constructeur des fragments (user, parametres)
+LOTS_PDF = {
+    'factures_location': 'fleet_app.views_location.fragments_factures_batch',
+}
+
+# Fragments en cours de conversion par processus du pool (borne la mémoire)
+FRAGMENTS_PAR_PROCESSUS = 2
+
+# Durée de conservation des rendus terminés et des PDF en cache (jours)
+RETENTION_JOURS = 30
+
+
+def chemin_cache(empreinte):
+    """Chemin (relatif à MEDIA_ROOT) du PDF d'une empreinte"""
+    return f"{DOSSIER_CACHE}/{empreinte}.pdf"
+
+
+def preparer_document(template_src, context, moteur='xhtml2pdf'):
+    """
+    Empreinte SHA-256 d'un document et production de son HTML complet
+
+    L'empreinte porte sur le template, le moteur et le HTML rendu sans les
+    horodatages de génération (CLES_VOLATILES) ; le template n'est rendu une
+    seconde fois (avec ces clés) que si le contexte en contient.
+
+    Returns:
+        tuple: (empreinte, fonction sans argument retournant le HTML complet)
+    """
+    contexte_stable = {cle: valeur for cle, valeur in context.items() if cle not in CLES_VOLATILES}
+    html_stable = render_to_string(template_src, contexte_stable)
+    contenu = f"{template_src}\n{moteur}\n{html_stable}"
+    empreinte = hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+    if len(contexte_stable) == len(context):
+        return empreinte, lambda: html_stable
+    return empreinte, lambda: render_to_string(template_src, context)
+
+
+def empreinte_document(template_src, context, moteur='xhtml2pdf'):
+    """Empreinte SHA-256 d'un document (voir `preparer_document`)"""
+    return preparer_document(template_src, context, moteur)[0]
+
+
+def convertir_html_en_pdf(html, moteur='xhtml2pdf', base_url=''):
+    """
+    Convertit un HTML en PDF
+
+    Returns:
+        bytes: Contenu du PDF
+
+    Raises:
+        RuntimeError: Moteur indisponible ou erreur de conversion
+    """
+    if moteur == 'weasyprint':
+        try:
+            from weasyprint import HTML
+        except Exception as e:
+            raise RuntimeError(f"WeasyPrint indisponible: {e}")
+        return HTML(string=html, base_url=base_url or None).write_pdf()
+
+    try:
+        from xhtml2pdf import pisa
+    except Exception as e:
+        raise RuntimeError(f"xhtml2pdf indisponible: {e}")
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+    if pdf.err:
+        raise RuntimeError('Erreur lors de la génération du PDF')
+    return result.getvalue()
+
+
+def demander_rendu_pdf(user, template_src, context, nom_fichier, moteur='xhtml2pdf', base_url='', arriere_plan=True):
+    """
+    Retourne le rendu PDF d'un document, en le mettant en file si nécessaire
+
+    Args:
+        user: Propriétaire du document
+        template_src: Template HTML du document
+        context: Contexte du template
+        nom_fichier: Nom proposé au téléchargement
+        moteur: 'xhtml2pdf' ou 'weasyprint'
+        base_url: URL de base des ressources (WeasyPrint)
+        arriere_plan: Lancer le rendu dans un thread après le commit
+
+    Returns:
+        RenduPdf: Rendu existant (cache), rendu terminé sur un PDF déjà en
+        cache (autre utilisateur, rendu purgé) ou nouveau rendu en attente
+    """
+    empreinte, html = preparer_document(template_src, context, moteur)
+    rendu = RenduPdf.objects.filter(user=user, empreinte=empreinte).exclude(statut='erreur').first()
+    if rendu is not None:
+        if rendu.statut != 'termine' or rendu.fichier_disponible:
+            return rendu
+        # Fichier supprimé du cache: nouveau rendu
+        rendu.delete()
+
+    chemin = chemin_cache(empreinte)
+    if default_storage.exists(chemin):
+        return RenduPdf.objects.create(
+            user=user, empreinte=empreinte, nom_fichier=nom_fichier, moteur=moteur, base_url=base_url,
+            fichier=chemin, statut='termine', date_fin=timezone.now(),
+        )
+
+    rendu = RenduPdf.objects.create(
+        user=user,
+        empreinte=empreinte,
+        nom_fichier=nom_fichier,
+        moteur=moteur,
+        base_url=base_url,
+        html=html(),
+    )
+    if arriere_plan and getattr(settings, 'PDF_RENDU_ARRIERE_PLAN', True):
+        transaction.on_commit(lambda: lancer_rendu_en_arriere_plan(rendu.pk))
+    return rendu
+
+
+def lancer_rendu_en_arriere_plan(rendu_id):
+    """Exécute un rendu dans un thread séparé (sans bloquer la requête)."""
+    def executer():
+        try:
+            executer_rendu_pdf(rendu_id)
+        finally:
+            close_old_connections()
+    threading.Thread(target=executer, name=f'rendu-pdf-{rendu_id}', daemon=True).start()
+
+
+def executer_rendu_pdf(rendu_id):
+    """
+    Exécute un rendu en attente ; sans effet si un autre processus l'a déjà pris
+
+    Returns:
+        bool: True si le rendu a été exécuté par cet appel
+    """
+    pris = RenduPdf.objects.filter(pk=rendu_id, statut='en_attente').update(statut='en_cours')
+    if not pris:
+        return False
+
+    rendu = RenduPdf.objects.get(pk=rendu_id)
+    try:
+        if rendu.moteur == 'fusion':
+            empreinte, chemin = executer_fusion_pdf(rendu)
+        else:
+            empreinte = rendu.empreinte
+            chemin = enregistrer_pdf(empreinte, lambda: convertir_html_en_pdf(rendu.html, rendu.moteur, rendu.base_url))
+        RenduPdf.objects.filter(pk=rendu_id).update(
+            statut='termine', empreinte=empreinte, fichier=chemin, html='', date_fin=timezone.now()
+        )
+        print(f"✅ RENDU PDF {rendu_id}: {rendu.nom_fichier}")
+    except Exception as e:
+        RenduPdf.objects.filter(pk=rendu_id).update(
+            statut='erreur', message=str(e), date_fin=timezone.now()
+        )
+        print(f"❌ RENDU PDF {rendu_id} ERROR: {e}")
+    return True
+
+
+def enregistrer_pdf(empreinte, produire):
+    """
+    Enregistre le PDF d'une empreinte dans le cache s'il n'y est pas déjà
+
+    Args:
+        empreinte: Empreinte du contenu
+        produire: Fonction retournant le contenu (bytes), appelée seulement si absent
+
+    Returns:
+        str: Chemin du fichier dans le stockage
+    """
+    chemin = chemin_cache(empreinte)
+    if not default_storage.exists(chemin):
+        chemin = default_storage.save(chemin, ContentFile(produire()))
+    return chemin
+
+
+def concatener_pdf(chemins, sortie):
+    """
+    Concatène des PDF du stockage dans un fichier ouvert en écriture binaire
+
+    Args:
+        chemins: Chemins (stockage) des PDF à concaténer, dans l'ordre
+        sortie: Fichier binaire positionné au début
+    """
+    from pypdf import PdfWriter
+
+    fusion = PdfWriter()
+    for chemin in chemins:
+        with default_storage.open(chemin, 'rb') as fichier:
+            fusion.append(fichier)
+    fusion.write(sortie)
+    fusion.close()
+
+
+def executer_fusion_pdf(lot):
+    """
+    Rend les fragments d'un lot (cache puis pool de processus) et les concatène
+
+    Les fragments sont des PDF du cache identifiés par leur empreinte, sans
+    ligne RenduPdf. Ceux qui manquent sont convertis au fil de l'eau avec au
+    plus FRAGMENTS_PAR_PROCESSUS fragments en vol par processus ; chaque PDF
+    converti est écrit dans le cache et ne reste pas en mémoire, puis
+    `concatener_pdf` fusionne les fragments dans un fichier temporaire.
+
+    Returns:
+        tuple: (empreinte du lot, chemin du PDF fusionné)
+    """
+    constructeur = import_string(LOTS_PDF[lot.type_lot])
+    empreintes = []
+    nb_processus = getattr(settings, 'PDF_PROCESSUS', min(4, os.cpu_count() or 1))
+
+    pool = ProcessPoolExecutor(max_workers=nb_processus, initializer=django.setup) if nb_processus > 1 else None
+    en_vol = {}
+    try:
+        for template_src, context, nom_fichier in constructeur(lot.user, lot.parametres):
+            empreinte, html = preparer_document(template_src, context)
+            empreintes.append(empreinte)
+            if default_storage.exists(chemin_cache(empreinte)):
+                continue
+            if pool is None:
+                contenu = convertir_html_en_pdf(html())
+                enregistrer_pdf(empreinte, lambda: contenu)
+                continue
+            en_vol[pool.submit(convertir_html_en_pdf, html())] = empreinte
+            if len(en_vol) >= nb_processus * FRAGMENTS_PAR_PROCESSUS:
+                termines, _ = wait(en_vol, return_when=FIRST_COMPLETED)
+                for future in termines:
+                    enregistrer_pdf(en_vol.pop(future), future.result)
+        for future in list(en_vol):
+            enregistrer_pdf(en_vol.pop(future), future.result)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    empreinte = hashlib.sha256(('fusion\n' + '\n'.join(empreintes)).encode('utf-8')).hexdigest()
+    chemin = chemin_cache(empreinte)
+    if not default_storage.exists(chemin):
+        with tempfile.TemporaryFile() as sortie:
+            concatener_pdf([chemin_cache(empreinte_fragment) for empreinte_fragment in empreintes], sortie)
+            sortie.seek(0)
+            chemin = default_storage.save(chemin, sortie)
+    return empreinte, chemin
+
+
+def demander_lot_pdf(user, type_lot, parametres, nom_fichier, arriere_plan=True):
+    """
+    Met en file le rendu d'un lot de documents (voir LOTS_PDF)
+
+    Args:
+        user: Propriétaire du lot
+        type_lot: Clé de LOTS_PDF
+        parametres: Paramètres JSON passés au constructeur des fragments
+        nom_fichier: Nom proposé au téléchargement
+        arriere_plan: Lancer le rendu dans un thread après le commit
+
+    Returns:
+        RenduPdf: Rendu du lot en attente
+    """
+    rendu = RenduPdf.objects.create(
+        user=user, empreinte='', nom_fichier=nom_fichier, moteur='fusion',
+        type_lot=type_lot, parametres=parametres,
+    )
+    if arriere_plan and getattr(settings, 'PDF_RENDU_ARRIERE_PLAN', True):
+        transaction.on_commit(lambda: lancer_rendu_en_arriere_plan(rendu.pk))
+    return rendu
+
+
+def traiter_rendus_en_attente():
+    """
+    Exécute tous les rendus en attente, du plus ancien au plus récent
+
+    Returns:
+        int: Nombre de rendus exécutés
+    """
+    rendu_ids = list(RenduPdf.objects.filter(
+        statut='en_attente'
+    ).order_by('date_creation').values_list('pk', flat=True))
+    return sum(1 for rendu_id in rendu_ids if executer_rendu_pdf(rendu_id))
+
+
+def purger_rendus_pdf(retention_jours=None):
+    """
+    Supprime les rendus terminés ou en erreur plus anciens que la rétention,
+    puis les PDF du cache qu'aucun rendu restant ne référence
+
+    Un PDF non référencé mais récent (fragment d'un lot, rendu en cours
+    d'enregistrement) est conservé jusqu'à la fin de la rétention.
+
+    Args:
+        retention_jours: Durée de conservation (PDF_RETENTION_JOURS par défaut)
+
+    Returns:
+        tuple: (rendus supprimés, fichiers supprimés)
+    """
+    if retention_jours is None:
+        retention_jours = getattr(settings, 'PDF_RETENTION_JOURS', RETENTION_JOURS)
+    limite = timezone.now() - timedelta(days=retention_jours)
+    nb_rendus, _ = RenduPdf.objects.filter(statut__in=['termine', 'erreur'], date_fin__lt=limite).delete()
+
+    references = set(RenduPdf.objects.exclude(fichier='').values_list('fichier', flat=True))
+    try:
+        _, noms = default_storage.listdir(DOSSIER_CACHE)
+    except FileNotFoundError:
+        return nb_rendus, 0
+    nb_fichiers = 0
+    for nom in noms:
+        chemin = f"{DOSSIER_CACHE}/{nom}"
+        if chemin in references or default_storage.get_modified_time(chemin) >= limite:
+            continue
+        default_storage.delete(chemin)
+        nb_fichiers += 1
+    return nb_rendus, nb_fichiers
+
+
+def rendu_asynchrone_demande(request):
+    """Le client suit le rendu par polling (`?async=1` ou requête AJAX)."""
+    return (
+        request.GET.get('async') == '1'
+        or request.POST.get('async') == '1'
+        or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    )
+
+
+def servir_rendu_pdf(rendu):
+    """Réponse de téléchargement d'un rendu terminé."""
+    return FileResponse(
+        rendu.fichier.open('rb'), as_attachment=True,
+        filename=rendu.nom_fichier, content_type='application/pdf',
+    )
+
+
+def reponse_pdf(request, template_src, context, nom_fichier, moteur='xhtml2pdf', base_url=''):
+    """
+    Réponse d'une vue d'export PDF
+
+    - Requête asynchrone: JSON du rendu (202 tant qu'il n'est pas terminé)
+    - Sinon: PDF en cache, ou rendu exécuté immédiatement puis servi
+
+    Returns:
+        HttpResponse: JSON de suivi, PDF, ou erreur 500
+    """
+    asynchrone = rendu_asynchrone_demande(request)
+    rendu = demander_rendu_pdf(
+        request.user, template_src, context, nom_fichier,
+        moteur=moteur, base_url=base_url, arriere_plan=asynchrone,
+    )
+    if asynchrone:
+        return JsonResponse(rendu.as_dict(), status=200 if rendu.statut == 'termine' else 202)
+
+    if rendu.statut != 'termine':
+        executer_rendu_pdf(rendu.pk)
+        rendu.refresh_from_db()
+    if rendu.fichier_disponible:
+        return servir_rendu_pdf(rendu)
+    if rendu.statut == 'en_cours' and rendu.html:
+        # Rendu déjà pris par un autre processus: conversion directe sans attendre
+        try:
+            contenu = convertir_html_en_pdf(rendu.html, rendu.moteur, rendu.base_url)
+        except RuntimeError as e:
+            return HttpResponse(str(e), status=500)
+        response = HttpResponse(contenu, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+        return response
+    return HttpResponse(rendu.message or 'Erreur lors de la génération du PDF', status=500)
+
+
+def reponse_lot_pdf(request, type_lot, parametres, nom_fichier):
+    """
+    Réponse d'une vue d'export d'un lot PDF
+
+    - Requête asynchrone: JSON du rendu du lot (202), à suivre par polling
+    - Sinon: lot rendu dans la requête puis servi
+
+    Returns:
+        HttpResponse: JSON de suivi, PDF, ou erreur 500
+    """
+    asynchrone = rendu_asynchrone_demande(request)
+    rendu = demander_lot_pdf(request.user, type_lot, parametres, nom_fichier, arriere_plan=asynchrone)
+    if asynchrone:
+        return JsonResponse(rendu.as_dict(), status=202)
+
+    executer_rendu_pdf(rendu.pk)
+    rendu.refresh_from_db()
+    if rendu.fichier_disponible:
+        return servir_rendu_pdf(rendu)
+    return HttpResponse(rendu.message or 'Erreur lors de la génération du PDF', status=500)
@@ -0,0 +1,56 @@
+"""
+Filtres de période indexables
+
+`date__month=` / `date__year=` sont traduits en EXTRACT / strftime sur la
+colonne, ce qui empêche l'usage des index (employe, date) ou (user, date).
+`month_range` donne les bornes du mois et `PeriodeQuerySet.for_month`
+filtre par `date BETWEEN premier_jour AND dernier_jour`, lisible par un
+parcours d'intervalle d'index. Une période invalide (mois hors 1-12,
+valeur non numérique) donne un queryset vide, comme `date__month=13`.
+"""
+
+import calendar
+from datetime import date
+
+from django.db import models
+
+
+def month_range(mois, annee):
+    """
+    Bornes d'un mois
+
+    Args:
+        mois: Mois (1-12)
+        annee: Année
+
+    Returns:
+        tuple: (premier jour, dernier jour) en `date`
+    """
+    mois, annee = int(mois), int(annee)
+    return date(annee, mois, 1), date(annee, mois, calendar.monthrange(annee, mois)[1])
+
+
+def year_range(annee):
+    """Bornes d'une année: (1er janvier, 31 décembre)"""
+    annee = int(annee)
+    return date(annee, 1, 1), date(annee, 12, 31)
+
+
+class PeriodeQuerySet(models.QuerySet):
+    """QuerySet des modèles datés: filtres mois / année sous forme d'intervalle"""
+
+    def for_month(self, mois, annee, champ='date'):
+        """Lignes dont `champ` tombe dans le mois (date BETWEEN début AND fin)"""
+        try:
+            bornes = month_range(mois, annee)
+        except (TypeError, ValueError):
+            return self.none()
+        return self.filter(**{f'{champ}__range': bornes})
+
+    def for_year(self, annee, champ='date'):
+        """Lignes dont `champ` tombe dans l'année"""
+        try:
+            bornes = year_range(annee)
+        except (TypeError, ValueError):
+            return self.none()
+        return self.filter(**{f'{champ}__range': bornes})
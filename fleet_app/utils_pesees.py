@@ -0,0 +1,51 @@
+"""
+Synthèse de la liste des pesées de camions
+
+Total, quantité cumulée et moyenne sont calculés en une seule agrégation,
+les cinq premières plaques et zones en deux requêtes groupées. La synthèse
+est mise en cache par utilisateur et par recherche, et périmée par les
+signaux des pesées (voir utils_cache) : les pages suivantes de la liste ne
+relancent pas ces agrégats sur toute la table.
+"""
+
+import hashlib
+
+from django.db.models import Avg, Count, Sum
+
+from .utils_cache import en_cache
+
+
+# Filet de sécurité: les signaux invalident la synthèse à chaque pesée modifiée
+DUREE_CACHE_STATISTIQUES = 60 * 60
+
+# Espace de cache (voir utils_cache), périmé par les signaux des pesées
+ESPACE_CACHE = 'pesees'
+
+
+def statistiques_pesees(user, pesees, recherche=''):
+    """
+    Synthèse des pesées filtrées, depuis le cache si possible
+
+    Args:
+        user: Utilisateur propriétaire des pesées
+        pesees: Queryset des pesées de l'utilisateur filtré par `recherche`
+        recherche: Saisie ayant produit le filtre (complète la clé de cache)
+
+    Returns:
+        dict: total_pesees, total_quantite, moyenne_quantite, top_plaques, top_zones
+    """
+    def calculer():
+        pesees_non_triees = pesees.order_by()
+        stats = pesees_non_triees.aggregate(
+            total_pesees=Count('pk'), total_quantite=Sum('quantity'), moyenne_quantite=Avg('quantity'),
+        )
+        stats['total_quantite'] = stats['total_quantite'] or 0
+        stats['moyenne_quantite'] = stats['moyenne_quantite'] or 0
+        for cle, champ in (('top_plaques', 'plate'), ('top_zones', 'loading_zone')):
+            stats[cle] = list(
+                pesees_non_triees.values(champ).annotate(total=Sum('quantity'), n=Count('id')).order_by('-total')[:5]
+            )
+        return stats
+
+    empreinte = hashlib.sha1(recherche.encode()).hexdigest()
+    return en_cache(ESPACE_CACHE, 'user', user.pk, (empreinte,), calculer, DUREE_CACHE_STATISTIQUES)
@@ -11,11 +11,18 @@ Formules de calcul :
 - J Repos = nombre de OFF
 """
 
-from django.db.models import Count, Q
+from django.db.models import Count
 from datetime import datetime
 from .models_entreprise import PresenceJournaliere, PaieEmploye, Employe
 
 
+# Statuts regroupés par les formules ci-dessus
+STATUTS_JOURS_PRESENCE = ('P(Am_&_Pm)', 'P(Pm)', 'P(Am)')
+STATUTS_SUNDAYS = ('P(dim_Am)', 'P(dim_Pm)', 'P(dim_Am_&_Pm)')
+# Certains modules utilisent 'Férié', d'autres 'F' ou 'Ferie'
+STATUTS_FERIES = ('Férié', 'F', 'Ferie')
+
+
 def calculer_statistiques_presence(employe, mois, annee):
     """
     Calcule les statistiques de présence pour un employé sur un mois donné
@@ -29,61 +36,77 @@ def calculer_statistiques_presence(employe, mois, annee):
     Returns:
         dict: Dictionnaire avec toutes les statistiques calculées
     """
+    return calculer_statistiques_presence_batch([employe], mois, annee)[employe.pk]
+
+
+def calculer_statistiques_presence_batch(employes, mois, annee):
+    """
+    Calcule les statistiques de présence de plusieurs employés sur un mois donné
+    en une seule requête (GROUP BY employé, statut)
     
-    # Récupérer toutes les présences du mois
-    presences = PresenceJournaliere.objects.filter(
-        employe=employe,
-        date__month=mois,
-        date__year=annee
-    )
+    Args:
+        employes: Liste ou queryset d'employés
+        mois: Mois (1-12)
+        annee: Année
+        
+    Returns:
+        dict: {employe_id: statistiques} avec le même dictionnaire que
+        `calculer_statistiques_presence` pour chaque employé (zéros si aucun pointage)
+    """
+    employe_ids = [employe.pk for employe in employes]
+    comptes = {employe_id: {} for employe_id in employe_ids}
+    
+    # Récupérer les comptes par statut de toutes les présences du mois
+    lignes = PresenceJournaliere.objects.for_month(mois, annee).filter(
+        employe_id__in=employe_ids
+    ).values('employe_id', 'statut').annotate(nombre=Count('id')).order_by()
+    for ligne in lignes:
+        comptes[ligne['employe_id']][ligne['statut']] = ligne['nombre']
+    
+    total_jours_mois = get_jours_dans_mois(mois, annee)
+    return {
+        employe_id: _statistiques_depuis_comptes(comptes_employe, total_jours_mois)
+        for employe_id, comptes_employe in comptes.items()
+    }
+
+
+def _statistiques_depuis_comptes(comptes, total_jours_mois):
+    """Applique les formules de présence à un dictionnaire {statut: nombre}."""
+    def total(statuts):
+        return sum(comptes.get(statut, 0) for statut in statuts)
     
-    # Calculer selon les formules spécifiées
-    statistiques = {
+    return {
         # Jours de présence = P(Am_&_Pm) + P(Pm) + P(Am)
-        'jours_presence': presences.filter(
-            Q(statut='P(Am_&_Pm)') | Q(statut='P(Pm)') | Q(statut='P(Am)')
-        ).count(),
+        'jours_presence': total(STATUTS_JOURS_PRESENCE),
         
         # Sundays = P(dim_Am) + P(dim_Pm) + P(dim_Am_&_Pm)
-        'sundays': presences.filter(
-            Q(statut='P(dim_Am)') | Q(statut='P(dim_Pm)') | Q(statut='P(dim_Am_&_Pm)')
-        ).count(),
+        'sundays': total(STATUTS_SUNDAYS),
         
         # Absent = nombre A
-        'absent': presences.filter(statut='A').count(),
+        'absent': comptes.get('A', 0),
         
         # Maladies = nombre de M
-        'maladies': presences.filter(statut='M').count(),
+        'maladies': comptes.get('M', 0),
         
         # M.Payer = nombre M(Payer)
-        'm_payer': presences.filter(statut='M(Payer)').count(),
+        'm_payer': comptes.get('M(Payer)', 0),
         
         # J Repos = nombre de OFF
-        'j_repos': presences.filter(statut='OFF').count(),
+        'j_repos': comptes.get('OFF', 0),
         
-        # Fériés = nombre de jours fériés (gérer plusieurs codes possibles)
-        # Certains modules utilisent 'Férié', d'autres 'F' ou 'Ferie'
-        'feries': presences.filter(
-            Q(statut='Férié') | Q(statut='F') | Q(statut='Ferie')
-        ).count(),
+        # Fériés = nombre de jours fériés
+        'feries': total(STATUTS_FERIES),
         
         # Total des jours du mois (pour référence)
-        'total_jours_mois': get_jours_dans_mois(mois, annee),
+        'total_jours_mois': total_jours_mois,
         
-        # Détail par statut pour debug
-        'detail_statuts': {}
+        # Détail par statut pour vérification
+        'detail_statuts': {
+            statut_code: {'label': statut_label, 'count': comptes[statut_code]}
+            for statut_code, statut_label in PresenceJournaliere.STATUT_CHOICES
+            if comptes.get(statut_code)
+        }
     }
-    
-    # Ajouter le détail par statut pour vérification
-    for statut_code, statut_label in PresenceJournaliere.STATUT_CHOICES:
-        count = presences.filter(statut=statut_code).count()
-        if count > 0:
-            statistiques['detail_statuts'][statut_code] = {
-                'label': statut_label,
-                'count': count
-            }
-    
-    return statistiques
 
 
 def get_jours_dans_mois(mois, annee):
@@ -94,7 +117,7 @@ def get_jours_dans_mois(mois, annee):
     return calendar.monthrange(annee, mois)[1]
 
 
-def synchroniser_presence_vers_paie(employe, mois, annee):
+def synchroniser_presence_vers_paie(employe, mois, annee, stats=None):
     """
     Synchronise automatiquement les données de présence vers la paie
     Crée ou met à jour l'enregistrement de paie avec les données calculées
@@ -103,13 +126,15 @@ def synchroniser_presence_vers_paie(employe, mois, annee):
         employe: Instance de l'employé
         mois: Mois (1-12)
         annee: Année
+        stats: Statistiques déjà calculées (optionnel, ex. par le calcul groupé)
         
     Returns:
         tuple: (paie_employe, created, statistiques)
     """
     
     # Calculer les statistiques de présence
-    stats = calculer_statistiques_presence(employe, mois, annee)
+    if stats is None:
+        stats = calculer_statistiques_presence(employe, mois, annee)
     
     # Récupérer ou créer l'enregistrement de paie
     paie_employe, created = PaieEmploye.objects.get_or_create(
@@ -151,12 +176,13 @@ def synchroniser_tous_employes_mois(user, mois, annee):
         dict: Rapport de synchronisation
     """
     
-    employes = Employe.objects.filter(user=user, statut='Actif')
+    employes = list(Employe.objects.filter(user=user, statut='Actif'))
+    stats_par_employe = calculer_statistiques_presence_batch(employes, mois, annee)
     
     rapport = {
         'mois': mois,
         'annee': annee,
-        'total_employes': employes.count(),
+        'total_employes': len(employes),
         'employes_synchronises': 0,
         'employes_crees': 0,
         'employes_mis_a_jour': 0,
@@ -166,7 +192,9 @@ def synchroniser_tous_employes_mois(user, mois, annee):
     
     for employe in employes:
         try:
-            paie_employe, created, stats = synchroniser_presence_vers_paie(employe, mois, annee)
+            paie_employe, created, stats = synchroniser_presence_vers_paie(
+                employe, mois, annee, stats=stats_par_employe[employe.pk]
+            )
             
             rapport['employes_synchronises'] += 1
             if created:
@@ -208,11 +236,12 @@ def generer_rapport_presence_mois(user, mois, annee):
         dict: Rapport détaillé
     """
     
-    employes = Employe.objects.filter(user=user, statut='Actif')
+    employes = list(Employe.objects.filter(user=user, statut='Actif'))
+    stats_par_employe = calculer_statistiques_presence_batch(employes, mois, annee)
     
     rapport = {
         'periode': f"{mois:02d}/{annee}",
-        'total_employes': employes.count(),
+        'total_employes': len(employes),
         'employes': [],
         'resume_global': {
             'total_jours_presence': 0,
@@ -225,7 +254,7 @@ def generer_rapport_presence_mois(user, mois, annee):
     }
     
     for employe in employes:
-        stats = calculer_statistiques_presence(employe, mois, annee)
+        stats = stats_par_employe[employe.pk]
         
         employe_data = {
             'employe': {
@@ -263,7 +292,12 @@ def verifier_coherence_presence_paie(user, mois, annee):
         dict: Rapport de vérification
     """
     
-    employes = Employe.objects.filter(user=user, statut='Actif')
+    employes = list(Employe.objects.filter(user=user, statut='Actif'))
+    stats_par_employe = calculer_statistiques_presence_batch(employes, mois, annee)
+    paies = {
+        paie.employe_id: paie
+        for paie in PaieEmploye.objects.filter(employe__in=employes, mois=mois, annee=annee)
+    }
     
     rapport = {
         'periode': f"{mois:02d}/{annee}",
@@ -277,11 +311,13 @@ def verifier_coherence_presence_paie(user, mois, annee):
         rapport['employes_verifies'] += 1
         
         # Calculer les stats depuis les présences
-        stats_presence = calculer_statistiques_presence(employe, mois, annee)
+        stats_presence = stats_par_employe[employe.pk]
         
         # Récupérer les données de paie
         try:
-            paie = PaieEmploye.objects.get(employe=employe, mois=mois, annee=annee)
+            paie = paies.get(employe.pk)
+            if paie is None:
+                raise PaieEmploye.DoesNotExist
             
             # Vérifier la cohérence
             problemes_employe = []
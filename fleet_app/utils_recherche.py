@@ -0,0 +1,552 @@
+"""
+Recherche plein texte par tenant
+
+Chaque véhicule, chauffeur, feuille de route, alerte, fournisseur et location
+est copié dans la table dénormalisée `DocumentRecherche` (SearchDocument) :
+titre et données d'affichage, plus un `contenu` normalisé (minuscules, sans
+accents) regroupant les champs cherchables et ceux des objets liés.
+Le contenu est indexé selon le moteur :
+- SQLite : table virtuelle FTS5 (SearchDocumentFTS) alimentée par triggers,
+  requête `MATCH '"terme"*'` triée par `rank` (bm25) ;
+- PostgreSQL : colonne générée `vecteur tsvector` + index GIN, requête
+  `to_tsquery('terme:*')` triée par `ts_rank` ;
+- autres moteurs (ou index absent) : repli sur `contenu LIKE`.
+Les documents sont mis à jour par les signaux (`indexer_objet`,
+`desindexer_objet`) et reconstruits par `python manage.py indexer_recherche`.
+Chaque écriture change la version de cache des tenants concernés
+(`versions_index`), ce qui périme les résultats mémorisés par le typeahead.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.urls import NoReverseMatch, reverse
+
+from .models import Chauffeur, FeuilleDeRoute, FournisseurVehicule, Vehicule
+from .models_alertes import Alerte
+from .models_location import LocationVehicule
+from .models_recherche import DocumentRecherche
+from .utils.tenant import build_tenant_context
+from .utils_cache import invalider_apres_commit, versions
+
+
+TABLE_DOCUMENTS = DocumentRecherche._meta.db_table
+TABLE_FTS = 'SearchDocumentFTS'
+INDEX_GIN = 'searchdocument_vecteur_gin'
+TAILLE_LOT_INDEXATION = 1000
+# Présence de l'index plein texte par alias de base (voir `index_plein_texte_disponible`)
+_INDEX_DISPONIBLE = {}
+# Espace de cache des versions de l'index (voir utils_cache)
+ESPACE_CACHE = 'recherche'
+
+# Colonnes réécrites quand le document existe déjà
+CHAMPS_DOCUMENT = [
+    'user', 'entreprise', 'titre', 'contenu', 'statut', 'categorie', 'niveau', 'date', 'url', 'donnees',
+    'date_modification',
+]
+
+
+def normaliser(texte):
+    """Minuscules sans accents, ponctuation remplacée par des espaces"""
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^0-9a-z]+', ' ', texte).strip()
+
+
+def termes_recherche(texte):
+    """Termes d'une saisie utilisateur, cherchés comme préfixes de mots"""
+    return normaliser(texte).split()
+
+
+def _url(nom, *args):
+    try:
+        return reverse(f'fleet_app:{nom}', args=args)
+    except NoReverseMatch:
+        return ''
+
+
+def _libelle_vehicule(vehicule):
+    if vehicule is None:
+        return ''
+    return f"{vehicule.marque} {vehicule.modele} ({vehicule.immatriculation})"
+
+
+def _champs_vehicule(vehicule):
+    if vehicule is None:
+        return []
+    return [vehicule.immatriculation, vehicule.marque, vehicule.modele]
+
+
+def _document_vehicule(vehicule):
+    return {
+        'user_id': vehicule.user_id,
+        'entreprise_id': vehicule.entreprise_id,
+        'titre': _libelle_vehicule(vehicule),
+        'champs': [vehicule.id_vehicule, *_champs_vehicule(vehicule), vehicule.numero_chassis, vehicule.categorie],
+        'statut': vehicule.statut_actuel,
+        'categorie': vehicule.categorie,
+        'url': _url('vehicule_detail', vehicule.pk),
+        'donnees': {'statut': vehicule.statut_actuel, 'categorie': vehicule.categorie},
+    }
+
+
+def _document_chauffeur(chauffeur):
+    return {
+        'user_id': chauffeur.user_id,
+        'titre': f"{chauffeur.nom} {chauffeur.prenom}",
+        'champs': [chauffeur.nom, chauffeur.prenom, chauffeur.numero_permis, chauffeur.telephone],
+        'statut': chauffeur.statut,
+        'url': _url('chauffeur_detail', chauffeur.pk),
+        'donnees': {'telephone': chauffeur.telephone, 'statut': chauffeur.statut},
+    }
+
+
+def _document_feuille_route(feuille):
+    vehicule, chauffeur = feuille.vehicule, feuille.chauffeur
+    return {
+        'user_id': vehicule.user_id,
+        'entreprise_id': vehicule.entreprise_id,
+        'titre': f"Feuille de route {feuille.pk} - {feuille.destination}",
+        'champs': [feuille.destination, *_champs_vehicule(vehicule), chauffeur.nom, chauffeur.prenom],
+        'date': feuille.date_depart,
+        'url': _url('feuille_route_detail', feuille.pk),
+        'donnees': {
+            'date': feuille.date_depart.strftime('%d/%m/%Y') if feuille.date_depart else '',
+            'vehicule': _libelle_vehicule(vehicule),
+            'chauffeur': f"{chauffeur.nom} {chauffeur.prenom}",
+        },
+    }
+
+
+def _document_alerte(alerte):
+    vehicule = alerte.vehicule
+    libelle = _libelle_vehicule(vehicule)
+    return {
+        'user_id': vehicule.user_id if vehicule else None,
+        'entreprise_id': vehicule.entreprise_id if vehicule else None,
+        'titre': f"{alerte.titre} - {libelle}" if libelle else alerte.titre,
+        'champs': [alerte.titre, alerte.description, *_champs_vehicule(vehicule)],
+        'statut': alerte.statut,
+        'niveau': alerte.niveau,
+        'date': alerte.date_creation.date() if alerte.date_creation else None,
+        'url': _url('alerte_list'),
+        'donnees': {
+            'niveau': alerte.niveau,
+            'statut': alerte.statut,
+            'date': alerte.date_creation.strftime('%d/%m/%Y') if alerte.date_creation else '',
+        },
+    }
+
+
+def _document_fournisseur(fournisseur):
+    return {
+        'user_id': fournisseur.user_id,
+        'entreprise_id': fournisseur.entreprise_id,
+        'titre': fournisseur.nom,
+        'champs': [fournisseur.nom, fournisseur.contact, fournisseur.telephone, fournisseur.email, fournisseur.adresse],
+        'url': _url('fournisseur_update', fournisseur.pk),
+        'donnees': {'telephone': fournisseur.telephone or ''},
+    }
+
+
+def _document_location(location):
+    vehicule, fournisseur = location.vehicule, location.fournisseur
+    return {
+        'user_id': location.user_id,
+        'entreprise_id': location.entreprise_id,
+        'titre': f"Location {_libelle_vehicule(vehicule)}",
+        'champs': [*_champs_vehicule(vehicule), fournisseur.nom if fournisseur else '', location.motif],
+        'statut': location.statut,
+        'categorie': location.type_location,
+        'date': location.date_debut,
+        'url': _url('location_detail', location.pk),
+        'donnees': {
+            'statut': location.statut,
+            'fournisseur': fournisseur.nom if fournisseur else '',
+            'date': location.date_debut.strftime('%d/%m/%Y') if location.date_debut else '',
+        },
+    }
+
+
+# type_objet -> (modèle, relations chargées, constructeur du document)
+SOURCES = {
+    'vehicule': (Vehicule, (), _document_vehicule),
+    'chauffeur': (Chauffeur, (), _document_chauffeur),
+    'feuille_route': (FeuilleDeRoute, ('vehicule', 'chauffeur'), _document_feuille_route),
+    'alerte': (Alerte, ('vehicule',), _document_alerte),
+    'fournisseur': (FournisseurVehicule, (), _document_fournisseur),
+    'location': (LocationVehicule, ('vehicule', 'fournisseur'), _document_location),
+}
+
+TYPE_PAR_MODELE = {modele: type_objet for type_objet, (modele, _, _) in SOURCES.items()}
+
+# Documents qui recopient les champs d'un objet lié: (type dépendant, champ de liaison)
+DEPENDANTS = {
+    'vehicule': [('feuille_route', 'vehicule'), ('alerte', 'vehicule'), ('location', 'vehicule')],
+    'chauffeur': [('feuille_route', 'chauffeur')],
+    'fournisseur': [('location', 'fournisseur')],
+}
+# Champs recopiés dans ces documents: les dépendants ne sont reconstruits que s'ils changent
+CHAMPS_RECOPIES = {
+    'vehicule': ('immatriculation', 'marque', 'modele'),
+    'chauffeur': ('nom', 'prenom'),
+    'fournisseur': ('nom',),
+}
+
+
+def versions_index(user):
+    """
+    Versions de l'index visibles par un utilisateur (sans requête SQL)
+
+    Returns:
+        tuple: (version de son entreprise, version de l'utilisateur)
+    """
+    entreprise = build_tenant_context(user).entreprise
+    return versions(ESPACE_CACHE, [('entreprise', entreprise.pk if entreprise else 0), ('user', user.pk)])
+
+
+def invalider_tenants(tenants):
+    """
+    Change la version de l'index des tenants dont des documents ont été modifiés,
+    à la validation de la transaction
+
+    Args:
+        tenants: Itérable de (user_id, entreprise_id)
+    """
+    for user_id, entreprise_id in set(tenants):
+        invalider_apres_commit(ESPACE_CACHE, user_id, entreprise_id)
+
+
+def _tenants_existants(type_objet, objet_ids):
+    return DocumentRecherche.objects.filter(
+        type_objet=type_objet, objet_id__in=objet_ids,
+    ).values_list('user_id', 'entreprise_id').distinct()
+
+
+def objets_source(type_objet):
+    """Queryset des objets à indexer pour un type"""
+    modele, relations, _ = SOURCES[type_objet]
+    return modele.objects.select_related(*relations)
+
+
+def construire_document(type_objet, objet):
+    """DocumentRecherche (non enregistré) d'un objet"""
+    valeurs = SOURCES[type_objet][2](objet)
+    champs = valeurs.pop('champs')
+    return DocumentRecherche(
+        type_objet=type_objet,
+        objet_id=str(objet.pk),
+        contenu=normaliser(' '.join(str(champ) for champ in champs if champ)),
+        **valeurs,
+    )
+
+
+def indexer_objets(type_objet, objets):
+    """
+    Crée ou met à jour les documents d'un lot d'objets (un upsert groupé)
+
+    Returns:
+        int: Nombre de documents écrits
+    """
+    documents = [construire_document(type_objet, objet) for objet in objets]
+    if not documents:
+        return 0
+    # Anciens et nouveaux tenants (un objet peut changer de propriétaire)
+    tenants = list(_tenants_existants(type_objet, [document.objet_id for document in documents]))
+    tenants += [(document.user_id, document.entreprise_id) for document in documents]
+    # MySQL ne permet pas de cibler la contrainte: le conflit porte alors sur toute clé unique
+    cible = ['type_objet', 'objet_id'] if connection.features.supports_update_conflicts_with_target else None
+    DocumentRecherche.objects.bulk_create(
+        documents, batch_size=500,
+        update_conflicts=True, unique_fields=cible, update_fields=CHAMPS_DOCUMENT,
+    )
+    invalider_tenants(tenants)
+    return len(documents)
+
+
+def memoriser_champs_recopies(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Mémorise les champs recopiés par les documents dépendants tels qu'enregistrés
+    en base avant modification (voir `indexer_objet`)
+    """
+    instance._champs_recopies = None
+    if raw or instance._state.adding:
+        return
+    champs = CHAMPS_RECOPIES[TYPE_PAR_MODELE[sender]]
+    if update_fields is not None and not set(champs).intersection(update_fields):
+        # Aucun champ recopié réécrit: les valeurs en base sont celles de l'instance
+        instance._champs_recopies = {champ: getattr(instance, champ) for champ in champs}
+    else:
+        instance._champs_recopies = sender._base_manager.filter(pk=instance.pk).values(*champs).first()
+
+
+def indexer_objet(objet, created=False):
+    """
+    Indexe un objet modifié et les documents qui recopient ses champs
+
+    Les documents dépendants ne sont reconstruits que si un champ recopié a
+    changé depuis l'instantané de `memoriser_champs_recopies` (toujours si
+    l'instantané manque). Un objet créé n'a pas encore de dépendants.
+
+    Args:
+        objet: Instance enregistrée
+        created: True si l'objet vient d'être créé
+    """
+    type_objet = TYPE_PAR_MODELE[type(objet)]
+    precedent = objet.__dict__.pop('_champs_recopies', None)
+    dependants = DEPENDANTS.get(type_objet, []) if not created else []
+    if dependants and precedent is not None:
+        if all(precedent[champ] == getattr(objet, champ) for champ in CHAMPS_RECOPIES[type_objet]):
+            dependants = []
+    if SOURCES[type_objet][1]:
+        objet = objets_source(type_objet).get(pk=objet.pk)
+    indexer_objets(type_objet, [objet])
+    for type_dependant, champ in dependants:
+        indexer_objets(type_dependant, objets_source(type_dependant).filter(**{champ: objet}))
+
+
+def desindexer_objet(objet):
+    """Retire le document d'un objet supprimé"""
+    type_objet, objet_id = TYPE_PAR_MODELE[type(objet)], str(objet.pk)
+    tenants = list(_tenants_existants(type_objet, [objet_id]))
+    DocumentRecherche.objects.filter(type_objet=type_objet, objet_id=objet_id).delete()
+    invalider_tenants(tenants)
+
+
+def reconstruire_index(types=None):
+    """
+    Reconstruit les documents des types demandés (tous par défaut)
+
+    Returns:
+        dict: {type_objet: nombre de documents}
+    """
+    totaux = {}
+    for type_objet in types or SOURCES:
+        documents = DocumentRecherche.objects.filter(type_objet=type_objet)
+        invalider_tenants(documents.values_list('user_id', 'entreprise_id').distinct())
+        documents.delete()
+        total, lot = 0, []
+        for objet in objets_source(type_objet).order_by('pk').iterator(chunk_size=TAILLE_LOT_INDEXATION):
+            lot.append(objet)
+            if len(lot) == TAILLE_LOT_INDEXATION:
+                total += indexer_objets(type_objet, lot)
+                lot = []
+        totaux[type_objet] = total + indexer_objets(type_objet, lot)
+    return totaux
+
+
+# ---------- Index plein texte selon le moteur ----------
+
+def installer_index_plein_texte(connexion=connection):
+    """Crée la table FTS5 et ses triggers (SQLite) ou la colonne tsvector et son index GIN (PostgreSQL)"""
+    with connexion.cursor() as cursor:
+        if connexion.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS "{TABLE_FTS}" USING fts5('
+                f"contenu, content='{TABLE_DOCUMENTS}', content_rowid='id', prefix='2 3')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{TABLE_FTS}_ai" AFTER INSERT ON "{TABLE_DOCUMENTS}" BEGIN '
+                f'INSERT INTO "{TABLE_FTS}"(rowid, contenu) VALUES (new.id, new.contenu); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{TABLE_FTS}_ad" AFTER DELETE ON "{TABLE_DOCUMENTS}" BEGIN '
+                f'INSERT INTO "{TABLE_FTS}"("{TABLE_FTS}", rowid, contenu) VALUES (\'delete\', old.id, old.contenu); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS "{TABLE_FTS}_au" AFTER UPDATE ON "{TABLE_DOCUMENTS}" BEGIN '
+                f'INSERT INTO "{TABLE_FTS}"("{TABLE_FTS}", rowid, contenu) VALUES (\'delete\', old.id, old.contenu); '
+                f'INSERT INTO "{TABLE_FTS}"(rowid, contenu) VALUES (new.id, new.contenu); END'
+            )
+            cursor.execute(f'INSERT INTO "{TABLE_FTS}"("{TABLE_FTS}") VALUES (\'rebuild\')')
+        elif connexion.vendor == 'postgresql':
+            cursor.execute(
+                f'ALTER TABLE "{TABLE_DOCUMENTS}" ADD COLUMN IF NOT EXISTS vecteur tsvector '
+                f"GENERATED ALWAYS AS (to_tsvector('simple', contenu)) STORED"
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{INDEX_GIN}" ON "{TABLE_DOCUMENTS}" USING GIN (vecteur)')
+    _INDEX_DISPONIBLE.pop(connexion.alias, None)
+
+
+def supprimer_index_plein_texte(connexion=connection):
+    """Supprime les objets créés par `installer_index_plein_texte`"""
+    with connexion.cursor() as cursor:
+        if connexion.vendor == 'sqlite':
+            for suffixe in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{TABLE_FTS}_{suffixe}"')
+            cursor.execute(f'DROP TABLE IF EXISTS "{TABLE_FTS}"')
+        elif connexion.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS "{INDEX_GIN}"')
+            cursor.execute(f'ALTER TABLE "{TABLE_DOCUMENTS}" DROP COLUMN IF EXISTS vecteur')
+    _INDEX_DISPONIBLE.pop(connexion.alias, None)
+
+
+def index_plein_texte_disponible(connexion=connection):
+    """
+    Indique si l'index plein texte du moteur courant est installé
+
+    Lu une fois par processus et par base : `installer_index_plein_texte` et
+    `supprimer_index_plein_texte` oublient la valeur mémorisée, une migration
+    jouée par un autre processus n'est vue qu'après redémarrage.
+    """
+    if connexion.alias not in _INDEX_DISPONIBLE:
+        _INDEX_DISPONIBLE[connexion.alias] = _detecter_index_plein_texte(connexion)
+    return _INDEX_DISPONIBLE[connexion.alias]
+
+
+def _detecter_index_plein_texte(connexion):
+    with connexion.cursor() as cursor:
+        if connexion.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE_FTS])
+        elif connexion.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = 'vecteur'",
+                [TABLE_DOCUMENTS],
+            )
+        else:
+            return False
+        return cursor.fetchone() is not None
+
+
+# ---------- Recherche ----------
+
+def _conditions(user, types, filtres, apres=None):
+    """Clause WHERE (tenant, types, filtres, curseur) et ses paramètres, sur l'alias d"""
+    entreprise = build_tenant_context(user).entreprise
+    if entreprise is not None:
+        # Les objets sans entreprise (chauffeurs...) restent filtrés par utilisateur
+        conditions = ['(d.entreprise_id = %s OR (d.entreprise_id IS NULL AND d.user_id = %s))']
+        parametres = [entreprise.pk, user.pk]
+    else:
+        conditions, parametres = ['d.user_id = %s'], [user.pk]
+    if types:
+        conditions.append(f"d.type_objet IN ({', '.join(['%s'] * len(types))})")
+        parametres.extend(types)
+    for champ in ('statut', 'categorie', 'niveau'):
+        if filtres.get(champ):
+            conditions.append(f'd.{champ} = %s')
+            parametres.append(filtres[champ])
+    if filtres.get('date_debut'):
+        conditions.append('d.date >= %s')
+        parametres.append(filtres['date_debut'])
+    if filtres.get('date_fin'):
+        conditions.append('d.date <= %s')
+        parametres.append(filtres['date_fin'])
+    if apres:
+        conditions.append('(d.titre > %s OR (d.titre = %s AND d.id > %s))')
+        parametres.extend([apres[0], apres[0], apres[1]])
+    return ' AND '.join(conditions), parametres
+
+
+def _documents_repli(user, termes, types, filtres, apres):
+    """Documents du tenant filtrés par `contenu LIKE` (moteur sans index plein texte)"""
+    entreprise = build_tenant_context(user).entreprise
+    if entreprise is not None:
+        documents = DocumentRecherche.objects.filter(
+            Q(entreprise=entreprise) | Q(entreprise__isnull=True, user=user)
+        )
+    else:
+        documents = DocumentRecherche.objects.filter(user=user)
+    if types:
+        documents = documents.filter(type_objet__in=types)
+    for champ in ('statut', 'categorie', 'niveau'):
+        if filtres.get(champ):
+            documents = documents.filter(**{champ: filtres[champ]})
+    if filtres.get('date_debut'):
+        documents = documents.filter(date__gte=filtres['date_debut'])
+    if filtres.get('date_fin'):
+        documents = documents.filter(date__lte=filtres['date_fin'])
+    if apres:
+        documents = documents.filter(Q(titre__gt=apres[0]) | Q(titre=apres[0], pk__gt=apres[1]))
+    for terme in termes:
+        documents = documents.filter(contenu__contains=terme)
+    return documents
+
+
+def _recherche_repli(user, termes, types, limite, filtres, apres):
+    documents = _documents_repli(user, termes, types, filtres, apres).order_by('titre', 'pk')
+    return list(documents[:limite] if limite else documents)
+
+
+def _requete_plein_texte(termes, conditions, parametres, colonnes):
+    """SELECT des documents correspondant aux termes (FTS5 ou tsvector), sans tri"""
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT {colonnes} FROM "{TABLE_FTS}" JOIN "{TABLE_DOCUMENTS}" d ON d.id = "{TABLE_FTS}".rowid '
+            f'WHERE "{TABLE_FTS}" MATCH %s AND {conditions} '
+        )
+        expression = ' '.join(f'"{terme}"*' for terme in termes)
+    else:
+        sql = (
+            f'SELECT {colonnes} FROM "{TABLE_DOCUMENTS}" d '
+            f"WHERE d.vecteur @@ to_tsquery('simple', %s) AND {conditions} "
+        )
+        expression = ' & '.join(f'{terme}:*' for terme in termes)
+    return sql, [expression, *parametres], expression
+
+
+def rechercher(user, texte, types=None, limite=10, filtres=None, tri='pertinence', apres=None):
+    """
+    Recherche par préfixes dans les documents du tenant
+
+    Args:
+        user: Utilisateur connecté (portée entreprise ou utilisateur)
+        texte: Saisie libre
+        types: Types d'objets à chercher (tous si None)
+        limite: Nombre maximal de documents (None: tous)
+        filtres: dict optionnel statut / categorie / niveau / date_debut / date_fin
+        tri: 'pertinence' (bm25 / ts_rank) ou 'titre' (ordre stable pour la pagination par curseur)
+        apres: (titre, id) du dernier document de la page précédente (tri 'titre')
+
+    Returns:
+        list: DocumentRecherche
+    """
+    termes = termes_recherche(texte)
+    filtres = filtres or {}
+    if apres:
+        tri = 'titre'
+    if not termes:
+        # Saisie vide: parcours alphabétique (listes déroulantes), sans objet en tri par pertinence
+        return _recherche_repli(user, termes, types, limite, filtres, apres) if tri == 'titre' else []
+    if not index_plein_texte_disponible():
+        return _recherche_repli(user, termes, types, limite, filtres, apres)
+
+    colonnes = ', '.join(f'd."{champ.column}"' for champ in DocumentRecherche._meta.concrete_fields)
+    sql, parametres, expression = _requete_plein_texte(termes, *_conditions(user, types, filtres, apres), colonnes)
+    if tri == 'titre':
+        sql += 'ORDER BY d.titre, d.id'
+    elif connection.vendor == 'sqlite':
+        sql += f'ORDER BY "{TABLE_FTS}".rank'
+    else:
+        sql += "ORDER BY ts_rank(d.vecteur, to_tsquery('simple', %s)) DESC, d.id"
+        parametres.append(expression)
+    if limite:
+        sql += ' LIMIT %s'
+        parametres.append(limite)
+    return list(DocumentRecherche.objects.raw(sql, parametres))
+
+
+def ids_correspondants(user, type_objet, texte):
+    """
+    Sous-requête des clés des objets d'un type correspondant à la saisie
+
+    Évaluée par la base dans la requête de l'appelant (`filter(pk__in=...)`),
+    sans rapatrier ni limiter la liste des identifiants.
+
+    Returns:
+        QuerySet: `objet_id` converti dans le type de la clé primaire du modèle
+    """
+    termes = termes_recherche(texte)
+    if not termes:
+        documents = DocumentRecherche.objects.none()
+    elif index_plein_texte_disponible():
+        sql, parametres, _ = _requete_plein_texte(termes, *_conditions(user, [type_objet], {}), 'd.id')
+        documents = DocumentRecherche.objects.filter(pk__in=RawSQL(sql, parametres))
+    else:
+        documents = _documents_repli(user, termes, [type_objet], {}, None)
+    cle = SOURCES[type_objet][0]._meta.pk
+    return documents.values_list(Cast('objet_id', output_field=cle), flat=True)
@@ -0,0 +1,97 @@
+"""
+Contrôle du solde de stock persisté (Produit.stock_courant)
+
+Le solde est tenu à jour à chaque entrée / sortie (création, modification,
+suppression). `verifier_stocks` le compare à la somme des mouvements, calculée
+en deux requêtes groupées, et corrige les écarts ; utilisé par la commande
+`python manage.py recompute_stock`.
+
+Les compteurs de la page de stock (`statistiques_stock`) sont mis en cache par
+tenant et périmés par les signaux des produits et mouvements (voir utils_cache).
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models_inventaire import Produit, EntreeStock, SortieStock
+from .utils.decorators import queryset_filter_by_tenant
+from .utils.tenant import get_tenant_context
+from .utils_cache import en_cache, invalider_apres_commit
+
+
+# Filet de sécurité: les signaux invalident les compteurs à chaque mouvement
+DUREE_CACHE_STATISTIQUES = 60 * 60
+
+# Espace de cache (voir utils_cache), périmé par les signaux des produits, entrées et sorties
+ESPACE_CACHE = 'stock'
+
+
+def statistiques_stock(request):
+    """
+    Compteurs par statut et valeur du stock du tenant, depuis le cache si possible
+
+    Returns:
+        dict: total_produits, produits_rupture, produits_alerte, produits_normaux, valeur_totale
+    """
+    def calculer():
+        # Une seule requête d'agrégation conditionnelle sur le solde persisté
+        return queryset_filter_by_tenant(Produit.objects.all(), request).aggregate(
+            total_produits=Count('pk'),
+            produits_rupture=Count('pk', filter=Q(stock_courant=0)),
+            produits_alerte=Count('pk', filter=~Q(stock_courant=0) & Q(stock_courant__lte=F('seuil_minimum'))),
+            produits_normaux=Count('pk', filter=Q(stock_courant__gt=F('seuil_minimum'))),
+            valeur_totale=Coalesce(Sum(F('stock_courant') * F('prix_unitaire')), Decimal('0')),
+        )
+
+    portee, identifiant = get_tenant_context(request).portee
+    return en_cache(ESPACE_CACHE, portee, identifiant, (), calculer, DUREE_CACHE_STATISTIQUES)
+
+
+def soldes_mouvements(produits):
+    """
+    Stock de chaque produit recalculé à partir des entrées et sorties
+
+    Returns:
+        dict: {produit_id: entrées - sorties}
+    """
+    soldes = {}
+    for modele, sens in ((EntreeStock, 1), (SortieStock, -1)):
+        totaux = modele.objects.filter(produit__in=produits).values('produit').annotate(
+            total=Sum('quantite')
+        ).values_list('produit', 'total').order_by()
+        for produit_id, total in totaux:
+            soldes[produit_id] = soldes.get(produit_id, 0) + sens * (total or 0)
+    return soldes
+
+
+def verifier_stocks(produits=None, corriger=True):
+    """
+    Compare stock_courant au solde des mouvements et corrige les écarts
+
+    Args:
+        produits: Queryset de produits à contrôler (tous si None)
+        corriger: Écrire le solde recalculé sur les produits en écart
+
+    Returns:
+        list: Tuples (produit, stock_courant, solde recalculé) des produits en écart
+    """
+    produits = Produit.objects.all() if produits is None else produits
+    ecarts = []
+    with transaction.atomic():
+        # Verrouiller les produits contrôlés pour ne pas corriger pendant un mouvement
+        lignes = list(produits.select_for_update().order_by('pk'))
+        soldes = soldes_mouvements(lignes)
+        for produit in lignes:
+            solde = soldes.get(produit.pk, 0)
+            if produit.stock_courant != solde:
+                ecarts.append((produit, produit.stock_courant, solde))
+                produit.stock_courant = solde
+        if corriger and ecarts:
+            Produit.objects.bulk_update([ecart[0] for ecart in ecarts], ['stock_courant'], batch_size=500)
+            # bulk_update n'envoie pas de signal: périmer les compteurs des tenants corrigés
+            for user_id, entreprise_id in {(ecart[0].user_id, ecart[0].entreprise_id) for ecart in ecarts}:
+                invalider_apres_commit(ESPACE_CACHE, user_id, entreprise_id)
+    return ecarts
@@ -0,0 +1,148 @@
+"""
+Service de typeahead (saisie semi-automatique)
+
+Un seul point d'entrée pour toutes les listes de suggestions : recherche par
+préfixes dans l'index plein texte du tenant (`utils_recherche.rechercher`),
+triée par titre et paginée par curseur (titre, id) plutôt que par OFFSET.
+Les dernières saisies de chaque tenant sont mémorisées dans un cache LRU en
+mémoire du processus ; la clé (qui sert aussi d'ETag) contient la version de
+l'index du tenant, si bien qu'une frappe répétée ou un retour arrière est
+servi sans requête SQL de recherche, et qu'une modification des données
+périme immédiatement les entrées du tenant.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .utils.tenant import build_tenant_context
+from .utils_recherche import SOURCES, normaliser, rechercher, versions_index
+
+
+LIMITE_DEFAUT = 10
+LIMITE_MAX = 50
+# Saisies mémorisées par tenant et nombre de tenants gardés en mémoire
+CAPACITE_TENANT = 256
+CAPACITE_TENANTS = 1000
+
+
+class CacheLRU:
+    """Dictionnaire borné, l'entrée la moins récemment utilisée est évincée en premier"""
+
+    def __init__(self, capacite):
+        self.capacite = capacite
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            if cle not in self._entrees:
+                return defaut
+            self._entrees.move_to_end(cle)
+            return self._entrees[cle]
+
+    def set(self, cle, valeur):
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.capacite:
+                self._entrees.popitem(last=False)
+
+    def get_or_set(self, cle, fabrique):
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                return self._entrees[cle]
+        valeur = fabrique()
+        self.set(cle, valeur)
+        return valeur
+
+    def clear(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def __len__(self):
+        return len(self._entrees)
+
+
+_caches_tenants = CacheLRU(CAPACITE_TENANTS)
+
+
+def cache_tenant(portee):
+    """Cache LRU des saisies d'un tenant"""
+    return _caches_tenants.get_or_set(portee, lambda: CacheLRU(CAPACITE_TENANT))
+
+
+def encoder_curseur(document):
+    """Curseur opaque de la page suivante: (titre, id) du dernier document"""
+    brut = json.dumps([document.titre, document.pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    """(titre, id) d'un curseur, None s'il est absent ou invalide"""
+    if not curseur:
+        return None
+    try:
+        titre, identifiant = json.loads(base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)))
+        return str(titre), int(identifiant)
+    except (ValueError, TypeError):
+        return None
+
+
+def parametres_typeahead(texte, types=None, limite=None, curseur=None):
+    """Paramètres normalisés: (termes, types, limite, curseur)"""
+    types = tuple(sorted(t for t in (types or []) if t in SOURCES)) or None
+    try:
+        limite = min(max(int(limite or LIMITE_DEFAUT), 1), LIMITE_MAX)
+    except (TypeError, ValueError):
+        limite = LIMITE_DEFAUT
+    apres = decoder_curseur(curseur)
+    return normaliser(texte), types, limite, apres
+
+
+def cle_typeahead(user, texte, types=None, limite=None, curseur=None):
+    """
+    Portée du tenant et clé de la réponse (utilisée comme ETag), sans requête de recherche
+
+    Returns:
+        tuple: (portée, clé)
+    """
+    termes, types, limite, apres = parametres_typeahead(texte, types, limite, curseur)
+    portee = build_tenant_context(user).portee
+    empreinte = json.dumps([portee, versions_index(user), termes, types, limite, apres], default=str)
+    return portee, hashlib.sha1(empreinte.encode()).hexdigest()
+
+
+def resultats_typeahead(user, texte, types=None, limite=None, curseur=None):
+    """
+    Suggestions d'une saisie, depuis le cache LRU du tenant si possible
+
+    Args:
+        user: Utilisateur connecté
+        texte: Saisie (préfixes de mots)
+        types: Types d'objets (voir utils_recherche.SOURCES), tous si vide
+        limite: Taille de page (1-50)
+        curseur: Curseur `next` de la page précédente
+
+    Returns:
+        tuple: (clé / ETag, {'results': [{id, text, type, url}], 'next': curseur ou None})
+    """
+    termes, types_normalises, limite, apres = parametres_typeahead(texte, types, limite, curseur)
+    portee, cle = cle_typeahead(user, texte, types, limite, curseur)
+
+    def calculer():
+        # Un document de plus pour savoir s'il existe une page suivante
+        documents = rechercher(user, termes, types=types_normalises, limite=limite + 1, tri='titre', apres=apres)
+        page = documents[:limite]
+        return {
+            'results': [
+                {'id': d.objet_id, 'text': d.titre, 'type': d.type_objet, 'url': d.url}
+                for d in page
+            ],
+            'next': encoder_curseur(page[-1]) if len(documents) > limite else None,
+        }
+
+    return cle, cache_tenant(portee).get_or_set(cle, calculer)
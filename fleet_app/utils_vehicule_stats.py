@@ -0,0 +1,189 @@
+"""
+Moteur de statistiques véhicules par mois
+
+Toutes les séries mensuelles d'un ou plusieurs véhicules sont calculées par
+une requête groupée (véhicule, TruncMonth) par table source :
+FeuilleDeRoute, FeuillePontageLocation, CoutFonctionnement,
+ConsommationCarburant et SortieStock. Le nombre de requêtes ne dépend ni du
+nombre de mois ni du nombre de véhicules ou de locations ; les totaux d'une
+période sont la somme des mois.
+Utilisé par `vehicule_stats_dashboard`, `vehicule_stats_detail`,
+`vehicule_comparaison_stats` et l'export JSON.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import FeuilleDeRoute, CoutFonctionnement, ConsommationCarburant
+from .models_location import FeuillePontageLocation
+from .models_inventaire import SortieStock
+
+
+# Séries calculées pour chaque (véhicule, mois)
+METRIQUES = (
+    'jours_feuilles_route', 'jours_location_travail', 'jours_location_entretien', 'jours_location_hs',
+    'frais_location', 'cout_entretien', 'pieces_utilisees', 'consommation_litres',
+)
+
+
+def _mois(valeur):
+    """Normalise la valeur de TruncMonth (date ou datetime) en date du 1er du mois"""
+    return valeur.date() if hasattr(valeur, 'date') else valeur
+
+
+def _serie_vide():
+    return dict.fromkeys(METRIQUES, 0)
+
+
+def series_mensuelles_vehicules(vehicules, start_date, end_date, user):
+    """
+    Séries mensuelles de tous les véhicules (une requête groupée par table source)
+
+    Args:
+        vehicules: Liste ou queryset de Vehicule
+        start_date: Début de période
+        end_date: Fin de période
+        user: Utilisateur propriétaire des données
+
+    Returns:
+        dict: {vehicule_id: {date du 1er du mois: {métrique: valeur}}}
+    """
+    vehicules = list(vehicules)
+    series = {vehicule.pk: defaultdict(_serie_vide) for vehicule in vehicules}
+    if not vehicules:
+        return series
+
+    def cumuler(lignes, cle_vehicule, champs):
+        for ligne in lignes:
+            serie = series.get(ligne[cle_vehicule])
+            if serie is None or ligne['mois'] is None:
+                continue
+            mois = serie[_mois(ligne['mois'])]
+            for metrique, champ in champs.items():
+                mois[metrique] += ligne[champ] or 0
+
+    # Feuilles de route complétées
+    cumuler(FeuilleDeRoute.objects.filter(
+        vehicule__in=vehicules, date_depart__range=[start_date, end_date],
+        date_retour__isnull=False, signature_chauffeur=True,
+    ).values('vehicule', mois=TruncMonth('date_depart')).annotate(jours=Count('pk')).order_by(),
+        'vehicule', {'jours_feuilles_route': 'jours'})
+
+    # Pontages des locations de la période (jours par statut et frais facturables)
+    travail = Q(statut='Travail')
+    cumuler(FeuillePontageLocation.objects.filter(
+        location__vehicule__in=vehicules, location__user=user,
+        location__date_debut__lte=end_date, location__date_fin__gte=start_date,
+        date__range=[start_date, end_date], user=user,
+    ).values('location__vehicule', mois=TruncMonth('date')).annotate(
+        travail=Count('pk', filter=travail),
+        entretien=Count('pk', filter=Q(statut='Entretien')),
+        hs=Count('pk', filter=Q(statut='Hors service')),
+        frais=Sum(F('location__tarif_journalier'), filter=travail),
+    ).order_by(), 'location__vehicule', {
+        'jours_location_travail': 'travail',
+        'jours_location_entretien': 'entretien',
+        'jours_location_hs': 'hs',
+        'frais_location': 'frais',
+    })
+
+    # Coûts d'entretien
+    cumuler(CoutFonctionnement.objects.filter(
+        vehicule__in=vehicules, date__range=[start_date, end_date], type_cout='Entretien', user=user,
+    ).values('vehicule', mois=TruncMonth('date')).annotate(total=Sum('montant')).order_by(),
+        'vehicule', {'cout_entretien': 'total'})
+
+    # Consommation carburant
+    cumuler(ConsommationCarburant.objects.filter(
+        vehicule__in=vehicules, date_plein2__range=[start_date, end_date], user=user,
+    ).values('vehicule', mois=TruncMonth('date_plein2')).annotate(litres=Sum('litres_ajoutes')).order_by(),
+        'vehicule', {'consommation_litres': 'litres'})
+
+    # Pièces sorties du stock vers le véhicule
+    cumuler(SortieStock.objects.filter(
+        vehicule__in=vehicules, date__range=[start_date, end_date],
+    ).values('vehicule', mois=TruncMonth('date')).annotate(quantite=Sum('quantite')).order_by(),
+        'vehicule', {'pieces_utilisees': 'quantite'})
+
+    return series
+
+
+def totaliser_serie(serie, start_date, end_date):
+    """
+    Totaux d'une période à partir des mois d'un véhicule, au format de
+    `calculer_stats_vehicule`
+
+    Args:
+        serie: {mois: {métrique: valeur}} d'un véhicule
+        start_date: Début de période
+        end_date: Fin de période
+
+    Returns:
+        dict: jours, coûts, consommation et frais de location
+    """
+    total = _serie_vide()
+    for valeurs in serie.values():
+        for metrique in METRIQUES:
+            total[metrique] += valeurs[metrique]
+
+    frais_journaliers = total['frais_location']
+    # Estimations mensuelles et annuelles basées sur la période
+    frais_mensuels = (frais_journaliers / ((end_date - start_date).days + 1)) * 30 if frais_journaliers > 0 else 0
+    return {
+        'jours_actifs': total['jours_feuilles_route'] + total['jours_location_travail'],
+        'jours_inactifs': 0,  # Pas de statut inactif dans le modèle
+        'jours_entretien': total['jours_location_entretien'],
+        'jours_hors_service': total['jours_location_hs'],
+        'cout_entretien': total['cout_entretien'],
+        'pieces_utilisees': total['pieces_utilisees'],
+        'valeur_pieces': total['pieces_utilisees'],  # Pas de prix_unitaire dans SortieStock
+        'consommation_litres': total['consommation_litres'],
+        'cout_carburant': total['consommation_litres'],  # ConsommationCarburant n'a pas de champ cout_total
+        'frais_location': {
+            'journalier': frais_journaliers,
+            'mensuel': frais_mensuels,
+            'annuel': frais_mensuels * 12,
+            'total': frais_journaliers,
+            'jours_factures': total['jours_location_travail'],
+        },
+    }
+
+
+def stats_vehicules(vehicules, start_date, end_date, user):
+    """
+    Statistiques de période de plusieurs véhicules
+
+    Returns:
+        dict: {vehicule_id: stats au format de `calculer_stats_vehicule`}
+    """
+    series = series_mensuelles_vehicules(vehicules, start_date, end_date, user)
+    return {pk: totaliser_serie(serie, start_date, end_date) for pk, serie in series.items()}
+
+
+def stats_mensuelles_graphique(serie, start_date, end_date):
+    """
+    Séries d'un véhicule pour les graphiques, un point par mois de la période
+
+    Returns:
+        dict: {'YYYY-MM': {mois, jours_actifs, jours_entretien, cout_entretien, cout_carburant, frais_location}}
+    """
+    stats_par_mois = {}
+    current_date = start_date.replace(day=1)
+    while current_date <= end_date:
+        valeurs = serie.get(current_date) or _serie_vide()
+        stats_par_mois[current_date.strftime('%Y-%m')] = {
+            'mois': current_date.strftime('%B %Y'),
+            'jours_actifs': valeurs['jours_feuilles_route'] + valeurs['jours_location_travail'],
+            'jours_entretien': valeurs['jours_location_entretien'],
+            'cout_entretien': valeurs['cout_entretien'],
+            'cout_carburant': valeurs['consommation_litres'],
+            'frais_location': valeurs['frais_location'],
+        }
+        # Passer au mois suivant
+        if current_date.month == 12:
+            current_date = current_date.replace(year=current_date.year + 1, month=1)
+        else:
+            current_date = current_date.replace(month=current_date.month + 1)
+    return stats_par_mois
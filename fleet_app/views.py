@@ -8,6 +8,7 @@ from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.db import transaction
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
@@ -41,12 +42,26 @@ from .forms_document import DocumentAdministratifForm
 # Import des utilitaires
 from .utils import convertir_en_gnf, formater_montant_gnf, formater_cout_par_km_gnf, TAUX_CONVERSION_EUR_GNF
 from .utils.decorators import queryset_filter_by_tenant
+from .utils_dashboard_kpi import kpi_dashboard_tenant
+from .models_kpi import KpiMensuel
+from .utils_kpi_mensuel import kpi_totaux, kpi_par_vehicule, moyenne
+from .utils_pdf import reponse_pdf
+from .utils_pagination import paginer_selon_ordre
+from .utils_recherche import rechercher
+from .utils_pages import (
+    DUREE_CACHE_FRAGMENTS, FRAGMENTS_ACCUEIL, FRAGMENTS_GALERIE, NB_IMAGES_ACCUEIL, NB_LOCATIONS_ACCUEIL,
+    cles_fragments, etag_accueil, etag_galerie, etat_locations_du_jour, get_conditionnel,
+)
 
 # Vue de la page d'accueil
+@get_conditionnel(etag_accueil)
 def home(request):
     """
     Vue de la page d'accueil qui affiche une présentation de l'entreprise
     Accessible à tous, même sans authentification
+
+    GET conditionnel (ETag, voir utils_pages) ; les blocs galerie et locations
+    sont en cache de fragments et leurs requêtes ne s'exécutent qu'au rendu.
     """
     # Vérifier si l'utilisateur a complété son profil (seulement si connecté)
     if request.user.is_authenticated:
@@ -56,75 +71,53 @@ def home(request):
     
     from django.conf import settings
     
-    # Dernières images de la galerie (upload via admin)
-    try:
-        latest_gallery = list(GalleryImage.objects.all().order_by('-created_at')[:12])
-    except Exception:
-        latest_gallery = []
-
-    # Données des véhicules en location (si utilisateur connecté)
-    vehicules_location_info = []
-    total_locations = 0
-    locations_travail = 0
-    locations_panne = 0
-    locations_entretien = 0
-    
-    if request.user.is_authenticated:
-        from .models_location import LocationVehicule, FeuillePontageLocation
-        
-        today_date = timezone.now().date()
-        
-        # Récupérer les locations actives (6 premières pour la page d'accueil)
-        locations_actives = queryset_filter_by_tenant(LocationVehicule.objects.all(), request).filter(
-            statut='Active'
-        ).select_related('vehicule', 'fournisseur').order_by('vehicule__immatriculation')[:6]
-        
-        # Récupérer les feuilles de pontage du jour
-        feuilles_today = queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request).filter(
-            date=today_date
-        ).select_related('location', 'location__vehicule')
-        
-        # Créer un dictionnaire des véhicules en location avec leurs infos
-        for location in locations_actives:
-            feuille = feuilles_today.filter(location=location).first()
-            vehicules_location_info.append({
-                'location': location,
-                'vehicule': location.vehicule,
-                'fournisseur': location.fournisseur,
-                'feuille': feuille,
-                'statut_jour': feuille.statut if feuille else 'Non renseigné',
-                'a_travaille': feuille and feuille.statut == 'Travail',
-                'en_panne': feuille and feuille.statut in ['Hors service', 'Panne'],
-                'en_entretien': feuille and feuille.statut == 'Entretien',
-            })
-        
-        # Statistiques locations
-        total_locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request).filter(statut='Active').count()
-        locations_travail = sum(1 for v in vehicules_location_info if v['a_travaille'])
-        locations_panne = sum(1 for v in vehicules_location_info if v['en_panne'])
-        locations_entretien = sum(1 for v in vehicules_location_info if v['en_entretien'])
-
     context = {
         'titre': 'Accueil',
         'description': 'Bienvenue dans le système de gestion du parc automobile',
         'MEDIA_URL': settings.MEDIA_URL,
-        'gallery_images': latest_gallery,
-        # Données véhicules en location
-        'vehicules_location_info': vehicules_location_info,
-        'total_locations': total_locations,
-        'locations_travail': locations_travail,
-        'locations_panne': locations_panne,
-        'locations_entretien': locations_entretien,
+        # Dernières images de la galerie (upload via admin), lues au rendu du fragment
+        'gallery_images': GalleryImage.objects.order_by('-created_at')[:NB_IMAGES_ACCUEIL],
+        # Données véhicules en location (si utilisateur connecté), calculées au rendu du fragment
+        'locations_jour': SimpleLazyObject(lambda: _locations_accueil(request)),
+        'fragments': cles_fragments(request, *FRAGMENTS_ACCUEIL),
+        'duree_fragments': DUREE_CACHE_FRAGMENTS,
     }
     return render(request, 'fleet_app/home.html', context)
 
+
+def _locations_accueil(request):
+    """Bloc « Véhicules en location » de l'accueil: état du jour des premières locations actives du tenant"""
+    from .models_location import LocationVehicule, FeuillePontageLocation
+    
+    locations_actives = queryset_filter_by_tenant(LocationVehicule.objects.all(), request).filter(statut='Active')
+    
+    # Locations actives (6 premières pour la page d'accueil) et leurs feuilles de pontage du jour
+    premieres = list(locations_actives.select_related('vehicule', 'fournisseur').order_by(
+        'vehicule__immatriculation'
+    )[:NB_LOCATIONS_ACCUEIL])
+    feuilles_today = queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request).filter(
+        date=timezone.now().date(), location__in=[location.pk for location in premieres]
+    )
+    vehicules_location_info = etat_locations_du_jour(premieres, feuilles_today)
+    
+    return {
+        'vehicules_location_info': vehicules_location_info,
+        'total_locations': locations_actives.count(),
+        'locations_travail': sum(1 for v in vehicules_location_info if v['a_travaille']),
+        'locations_panne': sum(1 for v in vehicules_location_info if v['en_panne']),
+        'locations_entretien': sum(1 for v in vehicules_location_info if v['en_entretien']),
+    }
+
 # Galerie d'images simple
+@get_conditionnel(etag_galerie)
 def gallery(request):
-    """Page galerie publique: affiche les images uploadées via l'admin."""
+    """Page galerie publique: affiche les images uploadées via l'admin (GET conditionnel, fragment en cache)."""
     images = GalleryImage.objects.all().order_by('-created_at')
     context = {
         'titre': 'Galerie',
         'images': images,
+        'fragments': cles_fragments(request, *FRAGMENTS_GALERIE),
+        'duree_fragments': DUREE_CACHE_FRAGMENTS,
     }
     return render(request, 'fleet_app/gallery.html', context)
 
@@ -133,14 +126,19 @@ def paginate_and_search(request, queryset, search_fields=None, per_page=10):
     """
     Fonction utilitaire pour gérer la pagination et la recherche
     
+    La pagination suit l'ordre du queryset (à défaut Meta.ordering) : par
+    curseur, la clé primaire servant de départage, ou par décalage si cet
+    ordre porte sur une relation, une expression ou une colonne nullable
+    (voir utils_pagination.paginer_selon_ordre).
+    
     Args:
         request: La requête HTTP
-        queryset: Le queryset à paginer et filtrer
+        queryset: Le queryset ordonné à paginer et filtrer
         search_fields: Liste des champs sur lesquels effectuer la recherche (format: model__field)
         per_page: Nombre d'éléments par page
         
     Returns:
-        tuple: (queryset paginé, terme de recherche)
+        tuple: (page par curseur, terme de recherche)
     """
     search_query = request.GET.get('search', '')
     
@@ -152,16 +150,8 @@ def paginate_and_search(request, queryset, search_fields=None, per_page=10):
             q_objects |= Q(**kwargs)
         queryset = queryset.filter(q_objects)
     
-    # Pagination
-    paginator = Paginator(queryset, per_page)
-    page = request.GET.get('page', 1)
-    
-    try:
-        paginated_queryset = paginator.page(page)
-    except PageNotAnInteger:
-        paginated_queryset = paginator.page(1)
-    except EmptyPage:
-        paginated_queryset = paginator.page(paginator.num_pages)
+    # Pagination sur l'ordre demandé par l'appelant
+    paginated_queryset = paginer_selon_ordre(request, queryset, per_page=per_page)
         
     return paginated_queryset, search_query
 
@@ -218,146 +208,20 @@ def dashboard(request):
     if profile_check:
         return profile_check
         
-    # Statistiques globales (filtrées par tenant)
+    # Statistiques globales et 7 KPI (filtrés par tenant, requêtes agrégées, en cache)
     vehicules_qs = queryset_filter_by_tenant(Vehicule.objects.all(), request)
-    total_vehicules = vehicules_qs.count()
-    vehicules_actifs = vehicules_qs.filter(statut_actuel='Actif').count()
-    vehicules_maintenance = vehicules_qs.filter(statut_actuel='Maintenance').count()
-    vehicules_hors_service = vehicules_qs.filter(statut_actuel='Hors Service').count()
-    
-    # Calcul des 7 KPI
-    
-    # 1. Distance parcourue - Moyenne par véhicule
-    distances = DistanceParcourue.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        distance_totale=Sum('distance_parcourue')
-    ).order_by('-distance_totale')[:5]  # Top 5 des véhicules par distance
-    
-    # Enrichir avec les détails du véhicule
-    for d in distances:
-        vehicule = vehicules_qs.get(id_vehicule=d['vehicule'])
-        d['immatriculation'] = vehicule.immatriculation
-        d['marque'] = vehicule.marque
-        d['modele'] = vehicule.modele
-        d['type_moteur'] = vehicule.type_moteur
-        # Définir des objectifs selon le type de moteur
-        if vehicule.type_moteur == 'Diesel':
-            d['objectif'] = 30000  # 30 000 km/an pour diesel
-            d['pourcentage'] = min(100, (d['distance_totale'] / 30000) * 100)
-        elif vehicule.type_moteur == 'Essence':
-            d['objectif'] = 15000  # 15 000 km/an pour essence
-            d['pourcentage'] = min(100, (d['distance_totale'] / 15000) * 100)
-        else:
-            d['objectif'] = 10000  # 10 000 km/an pour autres
-            d['pourcentage'] = min(100, (d['distance_totale'] / 10000) * 100)
-    
-    # 2. Consommation de carburant - Moyenne par véhicule
-    consommations = ConsommationCarburant.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        consommation_moyenne=Avg('consommation_100km')
-    ).order_by('-consommation_moyenne')[:5]  # Top 5 des véhicules par consommation
-    
-    # Enrichir avec les détails du véhicule
-    for c in consommations:
-        vehicule = vehicules_qs.get(id_vehicule=c['vehicule'])
-        c['immatriculation'] = vehicule.immatriculation
-        c['marque'] = vehicule.marque
-        c['modele'] = vehicule.modele
-        c['type_moteur'] = vehicule.type_moteur
-        # Valeur cible basée sur type de moteur (simplifié)
-        if vehicule.type_moteur == 'Diesel':
-            c['cible'] = 6.0  # L/100km
-        elif vehicule.type_moteur == 'Essence':
-            c['cible'] = 7.0  # L/100km
-        else:
-            c['cible'] = 5.0  # L/100km
-        # Calcul du dépassement
-        c['depassement'] = max(0, c['consommation_moyenne'] - c['cible'])
-        c['alerte'] = c['consommation_moyenne'] > c['cible'] * 1.2  # Alerte si 20% au-dessus de la cible
-    
-    # 3. Disponibilité des véhicules
-    disponibilites = DisponibiliteVehicule.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        disponibilite_moyenne=Avg('disponibilite_pourcentage')
-    ).order_by('disponibilite_moyenne')[:5]  # 5 véhicules les moins disponibles
-    
-    # Enrichir avec les détails du véhicule
-    for d in disponibilites:
-        vehicule = vehicules_qs.get(id_vehicule=d['vehicule'])
-        d['immatriculation'] = vehicule.immatriculation
-        d['marque'] = vehicule.marque
-        d['modele'] = vehicule.modele
-        d['alerte'] = d['disponibilite_moyenne'] < 80  # Alerte si disponibilité < 80%
-    
-    # 4. Utilisation des actifs
-    utilisations = UtilisationActif.objects.values('vehicule').annotate(
-        jours_utilises_total=Sum('jours_utilises'),
-        jours_disponibles_total=Sum('jours_disponibles')
-    ).order_by('vehicule')[:5]  # 5 premiers véhicules
-    
-    # Enrichir avec les détails du véhicule et calculer le taux d'utilisation
-    for u in utilisations:
-        vehicule = vehicules_qs.get(id_vehicule=u['vehicule'])
-        u['immatriculation'] = vehicule.immatriculation
-        u['marque'] = vehicule.marque
-        u['modele'] = vehicule.modele
-        # Calculer le taux d'utilisation manuellement
-        if u['jours_disponibles_total'] > 0:
-            u['utilisation_moyenne'] = (u['jours_utilises_total'] / u['jours_disponibles_total']) * 100
-        else:
-            u['utilisation_moyenne'] = 0
-        u['alerte'] = u['utilisation_moyenne'] < 70  # Alerte si utilisation < 70%
-    
-    # 5. Sécurité - Incidents par véhicule
-    incidents = IncidentSecurite.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        total_incidents=Count('id')
-    ).order_by('-total_incidents')[:5]  # Top 5 des véhicules avec le plus d'incidents
-    
-    # Enrichir avec les détails du véhicule
-    for i in incidents:
-        vehicule = vehicules_qs.get(id_vehicule=i['vehicule'])
-        i['immatriculation'] = vehicule.immatriculation
-        i['marque'] = vehicule.marque
-        i['modele'] = vehicule.modele
-        i['alerte'] = i['total_incidents'] > 0  # Alerte si au moins un incident
-    
-    # 6 & 7. Coûts de fonctionnement et financiers par km
-    couts_fonctionnement = CoutFonctionnement.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        cout_moyen=Avg('cout_par_km')
-    ).order_by('-cout_moyen')[:5]  # Top 5 des véhicules les plus coûteux
-    
-    # Enrichir avec les détails du véhicule
-    for c in couts_fonctionnement:
-        vehicule = vehicules_qs.get(id_vehicule=c['vehicule'])
-        c['immatriculation'] = vehicule.immatriculation
-        c['marque'] = vehicule.marque
-        c['modele'] = vehicule.modele
-        c['categorie'] = vehicule.categorie
-        # Seuil d'alerte basé sur la catégorie (simplifié)
-        if vehicule.categorie == 'Utilitaire':
-            c['seuil'] = 0.15  # €/km
-        elif vehicule.categorie == 'Berline':
-            c['seuil'] = 0.12  # €/km
-        else:
-            c['seuil'] = 0.10  # €/km
-        c['alerte'] = c['cout_moyen'] > c['seuil']  # Alerte si coût > seuil
-    
-    couts_financiers = CoutFinancier.objects.filter(vehicule__in=vehicules_qs).values('vehicule').annotate(
-        cout_moyen=Avg('cout_par_km')
-    ).order_by('-cout_moyen')[:5]  # Top 5 des véhicules les plus coûteux
-    
-    # Enrichir avec les détails du véhicule
-    for c in couts_financiers:
-        vehicule = vehicules_qs.get(id_vehicule=c['vehicule'])
-        c['immatriculation'] = vehicule.immatriculation
-        c['marque'] = vehicule.marque
-        c['modele'] = vehicule.modele
-        c['categorie'] = vehicule.categorie
-        # Seuil d'alerte basé sur la catégorie (simplifié)
-        if vehicule.categorie == 'Utilitaire':
-            c['seuil'] = 0.20  # €/km
-        elif vehicule.categorie == 'Berline':
-            c['seuil'] = 0.15  # €/km
-        else:
-            c['seuil'] = 0.12  # €/km
-        c['alerte'] = c['cout_moyen'] > c['seuil']  # Alerte si coût > seuil
+    kpi = kpi_dashboard_tenant(request)
+    total_vehicules = kpi.total_vehicules
+    vehicules_actifs = kpi.vehicules_actifs
+    vehicules_maintenance = kpi.vehicules_maintenance
+    vehicules_hors_service = kpi.vehicules_hors_service
+    distances = kpi.distances
+    consommations = kpi.consommations
+    disponibilites = kpi.disponibilites
+    utilisations = kpi.utilisations
+    incidents = kpi.incidents
+    couts_fonctionnement = kpi.couts_fonctionnement
+    couts_financiers = kpi.couts_financiers
     
     # Générer des alertes automatiques basées sur les KPI
     alertes_kpi = []
@@ -557,9 +421,12 @@ def dashboard(request):
             vehicules_problematiques[i['vehicule']]['details']['incidents'] = i['total_incidents']
     
     # Identifier les véhicules à remplacer (points négatifs > 5)
+    # Charger en une requête les véhicules problématiques
+    vehicules_problematiques_objs = vehicules_qs.in_bulk(list(vehicules_problematiques.keys()))
+    
     for vehicule_id, data in vehicules_problematiques.items():
         if data['points'] >= 5:
-            vehicule = Vehicule.objects.get(id_vehicule=vehicule_id)
+            vehicule = vehicules_problematiques_objs[vehicule_id]
             raisons = []
             if 'cout_fonctionnement' in data['details']:
                 raisons.append(f"Coût fonctionnement élevé: {data['details']['cout_fonctionnement']:.2f} €/km")
@@ -778,7 +645,7 @@ def dashboard(request):
     # Améliorer l'identification des véhicules à remplacer avec un score et des raisons détaillées
     for vehicule_id, data in vehicules_problematiques.items():
         if data['points'] >= 5:
-            vehicule = vehicules_qs.get(id_vehicule=vehicule_id)
+            vehicule = vehicules_problematiques_objs[vehicule_id]
             raisons = []
             
             # Ajouter des raisons plus détaillées avec des recommandations
@@ -1019,6 +886,12 @@ def dashboard(request):
     
     return render(request, 'fleet_app/dashboard.html', context)
 
+@login_required
+def dashboard_kpi_json(request):
+    """API JSON exposant les mêmes blocs KPI que le tableau de bord"""
+    kpi = kpi_dashboard_tenant(request)
+    return JsonResponse({'success': True, 'kpi': kpi.as_dict()})
+
 # Vues pour les chauffeurs
 class ChauffeurListView(LoginRequiredMixin, ListView):
     model = Chauffeur
@@ -1148,21 +1021,9 @@ class FeuilleRouteListView(LoginRequiredMixin, ListView):
         return context
 
 # ---------- PDF UTIL ----------
-def render_to_pdf(template_src, context_dict, filename):
-    try:
-        from xhtml2pdf import pisa
-    except Exception:
-        return HttpResponse('Génération PDF indisponible (xhtml2pdf/reportlab manquants).', status=503)
-
-    template = get_template(template_src)
-    html = template.render(context_dict)
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    if not pdf.err:
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
-    return HttpResponse('Erreur lors de la génération du PDF', status=500)
+def render_to_pdf(request, template_src, context_dict, filename):
+    """Export PDF via la file de rendu (cache par empreinte du contenu, voir utils_pdf)"""
+    return reponse_pdf(request, template_src, context_dict, filename)
 
 # ---------- PDF EXPORT VIEWS ----------
 @login_required
@@ -1183,7 +1044,7 @@ def export_vehicules_pdf(request):
         'start': request.GET.get('start', ''),
         'end': request.GET.get('end', ''),
     }
-    return render_to_pdf('fleet_app/pdf/vehicules_list_pdf.html', context, 'vehicules.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/vehicules_list_pdf.html', context, 'vehicules.pdf')
 
 @login_required
 def export_feuilles_route_pdf(request):
@@ -1208,7 +1069,7 @@ def export_feuilles_route_pdf(request):
         'start': request.GET.get('start', ''),
         'end': request.GET.get('end', ''),
     }
-    return render_to_pdf('fleet_app/pdf/feuilles_route_list_pdf.html', context, 'feuilles_route.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/feuilles_route_list_pdf.html', context, 'feuilles_route.pdf')
 
 class FeuilleRouteDetailView(LoginRequiredMixin, DetailView):
     model = FeuilleDeRoute
@@ -2282,22 +2143,25 @@ def kpi_consommation(request):
     except EmptyPage:
         consommations = paginator.page(paginator.num_pages)
     
-    # Récupérer les données agrégées pour le graphique
-    consommations_graph = ConsommationCarburant.objects.values('vehicule').annotate(
-        litres_total=Sum('litres_ajoutes'),
-    ).order_by('vehicule')
+    # Données agrégées pour le graphique, lues depuis le cumul mensuel avec
+    # les informations du véhicule jointes (une seule requête)
+    consommations_graph = KpiMensuel.objects.filter(user=request.user).values(
+        'vehicule', 'vehicule__immatriculation', 'vehicule__marque', 'vehicule__modele',
+        'vehicule__categorie', 'vehicule__type_moteur',
+    ).annotate(
+        litres_total=Sum('litres_carburant'),
+        distance_totale=Sum('distance_km'),
+        nb_consommations_total=Sum('nb_consommations'),
+    ).filter(nb_consommations_total__gt=0).order_by('vehicule')
     
-    # Enrichir les données avec les informations du véhicule et calculer la consommation moyenne
+    # Calculer la consommation moyenne de chaque véhicule
     for c in consommations_graph:
-        vehicule = Vehicule.objects.get(id_vehicule=c['vehicule'])
-        c['immatriculation'] = vehicule.immatriculation
-        c['marque'] = vehicule.marque
-        c['modele'] = vehicule.modele
-        c['categorie'] = vehicule.categorie
-        c['type_moteur'] = vehicule.type_moteur
-        
-        # Récupérer la distance parcourue pour ce véhicule
-        distance_totale = DistanceParcourue.objects.filter(vehicule=vehicule).aggregate(Sum('distance_parcourue'))['distance_parcourue__sum'] or 0
+        c['immatriculation'] = c['vehicule__immatriculation']
+        c['marque'] = c['vehicule__marque']
+        c['modele'] = c['vehicule__modele']
+        c['categorie'] = c['vehicule__categorie']
+        c['type_moteur'] = c['vehicule__type_moteur']
+        distance_totale = c['distance_totale'] or 0
         
         # Éviter division par zéro
         if distance_totale > 0:
@@ -2305,9 +2169,9 @@ def kpi_consommation(request):
             c['consommation_moyenne'] = (c['litres_total'] * 100) / distance_totale
             
             # Définir la cible selon le type de moteur (valeurs fictives à adapter)
-            if vehicule.type_moteur == 'Diesel':
+            if c['type_moteur'] == 'Diesel':
                 c['cible'] = 6.5  # L/100km pour diesel
-            elif vehicule.type_moteur == 'Essence':
+            elif c['type_moteur'] == 'Essence':
                 c['cible'] = 7.5  # L/100km pour essence
             else:
                 c['cible'] = 2.0  # L/100km pour hybride/électrique
@@ -2325,14 +2189,14 @@ def kpi_consommation(request):
             if c['alerte']:
                 # Vérifier si une alerte active existe déjà pour ce véhicule et ce titre
                 alerte_existante = Alerte.objects.filter(
-                    vehicule=vehicule,
+                    vehicule_id=c['vehicule'],
                     titre__startswith='Consommation excessive',
                     statut='Active'
                 ).first()
                 
                 # Description de l'alerte
                 description = (
-                    f"La consommation du véhicule {vehicule.marque} {vehicule.modele} ({vehicule.immatriculation}) "
+                    f"La consommation du véhicule {c['marque']} {c['modele']} ({c['immatriculation']}) "
                     f"est de {c['consommation_moyenne']:.1f} L/100km, "
                     f"ce qui dépasse la cible recommandée de {c['cible']:.1f} L/100km de {c['depassement']:.1f} L/100km."
                 )
@@ -2345,7 +2209,7 @@ def kpi_consommation(request):
                     # Créer une nouvelle alerte
                     niveau = 'Critique' if c['depassement'] > 5.0 else 'Élevé' if c['depassement'] > 3.5 else 'Moyen'
                     Alerte.objects.create(
-                        vehicule=vehicule,
+                        vehicule_id=c['vehicule'],
                         titre="Consommation excessive de carburant",
                         description=description,
                         niveau=niveau,
@@ -2362,8 +2226,7 @@ def kpi_consommation(request):
     data = []
     
     for c in consommations_graph:
-        vehicule = Vehicule.objects.get(id_vehicule=c['vehicule'])
-        label = f"{vehicule.marque} {vehicule.modele} ({vehicule.immatriculation})"
+        label = f"{c['marque']} {c['modele']} ({c['immatriculation']})"
         labels.append(label)
         
         if 'consommation_moyenne' in c and c['consommation_moyenne'] > 0:
@@ -2470,21 +2333,23 @@ def kpi_disponibilite(request):
         except EmptyPage:
             disponibilites = paginator.page(paginator.num_pages)
         
-        # Récupérer les données agrégées pour le graphique
-        disponibilites_graph = DisponibiliteVehicule.objects.values('vehicule').annotate(
-            disponibilite_moyenne=Avg('disponibilite_pourcentage')
-        ).order_by('-disponibilite_moyenne')
-        
-        # Enrichir les données avec les informations du véhicule
-        for d in disponibilites_graph:
-            try:
-                vehicule = Vehicule.objects.get(id_vehicule=d['vehicule'])
-                d['immatriculation'] = vehicule.immatriculation
-                d['marque'] = vehicule.marque
-                d['modele'] = vehicule.modele
-            except Exception:
-                # Erreur lors de la récupération du véhicule
-                pass
+        # Données agrégées pour le graphique, lues depuis le cumul mensuel
+        # (moyenne = somme des pourcentages / nombre de relevés)
+        cumuls = KpiMensuel.objects.filter(user=request.user)
+        disponibilites_graph = []
+        for d in cumuls.values(
+            'vehicule', 'vehicule__immatriculation', 'vehicule__marque', 'vehicule__modele'
+        ).annotate(
+            somme=Sum('somme_disponibilite'), nombre=Sum('nb_disponibilites')
+        ).filter(nombre__gt=0):
+            disponibilites_graph.append({
+                'vehicule': d['vehicule'],
+                'immatriculation': d['vehicule__immatriculation'],
+                'marque': d['vehicule__marque'],
+                'modele': d['vehicule__modele'],
+                'disponibilite_moyenne': moyenne(d['somme'], d['nombre']),
+            })
+        disponibilites_graph.sort(key=lambda d: d['disponibilite_moyenne'], reverse=True)
         
         # Préparer les données pour le graphique
         labels = []
@@ -2507,8 +2372,8 @@ def kpi_disponibilite(request):
                 data.append(random.uniform(50, 100))
         
         # Calculer la disponibilité moyenne globale
-        if disponibilites_list.exists():
-            disponibilite_moyenne = disponibilites_list.aggregate(Avg('disponibilite_pourcentage'))['disponibilite_pourcentage__avg'] or 0
+        totaux = kpi_totaux(cumuls)
+        disponibilite_moyenne = moyenne(totaux['somme_disponibilite'], totaux['nb_disponibilites'])
         
         # Trouver les véhicules les plus et moins disponibles
         if disponibilites_graph:
@@ -2703,11 +2568,12 @@ def export_kpi_distance_pdf(request):
     # Résumé global calendaire (M/T/A)
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = DistanceParcourue.objects.select_related('vehicule').filter(date_debut__gte=s, date_fin__lte=e)
+        totaux = kpi_totaux(cumuls, s, e)
         global_summary[key] = {
-            'total_distance': qf.aggregate(Sum('distance_parcourue'))['distance_parcourue__sum'] or 0,
-            'rows_count': qf.count(),
+            'total_distance': totaux['distance_km'],
+            'rows_count': totaux['nb_distances'],
         }
     context = {
         'rows': qs,
@@ -2721,7 +2587,7 @@ def export_kpi_distance_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_distance_pdf.html', context, 'kpi_distance.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_distance_pdf.html', context, 'kpi_distance.pdf')
 
 @login_required
 def export_kpi_consommation_pdf(request):
@@ -2739,14 +2605,14 @@ def export_kpi_consommation_pdf(request):
     )
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = ConsommationCarburant.objects.select_related('vehicule').filter(date_plein1__gte=s, date_plein2__lte=e)
-        ag = qf.aggregate(total_litres=Sum('litres_ajoutes'), total_distance=Sum('distance_parcourue'), avg_conso=Avg('consommation_100km'))
+        totaux = kpi_totaux(cumuls, s, e)
         global_summary[key] = {
-            'total_litres': ag.get('total_litres') or 0,
-            'total_distance': ag.get('total_distance') or 0,
-            'avg_conso': ag.get('avg_conso') or 0,
-            'rows_count': qf.count(),
+            'total_litres': totaux['litres_carburant'],
+            'total_distance': totaux['distance_carburant'],
+            'avg_conso': moyenne(totaux['somme_consommation_100km'], totaux['nb_consommations']),
+            'rows_count': totaux['nb_consommations'],
         }
     context = {
         'rows': qs,
@@ -2762,7 +2628,7 @@ def export_kpi_consommation_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_consommation_pdf.html', context, 'kpi_consommation.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_consommation_pdf.html', context, 'kpi_consommation.pdf')
 
 @login_required
 def export_kpi_disponibilite_pdf(request):
@@ -2780,14 +2646,14 @@ def export_kpi_disponibilite_pdf(request):
     )
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = DisponibiliteVehicule.objects.select_related('vehicule').filter(date_debut__gte=s, date_fin__lte=e)
-        ag = qf.aggregate(total_heures_disponibles=Sum('heures_disponibles'), total_heures_totales=Sum('heures_totales'), avg_disponibilite=Avg('disponibilite_pourcentage'))
+        totaux = kpi_totaux(cumuls, s, e)
         global_summary[key] = {
-            'total_heures_disponibles': ag.get('total_heures_disponibles') or 0,
-            'total_heures_totales': ag.get('total_heures_totales') or 0,
-            'avg_disponibilite': ag.get('avg_disponibilite') or 0,
-            'rows_count': qf.count(),
+            'total_heures_disponibles': totaux['heures_disponibles'],
+            'total_heures_totales': totaux['heures_totales'],
+            'avg_disponibilite': moyenne(totaux['somme_disponibilite'], totaux['nb_disponibilites']),
+            'rows_count': totaux['nb_disponibilites'],
         }
     context = {
         'rows': qs,
@@ -2803,7 +2669,7 @@ def export_kpi_disponibilite_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_disponibilite_pdf.html', context, 'kpi_disponibilite.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_disponibilite_pdf.html', context, 'kpi_disponibilite.pdf')
 
 @login_required
 def export_kpi_couts_fonctionnement_pdf(request):
@@ -2814,19 +2680,24 @@ def export_kpi_couts_fonctionnement_pdf(request):
         couts = couts.filter(date__gte=start_date)
     if end_date:
         couts = couts.filter(date__lte=end_date)
-    agg = couts.values('vehicule').annotate(cout_total=Sum('montant')).order_by('vehicule')
+    agg = list(couts.values('vehicule').annotate(cout_total=Sum('montant')).order_by('vehicule'))
+    vehicule_ids = [c['vehicule'] for c in agg]
+    vehicules_par_id = Vehicule.objects.in_bulk(vehicule_ids)
+    # Distances de tous les véhicules concernés en une requête groupée
+    distances = DistanceParcourue.objects.filter(vehicule_id__in=vehicule_ids)
+    if start_date:
+        distances = distances.filter(date_debut__gte=start_date)
+    if end_date:
+        distances = distances.filter(date_fin__lte=end_date)
+    distances_par_vehicule = dict(
+        distances.values('vehicule').annotate(total=Sum('distance_parcourue')).values_list('vehicule', 'total')
+    )
     rows = []
     for c in agg:
-        try:
-            v = Vehicule.objects.get(id_vehicule=c['vehicule'])
-        except Vehicule.DoesNotExist:
+        v = vehicules_par_id.get(c['vehicule'])
+        if v is None:
             continue
-        distance_totale = DistanceParcourue.objects.filter(vehicule=v)
-        if start_date:
-            distance_totale = distance_totale.filter(date_debut__gte=start_date)
-        if end_date:
-            distance_totale = distance_totale.filter(date_fin__lte=end_date)
-        distance_totale = distance_totale.aggregate(Sum('distance_parcourue'))['distance_parcourue__sum'] or 0
+        distance_totale = distances_par_vehicule.get(c['vehicule']) or 0
         cout_total = c['cout_total'] or 0
         cout_moyen_par_km = cout_total / distance_totale if distance_totale else 0
         rows.append({
@@ -2840,13 +2711,12 @@ def export_kpi_couts_fonctionnement_pdf(request):
     avg_cout_km = (total_cout / total_km) if total_km else 0
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qcf = CoutFonctionnement.objects.filter(date__gte=s, date__lte=e)
-        ag_cout = qcf.aggregate(total_cout=Sum('montant'))
-        # Distance globale sur la même fenêtre
-        qd = DistanceParcourue.objects.filter(date_debut__gte=s, date_fin__lte=e)
-        total_km_g = qd.aggregate(total_km=Sum('distance_parcourue'))['total_km'] or 0
-        total_cout_g = ag_cout.get('total_cout') or 0
+        # Coût et distance globaux sur la même fenêtre, lus depuis le cumul mensuel
+        totaux = kpi_totaux(cumuls, s, e)
+        total_km_g = totaux['distance_km']
+        total_cout_g = totaux['cout_fonctionnement']
         global_summary[key] = {
             'total_cout': total_cout_g,
             'total_km': total_km_g,
@@ -2866,7 +2736,7 @@ def export_kpi_couts_fonctionnement_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_couts_fonctionnement_pdf.html', context, 'kpi_couts_fonctionnement.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_couts_fonctionnement_pdf.html', context, 'kpi_couts_fonctionnement.pdf')
 
 @login_required
 def export_kpi_incidents_pdf(request):
@@ -2878,21 +2748,21 @@ def export_kpi_incidents_pdf(request):
         qs = qs.filter(date_incident__lte=end_date)
     qs = qs.order_by('-date_incident')
     # Aggregation par véhicule pour un tableau synthétique
-    agg = qs.values('vehicule').annotate(total=Count('id')).order_by('-total')
+    agg = list(qs.values('vehicule').annotate(total=Count('id')).order_by('-total'))
+    vehicules_par_id = Vehicule.objects.in_bulk([a['vehicule'] for a in agg])
     rows = []
     for a in agg:
-        try:
-            v = Vehicule.objects.get(id_vehicule=a['vehicule'])
-        except Vehicule.DoesNotExist:
+        v = vehicules_par_id.get(a['vehicule'])
+        if v is None:
             continue
         rows.append({'vehicule': v, 'total_incidents': a['total']})
     total_incidents = sum(r['total_incidents'] for r in rows)
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = IncidentSecurite.objects.select_related('vehicule').filter(date_incident__gte=s, date_incident__lte=e)
         global_summary[key] = {
-            'total_incidents': qf.count(),
+            'total_incidents': kpi_totaux(cumuls, s, e)['nb_incidents'],
         }
     context = {
         'rows': rows,
@@ -2906,7 +2776,7 @@ def export_kpi_incidents_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_incidents_pdf.html', context, 'kpi_incidents.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_incidents_pdf.html', context, 'kpi_incidents.pdf')
 
 @login_required
 def export_kpi_utilisation_pdf(request):
@@ -2932,11 +2802,12 @@ def export_kpi_utilisation_pdf(request):
     avg_taux = (total_jours_utilises / total_jours_disponibles * 100) if total_jours_disponibles else 0
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = UtilisationActif.objects.select_related('vehicule').filter(date_debut__gte=s, date_fin__lte=e)
         # Taux moyen global sur la fenêtre
-        total_u = qf.aggregate(Sum('jours_utilises'))['jours_utilises__sum'] or 0
-        total_d = qf.aggregate(Sum('jours_disponibles'))['jours_disponibles__sum'] or 0
+        totaux = kpi_totaux(cumuls, s, e)
+        total_u = totaux['jours_utilises']
+        total_d = totaux['jours_disponibles']
         avg_taux_g = (total_u / total_d * 100) if total_d else 0
         global_summary[key] = {
             'total_jours_utilises': total_u,
@@ -2957,7 +2828,7 @@ def export_kpi_utilisation_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_utilisation_pdf.html', context, 'kpi_utilisation.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_utilisation_pdf.html', context, 'kpi_utilisation.pdf')
 
 @login_required
 def export_kpi_couts_financiers_pdf(request):
@@ -2969,22 +2840,21 @@ def export_kpi_couts_financiers_pdf(request):
         qs = qs.filter(date__lte=end_date)
     qs = qs.order_by('-date')
     # Agrégation par véhicule (total GNF) pour un tableau synthétique
-    agg = qs.values('vehicule').annotate(cout_total=Sum('montant')).order_by('-cout_total')
+    agg = list(qs.values('vehicule').annotate(cout_total=Sum('montant')).order_by('-cout_total'))
+    vehicules_par_id = Vehicule.objects.in_bulk([a['vehicule'] for a in agg])
     rows = []
     for a in agg:
-        try:
-            v = Vehicule.objects.get(id_vehicule=a['vehicule'])
-        except Vehicule.DoesNotExist:
+        v = vehicules_par_id.get(a['vehicule'])
+        if v is None:
             continue
         rows.append({'vehicule': v, 'cout_total': a['cout_total'] or 0})
     total_cout = sum(r['cout_total'] for r in rows)
     cal = _calendar_ranges()
     global_summary = {}
+    cumuls = KpiMensuel.objects.filter(user=request.user)
     for key, (s, e) in cal.items():
-        qf = CoutFinancier.objects.select_related('vehicule').filter(date__gte=s, date__lte=e)
-        total = qf.aggregate(Sum('montant'))['montant__sum'] or 0
         global_summary[key] = {
-            'total_cout': total,
+            'total_cout': kpi_totaux(cumuls, s, e)['cout_financier'],
         }
     context = {
         'rows': rows,
@@ -2998,7 +2868,7 @@ def export_kpi_couts_financiers_pdf(request):
         },
         'global_summary': global_summary,
     }
-    return render_to_pdf('fleet_app/pdf/kpi_couts_financiers_pdf.html', context, 'kpi_couts_financiers.pdf')
+    return render_to_pdf(request, 'fleet_app/pdf/kpi_couts_financiers_pdf.html', context, 'kpi_couts_financiers.pdf')
 
 from .utils import convertir_en_gnf, formater_montant_gnf, formater_cout_par_km_gnf
 from django.http import JsonResponse
@@ -3413,12 +3283,13 @@ def kpi_couts_fonctionnement(request):
         vehicules = Vehicule.objects.filter(user=request.user)
         labels = [f"{v.marque} {v.modele} ({v.immatriculation})" for v in vehicules]
         
-        # Calcul des coûts moyens par véhicule
+        # Calcul des coûts moyens par véhicule, lus depuis le cumul mensuel (une requête)
+        totaux = kpi_par_vehicule(KpiMensuel.objects.filter(user=request.user))
         data = []
         data_gnf = []
         for v in vehicules:
-            cout_avg = CoutFonctionnement.objects.filter(vehicule=v).aggregate(Avg('cout_par_km'))
-            cout_moyen = cout_avg['cout_par_km__avg'] or 0
+            cumul = totaux.get(v.id_vehicule, {})
+            cout_moyen = moyenne(cumul.get('somme_cout_fonctionnement_km', 0), cumul.get('nb_couts_fonctionnement', 0))
             data.append(cout_moyen)
             # Conversion en GNF
             data_gnf.append(convertir_en_gnf(cout_moyen))
@@ -3556,11 +3427,11 @@ def kpi_couts_financiers(request):
     vehicules = Vehicule.objects.filter(user=request.user)
     labels = [f"{v.marque} {v.modele} ({v.immatriculation})" for v in vehicules]
     
-    # Calcul des coûts totaux par véhicule (convertis en GNF)
+    # Calcul des coûts totaux par véhicule (convertis en GNF), lus depuis le cumul mensuel
+    totaux = kpi_par_vehicule(KpiMensuel.objects.filter(user=request.user))
     data = []
     for v in vehicules:
-        cout_total = CoutFinancier.objects.filter(vehicule=v).aggregate(Sum('montant'))
-        montant_eur = cout_total['montant__sum'] or 0
+        montant_eur = totaux.get(v.id_vehicule, {}).get('cout_financier', 0)
         montant_gnf = convertir_en_gnf(montant_eur)
         data.append(montant_gnf)
     
@@ -3677,11 +3548,9 @@ def kpi_incidents(request):
     vehicules = Vehicule.objects.filter(user=request.user)
     labels = [f"{v.marque} {v.modele} ({v.immatriculation})" for v in vehicules]
     
-    # Calcul du nombre d'incidents par véhicule
-    data = []
-    for v in vehicules:
-        incident_count = IncidentSecurite.objects.filter(vehicule=v).count()
-        data.append(incident_count)
+    # Calcul du nombre d'incidents par véhicule, lu depuis le cumul mensuel (une requête)
+    totaux = kpi_par_vehicule(KpiMensuel.objects.filter(user=request.user))
+    data = [totaux.get(v.id_vehicule, {}).get('nb_incidents', 0) for v in vehicules]
     
     # Calcul des incidents par gravité
     gravites = IncidentSecurite.objects.values('gravite').annotate(total=Count('id'))
@@ -3773,11 +3642,9 @@ def kpi_utilisation(request):
         departements_labels = [item['departement'] for item in departements]
         departements_data = [item['total'] for item in departements]
         
-        # Calcul du nombre d'utilisations par véhicule pour le graphique
-        data = []
-        for v in vehicules:
-            utilisation_count = UtilisationVehicule.objects.filter(vehicule=v).count()
-            data.append(utilisation_count)
+        # Calcul du nombre d'utilisations par véhicule pour le graphique (cumul mensuel)
+        totaux = kpi_par_vehicule(KpiMensuel.objects.filter(user=request.user))
+        data = [totaux.get(v.id_vehicule, {}).get('nb_utilisations', 0) for v in vehicules]
             
     except Exception as e:
         # Gérer l'erreur de table manquante ou autre erreur
@@ -3840,12 +3707,9 @@ def kpi_distance(request):
     except EmptyPage:
         distances = paginator.page(paginator.num_pages)
     
-    # Calcul des statistiques de distance par véhicule pour le graphique
-    data = []
-    for v in vehicules:
-        total_distance = DistanceParcourue.objects.filter(vehicule=v).aggregate(Sum('distance_parcourue'))
-        distance_sum = total_distance['distance_parcourue__sum'] or 0
-        data.append(distance_sum)
+    # Distance totale par véhicule, lue depuis le cumul mensuel (une requête)
+    totaux = kpi_par_vehicule(KpiMensuel.objects.filter(user=request.user))
+    data = [totaux.get(v.id_vehicule, {}).get('distance_km', 0) for v in vehicules]
     
     context = {
         'distances': distances,
@@ -3877,9 +3741,8 @@ def calculer_distance_parcourue(vehicule):
     annee_courante = date.today().year
     
     # Calculer la distance parcourue cette année
-    distances = DistanceParcourue.objects.filter(
-        vehicule=vehicule,
-        date_debut__year=annee_courante
+    distances = DistanceParcourue.objects.for_year(annee_courante, champ='date_debut').filter(
+        vehicule=vehicule
     )
     
     distance_annuelle = distances.aggregate(Sum('distance_parcourue'))['distance_parcourue__sum'] or 0
@@ -4123,198 +3986,44 @@ def get_alertes_kpi(request):
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     })
 
+# Paramètre `table` de recherche_dynamique -> types de documents (None: tous)
+TABLES_RECHERCHE = {
+    'vehicules': ['vehicule'],
+    'chauffeurs': ['chauffeur'],
+    'feuilles_route': ['feuille_route'],
+    'alertes': ['alerte'],
+    'fournisseurs': ['fournisseur'],
+    'locations': ['location'],
+    'global': None,
+}
+
 @login_required
 def recherche_dynamique(request):
-    """API pour la recherche dynamique dans les différentes tables de la base de données"""
+    """API de recherche dynamique: recherche plein texte dans l'index du tenant (voir utils_recherche)"""
     query = request.GET.get('q', '')
     table = request.GET.get('table', 'vehicules')
-    limit = int(request.GET.get('limit', 10))
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
     
     # Filtres spécifiques
-    statut = request.GET.get('statut', '')
-    categorie = request.GET.get('categorie', '')
-    niveau = request.GET.get('niveau', '')
-    date_debut = request.GET.get('date_debut', '')
-    date_fin = request.GET.get('date_fin', '')
+    filtres = {
+        'statut': request.GET.get('statut', ''),
+        'categorie': request.GET.get('categorie', ''),
+        'niveau': request.GET.get('niveau', ''),
+    }
+    for cle in ('date_debut', 'date_fin'):
+        try:
+            filtres[cle] = datetime.strptime(request.GET.get(cle, ''), '%Y-%m-%d').date()
+        except ValueError:
+            pass
     
-    if not query or len(query) < 2:
+    if not query or len(query) < 2 or table not in TABLES_RECHERCHE:
         return JsonResponse({'results': []})
     
-    results = []
-    
-    if table == 'vehicules':
-        # Recherche dans les véhicules
-        query_filter = Q(marque__icontains=query) | \
-                      Q(modele__icontains=query) | \
-                      Q(immatriculation__icontains=query) | \
-                      Q(numero_chassis__icontains=query) | \
-                      Q(categorie__icontains=query)
-        
-        # Appliquer les filtres supplémentaires
-        if statut:
-            query_filter &= Q(statut_actuel=statut)
-        if categorie:
-            query_filter &= Q(categorie=categorie)
-            
-        vehicules = Vehicule.objects.filter(query_filter)[:limit]
-        
-        for v in vehicules:
-            results.append({
-                'id': v.id_vehicule,
-                'text': f"{v.marque} {v.modele} ({v.immatriculation})",
-                'url': f"/vehicules/{v.id_vehicule}/",
-                'type': 'Véhicule',
-                'statut': v.statut_actuel,
-                'categorie': v.categorie
-            })
-    
-    elif table == 'chauffeurs':
-        # Recherche dans les chauffeurs
-        query_filter = Q(nom__icontains=query) | \
-                      Q(prenom__icontains=query) | \
-                      Q(numero_permis__icontains=query) | \
-                      Q(telephone__icontains=query)
-        
-        # Appliquer les filtres supplémentaires
-        if statut:
-            query_filter &= Q(statut=statut)
-            
-        chauffeurs = Chauffeur.objects.filter(query_filter)[:limit]
-        
-        for c in chauffeurs:
-            results.append({
-                'id': c.id_chauffeur,
-                'text': f"{c.nom} {c.prenom}",
-                'url': f"/chauffeurs/{c.id_chauffeur}/",
-                'type': 'Chauffeur',
-                'telephone': c.telephone,
-                'statut': c.statut
-            })
-    
-    elif table == 'feuilles_route':
-        # Recherche dans les feuilles de route
-        query_filter = Q(destination__icontains=query) | \
-                      Q(vehicule__marque__icontains=query) | \
-                      Q(vehicule__modele__icontains=query) | \
-                      Q(vehicule__immatriculation__icontains=query) | \
-                      Q(chauffeur__nom__icontains=query) | \
-                      Q(chauffeur__prenom__icontains=query)
-        
-        # Appliquer les filtres de date
-        if date_debut:
-            try:
-                date_debut_obj = datetime.strptime(date_debut, '%Y-%m-%d').date()
-                query_filter &= Q(date_depart__gte=date_debut_obj)
-            except ValueError:
-                pass
-                
-        if date_fin:
-            try:
-                date_fin_obj = datetime.strptime(date_fin, '%Y-%m-%d').date()
-                query_filter &= Q(date_depart__lte=date_fin_obj)
-            except ValueError:
-                pass
-                
-        feuilles = FeuilleDeRoute.objects.filter(query_filter)[:limit]
-        
-        for f in feuilles:
-            results.append({
-                'id': f.id,
-                'text': f"Feuille de route {f.id} - {f.destination}",
-                'url': f"/feuilles-route/{f.id}/",
-                'type': 'Feuille de route',
-                'date': f.date_depart.strftime('%d/%m/%Y'),
-                'vehicule': f"{f.vehicule.marque} {f.vehicule.modele} ({f.vehicule.immatriculation})",
-                'chauffeur': f"{f.chauffeur.nom} {f.chauffeur.prenom}"
-            })
-    
-    elif table == 'alertes':
-        # Recherche dans les alertes
-        query_filter = Q(type_alerte__icontains=query) | \
-                      Q(description__icontains=query) | \
-                      Q(vehicule__marque__icontains=query) | \
-                      Q(vehicule__modele__icontains=query) | \
-                      Q(vehicule__immatriculation__icontains=query)
-        
-        # Appliquer les filtres supplémentaires
-        if statut:
-            query_filter &= Q(statut=statut)
-        if niveau:
-            query_filter &= Q(niveau_urgence=niveau)
-            
-        # Filtres de date
-        if date_debut:
-            try:
-                date_debut_obj = datetime.strptime(date_debut, '%Y-%m-%d').date()
-                query_filter &= Q(date_creation__gte=date_debut_obj)
-            except ValueError:
-                pass
-                
-        if date_fin:
-            try:
-                date_fin_obj = datetime.strptime(date_fin, '%Y-%m-%d').date()
-                query_filter &= Q(date_creation__lte=date_fin_obj)
-            except ValueError:
-                pass
-                
-        alertes = Alerte.objects.filter(query_filter)[:limit]
-        
-        for a in alertes:
-            results.append({
-                'id': a.id,
-                'text': f"{a.type_alerte} - {a.vehicule.marque} {a.vehicule.modele}",
-                'url': f"/alertes/",  # Redirection vers la liste des alertes avec un filtre
-                'type': 'Alerte',
-                'niveau': a.niveau_urgence,
-                'statut': a.statut,
-                'date': a.date_creation.strftime('%d/%m/%Y')
-            })
-    
-    elif table == 'global':
-        # Recherche globale dans toutes les tables principales
-        # Véhicules
-        vehicules = Vehicule.objects.filter(
-            Q(marque__icontains=query) | 
-            Q(modele__icontains=query) | 
-            Q(immatriculation__icontains=query)
-        )[:5]
-        
-        for v in vehicules:
-            results.append({
-                'id': v.id_vehicule,
-                'text': f"{v.marque} {v.modele} ({v.immatriculation})",
-                'url': f"/vehicules/{v.id_vehicule}/",
-                'type': 'Véhicule'
-            })
-        
-        # Chauffeurs
-        chauffeurs = Chauffeur.objects.filter(
-            Q(nom__icontains=query) | 
-            Q(prenom__icontains=query)
-        )[:5]
-        
-        for c in chauffeurs:
-            results.append({
-                'id': c.id_chauffeur,
-                'text': f"{c.nom} {c.prenom}",
-                'url': f"/chauffeurs/{c.id_chauffeur}/",
-                'type': 'Chauffeur'
-            })
-        
-        # Feuilles de route
-        feuilles = FeuilleDeRoute.objects.filter(
-            Q(destination__icontains=query)
-        )[:5]
-        
-        for f in feuilles:
-            results.append({
-                'id': f.id,
-                'text': f"Feuille de route - {f.destination}",
-                'url': f"/feuilles-route/{f.id}/",
-                'type': 'Feuille de route'
-            })
-    
-    return JsonResponse({'results': results})
+    documents = rechercher(request.user, query, types=TABLES_RECHERCHE[table], limite=limit, filtres=filtres)
+    return JsonResponse({'results': [document.en_resultat() for document in documents]})
 
 @login_required
 def get_alertes_kpi(request):
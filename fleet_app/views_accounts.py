@@ -11,6 +11,7 @@ from django.contrib.auth.models import User
 from django.db import transaction
 
 from .models_accounts import Profil, PersonnePhysique, Entreprise
+from .utils.tenant import get_tenant_context
 from .forms_accounts import (
     TypeCompteForm, ProfilForm, PersonnePhysiqueForm, 
     EntrepriseForm, CompteUtilisateurForm, ConditionsForm
@@ -23,11 +24,9 @@ def check_profile_completion(request):
     Si non, redirige vers le formulaire de création de compte.
     """
     if request.user.is_authenticated:
-        try:
-            profil = request.user.profil
-            if not profil.compte_complete:
-                return HttpResponseRedirect(reverse('fleet_app:creation_compte'))
-        except Profil.DoesNotExist:
+        # Profil déjà chargé avec l'utilisateur (contexte tenant de la requête)
+        profil = get_tenant_context(request).profil
+        if profil is None or not profil.compte_complete:
             return HttpResponseRedirect(reverse('fleet_app:creation_compte'))
     return None
 
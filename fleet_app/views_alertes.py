@@ -3,92 +3,87 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.http import JsonResponse
-from django.db.models import Count, Q
-from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
+from datetime import datetime
 from .models_alertes import Alerte
+from .utils.decorators import queryset_filter_by_tenant
+from .utils_alertes import alertes_actives_tenant, compteurs_alertes
+from .utils_pagination import paginer_par_curseur
+from .utils_recherche import ids_correspondants
 from .models import Vehicule, DistanceParcourue, ConsommationCarburant, DisponibiliteVehicule, UtilisationVehicule, IncidentSecurite, CoutFonctionnement, CoutFinancier
 
-@login_required
-def alerte_list(request):
+# Statuts affichés par section de la liste des alertes
+STATUTS_SECTION = {
+    'actives': ['Active'],
+    'resolues': ['Résolue', 'Ignorée'],
+}
+
+
+def filtrer_alertes(request, section):
     """
-    Vue pour afficher la liste des alertes actives et résolues avec recherche
+    Alertes d'une section ('actives' ou 'resolues') du tenant, filtrées par les critères GET
+
+    Alerte n'a pas de champ user: la portée passe par les véhicules du tenant,
+    et le texte libre est résolu par l'index de recherche.
     """
     user = request.user
-    
-    # Filtres de recherche
     search_text = request.GET.get('search_text', '').strip()
     search_niveau = request.GET.get('search_niveau', '').strip()
-    search_statut = request.GET.get('search_statut', '').strip()
     search_vehicule = request.GET.get('search_vehicule', '').strip()
     date_creation_min = request.GET.get('date_creation_min', '').strip()
     date_creation_max = request.GET.get('date_creation_max', '').strip()
     
-    # Requête de base avec filtrage par utilisateur
-    qs_actives = Alerte.objects.filter(user=user, statut='Active').select_related('vehicule')
-    qs_resolues = Alerte.objects.filter(user=user, statut__in=['Résolue', 'Ignorée']).select_related('vehicule')
+    vehicules = queryset_filter_by_tenant(Vehicule.objects.all(), request)
+    qs = Alerte.objects.filter(
+        vehicule__in=vehicules, statut__in=STATUTS_SECTION.get(section, STATUTS_SECTION['actives'])
+    ).select_related('vehicule')
     
-    # Application des filtres pour les alertes actives
     if search_text:
-        qs_actives = qs_actives.filter(
-            Q(titre__icontains=search_text) |
-            Q(description__icontains=search_text) |
-            Q(type_alerte__icontains=search_text)
-        )
+        qs = qs.filter(pk__in=ids_correspondants(user, 'alerte', search_text))
     
     if search_niveau:
-        qs_actives = qs_actives.filter(niveau_urgence=search_niveau)
+        qs = qs.filter(niveau=search_niveau)
     
     if search_vehicule:
-        qs_actives = qs_actives.filter(
-            Q(vehicule__immatriculation__icontains=search_vehicule) |
-            Q(vehicule__marque__icontains=search_vehicule) |
-            Q(vehicule__modele__icontains=search_vehicule)
-        )
-    
-    if date_creation_min:
-        qs_actives = qs_actives.filter(date_creation__gte=date_creation_min)
-    
-    if date_creation_max:
-        qs_actives = qs_actives.filter(date_creation__lte=date_creation_max)
-    
-    # Application des mêmes filtres pour les alertes résolues
-    if search_text:
-        qs_resolues = qs_resolues.filter(
-            Q(titre__icontains=search_text) |
-            Q(description__icontains=search_text) |
-            Q(type_alerte__icontains=search_text)
-        )
-    
-    if search_niveau:
-        qs_resolues = qs_resolues.filter(niveau_urgence=search_niveau)
+        qs = qs.filter(vehicule__in=ids_correspondants(user, 'vehicule', search_vehicule))
     
-    if search_vehicule:
-        qs_resolues = qs_resolues.filter(
-            Q(vehicule__immatriculation__icontains=search_vehicule) |
-            Q(vehicule__marque__icontains=search_vehicule) |
-            Q(vehicule__modele__icontains=search_vehicule)
-        )
-    
-    if date_creation_min:
-        qs_resolues = qs_resolues.filter(date_creation__gte=date_creation_min)
-    
-    if date_creation_max:
-        qs_resolues = qs_resolues.filter(date_creation__lte=date_creation_max)
+    for lookup, valeur in (('gte', date_creation_min), ('lte', date_creation_max)):
+        try:
+            jour = datetime.strptime(valeur, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        qs = qs.filter(**{f'date_creation__date__{lookup}': jour})
     
-    # Tri
-    alertes_actives = qs_actives.order_by('-date_creation')
-    alertes_resolues = qs_resolues.order_by('-date_creation')
+    return qs
+
+
+def paginer_alertes(request, section, param='curseur'):
+    """Page par curseur (date de création, id) des alertes d'une section, avec leur total"""
+    return paginer_par_curseur(
+        request, filtrer_alertes(request, section), ordering=('-date_creation', '-pk'), per_page=10,
+        param=param, total='exact',
+    )
+
+
+@login_required
+def alerte_list(request):
+    """
+    Vue pour afficher la liste des alertes actives et résolues avec recherche
+    """
+    user = request.user
     
-    # Pagination
-    paginator_actives = Paginator(alertes_actives, 10)
-    page_number_actives = request.GET.get('page_actives', 1)
-    alertes_actives_page = paginator_actives.get_page(page_number_actives)
+    # Filtres de recherche
+    search_text = request.GET.get('search_text', '').strip()
+    search_niveau = request.GET.get('search_niveau', '').strip()
+    search_statut = request.GET.get('search_statut', '').strip()
+    search_vehicule = request.GET.get('search_vehicule', '').strip()
+    date_creation_min = request.GET.get('date_creation_min', '').strip()
+    date_creation_max = request.GET.get('date_creation_max', '').strip()
     
-    paginator_resolues = Paginator(alertes_resolues, 10)
-    page_number_resolues = request.GET.get('page_resolues', 1)
-    alertes_resolues_page = paginator_resolues.get_page(page_number_resolues)
+    # Pagination par curseur, un jeton par section
+    alertes_actives_page = paginer_alertes(request, 'actives', param='curseur_actives')
+    alertes_resolues_page = paginer_alertes(request, 'resolues', param='curseur_resolues')
     
     # Données pour les filtres
     vehicules = Vehicule.objects.filter(user=user).values_list('immatriculation', flat=True).distinct()
@@ -104,8 +99,8 @@ def alerte_list(request):
         'alertes_historique': alertes_resolues_page,  # Pour compatibilité avec le template existant
         'alertes_actives': alertes_actives_page,
         'alertes_resolues': alertes_resolues_page,
-        'active_count': alertes_actives.count(),
-        'resolved_count': alertes_resolues.count(),
+        'active_count': alertes_actives_page.count,
+        'resolved_count': alertes_resolues_page.count,
         'vehicules': vehicules,
         'niveaux_urgence': niveaux_urgence,
         'search_text': search_text,
@@ -215,18 +210,18 @@ def alerte_supprimer(request, pk):
 def get_alertes_kpi(request):
     """
     Vue API pour récupérer les données des alertes pour le tableau de bord
+
+    Les compteurs du tenant viennent du cache (voir utils_alertes).
     """
-    # Compter les alertes par niveau
-    alertes_par_niveau = Alerte.objects.filter(statut='Active').values('niveau').annotate(count=Count('id'))
+    compteurs = compteurs_alertes(request.user)
     
     # Compter les alertes par type de KPI
     alertes_par_type = []
     
-    # Convertir en format adapté pour le frontend
-    niveaux_data = {item['niveau']: item['count'] for item in alertes_par_niveau}
-    
     # Récupérer les 5 alertes les plus récentes
-    alertes_recentes = Alerte.objects.filter(statut='Active').order_by('-date_creation')[:5]
+    alertes_recentes = []
+    if compteurs['total_actives']:
+        alertes_recentes = alertes_actives_tenant(request.user).select_related('vehicule').order_by('-date_creation')[:5]
     alertes_recentes_data = []
     
     for alerte in alertes_recentes:
@@ -240,10 +235,10 @@ def get_alertes_kpi(request):
         })
     
     data = {
-        'alertes_par_niveau': niveaux_data,
+        'alertes_par_niveau': compteurs['par_niveau'],
         'alertes_par_type': alertes_par_type,
         'alertes_recentes': alertes_recentes_data,
-        'total_actives': Alerte.objects.filter(statut='Active').count()
+        'total_actives': compteurs['total_actives']
     }
     
     return JsonResponse(data)
@@ -255,60 +250,11 @@ def alerte_search_ajax(request):
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
         return JsonResponse({'error': 'Requête non autorisée'}, status=400)
     
-    user = request.user
-    
-    # Récupération des paramètres de recherche
-    search_text = request.GET.get('search_text', '').strip()
-    search_niveau = request.GET.get('search_niveau', '').strip()
-    search_statut = request.GET.get('search_statut', '').strip()
-    search_vehicule = request.GET.get('search_vehicule', '').strip()
-    date_creation_min = request.GET.get('date_creation_min', '').strip()
-    date_creation_max = request.GET.get('date_creation_max', '').strip()
     section = request.GET.get('section', 'actives')  # 'actives' ou 'resolues'
-    
-    # Requête de base selon la section
-    if section == 'actives':
-        qs = Alerte.objects.filter(user=user, statut='Active').select_related('vehicule')
-    else:
-        qs = Alerte.objects.filter(user=user, statut__in=['Résolue', 'Ignorée']).select_related('vehicule')
-    
-    # Application des filtres
-    if search_text:
-        qs = qs.filter(
-            Q(titre__icontains=search_text) |
-            Q(description__icontains=search_text) |
-            Q(type_alerte__icontains=search_text)
-        )
-    
-    if search_niveau:
-        qs = qs.filter(niveau_urgence=search_niveau)
-    
-    if search_vehicule:
-        qs = qs.filter(
-            Q(vehicule__immatriculation__icontains=search_vehicule) |
-            Q(vehicule__marque__icontains=search_vehicule) |
-            Q(vehicule__modele__icontains=search_vehicule)
-        )
-    
-    if date_creation_min:
-        try:
-            qs = qs.filter(date_creation__gte=date_creation_min)
-        except:
-            pass
-    
-    if date_creation_max:
-        try:
-            qs = qs.filter(date_creation__lte=date_creation_max)
-        except:
-            pass
-    
-    # Tri
-    qs = qs.order_by('-date_creation')
-    
-    # Pagination
-    paginator = Paginator(qs, 10)
-    page_number = request.GET.get('page', 1)
-    alertes = paginator.get_page(page_number)
+    if section not in STATUTS_SECTION:
+        section = 'actives'
+    param = f'curseur_{section}'
+    alertes = paginer_alertes(request, section, param=param)
     
     # Rendu du template partiel selon la section
     if section == 'actives':
@@ -320,11 +266,12 @@ def alerte_search_ajax(request):
         'alertes': alertes
     }, request=request)
     
+    pagination = render_to_string('fleet_app/includes/pagination_curseur.html', {
+        'page': alertes, 'param': param,
+    }, request=request)
+    
     return JsonResponse({
         'html': html,
-        'has_next': alertes.has_next(),
-        'has_previous': alertes.has_previous(),
-        'page_number': alertes.number,
-        'num_pages': alertes.paginator.num_pages,
-        'count': alertes.paginator.count
+        'pagination': pagination,
+        **alertes.en_json(),
     })
@@ -35,7 +35,7 @@ class HeureSupplementaireListView(LoginRequiredMixin, ListView):
         
         if mois and annee:
             try:
-                queryset = queryset.filter(date__month=int(mois), date__year=int(annee))
+                queryset = queryset.for_month(int(mois), int(annee))
             except ValueError:
                 pass
         
@@ -401,7 +401,7 @@ class FraisKilometriqueListView(LoginRequiredMixin, ListView):
         
         if mois and annee:
             try:
-                queryset = queryset.filter(date__month=int(mois), date__year=int(annee))
+                queryset = queryset.for_month(int(mois), int(annee))
             except ValueError:
                 pass
         
@@ -456,10 +456,8 @@ class FraisKilometriqueListView(LoginRequiredMixin, ListView):
         
         if mois and annee:
             # Filtrer par mois/année
-            frais_mois = FraisKilometrique.objects.filter(
-                employe__user=self.request.user,
-                date__month=mois_int,
-                date__year=annee_int
+            frais_mois = FraisKilometrique.objects.for_month(mois_int, annee_int).filter(
+                employe__user=self.request.user
             ).select_related('employe')
         else:
             # Tous les frais
@@ -13,6 +13,7 @@ from decimal import Decimal
 from .models_inventaire import Produit
 from .models_facturation import Facture, LigneFacture
 from .forms_inventaire import FactureForm, LigneFactureForm, RechercheFactureForm, DocumentSigneForm
+from .utils_pdf import reponse_pdf
 
 import datetime
 import csv
@@ -355,34 +356,8 @@ def export_facture_pdf(request, pk):
             'lignes': lignes,
         }
         
-        # Rendre le template HTML
-        template = get_template('fleet_app/inventaire/facture_pdf.html')
-        html_string = template.render(context)
-        
-        # Créer un buffer pour stocker le PDF
-        buffer = io.BytesIO()
-        
-        # Générer le PDF avec xhtml2pdf
-        pisa_status = pisa.CreatePDF(
-            html_string,
-            dest=buffer,
-        )
-        
-        # Vérifier si la génération du PDF a réussi
-        if pisa_status.err:
-            messages.error(request, "Une erreur est survenue lors de la génération du PDF.")
-            return redirect('facture_detail', facture.numero)
-        
-        # Récupérer le contenu du buffer
-        buffer.seek(0)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        # Créer la réponse HTTP avec le PDF
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="facture_{facture.numero}.pdf"'
-        
-        return response
+        # Rendu PDF en file d'attente (resservi depuis le cache si la facture n'a pas changé)
+        return reponse_pdf(request, 'fleet_app/inventaire/facture_pdf.html', context, f"facture_{facture.numero}.pdf")
     except Exception as e:
         messages.error(request, f"Erreur lors de la génération du PDF : {str(e)}")
         return redirect('facture_detail', facture.numero)
@@ -11,6 +11,9 @@ from django.template.loader import get_template
 from decimal import Decimal
 from django.utils import timezone
 from .utils.decorators import queryset_filter_by_tenant
+from .utils_pdf import reponse_pdf
+from .utils_pagination import paginer_par_curseur
+from .utils_stock import statistiques_stock
 
 from .models_inventaire import Produit, EntreeStock, SortieStock, MouvementStock, Commande, LigneCommande
 from .forms_inventaire import ProduitForm, EntreeStockForm, SortieStockForm, RechercheInventaireForm, RechercheCommandeForm, CommandeForm, LigneCommandeForm, DocumentSigneCommandeForm
@@ -65,18 +68,11 @@ def inventaire_dashboard(request):
     """Tableau de bord Inventaire avec KPIs clés: stock disponible, alertes, ventes récentes"""
     produits = queryset_filter_by_tenant(Produit.objects.all(), request)
 
-    # KPIs de stock
+    # KPIs de stock (filtres sur le solde persisté Produit.stock_courant)
     total_produits = produits.count()
-    stock_disponible_total = 0
-    produits_alerte = []
-    produits_rupture = []
-    for p in produits:
-        stock = p.get_stock_actuel()
-        stock_disponible_total += stock
-        if stock == 0:
-            produits_rupture.append(p)
-        elif p.seuil_minimum is not None and stock <= p.seuil_minimum:
-            produits_alerte.append(p)
+    stock_disponible_total = produits.aggregate(total=Coalesce(Sum('stock_courant'), 0))['total']
+    produits_rupture = produits.filter(stock_courant=0)
+    produits_alerte = produits.exclude(stock_courant=0).filter(stock_courant__lte=F('seuil_minimum'))
 
     # Ventes et entrées récentes (7 derniers jours)
     seven_days_ago = timezone.now().date() - datetime.timedelta(days=7)
@@ -96,8 +92,8 @@ def inventaire_dashboard(request):
         'titre': 'Tableau de bord Inventaire',
         'total_produits': total_produits,
         'stock_disponible_total': stock_disponible_total,
-        'nb_alerte': len(produits_alerte),
-        'nb_rupture': len(produits_rupture),
+        'nb_alerte': produits_alerte.count(),
+        'nb_rupture': produits_rupture.count(),
         'produits_alerte': produits_alerte[:10],
         'produits_rupture': produits_rupture[:10],
         'ventes_recentes': ventes_recentes,
@@ -350,14 +346,8 @@ def entree_stock_create(request, produit_id=None):
                 return redirect('fleet_app:produit_detail', pk=produit_id)
             return redirect('fleet_app:entree_stock_list')
     else:
-        # Génération automatique du prochain ID d'entrée
-        last_entree = EntreeStock.objects.order_by('-id_entree').first()
-        next_id = 'ENT001'
-        if last_entree:
-            last_num = int(last_entree.id_entree[3:])
-            next_id = f'ENT{(last_num + 1):03d}'
-        
-        initial_data = {'id_entree': next_id, 'date': datetime.date.today()}
+        # L'ID (ENTxxx) est attribué par la séquence de numérotation à l'enregistrement
+        initial_data = {'date': datetime.date.today()}
         # Pré-remplir le produit si fourni
         if produit:
             initial_data['produit'] = produit
@@ -502,7 +492,7 @@ def sortie_stock_create(request, produit_id=None):
         produit = get_object_or_404(Produit, id_produit=produit_id)
     
     if request.method == 'POST':
-        form = SortieStockForm(request.POST)
+        form = SortieStockForm(request.POST, user=request.user)
         if form.is_valid():
             # Note: Vérification de propriétaire désactivée car le modèle Produit n'a pas de champ user
             produit_form = form.cleaned_data.get('produit')
@@ -531,21 +521,15 @@ def sortie_stock_create(request, produit_id=None):
                 return redirect('fleet_app:produit_detail', pk=produit_id)
             return redirect('fleet_app:sortie_stock_list')
     else:
-        # Génération automatique du prochain ID de sortie
-        last_sortie = SortieStock.objects.order_by('-id_sortie').first()
-        next_id = 'SRT001'
-        if last_sortie:
-            last_num = int(last_sortie.id_sortie[3:])
-            next_id = f'SRT{(last_num + 1):03d}'
-        
-        initial_data = {'id_sortie': next_id, 'date': datetime.date.today()}
+        # L'ID (SRTxxx) est attribué par la séquence de numérotation à l'enregistrement
+        initial_data = {'date': datetime.date.today()}
         # Pré-remplir le produit si fourni
         if produit:
             initial_data['produit'] = produit
             # Vérifier le stock actuel pour la validation côté serveur
             initial_data['stock_avant'] = produit.get_stock_actuel()
         
-        form = SortieStockForm(initial=initial_data)
+        form = SortieStockForm(initial=initial_data, user=request.user)
     
     context = {
         'form': form,
@@ -563,7 +547,7 @@ def sortie_stock_update(request, pk):
     sortie = get_object_or_404(SortieStock, pk=pk)
     
     if request.method == 'POST':
-        form = SortieStockForm(request.POST, instance=sortie)
+        form = SortieStockForm(request.POST, instance=sortie, user=request.user)
         if form.is_valid():
             # Note: Vérification de propriétaire désactivée car le modèle Produit n'a pas de champ user
             produit_form = form.cleaned_data.get('produit')
@@ -590,7 +574,7 @@ def sortie_stock_update(request, pk):
             messages.success(request, "La sortie de stock a été mise à jour avec succès.")
             return redirect('fleet_app:sortie_stock_list')
     else:
-        form = SortieStockForm(instance=sortie)
+        form = SortieStockForm(instance=sortie, user=request.user)
     
     context = {
         'form': form,
@@ -617,60 +601,6 @@ def sortie_stock_delete(request, pk):
     
     return redirect('fleet_app:sortie_stock_list')
 
-# Vue pour le stock actuel
-@login_required
-def stock_actuel(request):
-    """Affichage du stock actuel pour tous les produits"""
-    form_recherche = RechercheInventaireForm(request.GET)
-    produits = Produit.objects.filter(user=request.user)
-    
-    # Filtrage selon les critères de recherche
-    if form_recherche.is_valid():
-        critere = form_recherche.cleaned_data.get('critere')
-        terme = form_recherche.cleaned_data.get('terme')
-        
-        if critere and terme:
-            if critere == 'id_produit':
-                produits = produits.filter(id_produit__icontains=terme)
-            elif critere == 'nom':
-                produits = produits.filter(nom__icontains=terme)
-            elif critere == 'categorie':
-                produits = produits.filter(categorie__icontains=terme)
-            elif critere == 'fournisseur':
-                produits = produits.filter(fournisseur__icontains=terme)
-    
-    # Calcul des stocks pour chaque produit
-    stock_data = []
-    for produit in produits:
-        total_entrees = EntreeStock.objects.filter(produit=produit).aggregate(Sum('quantite'))['quantite__sum'] or 0
-        total_sorties = SortieStock.objects.filter(produit=produit).aggregate(Sum('quantite'))['quantite__sum'] or 0
-        stock_actuel = total_entrees - total_sorties
-        statut = "OK"
-        if stock_actuel <= produit.seuil_minimum:
-            statut = "ALERTE"
-        
-        stock_data.append({
-            'produit': produit,
-            'total_entrees': total_entrees,
-            'total_sorties': total_sorties,
-            'stock_actuel': stock_actuel,
-            'seuil_minimum': produit.seuil_minimum,
-            'statut': statut
-        })
-    
-    # Pagination
-    paginator = Paginator(stock_data, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    context = {
-        'stock_data': page_obj,
-        'form_recherche': form_recherche,
-        'titre': 'Stock Actuel',
-    }
-    
-    return render(request, 'fleet_app/inventaire/stock_actuel.html', context)
-
 # Vue pour les mouvements de stock
 @login_required
 def mouvement_stock_list(request):
@@ -713,10 +643,8 @@ def mouvement_stock_list(request):
                        .annotate(nb_mouvements=Count('id'))
                        .order_by('-nb_mouvements')[:5])
     
-    # Pagination
-    paginator = Paginator(mouvements.order_by('-date'), 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur (date, id): lecture directe dans l'index (entreprise, date)
+    page_obj = paginer_par_curseur(request, mouvements, ordering=('-date', '-pk'), per_page=20)
     
     context = {
         'mouvements': page_obj,
@@ -805,78 +733,57 @@ def get_produits_list(request):
 # Vue pour afficher le stock actuel
 @login_required
 def stock_actuel(request):
-    """Affiche le stock actuel des produits de l'utilisateur connecté
-    Filtrée pour n'afficher que les produits de l'utilisateur connecté
+    """Affiche le stock actuel des produits du tenant connecté
+    Filtrage, compteurs par statut et pagination sont faits en base sur le solde
+    persisté (Produit.stock_courant) : le temps de réponse ne dépend pas de la
+    taille du catalogue.
     """
     form_recherche = RechercheInventaireForm(request.GET)
-    # Récupérer tous les produits
-    produits = Produit.objects.filter(user=request.user)
+    produits_tenant = queryset_filter_by_tenant(Produit.objects.all(), request)
+    produits = produits_tenant
     
-    # Récupérer les catégories uniques pour le filtre
-    categories = Produit.objects.values_list('categorie', flat=True).distinct()
-    categories = [cat for cat in categories if cat]  # Filtrer les valeurs vides
+    # Récupérer les catégories du tenant pour le filtre
+    categories = produits_tenant.exclude(categorie='').order_by('categorie').values_list('categorie', flat=True).distinct()
     
     # Filtrage selon les critères de recherche
     if form_recherche.is_valid():
         critere = form_recherche.cleaned_data.get('critere')
         terme = form_recherche.cleaned_data.get('terme')
         if critere and terme:
-            if critere == 'produit':
-                produits = produits.filter(nom__icontains=terme)
-            elif critere == 'reference':
+            if critere == 'id_produit':
                 produits = produits.filter(id_produit__icontains=terme)
+            elif critere == 'nom':
+                produits = produits.filter(nom__icontains=terme)
+            elif critere == 'categorie':
+                produits = produits.filter(categorie__icontains=terme)
+            elif critere == 'fournisseur':
+                produits = produits.filter(fournisseur__icontains=terme)
     
     # Filtrage par catégorie
     categorie = request.GET.get('categorie')
     if categorie:
         produits = produits.filter(categorie=categorie)
     
-    # Récupérer tous les produits pour le filtrage manuel
-    all_produits = list(produits)
-    
-    # Filtrage manuel par statut d'alerte (car stock_actuel est calculé dynamiquement)
+    # Filtrage par statut d'alerte sur le solde persisté
     alerte = request.GET.get('alerte')
-    if alerte:
-        filtered_produits = []
-        for produit in all_produits:
-            stock = produit.get_stock_actuel()
-            if alerte == 'alerte' and 0 < stock <= produit.seuil_minimum:
-                filtered_produits.append(produit)
-            elif alerte == 'rupture' and stock == 0:
-                filtered_produits.append(produit)
-        all_produits = filtered_produits
-    
-    # Calcul des statistiques manuellement
-    total_produits = len(all_produits)
-    
-    # Compter les produits par statut
-    produits_alerte = 0
-    produits_rupture = 0
-    produits_normaux = 0
-    
-    for produit in Produit.objects.filter(user=request.user):
-        stock = produit.get_stock_actuel()
-        if stock == 0:
-            produits_rupture += 1
-        elif stock <= produit.seuil_minimum:
-            produits_alerte += 1
-        else:
-            produits_normaux += 1
-    
-    # Pagination manuelle
-    paginator = Paginator(all_produits, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if alerte == 'alerte':
+        produits = produits.filter(stock_courant__gt=0, stock_courant__lte=F('seuil_minimum'))
+    elif alerte == 'rupture':
+        produits = produits.filter(stock_courant=0)
+    
+    # Compteurs par statut et valeur du stock du tenant (une requête, mise en cache)
+    statistiques = statistiques_stock(request)
+    
+    # Pagination par curseur sur la clé primaire (sans OFFSET) ; le total filtré reste affiché
+    page_obj = paginer_par_curseur(request, produits, ordering=('id_produit',), per_page=20, total='exact')
     
     context = {
         'produits': page_obj,
+        'page_obj': page_obj,
         'form_recherche': form_recherche,
         'categories': categories,
         'titre': 'Stock Actuel',
-        'total_produits': Produit.objects.count(),  # Total de tous les produits
-        'produits_alerte': produits_alerte,
-        'produits_rupture': produits_rupture,
-        'produits_normaux': produits_normaux,
+        **statistiques,
     }
     
     return render(request, 'fleet_app/inventaire/stock_actuel.html', context)
@@ -1238,18 +1145,11 @@ def export_commande_pdf(request, pk):
             'remise_pourcentage': remise_pourcentage,
         }
         
-        # Rendre le template HTML
-        template = get_template('fleet_app/inventaire/commande_pdf.html')
-        html_string = template.render(context)
-        
-        # Générer le PDF
-        pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-        
-        # Créer la réponse HTTP avec le PDF
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="commande_{commande.numero}.pdf"'
-        
-        return response
+        # Rendu PDF en file d'attente (resservi depuis le cache si la commande n'a pas changé)
+        return reponse_pdf(
+            request, 'fleet_app/inventaire/commande_pdf.html', context, f"commande_{commande.numero}.pdf",
+            moteur='weasyprint', base_url=request.build_absolute_uri(),
+        )
     except Exception as e:
         messages.error(request, f"Erreur lors de la génération du PDF : {str(e)}. Essayez d'installer GTK et les dépendances requises pour WeasyPrint.")
         return redirect('fleet_app:commande_detail', pk=commande.numero)
@@ -2,9 +2,9 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
 from django.template.loader import render_to_string, get_template
 from django.contrib import messages
 import calendar
@@ -23,59 +23,32 @@ from .forms_location import (
     FactureLocationForm,
 )
 from .utils.decorators import queryset_filter_by_tenant, object_belongs_to_tenant
+from .utils.tenant import build_tenant_context, get_tenant_context
+from .utils_pdf import reponse_pdf, reponse_lot_pdf
+from .utils_factures_location import generer_factures_mensuelles_locations
+from .utils_locations_metrics import metriques_locations
+from .utils_pages import (
+    DUREE_CACHE_FRAGMENTS, FRAGMENTS_ACCUEIL_PUBLIC, cles_fragments, etag_accueil_public, etat_locations_du_jour,
+    get_conditionnel,
+)
+from .utils_pagination import paginer_par_curseur
+from .utils_recherche import ids_correspondants
 
 
 @login_required
 def locations_dashboard(request):
-    user = request.user
     locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request).select_related("vehicule", "fournisseur")
-    actifs = locations.filter(statut="Active").count()
-    inactifs = locations.filter(statut__in=["Inactive", "Clôturée"]).count()
-
-    feuilles = queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request)
-    jours_travail = feuilles.filter(statut="Travail").count()
-    jours_entretien = feuilles.filter(statut="Entretien").count()
-    jours_hs = feuilles.filter(statut="Hors service").count()
 
     # Totaux factures existants
     recettes = queryset_filter_by_tenant(FactureLocation.objects.all(), request).aggregate(total=Sum("montant_ttc"))['total'] or 0
 
-    # Calculs par périodes basés sur les feuilles de type "Travail" et le tarif journalier de la location
-    today = timezone.now().date()
-    start_month = today.replace(day=1)
-    start_year = today.replace(month=1, day=1)
-
-    # Revenus journaliers = somme des tarifs journaliers pour chaque feuille "Travail" du jour
-    feuilles_jour = feuilles.filter(statut="Travail", date=today).select_related("location")
-    revenu_jour = sum((f.location.tarif_journalier or 0) for f in feuilles_jour)
-
-    # Revenus mensuels
-    feuilles_mois = feuilles.filter(statut="Travail", date__gte=start_month, date__lte=today).select_related("location")
-    revenu_mois = sum((f.location.tarif_journalier or 0) for f in feuilles_mois)
-
-    # Revenus annuels
-    feuilles_annee = feuilles.filter(statut="Travail", date__gte=start_year, date__lte=today).select_related("location")
-    revenu_annee = sum((f.location.tarif_journalier or 0) for f in feuilles_annee)
-
-    # Entretien: nombre de jours en entretien (mois courant) et montant "perdu" (tarif * jours entretien)
-    feuilles_entretien_mois = feuilles.filter(statut="Entretien", date__gte=start_month, date__lte=today).select_related("location")
-    entretien_jours_mois = feuilles_entretien_mois.count()
-    entretien_perte_mois = sum((f.location.tarif_journalier or 0) for f in feuilles_entretien_mois)
+    # Compteurs, revenus (feuilles "Travail" x tarif journalier) et pertes d'entretien, agrégés en base et mis en cache
+    metriques = metriques_locations(request)
 
     context = {
         "locations": locations[:10],
-        "actifs": actifs,
-        "inactifs": inactifs,
-        "jours_travail": jours_travail,
-        "jours_entretien": jours_entretien,
-        "jours_hs": jours_hs,
         "recettes": recettes,
-        # Nouveaux indicateurs
-        "revenu_jour": revenu_jour,
-        "revenu_mois": revenu_mois,
-        "revenu_annee": revenu_annee,
-        "entretien_jours_mois": entretien_jours_mois,
-        "entretien_perte_mois": entretien_perte_mois,
+        **metriques,
     }
     return render(request, "fleet_app/locations/dashboard.html", context)
 
@@ -86,56 +59,21 @@ def locations_dashboard_metrics_ajax(request):
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
         return JsonResponse({'error': 'Requête non autorisée'}, status=400)
 
-    user = request.user
+    # vehicule_id correspond au PK string de Vehicule
     vehicule_id = request.GET.get('vehicule_id', '').strip()
-
-    feuilles = queryset_filter_by_tenant(FeuillePontageLocation.objects.all(), request)
-    locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request)
-    if vehicule_id:
-        try:
-            # vehicule_id correspond au PK string de Vehicule
-            feuilles = feuilles.filter(location__vehicule__id_vehicule=vehicule_id)
-            locations = locations.filter(vehicule__id_vehicule=vehicule_id)
-        except Exception:
-            pass
-
-    actifs = locations.filter(statut="Active").count()
-    inactifs = locations.filter(statut__in=["Inactive", "Clôturée"]).count()
-
-    jours_travail = feuilles.filter(statut="Travail").count()
-    jours_entretien = feuilles.filter(statut="Entretien").count()
-    jours_hs = feuilles.filter(statut="Hors service").count()
-
-    today = timezone.now().date()
-    start_month = today.replace(day=1)
-    start_year = today.replace(month=1, day=1)
-
-    # Revenus
-    f_jour = feuilles.filter(statut="Travail", date=today).select_related("location")
-    revenu_jour = sum((f.location.tarif_journalier or 0) for f in f_jour)
-
-    f_mois = feuilles.filter(statut="Travail", date__gte=start_month, date__lte=today).select_related("location")
-    revenu_mois = sum((f.location.tarif_journalier or 0) for f in f_mois)
-
-    f_annee = feuilles.filter(statut="Travail", date__gte=start_year, date__lte=today).select_related("location")
-    revenu_annee = sum((f.location.tarif_journalier or 0) for f in f_annee)
-
-    # Entretien pertes (mois)
-    f_ent_mois = feuilles.filter(statut="Entretien", date__gte=start_month, date__lte=today).select_related("location")
-    entretien_jours_mois = f_ent_mois.count()
-    entretien_perte_mois = sum((f.location.tarif_journalier or 0) for f in f_ent_mois)
+    metriques = metriques_locations(request, vehicule_id)
 
     return JsonResponse({
-        'actifs': actifs,
-        'inactifs': inactifs,
-        'jours_travail': jours_travail,
-        'jours_entretien': jours_entretien,
-        'jours_hs': jours_hs,
-        'revenu_jour': float(revenu_jour),
-        'revenu_mois': float(revenu_mois),
-        'revenu_annee': float(revenu_annee),
-        'entretien_jours_mois': entretien_jours_mois,
-        'entretien_perte_mois': float(entretien_perte_mois),
+        'actifs': metriques['actifs'],
+        'inactifs': metriques['inactifs'],
+        'jours_travail': metriques['jours_travail'],
+        'jours_entretien': metriques['jours_entretien'],
+        'jours_hs': metriques['jours_hs'],
+        'revenu_jour': float(metriques['revenu_jour']),
+        'revenu_mois': float(metriques['revenu_mois']),
+        'revenu_annee': float(metriques['revenu_annee']),
+        'entretien_jours_mois': metriques['entretien_jours_mois'],
+        'entretien_perte_mois': float(metriques['entretien_perte_mois']),
     })
 
 
@@ -156,11 +94,7 @@ def feuille_pontage_search_ajax(request):
     search_comment = request.GET.get('search_comment', '').strip()
 
     if search_vehicule:
-        qs = qs.filter(
-            Q(location__vehicule__immatriculation__icontains=search_vehicule) |
-            Q(location__vehicule__marque__icontains=search_vehicule) |
-            Q(location__vehicule__modele__icontains=search_vehicule)
-        )
+        qs = qs.filter(location__vehicule__in=ids_correspondants(user, 'vehicule', search_vehicule))
 
     if search_statut:
         qs = qs.filter(statut=search_statut)
@@ -183,9 +117,7 @@ def feuille_pontage_search_ajax(request):
     if search_comment:
         qs = qs.filter(commentaire__icontains=search_comment)
 
-    paginator = Paginator(qs.order_by('-date'), 20)
-    page_number = request.GET.get('page', 1)
-    feuilles = paginator.get_page(page_number)
+    feuilles = paginer_par_curseur(request, qs, ordering=('-date', '-pk'), per_page=20, total='exact')
 
     html = render_to_string('fleet_app/locations/feuille_pontage_rows.html', {
         'feuilles': feuilles
@@ -193,11 +125,7 @@ def feuille_pontage_search_ajax(request):
 
     return JsonResponse({
         'html': html,
-        'has_next': feuilles.has_next(),
-        'has_previous': feuilles.has_previous(),
-        'page_number': feuilles.number,
-        'num_pages': feuilles.paginator.num_pages,
-        'count': feuilles.paginator.count,
+        **feuilles.en_json(),
     })
 
 
@@ -212,17 +140,9 @@ def fournisseur_search_ajax(request):
 
     search_text = request.GET.get('search_text', '').strip()
     if search_text:
-        qs = qs.filter(
-            Q(nom__icontains=search_text) |
-            Q(contact__icontains=search_text) |
-            Q(telephone__icontains=search_text) |
-            Q(email__icontains=search_text) |
-            Q(adresse__icontains=search_text)
-        )
+        qs = qs.filter(pk__in=ids_correspondants(user, 'fournisseur', search_text))
 
-    paginator = Paginator(qs.order_by('nom'), 20)
-    page_number = request.GET.get('page', 1)
-    fournisseurs = paginator.get_page(page_number)
+    fournisseurs = paginer_par_curseur(request, qs, ordering=('nom', 'pk'), per_page=20, total='exact')
 
     html = render_to_string('fleet_app/locations/fournisseur_rows.html', {
         'fournisseurs': fournisseurs
@@ -230,11 +150,7 @@ def fournisseur_search_ajax(request):
 
     return JsonResponse({
         'html': html,
-        'has_next': fournisseurs.has_next(),
-        'has_previous': fournisseurs.has_previous(),
-        'page_number': fournisseurs.number,
-        'num_pages': fournisseurs.paginator.num_pages,
-        'count': fournisseurs.paginator.count,
+        **fournisseurs.en_json(),
     })
 
 
@@ -260,11 +176,7 @@ def facture_search_ajax(request):
         qs = qs.filter(statut__iexact=search_statut)
 
     if search_vehicule:
-        qs = qs.filter(
-            Q(location__vehicule__immatriculation__icontains=search_vehicule) |
-            Q(location__vehicule__marque__icontains=search_vehicule) |
-            Q(location__vehicule__modele__icontains=search_vehicule)
-        )
+        qs = qs.filter(location__vehicule__in=ids_correspondants(user, 'vehicule', search_vehicule))
 
     if date_min:
         try:
@@ -278,9 +190,7 @@ def facture_search_ajax(request):
         except Exception:
             pass
 
-    paginator = Paginator(qs.order_by('-date'), 20)
-    page_number = request.GET.get('page', 1)
-    factures = paginator.get_page(page_number)
+    factures = paginer_par_curseur(request, qs, ordering=('-date', '-pk'), per_page=20, total='exact')
 
     html = render_to_string('fleet_app/locations/facture_rows.html', {
         'factures': factures
@@ -290,11 +200,7 @@ def facture_search_ajax(request):
 
     return JsonResponse({
         'html': html,
-        'has_next': factures.has_next(),
-        'has_previous': factures.has_previous(),
-        'page_number': factures.number,
-        'num_pages': factures.paginator.num_pages,
-        'count': factures.paginator.count,
+        **factures.en_json(),
         'total': float(total),
     })
 
@@ -335,11 +241,8 @@ def location_list(request):
     if date_debut_max:
         qs = qs.filter(date_debut__lte=date_debut_max)
 
-    # Pagination (ensure stable ordering)
-    qs = qs.order_by('-date_debut', '-id')
-    paginator = Paginator(qs, 20)
-    page_number = request.GET.get('page')
-    locations = paginator.get_page(page_number)
+    # Pagination par curseur (date de début, id)
+    locations = paginer_par_curseur(request, qs, ordering=('-date_debut', '-id'), per_page=20, total='exact')
 
     # Données pour les filtres (tenant-aware)
     fournisseurs = queryset_filter_by_tenant(FournisseurVehicule.objects.all(), request).values_list('nom', flat=True).distinct()
@@ -733,70 +636,13 @@ def generer_factures_mensuelles(request):
     except ValueError:
         return JsonResponse({'success': False, 'message': 'Paramètres year/month invalides.'}, status=400)
 
-    # Début/fin du mois
-    first_day = timezone.datetime(year, month, 1).date()
-    last_day = timezone.datetime(year, month, calendar.monthrange(year, month)[1]).date()
+    # Entreprise du tenant (résolue une fois par requête par TenantMiddleware)
+    ent = get_tenant_context(request).entreprise
 
-    locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request).select_related('vehicule')
-    results = []
-    total_factures = 0
-
-    for loc in locations:
-        # Calculer l'intervalle de recouvrement entre la période de la location et le mois
-        loc_start = loc.date_debut or first_day
-        loc_end = loc.date_fin or last_day
-        period_start = max(loc_start, first_day)
-        period_end = min(loc_end, last_day)
-        if period_start > period_end:
-            continue  # pas de recouvrement ce mois
-
-        # Nombre de jours calendaires couverts ce mois pour cette location
-        jours_couverts = (period_end - period_start).days + 1
-
-        # Feuilles de pontage "Travail" dans cet intervalle
-        feuilles_travail = loc.feuilles.filter(statut="Travail", date__gte=period_start, date__lte=period_end)
-        jours_travail = feuilles_travail.count()
-        jours_non_travail = max(jours_couverts - jours_travail, 0)
-
-        # Montants
-        tarif = loc.tarif_journalier or Decimal('0')
-        montant_ht = jours_travail * tarif
-        tva = montant_ht * Decimal('0.18')
-        montant_ttc = montant_ht + tva
-
-        numero = f"LOC-{loc.pk}-{year}{month:02d}"
-        
-        # Récupérer l'entreprise de l'utilisateur
-        ent = getattr(getattr(user, 'profil', None), 'entreprise', None) or getattr(user, 'entreprise', None)
-
-        # Créer ou mettre à jour la facture du mois
-        facture, created = FactureLocation.objects.update_or_create(
-            user=user,
-            location=loc,
-            numero=numero,
-            defaults={
-                'date': period_end,
-                'montant_ht': montant_ht,
-                'tva': tva,
-                'montant_ttc': montant_ttc,
-                'jours_travail_mois': jours_travail,
-                'jours_non_travail_mois': jours_non_travail,
-                'statut': getattr(FactureLocation, 'STATUT_BROUILLON', 'Brouillon'),
-                'entreprise': ent,
-            }
-        )
-
-        total_factures += float(montant_ttc)
-        results.append({
-            'location_id': loc.pk,
-            'vehicule': str(loc.vehicule),
-            'jours_travail': jours_travail,
-            'jours_non_travail': jours_non_travail,
-            'montant_ttc': float(montant_ttc),
-            'facture_id': facture.pk,
-            'numero': numero,
-            'created': created,
-        })
+    # Comptage groupé des jours "Travail" et écriture des factures en une requête
+    locations = queryset_filter_by_tenant(LocationVehicule.objects.all(), request)
+    results = generer_factures_mensuelles_locations(locations, year, month, user=user, entreprise=ent)
+    total_factures = sum(detail['montant_ttc'] for detail in results)
 
     return JsonResponse({
         'success': True,
@@ -825,14 +671,10 @@ def location_search_ajax(request):
     
     # Application des filtres
     if search_vehicule:
-        qs = qs.filter(
-            Q(vehicule__immatriculation__icontains=search_vehicule) |
-            Q(vehicule__marque__icontains=search_vehicule) |
-            Q(vehicule__modele__icontains=search_vehicule)
-        )
+        qs = qs.filter(vehicule__in=ids_correspondants(user, 'vehicule', search_vehicule))
     
     if search_fournisseur:
-        qs = qs.filter(fournisseur__nom__icontains=search_fournisseur)
+        qs = qs.filter(fournisseur__in=ids_correspondants(user, 'fournisseur', search_fournisseur))
     
     if search_type:
         qs = qs.filter(type_location=search_type)
@@ -852,11 +694,8 @@ def location_search_ajax(request):
         except:
             pass
     
-    # Pagination (ensure stable ordering)
-    qs = qs.order_by('-date_debut', '-id')
-    paginator = Paginator(qs, 20)
-    page_number = request.GET.get('page', 1)
-    locations = paginator.get_page(page_number)
+    # Pagination par curseur (date de début, id)
+    locations = paginer_par_curseur(request, qs, ordering=('-date_debut', '-id'), per_page=20, total='exact')
     
     # Rendu du template partiel
     html = render_to_string('fleet_app/locations/location_table_rows.html', {
@@ -865,58 +704,10 @@ def location_search_ajax(request):
     
     return JsonResponse({
         'html': html,
-        'has_next': locations.has_next(),
-        'has_previous': locations.has_previous(),
-        'page_number': locations.number,
-        'num_pages': locations.paginator.num_pages,
-        'count': locations.paginator.count
+        **locations.en_json(),
     })
 
 
-@login_required
-def search_vehicules_ajax(request):
-    """Retourne une liste JSON de véhicules filtrés pour Select2."""
-    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
-        return JsonResponse({'error': 'Requête non autorisée'}, status=400)
-
-    term = request.GET.get('term', '').strip()
-    qs = Vehicule.objects.filter(user=request.user)
-    if term:
-        qs = qs.filter(
-            Q(immatriculation__icontains=term) |
-            Q(marque__icontains=term) |
-            Q(modele__icontains=term)
-        )
-    results = [
-        {
-            'id': v.pk,
-            'text': f"{v.immatriculation} - {v.marque} {v.modele}".strip()
-        }
-        for v in qs.order_by('immatriculation')[:20]
-    ]
-    return JsonResponse({'results': results})
-
-
-@login_required
-def search_fournisseurs_ajax(request):
-    """Retourne une liste JSON de fournisseurs filtrés pour Select2."""
-    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
-        return JsonResponse({'error': 'Requête non autorisée'}, status=400)
-
-    term = request.GET.get('term', '').strip()
-    qs = FournisseurVehicule.objects.filter(user=request.user)
-    if term:
-        qs = qs.filter(nom__icontains=term)
-    results = [
-        {
-            'id': f.pk,
-            'text': f.nom
-        }
-        for f in qs.order_by('nom')[:20]
-    ]
-    return JsonResponse({'results': results})
-
-
 @login_required
 @require_http_methods(["POST"])
 def fournisseur_quick_create_ajax(request):
@@ -1009,19 +800,8 @@ def vehicule_quick_create_ajax(request):
     })
 
 
-@login_required
-def facture_pdf(request, pk):
-    """Génère et télécharge une facture en PDF"""
-    facture = get_object_or_404(queryset_filter_by_tenant(FactureLocation.objects.all(), request), pk=pk)
-    
-    # Récupérer les informations de l'entreprise
-    entreprise = None
-    if hasattr(request.user, 'profil'):
-        entreprise = getattr(request.user.profil, 'entreprise', None)
-    if not entreprise and hasattr(request.user, 'entreprise'):
-        entreprise = request.user.entreprise
-    
-    # Récupérer les détails des feuilles de pontage pour cette facture
+def contexte_facture_pdf(facture, entreprise):
+    """Contexte du template PDF d'une facture de location (feuilles de la période facturée)"""
     # Calculer la période de facturation basée sur la date de la facture
     date_facture = facture.date
     if date_facture.day <= 15:
@@ -1041,19 +821,19 @@ def facture_pdf(request, pk):
     last_day = timezone.datetime(year, month, calendar.monthrange(year, month)[1]).date()
     
     # Récupérer les feuilles de pontage de la période
-    feuilles_travail = facture.location.feuilles.filter(
+    feuilles_travail = list(facture.location.feuilles.filter(
         statut="Travail",
         date__gte=first_day,
         date__lte=last_day
-    ).order_by('date')
+    ).order_by('date'))
     
-    feuilles_autres = facture.location.feuilles.filter(
+    feuilles_autres = list(facture.location.feuilles.filter(
         statut__in=["Entretien", "Hors service", "Inactif"],
         date__gte=first_day,
         date__lte=last_day
-    ).order_by('date')
+    ).order_by('date'))
     
-    context = {
+    return {
         'facture': facture,
         'entreprise': entreprise,
         'location': facture.location,
@@ -1063,34 +843,55 @@ def facture_pdf(request, pk):
         'periode_fin': last_day,
         'feuilles_travail': feuilles_travail,
         'feuilles_autres': feuilles_autres,
-        'jours_travail': feuilles_travail.count(),
-        'jours_autres': feuilles_autres.count(),
+        'jours_travail': len(feuilles_travail),
+        'jours_autres': len(feuilles_autres),
         'today': timezone.now(),
     }
-    
-    # Rendu du template HTML
-    template = get_template('fleet_app/locations/facture_pdf_template.html')
-    html = template.render(context)
-    
-    # Création du PDF
-    try:
-        from xhtml2pdf import pisa
-    except Exception:
-        messages.error(request, "Génération PDF indisponible: dépendances non installées (xhtml2pdf/reportlab).")
-        return redirect('fleet_app:facture_location_detail', pk=pk)
 
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+
+@login_required
+def facture_pdf(request, pk):
+    """Génère et télécharge une facture en PDF"""
+    facture = get_object_or_404(queryset_filter_by_tenant(FactureLocation.objects.all(), request), pk=pk)
+    context = contexte_facture_pdf(facture, get_tenant_context(request).entreprise)
     
-    if not pdf.err:
-        # Retourner le PDF en réponse
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="facture_{facture.numero}.pdf"'
-        return response
+    # Rendu PDF en file d'attente (resservi depuis le cache si la facture n'a pas changé)
+    return reponse_pdf(request, 'fleet_app/locations/facture_pdf_template.html', context, f"facture_{facture.numero}.pdf")
+
+
+def fragments_factures_batch(user, parametres):
+    """
+    Fragments PDF d'un lot de factures: page de résumé puis une facture par fragment
+
+    Appelé par le rendu du lot (utils_pdf.LOTS_PDF) ; les identifiants ont été
+    filtrés par tenant dans `factures_batch_pdf`.
+
+    Yields:
+        tuple: (template, contexte, nom de fichier) de chaque fragment
+    """
+    factures = FactureLocation.objects.filter(
+        id__in=parametres['facture_ids']
+    ).select_related('location', 'location__vehicule', 'location__fournisseur').order_by('date', 'numero')
+    entreprise = build_tenant_context(user).entreprise
+    totaux = factures.aggregate(total_ht=Sum('montant_ht'), total_tva=Sum('tva'), total_ttc=Sum('montant_ttc'))
     
-    # En cas d'erreur, rediriger avec un message d'erreur
-    messages.error(request, 'Erreur lors de la génération du PDF')
-    return redirect('fleet_app:facture_location_detail', pk=pk)
+    yield 'fleet_app/locations/factures_batch_pdf_template.html', {
+        'factures': factures,
+        'entreprise': entreprise,
+        'lot': factures.first().location,
+        'today': timezone.now(),
+        'total_ht': totaux['total_ht'] or 0,
+        'total_tva': totaux['total_tva'] or 0,
+        'total_ttc': totaux['total_ttc'] or 0,
+        'resume_seul': True,
+    }, 'factures_lot_resume.pdf'
+    
+    for facture in factures.iterator(chunk_size=100):
+        yield (
+            'fleet_app/locations/facture_pdf_template.html',
+            contexte_facture_pdf(facture, entreprise),
+            f"facture_{facture.numero}.pdf",
+        )
 
 
 @login_required
@@ -1103,51 +904,16 @@ def factures_batch_pdf(request):
     if not facture_ids:
         return JsonResponse({'error': 'Aucune facture sélectionnée'}, status=400)
     
-    factures = queryset_filter_by_tenant(FactureLocation.objects.all(), request).filter(
+    facture_ids = list(queryset_filter_by_tenant(FactureLocation.objects.all(), request).filter(
         id__in=facture_ids
-    ).select_related('location', 'location__vehicule', 'location__fournisseur')
+    ).values_list('id', flat=True))
     
-    if not factures.exists():
+    if not facture_ids:
         return JsonResponse({'error': 'Aucune facture trouvée'}, status=404)
     
-    # Récupérer les informations de l'entreprise pour le lot
-    entreprise = None
-    if hasattr(request.user, 'profil'):
-        entreprise = getattr(request.user.profil, 'entreprise', None)
-    if not entreprise and hasattr(request.user, 'entreprise'):
-        entreprise = request.user.entreprise
-    
-    context = {
-        'factures': factures,
-        'entreprise': entreprise,
-        'lot': factures.first().location,
-        'today': timezone.now(),
-        'total_ht': factures.aggregate(total=Sum('montant_ht'))['total'] or 0,
-        'total_tva': factures.aggregate(total=Sum('tva'))['total'] or 0,
-        'total_ttc': factures.aggregate(total=Sum('montant_ttc'))['total'] or 0,
-    }
-    
-    # Rendu du template HTML
-    template = get_template('fleet_app/locations/factures_batch_pdf_template.html')
-    html = template.render(context)
-    
-    # Création du PDF
-    try:
-        from xhtml2pdf import pisa
-    except Exception:
-        return JsonResponse({'error': 'Génération PDF indisponible: dépendances non installées'}, status=500)
-    
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    
-    if not pdf.err:
-        # Retourner le PDF en réponse
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        filename = f"factures_lot_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
-    
-    return JsonResponse({'error': 'Erreur lors de la génération du PDF'}, status=500)
+    # Chaque facture est rendue séparément (en parallèle, cache par facture) puis fusionnée
+    filename = f"factures_lot_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    return reponse_lot_pdf(request, 'factures_location', {'facture_ids': sorted(facture_ids)}, filename)
 
 
 @login_required
@@ -1178,23 +944,30 @@ def get_vehicule_fournisseur_ajax(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@get_conditionnel(etag_accueil_public)
 def accueil_public(request):
     """
     Page d'accueil publique pour les propriétaires de véhicules en location.
     Affiche les informations journalières des véhicules sans nécessiter d'authentification.
+
+    GET conditionnel (ETag, voir utils_pages) ; l'état du jour est en cache de
+    fragments et n'est calculé qu'au rendu.
     """
     today = timezone.now().date()
     
-    # Récupérer toutes les feuilles de pontage du jour
-    feuilles_today = FeuillePontageLocation.objects.filter(
-        date=today
-    ).select_related(
-        'location',
-        'location__vehicule',
-        'location__fournisseur'
-    ).order_by('location__vehicule__immatriculation')
+    context = {
+        'today': today,
+        'etat': SimpleLazyObject(lambda: _etat_accueil_public(today)),
+        'fragments': cles_fragments(request, *FRAGMENTS_ACCUEIL_PUBLIC),
+        'duree_fragments': DUREE_CACHE_FRAGMENTS,
+    }
     
-    # Récupérer tous les véhicules en location active
+    return render(request, 'fleet_app/locations/accueil_public.html', context)
+
+
+def _etat_accueil_public(today):
+    """État du jour de tous les véhicules en location active (deux requêtes)"""
+    # Tous les véhicules en location active
     locations_actives = LocationVehicule.objects.filter(
         statut='Active'
     ).select_related(
@@ -1202,35 +975,18 @@ def accueil_public(request):
         'fournisseur'
     ).order_by('vehicule__immatriculation')
     
-    # Créer un dictionnaire des véhicules avec leurs informations du jour
-    vehicules_info = {}
+    # Feuilles de pontage du jour, associées à leur location en mémoire
+    feuilles_today = FeuillePontageLocation.objects.filter(date=today, location__statut='Active')
     
-    for location in locations_actives:
-        vehicule = location.vehicule
-        immat = vehicule.immatriculation
-        
-        # Chercher la feuille de pontage du jour pour ce véhicule
-        feuille = feuilles_today.filter(location=location).first()
-        
-        vehicules_info[immat] = {
-            'vehicule': vehicule,
-            'location': location,
-            'fournisseur': location.fournisseur,
-            'feuille': feuille,
-            'statut_jour': feuille.statut if feuille else 'Non renseigné',
-            'commentaire': feuille.commentaire if feuille else '',
-            'a_travaille': feuille and feuille.statut == 'Travail',
-            'en_panne': feuille and feuille.statut in ['Hors service', 'Panne'],
-            'en_entretien': feuille and feuille.statut == 'Entretien',
-        }
+    vehicules_info = {
+        info['vehicule'].immatriculation: info
+        for info in etat_locations_du_jour(locations_actives, feuilles_today)
+    }
     
-    context = {
-        'today': today,
+    return {
         'vehicules_info': vehicules_info,
         'total_vehicules': len(vehicules_info),
         'vehicules_travail': sum(1 for v in vehicules_info.values() if v['a_travaille']),
         'vehicules_panne': sum(1 for v in vehicules_info.values() if v['en_panne']),
         'vehicules_entretien': sum(1 for v in vehicules_info.values() if v['en_entretien']),
     }
-    
-    return render(request, 'fleet_app/locations/accueil_public.html', context)
@@ -22,38 +22,24 @@ logger = logging.getLogger(__name__)
 
 @login_required
 def paie_employe_list(request):
-    """Vue pour afficher la liste des paies des employés avec calculs automatiques"""
+    """
+    Vue pour afficher la liste des paies des employés (lecture seule)
+
+    Les paies sont créées et recalculées par un job de synchronisation
+    (voir `utils_paie_sync`) ; la page se contente de lire les données et
+    de signaler les écarts avec les présences / heures supplémentaires.
+    """
     try:
         from datetime import datetime
-        from .utils_presence_paie import calculer_statistiques_presence, synchroniser_presence_vers_paie
+        from collections import defaultdict
+        import calendar
+        from .utils_presence_paie import calculer_statistiques_presence_batch
+        from .models_entreprise import SynchronisationPaieJob
         
         # Récupérer les filtres avec valeurs par défaut
         employe_id = request.GET.get('employe_id')
         annee = int(request.GET.get('annee', datetime.now().year))
         mois = int(request.GET.get('mois', datetime.now().month))
-        # Synchronisation automatique activée en permanence; force_sync ignoré
-        auto_sync = True
-        force_sync = False
-        
-        # Si auto_sync est activé, synchroniser automatiquement les données manquantes
-        if auto_sync:
-            employes_actifs = Employe.objects.filter(user=request.user, statut='Actif')
-            for employe in employes_actifs:
-                try:
-                    # Créer ou mettre à jour automatiquement la paie avec les calculs de présence
-                    paie_employe, created = PaieEmploye.objects.get_or_create(
-                        employe=employe,
-                        mois=mois,
-                        annee=annee,
-                        defaults={'salaire_base': getattr(employe, 'salaire_base', 0)}
-                    )
-                    # Synchroniser les données de présence selon les formules exactes
-                    paie_employe.synchroniser_donnees_presence()
-                    # Synchroniser les données d'heures supplémentaires
-                    paie_employe.synchroniser_donnees_heures_supp()
-                    paie_employe.save()
-                except Exception:
-                    continue  # Continuer même en cas d'erreur pour un employé
         
         # Récupérer les paies filtrées
         paies = PaieEmploye.objects.filter(
@@ -64,53 +50,34 @@ def paie_employe_list(request):
         
         if employe_id:
             paies = paies.filter(employe_id=employe_id)
+        paies = list(paies)
         
         employes = Employe.objects.filter(user=request.user, statut='Actif').order_by('matricule')
         
+        # Calculer les statistiques de présence selon les formules exactes (une requête pour le mois)
+        stats_par_employe = calculer_statistiques_presence_batch([paie.employe for paie in paies], mois, annee)
+        
+        # Heures supplémentaires du mois, chargées en une requête et regroupées par employé
+        premier_jour = datetime(annee, mois, 1).date()
+        dernier_jour = datetime(annee, mois, calendar.monthrange(annee, mois)[1]).date()
+        heures_supp_par_employe = defaultdict(list)
+        for heure in HeureSupplementaire.objects.filter(
+            employe__in=[paie.employe_id for paie in paies],
+            date__gte=premier_jour,
+            date__lte=dernier_jour
+        ):
+            heures_supp_par_employe[heure.employe_id].append(heure)
+        
         # Enrichir les données avec les calculs de présence et heures supplémentaires
         paies_enrichies = []
         for paie in paies:
             try:
-                # Calculer les statistiques de présence selon les formules exactes
-                stats_calculees = calculer_statistiques_presence(
-                    paie.employe, paie.mois, paie.annee
-                )
-                
-                # Calculer les heures supplémentaires pour ce mois
-                from .models_entreprise import HeureSupplementaire
-                from datetime import datetime
-                import calendar
-                
-                # Déterminer la plage de dates pour le mois
-                premier_jour = datetime(paie.annee, paie.mois, 1).date()
-                dernier_jour_mois = calendar.monthrange(paie.annee, paie.mois)[1]
-                dernier_jour = datetime(paie.annee, paie.mois, dernier_jour_mois).date()
-                
-                # Récupérer les heures supplémentaires pour cet employé ce mois
-                heures_supp_mois = HeureSupplementaire.objects.filter(
-                    employe=paie.employe,
-                    date__gte=premier_jour,
-                    date__lte=dernier_jour
-                )
+                stats_calculees = stats_par_employe[paie.employe_id]
+                heures_supp_mois = heures_supp_par_employe.get(paie.employe_id, [])
                 
                 # Calculer les totaux
                 total_heures_supp = sum(float(h.duree) for h in heures_supp_mois)
                 total_montant_supp = sum(float(h.total_a_payer) for h in heures_supp_mois)
-
-                # Synchroniser les champs stockés avec les valeurs calculées (auto_sync activé)
-                if auto_sync:
-                    try:
-                        paie.jours_mois = stats_calculees.get('total_jours_mois')
-                    except Exception:
-                        pass
-                    paie.jours_presence = stats_calculees.get('jours_presence', 0)
-                    paie.absences = stats_calculees.get('absent', 0)
-                    paie.jours_repos = stats_calculees.get('j_repos', 0)
-                    paie.dimanches = stats_calculees.get('sundays', 0)
-                    paie.heures_supplementaires = total_heures_supp
-                    paie.montant_heures_supplementaires = total_montant_supp
-                    # Sauvegarder
-                    paie.save()
                 
                 # Vérifier la cohérence avec les données stockées
                 coherence = {
@@ -126,81 +93,12 @@ def paie_employe_list(request):
                 stats_calculees['heures_supplementaires'] = total_heures_supp
                 stats_calculees['montant_heures_supplementaires'] = total_montant_supp
                 
-                # ===== Calculs financiers (CNSS 5%, RTS, Net) =====
-                try:
-                    # Salaire brut = salaire_base + primes/indemnités + montant HS
-                    salaire_base = paie.salaire_base or (paie.employe.salaire_journalier or 0)
-                    primes_indemnites = (
-                        (paie.prime_discipline or 0) +
-                        (paie.cherete_vie or 0) +
-                        (paie.indemnite_transport or 0) +
-                        (paie.indemnite_logement or 0)
-                    )
-                    salaire_brut = Decimal(str(salaire_base)) + Decimal(str(primes_indemnites)) + Decimal(str(total_montant_supp or 0))
-
-                    # CNSS: par défaut 5% activé; clés de configuration si présentes
-                    try:
-                        param_appliquer = ParametrePaie.objects.get(cle='CNSS_ACTIVER', user=request.user)
-                        appliquer_cnss = str(param_appliquer.valeur).strip() in ['1', 'true', 'True', 'on']
-                    except ParametrePaie.DoesNotExist:
-                        appliquer_cnss = True
-
-                    try:
-                        param_taux = ParametrePaie.objects.get(cle='CNSS_TAUX', user=request.user)
-                        taux_cnss = Decimal(str(param_taux.valeur))
-                    except ParametrePaie.DoesNotExist:
-                        taux_cnss = Decimal('5.0')
-
-                    cnss_employe = (salaire_brut * taux_cnss / Decimal('100')) if appliquer_cnss else Decimal('0.00')
-
-                    # RTS: type FIXE avec taux, sinon barème progressif par défaut
-                    try:
-                        param_rts_type = ParametrePaie.objects.get(cle='RTS_TYPE', user=request.user)
-                        rts_type = (param_rts_type.valeur or 'PROGRESSIF').upper()
-                    except ParametrePaie.DoesNotExist:
-                        rts_type = 'PROGRESSIF'
-
-                    try:
-                        param_rts_taux = ParametrePaie.objects.get(cle='RTS_TAUX_FIXE', user=request.user)
-                        rts_taux_fixe = Decimal(str(param_rts_taux.valeur))
-                    except ParametrePaie.DoesNotExist:
-                        rts_taux_fixe = Decimal('10.0')
-
-                    salaire_net_imposable = salaire_brut - cnss_employe
-                    if rts_type == 'FIXE':
-                        rts_employe = (salaire_net_imposable * rts_taux_fixe) / Decimal('100')
-                    else:
-                        # Barème progressif simple
-                        if salaire_net_imposable <= Decimal('1000000'):
-                            rts_employe = Decimal('0.00')
-                        elif salaire_net_imposable <= Decimal('3000000'):
-                            rts_employe = (salaire_net_imposable - Decimal('1000000')) * Decimal('0.05')
-                        else:
-                            rts_tranche_2 = Decimal('2000000') * Decimal('0.05')
-                            rts_tranche_3 = (salaire_net_imposable - Decimal('3000000')) * Decimal('0.15')
-                            rts_employe = rts_tranche_2 + rts_tranche_3
-
-                    avance = Decimal(str(paie.avance_sur_salaire or paie.employe.avances or 0))
-                    sanctions = Decimal(str(paie.sanction_vol_carburant or 0))
-                    net_a_payer = salaire_brut - (cnss_employe + rts_employe + avance + sanctions)
-
-                    # Persister si auto_sync ou force_sync
-                    if auto_sync or force_sync:
-                        paie.salaire_brut = salaire_brut
-                        paie.cnss = cnss_employe
-                        paie.rts = rts_employe
-                        paie.salaire_net_a_payer = net_a_payer
-                        paie.save()
-                except Exception:
-                    # En cas d'erreur, ne pas bloquer l'affichage
-                    pass
-                
                 paies_enrichies.append({
                     'paie': paie,
                     'stats_calculees': stats_calculees,
                     'coherence': coherence,
                     'a_incoherences': not all(coherence.values()),
-                    'heures_supp_details': list(heures_supp_mois)
+                    'heures_supp_details': heures_supp_mois
                 })
             except Exception as e:
                 # En cas d'erreur, ajouter la paie sans enrichissement
@@ -228,16 +126,18 @@ def paie_employe_list(request):
                     'heures_supp_details': []
                 })
         
-        # Synchronisation automatique: pas de message spécifique force_sync
+        # Dernier job de synchronisation du mois (progression affichée dans la page)
+        job_synchronisation = SynchronisationPaieJob.objects.filter(
+            user=request.user, mois=mois, annee=annee
+        ).first()
 
         context = {
             'paies_enrichies': paies_enrichies,
+            'job_synchronisation': job_synchronisation,
             'employes': employes,
             'employe_id': employe_id,
             'annee': annee,
             'mois': mois,
-            'auto_sync': auto_sync,
-            'force_sync': force_sync,
             'mois_noms': {
                 1: 'Janvier', 2: 'Février', 3: 'Mars', 4: 'Avril',
                 5: 'Mai', 6: 'Juin', 7: 'Juillet', 8: 'Août',
@@ -323,10 +223,8 @@ def paie_employe_create(request, employe_id):
             sanctions = Decimal(str(request.POST.get('sanctions', employe.sanctions or 0)))
             
             # Calcul automatique des données de présence
-            presences_mois = PresenceJournaliere.objects.filter(
-                employe=employe,
-                date__month=mois,
-                date__year=annee
+            presences_mois = PresenceJournaliere.objects.for_month(mois, annee).filter(
+                employe=employe
             )
             
             # Calcul automatique des données de présence selon les formules exactes
@@ -344,10 +242,8 @@ def paie_employe_create(request, employe_id):
             ).count()
             
             # Calcul des heures supplémentaires
-            heures_supp = HeureSupplementaire.objects.filter(
-                employe=employe,
-                date__month=mois,
-                date__year=annee
+            heures_supp = HeureSupplementaire.objects.for_month(mois, annee).filter(
+                employe=employe
             )
             
             total_heures_supp = sum(h.duree for h in heures_supp)
@@ -890,7 +786,7 @@ def heure_supplementaire_list(request):
                     if employe_id_post:
                         heures_sup_all = heures_sup_all.filter(employe_id=employe_id_post)
                     if mois_post and annee_post:
-                        heures_sup_all = heures_sup_all.filter(date__month=int(mois_post), date__year=int(annee_post))
+                        heures_sup_all = heures_sup_all.for_month(mois_post, annee_post)
                     else:
                         if date_debut_post:
                             heures_sup_all = heures_sup_all.filter(date__gte=date_debut_post)
@@ -925,7 +821,7 @@ def heure_supplementaire_list(request):
                 if employe_id_post:
                     heures_sup_all = heures_sup_all.filter(employe_id=employe_id_post)
                 if mois_post and annee_post:
-                    heures_sup_all = heures_sup_all.filter(date__month=int(mois_post), date__year=int(annee_post))
+                    heures_sup_all = heures_sup_all.for_month(mois_post, annee_post)
                 else:
                     if date_debut_post:
                         heures_sup_all = heures_sup_all.filter(date__gte=date_debut_post)
@@ -1250,10 +1146,8 @@ def bulletin_paie_print(request, employe_id):
         pass
     
     # Récupération des présences pour le mois
-    presences_mois = PresenceJournaliere.objects.filter(
-        employe=employe,
-        date__month=mois_actuel,
-        date__year=annee_actuelle
+    presences_mois = PresenceJournaliere.objects.for_month(mois_actuel, annee_actuelle).filter(
+        employe=employe
     )
     
     # Calcul des statistiques de présence détaillées
@@ -1294,10 +1188,8 @@ def bulletin_paie_print(request, employe_id):
     ).count()
     
     # Récupération des heures supplémentaires
-    heures_supp = HeureSupplementaire.objects.filter(
-        employe=employe,
-        date__month=mois_actuel,
-        date__year=annee_actuelle
+    heures_supp = HeureSupplementaire.objects.for_month(mois_actuel, annee_actuelle).filter(
+        employe=employe
     )
     
     total_heures_supp = sum(h.duree for h in heures_supp)
@@ -1397,6 +1289,14 @@ def bulletin_paie_print(request, employe_id):
         'entreprise': entreprise,
     }
     
+    # Version PDF téléchargeable (file de rendu avec cache, voir utils_pdf)
+    if request.GET.get('format') == 'pdf':
+        from .utils_pdf import reponse_pdf
+        return reponse_pdf(
+            request, 'fleet_app/entreprise/bulletin_paie_print.html', context,
+            f"bulletin_{employe.matricule}_{mois_actuel:02d}_{annee_actuelle}.pdf",
+        )
+    
     return render(request, 'fleet_app/entreprise/bulletin_paie_print.html', context)
 
 @login_required
@@ -1433,17 +1333,18 @@ def bulletin_paie_list(request):
         
         bulletins_data = []
         
+        # Jours travaillés de tous les employés pour le mois (une requête groupée)
+        jours_travailles_par_employe = dict(
+            PresenceJournaliere.objects.for_month(mois_actuel, annee_actuelle).filter(
+                employe__in=employes,
+                present=True
+            ).values('employe').annotate(total=Count('id')).values_list('employe', 'total')
+        )
+        
         for employe in employes:
             try:
-                # Récupération des présences pour le mois
-                presences_mois = PresenceJournaliere.objects.filter(
-                    employe=employe,
-                    date__month=mois_actuel,
-                    date__year=annee_actuelle
-                )
-                
                 # Calculs de base sécurisés
-                total_jours_travailles = presences_mois.filter(present=True).count()
+                total_jours_travailles = jours_travailles_par_employe.get(employe.id, 0)
                 salaire_journalier = employe.salaire_journalier or Decimal('0')
                 salaire_brut = salaire_journalier * total_jours_travailles
                 
@@ -1841,10 +1742,8 @@ def creer_archive_complete(user, mois, annee):
         
         for employe in employes:
             # Présences du mois (TRANSACTIONNEL - à réinitialiser)
-            presences_mois = PresenceJournaliere.objects.filter(
-                employe=employe,
-                date__month=mois,
-                date__year=annee
+            presences_mois = PresenceJournaliere.objects.for_month(mois, annee).filter(
+                employe=employe
             )
             
             presences_data = []
@@ -1903,10 +1802,8 @@ def creer_archive_complete(user, mois, annee):
                 donnees_a_supprimer['paies'] += 1
             
             # Heures supplémentaires du mois (TRANSACTIONNEL - à réinitialiser)
-            heures_supp = HeureSupplementaire.objects.filter(
-                employe=employe,
-                date__month=mois,
-                date__year=annee
+            heures_supp = HeureSupplementaire.objects.for_month(mois, annee).filter(
+                employe=employe
             )
             
             heures_data = []
@@ -1962,10 +1859,8 @@ def creer_archive_complete(user, mois, annee):
         print(f"🔄 ARCHIVAGE: Réinitialisation des données transactionnelles")
         
         # Supprimer les présences du mois archivé
-        presences_supprimees = PresenceJournaliere.objects.filter(
-            employe__user=user,
-            date__month=mois,
-            date__year=annee
+        presences_supprimees = PresenceJournaliere.objects.for_month(mois, annee).filter(
+            employe__user=user
         ).delete()
         
         # Supprimer les paies du mois archivé
@@ -1976,10 +1871,8 @@ def creer_archive_complete(user, mois, annee):
         ).delete()
         
         # Supprimer les heures supplémentaires du mois archivé
-        heures_supprimees = HeureSupplementaire.objects.filter(
-            employe__user=user,
-            date__month=mois,
-            date__year=annee
+        heures_supprimees = HeureSupplementaire.objects.for_month(mois, annee).filter(
+            employe__user=user
         ).delete()
         
         # 6. PRÉPARATION POUR LE NOUVEAU MOIS
@@ -2693,10 +2586,8 @@ def bulletin_paie_list_working(request):
         for employe in employes:
             try:
                 # Récupération des présences pour le mois
-                presences_mois = PresenceJournaliere.objects.filter(
-                    employe=employe,
-                    date__month=mois_actuel,
-                    date__year=annee_actuelle
+                presences_mois = PresenceJournaliere.objects.for_month(mois_actuel, annee_actuelle).filter(
+                    employe=employe
                 )
                 
                 # Calculs de base sécurisés
@@ -12,6 +12,9 @@ from datetime import datetime
 # Import des modèles et formulaires nécessaires
 from .models_entreprise import PeseeCamion, FicheOr, FicheBordMachine
 from .forms_entreprise import PeseeCamionForm, FicheOrForm, FicheOrFormManuel, FicheBordMachineForm
+from .utils.tenant import get_tenant_context
+from .utils_pagination import paginer_par_curseur
+from .utils_pesees import statistiques_pesees
 
 @login_required
 def pesee_camion_list(request):
@@ -76,20 +79,11 @@ def pesee_camion_list(request):
 
     qs = qs.order_by('-date', '-weighing_end')
 
-    # Statistiques sur le queryset filtré
-    stats = {
-        'total_pesees': qs.count(),
-        'total_quantite': qs.aggregate(s=Sum('quantity'))['s'] or 0,
-        'moyenne_quantite': qs.aggregate(a=Avg('quantity'))['a'] or 0,
-        'top_plaques': list(qs.values('plate').annotate(total=Sum('quantity'), n=Count('id')).order_by('-total')[:5]),
-        'top_zones': list(qs.values('loading_zone').annotate(total=Sum('quantity'), n=Count('id')).order_by('-total')[:5]),
-    }
+    # Statistiques sur le queryset filtré (en cache par utilisateur et recherche)
+    stats = statistiques_pesees(request.user, qs, (request.GET.get('q') or '').strip())
 
-    # Pagination (25 par page)
-    from django.core.paginator import Paginator
-    paginator = Paginator(qs, 25)
-    page_number = request.GET.get('page')
-    pesees_page = paginator.get_page(page_number)
+    # Pagination par curseur (25 par page): coût constant quelle que soit la profondeur
+    pesees_page = paginer_par_curseur(request, qs, ordering=('-date', '-weighing_end'), per_page=25)
 
     context = {
         'pesees': pesees_page,
@@ -511,15 +505,8 @@ def pesee_camion_add(request):
             pesee = form.save(commit=False)
             pesee.user = request.user
             
-            # Récupérer l'entreprise de l'utilisateur connecté
-            try:
-                from fleet_app.models_accounts import Profil
-                profil = Profil.objects.get(user=request.user)
-                if hasattr(profil, 'entreprise') and profil.entreprise:
-                    pesee.entreprise = profil.entreprise
-            except Exception as e:
-                # En cas d'erreur, on continue sans associer d'entreprise
-                pass
+            # Entreprise du tenant (résolue une fois par requête par TenantMiddleware)
+            pesee.entreprise = get_tenant_context(request).entreprise
                 
             pesee.save()
             messages.success(request, "La pesée de camion a été ajoutée avec succès.")
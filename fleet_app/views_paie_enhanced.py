@@ -13,8 +13,8 @@ from decimal import Decimal
 from .models_entreprise import PaieEmploye, Employe, PresenceJournaliere, HeureSupplementaire
 from .utils_presence_paie import (
     calculer_statistiques_presence,
+    calculer_statistiques_presence_batch,
     synchroniser_presence_vers_paie,
-    synchroniser_tous_employes_mois
 )
 
 
@@ -27,19 +27,6 @@ def paie_employe_list_enhanced(request):
     employe_id = request.GET.get('employe_id')
     annee = int(request.GET.get('annee', datetime.now().year))
     mois = int(request.GET.get('mois', datetime.now().month))
-    auto_sync = request.GET.get('auto_sync', 'false') == 'true'
-    
-    # Si auto_sync est activé, synchroniser automatiquement les données
-    if auto_sync:
-        try:
-            rapport = synchroniser_tous_employes_mois(request.user, mois, annee)
-            if rapport['employes_synchronises'] > 0:
-                messages.success(
-                    request, 
-                    f"✅ {rapport['employes_synchronises']} paie(s) synchronisée(s) automatiquement pour {mois:02d}/{annee}"
-                )
-        except Exception as e:
-            messages.warning(request, f"⚠️ Synchronisation automatique échouée: {str(e)}")
     
     # Récupérer les paies filtrées
     paies = PaieEmploye.objects.filter(
@@ -67,9 +54,11 @@ def paie_employe_list_enhanced(request):
         'salaire_net': Decimal('0')
     }
     
+    # Calculer les statistiques de présence en temps réel (une requête pour toutes les paies)
+    stats_par_employe = calculer_statistiques_presence_batch([paie.employe for paie in paies], mois, annee)
+    
     for paie in paies:
-        # Calculer les statistiques de présence en temps réel
-        stats_presence = calculer_statistiques_presence(paie.employe, mois, annee)
+        stats_presence = stats_par_employe[paie.employe_id]
         
         # Vérifier la cohérence avec les données stockées
         coherence = {
@@ -80,10 +69,8 @@ def paie_employe_list_enhanced(request):
         }
         
         # Calculer les heures supplémentaires
-        heures_sup = HeureSupplementaire.objects.filter(
-            employe=paie.employe,
-            date__month=mois,
-            date__year=annee
+        heures_sup = HeureSupplementaire.objects.for_month(mois, annee).filter(
+            employe=paie.employe
         )
         total_heures_sup = sum(hs.duree for hs in heures_sup)
         # Utiliser le champ existant total_a_payer (déjà utilisé ailleurs) au lieu d'une méthode inexistante
@@ -131,7 +118,6 @@ def paie_employe_list_enhanced(request):
         'employe_id': employe_id,
         'annee': annee,
         'mois': mois,
-        'auto_sync': auto_sync,
         'total_global': total_global,
         'statistiques_periode': {
             'total_employes': employes.count(),
@@ -172,17 +158,13 @@ def paie_employe_detail_enhanced(request, paie_id):
     stats_presence = calculer_statistiques_presence(paie.employe, paie.mois, paie.annee)
     
     # Récupérer les présences détaillées du mois
-    presences = PresenceJournaliere.objects.filter(
-        employe=paie.employe,
-        date__month=paie.mois,
-        date__year=paie.annee
+    presences = PresenceJournaliere.objects.for_month(paie.mois, paie.annee).filter(
+        employe=paie.employe
     ).order_by('date')
     
     # Récupérer les heures supplémentaires du mois
-    heures_sup = HeureSupplementaire.objects.filter(
-        employe=paie.employe,
-        date__month=paie.mois,
-        date__year=paie.annee
+    heures_sup = HeureSupplementaire.objects.for_month(paie.mois, paie.annee).filter(
+        employe=paie.employe
     ).order_by('date')
     
     # Vérifier la cohérence
@@ -340,8 +322,10 @@ def export_paies_csv(request):
         annee=annee
     ).select_related('employe')
     
+    stats_par_employe = calculer_statistiques_presence_batch([paie.employe for paie in paies], mois, annee)
+    
     for paie in paies:
-        stats = calculer_statistiques_presence(paie.employe, mois, annee)
+        stats = stats_par_employe[paie.employe_id]
         
         writer.writerow([
             paie.employe.matricule,
@@ -0,0 +1,31 @@
+"""
+Vues de suivi et de téléchargement des rendus PDF (voir utils_pdf)
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+
+from .models_pdf import RenduPdf
+from .utils_pdf import servir_rendu_pdf
+
+
+@login_required
+def rendu_pdf_status(request, rendu_id):
+    """
+    API de suivi d'un rendu PDF (statut et URL du fichier une fois terminé)
+    """
+    rendu = RenduPdf.objects.filter(pk=rendu_id, user=request.user).first()
+    if rendu is None:
+        return JsonResponse({'error': 'Rendu introuvable'}, status=404)
+    return JsonResponse(rendu.as_dict())
+
+
+@login_required
+def rendu_pdf_telecharger(request, rendu_id):
+    """
+    Téléchargement d'un rendu PDF terminé
+    """
+    rendu = RenduPdf.objects.filter(pk=rendu_id, user=request.user).first()
+    if rendu is None or not rendu.fichier_disponible:
+        raise Http404("PDF indisponible")
+    return servir_rendu_pdf(rendu)
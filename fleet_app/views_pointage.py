@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.db.models import Q
@@ -10,6 +11,7 @@ import calendar
 from datetime import date, datetime
 import json
 from .forms import PointageJournalierForm, PointageRapideForm
+from .signals import recalcul_paie_differe, marquer_paie_a_recalculer, mettre_a_jour_colonnes_presence_paies
 from decimal import Decimal
 
 
@@ -39,10 +41,8 @@ def pointage_journalier(request):
     employes = Employe.objects.filter(user=request.user, statut='Actif').order_by('nom', 'prenom')
     
     # Récupérer toutes les présences du mois
-    presences = PresenceJournaliere.objects.filter(
-        employe__user=request.user,
-        date__year=annee,
-        date__month=mois
+    presences = PresenceJournaliere.objects.for_month(mois, annee).filter(
+        employe__user=request.user
     ).select_related('employe')
     
     # Organiser les présences par employé et date
@@ -169,22 +169,21 @@ def pointage_ajax(request):
                     'message': 'Impossible de pointer dans le futur'
                 })
             
-            # Créer ou mettre à jour le pointage
-            pointage, created = PresenceJournaliere.objects.update_or_create(
-                employe=employe,
-                date=date_obj,
-                defaults={'statut': statut}
-            )
+            # Créer ou mettre à jour le pointage (paie resynchronisée une fois au commit)
+            with recalcul_paie_differe():
+                pointage, created = PresenceJournaliere.objects.update_or_create(
+                    employe=employe,
+                    date=date_obj,
+                    defaults={'statut': statut}
+                )
             
             action = 'créé' if created else 'mis à jour'
 
             # Calculer les compteurs mis à jour pour l'employé sur le mois de la date pointée
             mois = date_obj.month
             annee = date_obj.year
-            presences_mois = PresenceJournaliere.objects.filter(
-                employe=employe,
-                date__year=annee,
-                date__month=mois
+            presences_mois = PresenceJournaliere.objects.for_month(mois, annee).filter(
+                employe=employe
             )
 
             count_P_Am = 0
@@ -252,6 +251,90 @@ def pointage_ajax(request):
     return JsonResponse({'success': False, 'message': 'Méthode non autorisée'})
 
 
+@login_required
+@require_http_methods(["POST"])
+def pointage_bulk(request):
+    """
+    API AJAX pour enregistrer une grille de pointage complète en une transaction
+
+    Corps JSON attendu :
+        {"pointages": [{"employe_id": 1, "date": "2025-03-01", "statut": "P(Am_&_Pm)"}, ...]}
+
+    Les cellules sont validées puis insérées ou mises à jour en masse sur la clé
+    (employé, date) ; les colonnes de présence des paies sont ensuite recalculées
+    une seule fois par mois, et chaque paie touchée resynchronisée une seule fois.
+    """
+    try:
+        data = json.loads(request.body)
+        cellules = data['pointages']
+        if not isinstance(cellules, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'message': 'Format JSON invalide'}, status=400)
+    
+    statuts_valides = dict(PresenceJournaliere.STATUT_CHOICES)
+    aujourd_hui = timezone.now().date()
+    
+    # Employés de l'utilisateur concernés par la grille (une requête)
+    employe_ids = {str(c.get('employe_id')) for c in cellules if isinstance(c, dict)}
+    employes = {
+        str(e.id): e for e in Employe.objects.filter(user=request.user, id__in=[i for i in employe_ids if i.isdigit()])
+    }
+    
+    erreurs = []
+    pointages = {}
+    for index, cellule in enumerate(cellules):
+        if not isinstance(cellule, dict):
+            erreurs.append({'index': index, 'message': 'Cellule invalide'})
+            continue
+        employe = employes.get(str(cellule.get('employe_id')))
+        statut = cellule.get('statut')
+        try:
+            date_obj = datetime.strptime(str(cellule.get('date')), '%Y-%m-%d').date()
+        except ValueError:
+            erreurs.append({'index': index, 'message': 'Date invalide'})
+            continue
+        if employe is None:
+            erreurs.append({'index': index, 'message': 'Employé introuvable'})
+        elif statut not in statuts_valides:
+            erreurs.append({'index': index, 'message': f'Statut invalide: {statut}'})
+        elif date_obj > aujourd_hui:
+            erreurs.append({'index': index, 'message': 'Impossible de pointer dans le futur'})
+        else:
+            # En cas de doublon dans la grille, la dernière valeur l'emporte
+            pointages[(employe.id, date_obj)] = PresenceJournaliere(
+                employe=employe, date=date_obj, statut=statut, user=request.user
+            )
+    
+    if erreurs:
+        return JsonResponse({'success': False, 'message': 'Pointages invalides', 'erreurs': erreurs}, status=400)
+    
+    # Employés touchés par mois, pour le recalcul des paies
+    employes_par_mois = {}
+    for employe_id, date_obj in pointages:
+        employes_par_mois.setdefault((date_obj.month, date_obj.year), {})[employe_id] = employes[str(employe_id)]
+    
+    with recalcul_paie_differe():
+        PresenceJournaliere.objects.bulk_create(
+            pointages.values(),
+            update_conflicts=True,
+            unique_fields=['employe', 'date'],
+            update_fields=['statut'],
+            batch_size=500,
+        )
+        for (mois, annee), employes_mois in employes_par_mois.items():
+            mettre_a_jour_colonnes_presence_paies(list(employes_mois.values()), mois, annee)
+            for employe in employes_mois.values():
+                marquer_paie_a_recalculer(employe, mois, annee)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(pointages)} pointage(s) enregistré(s)',
+        'nb_pointages': len(pointages),
+        'nb_employes': len({employe_id for employe_id, _ in pointages}),
+    })
+
+
 @login_required
 def pointage_formulaire(request):
     """Vue pour le formulaire de pointage individuel"""
@@ -310,7 +393,9 @@ def pointage_rapide(request):
     if request.method == 'POST':
         form = PointageRapideForm(request.POST, user=request.user)
         if form.is_valid():
-            pointages_crees, pointages_mis_a_jour = form.save(request.user)
+            # Une seule resynchronisation de paie par employé pour tout le lot
+            with recalcul_paie_differe():
+                pointages_crees, pointages_mis_a_jour = form.save(request.user)
             
             total = pointages_crees + pointages_mis_a_jour
             if total > 0:
@@ -11,12 +11,13 @@ from django.views.decorators.http import require_http_methods
 from datetime import datetime
 import json
 
-from .signals import synchroniser_module_complet, verifier_coherence_donnees
+from .signals import verifier_coherence_donnees
 from .models_entreprise import (
     Employe, PaieEmploye, PresenceJournaliere, 
     HeureSupplementaire, ConfigurationMontantEmploye,
-    ParametrePaie
+    ParametrePaie, SynchronisationPaieJob
 )
+from .utils_paie_sync import demander_synchronisation_paies
 
 
 @login_required
@@ -32,24 +33,24 @@ def synchronization_dashboard(request):
             mois=datetime.now().month,
             annee=datetime.now().year
         ).count(),
-        'nb_presences_mois_actuel': PresenceJournaliere.objects.filter(
-            employe__user=request.user,
-            date__month=datetime.now().month,
-            date__year=datetime.now().year
+        'nb_presences_mois_actuel': PresenceJournaliere.objects.for_month(datetime.now().month, datetime.now().year).filter(
+            employe__user=request.user
         ).count(),
-        'nb_heures_supp_mois_actuel': HeureSupplementaire.objects.filter(
-            employe__user=request.user,
-            date__month=datetime.now().month,
-            date__year=datetime.now().year
+        'nb_heures_supp_mois_actuel': HeureSupplementaire.objects.for_month(datetime.now().month, datetime.now().year).filter(
+            employe__user=request.user
         ).count(),
     }
     
     # Vérification de cohérence
     rapport_coherence = verifier_coherence_donnees(request.user)
     
+    # Derniers jobs de synchronisation des paies (progression suivie en AJAX)
+    jobs_synchronisation = SynchronisationPaieJob.objects.filter(user=request.user)[:5]
+    
     context = {
         'stats': stats,
         'rapport_coherence': rapport_coherence,
+        'jobs_synchronisation': jobs_synchronisation,
         'mois_actuel': datetime.now().month,
         'annee_actuelle': datetime.now().year,
     }
@@ -61,37 +62,23 @@ def synchronization_dashboard(request):
 @require_http_methods(["POST"])
 def synchroniser_donnees_ajax(request):
     """
-    Synchronisation AJAX des données pour un mois donné
+    Met en file la synchronisation des paies d'un mois donné
+
+    La synchronisation s'exécute en arrière-plan ; la réponse contient le job
+    dont la progression se suit via `synchronisation_job_status`.
     """
     try:
         data = json.loads(request.body)
         mois = int(data.get('mois', datetime.now().month))
         annee = int(data.get('annee', datetime.now().year))
         
-        # Lancer la synchronisation complète
-        success = synchroniser_module_complet(request.user, mois, annee)
+        job = demander_synchronisation_paies(request.user, mois, annee)
         
-        if success:
-            # Récupérer les nouvelles statistiques
-            stats_apres = {
-                'nb_employes': Employe.objects.filter(user=request.user).count(),
-                'nb_paies_synchronisees': PaieEmploye.objects.filter(
-                    employe__user=request.user,
-                    mois=mois,
-                    annee=annee
-                ).count(),
-            }
-            
-            return JsonResponse({
-                'success': True,
-                'message': f'Synchronisation complète réussie pour {mois}/{annee}',
-                'stats': stats_apres
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'message': 'Erreur lors de la synchronisation'
-            })
+        return JsonResponse({
+            'success': True,
+            'message': f'Synchronisation programmée pour {mois}/{annee}',
+            'job': job.as_dict()
+        })
             
     except Exception as e:
         return JsonResponse({
@@ -100,6 +87,17 @@ def synchroniser_donnees_ajax(request):
         })
 
 
+@login_required
+def synchronisation_job_status(request, job_id):
+    """
+    API de suivi d'un job de synchronisation des paies (statut et progression)
+    """
+    job = SynchronisationPaieJob.objects.filter(pk=job_id, user=request.user).first()
+    if job is None:
+        return JsonResponse({'error': 'Job introuvable'}, status=404)
+    return JsonResponse(job.as_dict())
+
+
 @login_required
 @require_http_methods(["POST"])
 def verifier_coherence_ajax(request):
@@ -224,17 +222,13 @@ def status_synchronization_api(request):
                 'inactifs': employes.filter(statut='Inactif').count(),
             },
             'presences': {
-                'total': PresenceJournaliere.objects.filter(
-                    employe__user=request.user,
-                    date__month=mois,
-                    date__year=annee
+                'total': PresenceJournaliere.objects.for_month(mois, annee).filter(
+                    employe__user=request.user
                 ).count(),
             },
             'heures_supplementaires': {
-                'total': HeureSupplementaire.objects.filter(
-                    employe__user=request.user,
-                    date__month=mois,
-                    date__year=annee
+                'total': HeureSupplementaire.objects.for_month(mois, annee).filter(
+                    employe__user=request.user
                 ).count(),
             },
             'paies': {
@@ -0,0 +1,40 @@
+"""
+API de typeahead commune à toutes les listes de suggestions (voir utils_typeahead)
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_GET
+
+from .utils_typeahead import cle_typeahead, resultats_typeahead
+
+
+@login_required
+@require_GET
+def typeahead(request):
+    """
+    Suggestions JSON compactes: ?q=<préfixes>&types=vehicule,fournisseur&limit=10&apres=<curseur>
+
+    Réponse: {"results": [{"id", "text", "type", "url"}], "next": curseur de la page suivante ou null}.
+    L'ETag dépend de la version de l'index du tenant: une saisie déjà vue est
+    renvoyée en 304 sans recherche.
+    """
+    parametres = (
+        request.GET.get('q', ''),
+        request.GET.get('types', '').split(','),
+        request.GET.get('limit'),
+        request.GET.get('apres'),
+    )
+    _, cle = cle_typeahead(request.user, *parametres)
+    etag = quote_etag(cle)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        reponse = HttpResponseNotModified()
+    else:
+        _, donnees = resultats_typeahead(request.user, *parametres)
+        reponse = JsonResponse(donnees, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+    reponse['ETag'] = etag
+    reponse['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(reponse, ['Cookie'])
+    return reponse
@@ -1,15 +1,16 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Sum, Count, Q, Avg
+from django.db.models import Sum, Count, Q, Avg, F
 from django.utils import timezone
 from datetime import datetime, timedelta, date
 from django.http import JsonResponse
-import calendar
-from collections import defaultdict
 
 from .models import Vehicule, FeuilleDeRoute, CoutFonctionnement, ConsommationCarburant
 from .models_location import LocationVehicule, FeuillePontageLocation, FactureLocation
 from .models_inventaire import EntreeStock, SortieStock
+from .utils_vehicule_stats import (
+    series_mensuelles_vehicules, stats_vehicules, totaliser_serie, stats_mensuelles_graphique,
+)
 
 
 @login_required
@@ -39,14 +40,13 @@ def vehicule_stats_dashboard(request):
         'vehicules_hors_service': vehicules.filter(statut_actuel='Hors service').count(),
     }
     
-    # Statistiques par véhicule pour la période
-    vehicules_stats = []
-    for vehicule in vehicules:
-        stats = calculer_stats_vehicule(vehicule, start_date, end_date, user)
-        vehicules_stats.append({
-            'vehicule': vehicule,
-            'stats': stats
-        })
+    # Statistiques par véhicule pour la période (requêtes groupées pour tous les véhicules)
+    vehicules = list(vehicules)
+    stats_par_vehicule = stats_vehicules(vehicules, start_date, end_date, user)
+    vehicules_stats = [
+        {'vehicule': vehicule, 'stats': stats_par_vehicule[vehicule.pk]}
+        for vehicule in vehicules
+    ]
     
     # Statistiques d'entretien globales
     stats_entretien = calculer_stats_entretien_globales(user, start_date, end_date)
@@ -83,11 +83,16 @@ def vehicule_stats_detail(request, vehicule_id):
     if request.GET.get('end_date'):
         end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
     
+    # Séries mensuelles du véhicule, utilisées pour les totaux et pour les graphiques
+    serie = series_mensuelles_vehicules([vehicule], start_date, end_date, request.user)[vehicule.pk]
+    
     # Calculer les statistiques détaillées
-    stats = calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, request.user)
+    stats = calculer_stats_vehicule_detaillees(
+        vehicule, start_date, end_date, request.user, stats_base=totaliser_serie(serie, start_date, end_date)
+    )
     
     # Données pour les graphiques
-    stats_mensuelles = calculer_stats_mensuelles(vehicule, start_date, end_date, request.user)
+    stats_mensuelles = stats_mensuelles_graphique(serie, start_date, end_date)
     
     context = {
         'vehicule': vehicule,
@@ -102,90 +107,16 @@ def vehicule_stats_detail(request, vehicule_id):
 
 def calculer_stats_vehicule(vehicule, start_date, end_date, user):
     """Calcule les statistiques d'un véhicule pour une période donnée"""
-    
-    # Jours d'activité via feuilles de route
-    feuilles_route = FeuilleDeRoute.objects.filter(
-        vehicule=vehicule,
-        date_depart__range=[start_date, end_date]
-    )
-    
-    # Calculer les jours d'activité basés sur les feuilles de route complétées
-    jours_actifs = feuilles_route.filter(date_retour__isnull=False, signature_chauffeur=True).count()
-    jours_inactifs = 0  # Pas de statut inactif dans le modèle
-    jours_entretien = 0  # Pas de statut entretien dans le modèle
-    jours_hors_service = 0  # Pas de statut hors service dans le modèle
-    
-    # Jours d'activité via locations
-    locations = LocationVehicule.objects.filter(
-        vehicule=vehicule,
-        user=user,
-        date_debut__lte=end_date,
-        date_fin__gte=start_date
-    )
-    
-    jours_location_travail = 0
-    jours_location_entretien = 0
-    jours_location_hs = 0
-    
-    for location in locations:
-        pontages = FeuillePontageLocation.objects.filter(
-            location=location,
-            date__range=[start_date, end_date],
-            user=user
-        )
-        jours_location_travail += pontages.filter(statut='Travail').count()
-        jours_location_entretien += pontages.filter(statut='Entretien').count()
-        jours_location_hs += pontages.filter(statut='Hors service').count()
-    
-    # Coûts d'entretien
-    couts_entretien = CoutFonctionnement.objects.filter(
-        vehicule=vehicule,
-        date__range=[start_date, end_date],
-        type_cout='Entretien',
-        user=user
-    ).aggregate(total=Sum('montant'))['total'] or 0
-    
-    # Pièces utilisées (sorties de stock) - filtrage par destination contenant l'immatriculation
-    pieces_utilisees = SortieStock.objects.filter(
-        destination__icontains=vehicule.immatriculation,
-        date__range=[start_date, end_date],
-        entreprise__profil__user=user
-    ).aggregate(
-        total_pieces=Sum('quantite'),
-        valeur_pieces=Sum('quantite')  # Pas de prix_unitaire dans SortieStock
-    )
-    
-    # Consommation carburant
-    consommation = ConsommationCarburant.objects.filter(
-        vehicule=vehicule,
-        date_plein2__range=[start_date, end_date],
-        user=user
-    ).aggregate(
-        total_litres=Sum('litres_ajoutes'),
-        total_cout=Sum('litres_ajoutes')  # ConsommationCarburant n'a pas de champ cout_total
-    )
-    
-    # Frais de location
-    frais_location = calculer_frais_location(vehicule, start_date, end_date, user)
-    
-    return {
-        'jours_actifs': jours_actifs + jours_location_travail,
-        'jours_inactifs': jours_inactifs,
-        'jours_entretien': jours_entretien + jours_location_entretien,
-        'jours_hors_service': jours_hors_service + jours_location_hs,
-        'cout_entretien': couts_entretien,
-        'pieces_utilisees': pieces_utilisees['total_pieces'] or 0,
-        'valeur_pieces': pieces_utilisees['valeur_pieces'] or 0,
-        'consommation_litres': consommation['total_litres'] or 0,
-        'cout_carburant': consommation['total_cout'] or 0,
-        'frais_location': frais_location,
-    }
+    return stats_vehicules([vehicule], start_date, end_date, user)[vehicule.pk]
 
 
-def calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, user):
-    """Calcule les statistiques détaillées d'un véhicule"""
+def calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, user, stats_base=None):
+    """Calcule les statistiques détaillées d'un véhicule
+    (stats_base: statistiques de période déjà calculées par le moteur, sinon calculées ici)
+    """
     
-    stats_base = calculer_stats_vehicule(vehicule, start_date, end_date, user)
+    if stats_base is None:
+        stats_base = calculer_stats_vehicule(vehicule, start_date, end_date, user)
     
     # Calculs additionnels
     total_jours = (end_date - start_date).days + 1
@@ -197,8 +128,9 @@ def calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, user):
     
     # Coût par jour d'utilisation
     jours_utilisation = stats_base['jours_actifs'] + stats_base['jours_entretien']
-    cout_total = (stats_base['cout_entretien'] + stats_base['valeur_pieces'] + 
-                  stats_base['cout_carburant'] + stats_base['frais_location']['total'])
+    # Montants de types différents (FloatField, DecimalField) ramenés en float
+    cout_total = (float(stats_base['cout_entretien']) + float(stats_base['valeur_pieces']) + 
+                  float(stats_base['cout_carburant']) + float(stats_base['frais_location']['total']))
     
     cout_par_jour = cout_total / jours_utilisation if jours_utilisation > 0 else 0
     
@@ -207,7 +139,7 @@ def calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, user):
                            if stats_base['jours_actifs'] > 0 else 0)
     
     # Calcul de rentabilité
-    rentabilite = stats_base['frais_location']['total'] - cout_total
+    rentabilite = float(stats_base['frais_location']['total']) - cout_total
     
     stats_base.update({
         'total_jours': total_jours,
@@ -225,41 +157,7 @@ def calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, user):
 
 def calculer_frais_location(vehicule, start_date, end_date, user):
     """Calcule les frais de location pour un véhicule"""
-    
-    locations = LocationVehicule.objects.filter(
-        vehicule=vehicule,
-        user=user,
-        date_debut__lte=end_date,
-        date_fin__gte=start_date
-    )
-    
-    frais_journaliers = 0
-    jours_factures = 0
-    
-    for location in locations:
-        # Calculer les jours de travail facturables dans la période
-        pontages = FeuillePontageLocation.objects.filter(
-            location=location,
-            date__range=[start_date, end_date],
-            statut='Travail',
-            user=user
-        )
-        
-        jours_travail = pontages.count()
-        frais_journaliers += jours_travail * location.tarif_journalier
-        jours_factures += jours_travail
-    
-    # Calculs mensuels et annuels (estimations basées sur les données actuelles)
-    frais_mensuels = (frais_journaliers / ((end_date - start_date).days + 1)) * 30 if frais_journaliers > 0 else 0
-    frais_annuels = frais_mensuels * 12
-    
-    return {
-        'journalier': frais_journaliers,
-        'mensuel': frais_mensuels,
-        'annuel': frais_annuels,
-        'total': frais_journaliers,
-        'jours_factures': jours_factures,
-    }
+    return calculer_stats_vehicule(vehicule, start_date, end_date, user)['frais_location']
 
 
 def calculer_stats_entretien_globales(user, start_date, end_date):
@@ -306,20 +204,15 @@ def calculer_stats_location_globales(user, start_date, end_date):
         date_fin__gte=start_date
     )
     
-    revenus_totaux = 0
-    jours_location_totaux = 0
-    
-    for location in locations:
-        pontages = FeuillePontageLocation.objects.filter(
-            location=location,
-            date__range=[start_date, end_date],
-            statut='Travail',
-            user=user
-        )
-        
-        jours_travail = pontages.count()
-        revenus_totaux += jours_travail * location.tarif_journalier
-        jours_location_totaux += jours_travail
+    # Jours de travail et revenus de toutes les locations en une agrégation
+    totaux = FeuillePontageLocation.objects.filter(
+        location__in=locations,
+        date__range=[start_date, end_date],
+        statut='Travail',
+        user=user
+    ).aggregate(jours=Count('pk'), revenus=Sum(F('location__tarif_journalier')))
+    revenus_totaux = totaux['revenus'] or 0
+    jours_location_totaux = totaux['jours']
     
     return {
         'revenus_totaux': revenus_totaux,
@@ -331,46 +224,8 @@ def calculer_stats_location_globales(user, start_date, end_date):
 
 def calculer_stats_mensuelles(vehicule, start_date, end_date, user):
     """Calcule les statistiques mensuelles pour les graphiques"""
-    
-    stats_par_mois = defaultdict(lambda: {
-        'jours_actifs': 0,
-        'jours_entretien': 0,
-        'cout_entretien': 0,
-        'cout_carburant': 0,
-        'frais_location': 0,
-    })
-    
-    # Parcourir chaque mois dans la période
-    current_date = start_date.replace(day=1)
-    while current_date <= end_date:
-        # Dernier jour du mois
-        last_day = calendar.monthrange(current_date.year, current_date.month)[1]
-        month_end = current_date.replace(day=last_day)
-        
-        # Limiter à la période demandée
-        period_start = max(current_date, start_date)
-        period_end = min(month_end, end_date)
-        
-        # Calculer les stats pour ce mois
-        stats_mois = calculer_stats_vehicule(vehicule, period_start, period_end, user)
-        
-        mois_key = current_date.strftime('%Y-%m')
-        stats_par_mois[mois_key] = {
-            'mois': current_date.strftime('%B %Y'),
-            'jours_actifs': stats_mois['jours_actifs'],
-            'jours_entretien': stats_mois['jours_entretien'],
-            'cout_entretien': stats_mois['cout_entretien'],
-            'cout_carburant': stats_mois['cout_carburant'],
-            'frais_location': stats_mois['frais_location']['total'],
-        }
-        
-        # Passer au mois suivant
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
-    
-    return dict(stats_par_mois)
+    serie = series_mensuelles_vehicules([vehicule], start_date, end_date, user)[vehicule.pk]
+    return stats_mensuelles_graphique(serie, start_date, end_date)
 
 
 @login_required
@@ -387,9 +242,11 @@ def vehicule_stats_export(request):
     else:
         # Statistiques globales
         vehicules = Vehicule.objects.filter(user=request.user)
-        stats = {}
-        for vehicule in vehicules:
-            stats[str(vehicule.pk)] = calculer_stats_mensuelles(vehicule, start_date, end_date, request.user)
+        series = series_mensuelles_vehicules(vehicules, start_date, end_date, request.user)
+        stats = {
+            str(pk): stats_mensuelles_graphique(serie, start_date, end_date)
+            for pk, serie in series.items()
+        }
     
     return JsonResponse(stats)
 
@@ -402,27 +259,23 @@ def vehicule_comparaison_stats(request):
     start_date = datetime.strptime(request.GET.get('start_date', '2024-01-01'), '%Y-%m-%d').date()
     end_date = datetime.strptime(request.GET.get('end_date', str(timezone.now().date())), '%Y-%m-%d').date()
     
-    vehicules_stats = []
-    
     if vehicule_ids:
-        vehicules = Vehicule.objects.filter(pk__in=vehicule_ids, user=request.user)
-        
-        for vehicule in vehicules:
-            stats = calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, request.user)
-            vehicules_stats.append({
-                'vehicule': vehicule,
-                'stats': stats
-            })
+        vehicules = list(Vehicule.objects.filter(pk__in=vehicule_ids, user=request.user))
     else:
         # Si aucun véhicule sélectionné, prendre tous les véhicules
-        vehicules = Vehicule.objects.filter(user=request.user)[:5]  # Limiter à 5 pour la lisibilité
-        
-        for vehicule in vehicules:
-            stats = calculer_stats_vehicule_detaillees(vehicule, start_date, end_date, request.user)
-            vehicules_stats.append({
-                'vehicule': vehicule,
-                'stats': stats
-            })
+        vehicules = list(Vehicule.objects.filter(user=request.user)[:5])  # Limiter à 5 pour la lisibilité
+    
+    # Statistiques de tous les véhicules comparés en requêtes groupées
+    stats_par_vehicule = stats_vehicules(vehicules, start_date, end_date, request.user)
+    vehicules_stats = [
+        {
+            'vehicule': vehicule,
+            'stats': calculer_stats_vehicule_detaillees(
+                vehicule, start_date, end_date, request.user, stats_base=stats_par_vehicule[vehicule.pk]
+            ),
+        }
+        for vehicule in vehicules
+    ]
     
     context = {
         'vehicules_stats': vehicules_stats,
@@ -433,3 +286,56 @@ def vehicule_comparaison_stats(request):
     }
     
     return render(request, 'fleet_app/stats/vehicule_comparaison.html', context)
+
+
+# Nombre maximal de véhicules par appel de l'API de comparaison
+MAX_VEHICULES_COMPARAISON = 500
+
+# Colonnes renvoyées par l'API de comparaison (une liste par métrique)
+METRIQUES_COMPARAISON = (
+    'jours_actifs', 'jours_entretien', 'jours_hors_service', 'pourcentage_actif',
+    'cout_entretien', 'pieces_utilisees', 'consommation_litres', 'frais_location',
+    'cout_total', 'cout_par_jour', 'rentabilite',
+)
+
+
+@login_required
+def vehicule_comparaison_api(request):
+    """API de comparaison de flotte au format colonne
+    Une liste par métrique, un élément par véhicule (même ordre que `vehicules.id`),
+    calculée en requêtes groupées quel que soit le nombre de véhicules (max 500)
+    """
+    vehicule_ids = request.GET.getlist('vehicules')
+    try:
+        start_date = datetime.strptime(request.GET.get('start_date', '2024-01-01'), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.GET.get('end_date', str(timezone.now().date())), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Dates invalides (format AAAA-MM-JJ)'}, status=400)
+    if len(vehicule_ids) > MAX_VEHICULES_COMPARAISON:
+        return JsonResponse({'error': f'Maximum {MAX_VEHICULES_COMPARAISON} véhicules par comparaison'}, status=400)
+    
+    vehicules = Vehicule.objects.filter(user=request.user).order_by('id_vehicule')
+    if vehicule_ids:
+        vehicules = vehicules.filter(pk__in=vehicule_ids)
+    vehicules = list(vehicules.only('id_vehicule', 'immatriculation', 'marque', 'modele')[:MAX_VEHICULES_COMPARAISON])
+    
+    stats_par_vehicule = stats_vehicules(vehicules, start_date, end_date, request.user)
+    colonnes = {metrique: [] for metrique in METRIQUES_COMPARAISON}
+    for vehicule in vehicules:
+        stats = calculer_stats_vehicule_detaillees(
+            vehicule, start_date, end_date, request.user, stats_base=stats_par_vehicule[vehicule.pk]
+        )
+        stats['frais_location'] = stats['frais_location']['total']
+        for metrique in METRIQUES_COMPARAISON:
+            colonnes[metrique].append(float(stats[metrique]))
+    
+    return JsonResponse({
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'vehicules': {
+            'id': [vehicule.pk for vehicule in vehicules],
+            'immatriculation': [vehicule.immatriculation for vehicule in vehicules],
+            'libelle': [f"{vehicule.marque} {vehicule.modele}" for vehicule in vehicules],
+        },
+        'metriques': colonnes,
+    })
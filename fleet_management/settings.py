@@ -49,6 +49,13 @@ MIDDLEWARE = [
     'fleet_app.middleware.SynchronisationMiddleware',
 ]
 
+# L'utilisateur est chargé avec son profil et son entreprise (une requête).
+# Seul backend: un second ModelBackend rehacherait le mot de passe à chaque
+# échec de connexion (les sessions ouvertes avant ce backend se reconnectent).
+AUTHENTICATION_BACKENDS = [
+    'fleet_app.backends.TenantModelBackend',
+]
+
 ROOT_URLCONF = 'fleet_management.urls'
 
 TEMPLATES = [
@@ -88,9 +95,40 @@ DATABASES = {
         'PASSWORD': _db_password,
         'HOST': _db_host,
         'PORT': _db_port,
+        # L'historique de migrations ne s'applique pas sur une base vierge
+        # (0010 ré-ajoute des colonnes existantes) : la base de test est
+        # créée directement depuis les modèles.
+        'TEST': {'MIGRATE': False},
     }
 }
 
+# Cache des compteurs par tenant (voir fleet_app/utils_cache.py) : les versions
+# des espaces sont incrémentées par `cache.incr`, qui doit être atomique.
+# DJANGO_CACHE_BACKEND: 'locmem' (défaut, mémoire du processus: développement
+# ou serveur à un seul worker), 'redis' (paquet `redis`) ou 'memcached'
+# (paquet `pymemcache`) pour plusieurs workers, à l'adresse DJANGO_CACHE_LOCATION.
+# Les tests utilisent toujours un cache mémoire propre (voir TEST_RUNNER)
+_cache_backend = os.getenv('DJANGO_CACHE_BACKEND', 'locmem')
+
+if _cache_backend == 'redis':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    }}
+elif _cache_backend == 'memcached':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', '127.0.0.1:11211'),
+    }}
+else:
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'guineegest',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('DJANGO_CACHE_MAX_ENTRIES', '20000'))},
+    }}
+
+TEST_RUNNER = 'fleet_management.test_runner.CacheMemoireTestRunner'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -136,3 +174,20 @@ CSRF_COOKIE_SECURE = False
 CSRF_COOKIE_HTTPONLY = False
 CSRF_USE_SESSIONS = False
 CSRF_COOKIE_SAMESITE = None
+
+# Synchronisation des paies: exécuter les jobs dans un thread après la requête.
+# Mettre à False si les jobs sont traités par `python manage.py traiter_jobs_paie`
+# (tâche planifiée), par exemple sur un hébergement qui interdit les threads.
+PAIE_SYNC_ARRIERE_PLAN = True
+# Un job « en cours » depuis plus longtemps (secondes) est repris: worker arrêté en cours de traitement
+PAIE_SYNC_DELAI_BLOQUE = 30 * 60
+
+# Rendus PDF: convertir les documents dans un thread après la requête.
+# Mettre à False si les rendus sont traités par `python manage.py traiter_rendus_pdf`.
+PDF_RENDU_ARRIERE_PLAN = True
+
+# Lots PDF: nombre de processus convertissant les fragments en parallèle (1 = dans le thread du rendu)
+PDF_PROCESSUS = min(4, os.cpu_count() or 1)
+
+# Rendus PDF terminés et fichiers du cache conservés (jours), purgés par `traiter_rendus_pdf`
+PDF_RETENTION_JOURS = int(os.getenv('PDF_RETENTION_JOURS', '30'))
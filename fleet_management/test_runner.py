@@ -0,0 +1,28 @@
+"""
+Lanceur de tests du projet
+
+Les tests recréent la base à chaque exécution : un cache partagé configuré
+(Redis ou Memcached, voir settings.CACHES) servirait des entrées d'une autre
+exécution. Le lanceur le remplace par un cache mémoire le temps des tests.
+Seul `manage.py test` lit TEST_RUNNER (pytest-django l'ignore) ; le cache
+mémoire par défaut des settings est de toute façon propre à chaque processus.
+"""
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class CacheMemoireTestRunner(DiscoverRunner):
+    """DiscoverRunner avec un cache mémoire (LocMemCache) propre à l'exécution"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_memoire = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'guineegest-tests',
+        }})
+        self._cache_memoire.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_memoire.disable()
+        super().teardown_test_environment(**kwargs)